@@ -0,0 +1,127 @@
+"""
+Benchmark of the commute step on a synthetic London-sized world.
+
+Times finding the commute subgroup of every public transport commuter with the
+per-city lookup (``City.get_commute_subgroup``) and with the precomputed
+``CommuteRoutes`` table. The commuter containers are stored as lists, as they
+are when they come out of an HDF5 file, so the city lookup is a linear scan.
+
+Usage: python benchmarks/benchmark_commute.py --n_people 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from june.demography import Person
+from june.geography import (
+    Area,
+    SuperArea,
+    City,
+    Cities,
+    CityStation,
+    InterCityStation,
+)
+from june.groups.travel import (
+    CommuteRoutes,
+    CityTransport,
+    InterCityTransport,
+    ModeOfTransport,
+)
+
+
+def make_world(n_people, n_super_areas, n_city_stations, n_inter_city_stations):
+    rng = np.random.default_rng(0)
+    super_areas = []
+    for i in range(n_super_areas):
+        coordinates = [51.5 + rng.normal(0, 0.2), rng.normal(0, 0.2)]
+        super_area = SuperArea(name=f"sa_{i}", coordinates=coordinates)
+        area = Area(super_area=super_area, coordinates=coordinates)
+        super_area.areas = [area]
+        super_areas.append(super_area)
+    city = City(name="London", super_area=super_areas[0])
+    for super_area in super_areas:
+        super_area.city = city
+    city_stations = []
+    for i in range(n_city_stations):
+        station = CityStation(city="London", super_area=super_areas[i % n_super_areas])
+        station.city_transports = [CityTransport(station=station) for _ in range(10)]
+        city_stations.append(station)
+    inter_city_stations = []
+    for i in range(n_inter_city_stations):
+        station = InterCityStation(
+            city="London", super_area=super_areas[i % n_super_areas]
+        )
+        station.inter_city_transports = [
+            InterCityTransport(station=station) for _ in range(10)
+        ]
+        inter_city_stations.append(station)
+    city.city_stations = city_stations
+    city.inter_city_stations = inter_city_stations
+    for i, super_area in enumerate(super_areas):
+        super_area.closest_inter_city_station_for_city["London"] = inter_city_stations[
+            i % n_inter_city_stations
+        ]
+    public = ModeOfTransport(description="Underground", is_public=True)
+    people = []
+    internal_ids = []
+    station_ids = [[] for _ in inter_city_stations]
+    for i in range(n_people):
+        person = Person.from_attributes(age=30)
+        home = super_areas[rng.integers(n_super_areas)]
+        home.areas[0].add(person)
+        person.work_super_area = super_areas[0]
+        person.mode_of_transport = public
+        if rng.random() < 0.8:
+            internal_ids.append(person.id)
+        else:
+            station = home.closest_inter_city_station_for_city["London"]
+            station_ids[inter_city_stations.index(station)].append(person.id)
+        people.append(person)
+    # as loaded from hdf5
+    city.internal_commuter_ids = internal_ids
+    for station, ids in zip(inter_city_stations, station_ids):
+        station.commuter_ids = ids
+    return Cities([city], ball_tree=False), people
+
+
+def time_lookup(lookup, people):
+    t1 = time.perf_counter()
+    for person in people:
+        lookup(person)
+    return time.perf_counter() - t1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_people", type=int, default=200_000)
+    parser.add_argument("--n_super_areas", type=int, default=1000)
+    parser.add_argument("--n_city_stations", type=int, default=270)
+    parser.add_argument("--n_inter_city_stations", type=int, default=8)
+    parser.add_argument(
+        "--n_sampled",
+        type=int,
+        default=1000,
+        help="number of commuters timed with the (slow) per-city lookup",
+    )
+    args = parser.parse_args()
+    cities, people = make_world(
+        args.n_people,
+        args.n_super_areas,
+        args.n_city_stations,
+        args.n_inter_city_stations,
+    )
+    city = cities[0]
+    sampled = people[: args.n_sampled]
+    t_city = time_lookup(city.get_commute_subgroup, sampled) / len(sampled)
+    t1 = time.perf_counter()
+    routes = CommuteRoutes.from_cities(cities)
+    t_build = time.perf_counter() - t1
+    t_routes = time_lookup(routes.get_commute_subgroup, people) / len(people)
+    print(f"commuters: {len(routes)}")
+    print(f"city lookup:    {1e6 * t_city:10.2f} us per commuter")
+    print(f"routes lookup:  {1e6 * t_routes:10.2f} us per commuter")
+    print(f"routes build:   {t_build:10.3f} s")
+    print(
+        f"commute step:   {t_city * len(people):10.3f} s -> {t_routes * len(people):.3f} s"
+    )
@@ -0,0 +1,102 @@
+"""
+Benchmark of the memory of forked workers sharing a world.
+
+Builds a synthetic world, forks workers that read the age and household of
+every person, with and without freezing the garbage collector before the
+fork, and reports the unique RSS of each worker: the memory it copied from
+the parent instead of sharing it.
+
+Usage: python benchmarks/benchmark_fork_memory.py --n_people 200000 --n_workers 2
+"""
+import argparse
+import gc
+import multiprocessing
+from time import perf_counter
+
+import numpy as np
+
+from june.demography import Person, Population
+from june.geography import Area, Areas, SuperArea, SuperAreas
+from june.groups import Household, Households
+from june.utils.memory import get_unique_rss
+from june.world import World
+
+# world of the parent, inherited by the forked workers
+world = None
+
+
+def make_world(n_people, people_per_area=500, household_size=4):
+    world = World()
+    n_areas = max(n_people // people_per_area, 1)
+    areas = [
+        Area(name=f"area_{i}", coordinates=[float(i), float(i)]) for i in range(n_areas)
+    ]
+    super_area = SuperArea(areas=areas, name="super_area_0", coordinates=[0.0, 0.0])
+    people, households = Population(), []
+    for i, area in enumerate(areas):
+        area.super_area = super_area
+        for _ in range(people_per_area // household_size):
+            household = Household(area=area)
+            for age in np.random.randint(0, 100, household_size):
+                person = Person.from_attributes(age=int(age), sex="f")
+                person.area = area
+                people.add(person)
+                household.add(person)
+            households.append(household)
+    world.people = people
+    world.areas = Areas(areas, ball_tree=False)
+    world.super_areas = SuperAreas([super_area], ball_tree=False)
+    world.households = Households(households)
+    return world
+
+
+def read_objects(_):
+    mean_ages = [
+        np.mean([person.age for person in household.people])
+        for household in world.households
+    ]
+    gc.collect()
+    return get_unique_rss(), float(np.mean(mean_ages))
+
+
+def run_workers(function, n_workers, freeze):
+    context = multiprocessing.get_context("fork")
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    tick = perf_counter()
+    with context.Pool(n_workers) as pool:
+        results = pool.map(function, range(n_workers), chunksize=1)
+    time = perf_counter() - tick
+    gc.unfreeze()
+    unique_rss = [result[0] for result in results]
+    return unique_rss, results[0][1], time
+
+
+def main():
+    global world
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_people", type=int, default=200000)
+    parser.add_argument("--n_workers", type=int, default=2)
+    args = parser.parse_args()
+    if get_unique_rss() is None:
+        raise SystemExit("unique RSS needs /proc/<pid>/smaps_rollup")
+    world = make_world(args.n_people)
+    print(
+        f"{len(world.people)} people, parent unique RSS "
+        f"{get_unique_rss() / 1e6:.1f} MB"
+    )
+    for name, function, freeze in (
+        ("objects", read_objects, False),
+        ("objects, gc.freeze", read_objects, True),
+    ):
+        unique_rss, mean_age, time = run_workers(function, args.n_workers, freeze)
+        print(
+            f"{name:20s} unique RSS per worker "
+            f"{np.mean(unique_rss) / 1e6:7.1f} MB "
+            f"(mean age {mean_age:.2f}, {time:.2f} s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
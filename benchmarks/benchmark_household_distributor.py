@@ -0,0 +1,100 @@
+"""
+Benchmark of the household distribution on synthetic output areas.
+
+Distributes the people of ``n_areas`` areas of ~300 people to households,
+once with the people pools stored as plain dictionaries of age -> people (the
+closest age is found by scanning the keys) and once with ``PeopleByAge``
+(the closest age is found with bit operations on the mask of ages left).
+
+Usage: python benchmarks/benchmark_household_distributor.py --n_areas 2000
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from june.demography import Person
+from june.distributors import HouseholdDistributor
+from june.distributors.people_by_age import PeopleByAge
+from june.geography import Area
+
+composition_numbers = {
+    "0 0 0 0 1": 12,
+    "0 0 0 1 0": 18,
+    "0 0 0 0 2": 10,
+    "0 0 0 2 0": 20,
+    "1 0 >=0 2 0": 12,
+    ">=2 0 >=0 2 0": 14,
+    "0 0 >=1 2 0": 6,
+    "1 0 >=0 1 0": 5,
+    ">=2 0 >=0 1 0": 4,
+    "0 0 >=1 1 0": 4,
+    "0 0 >=0 >=0 >=0": 3,
+}
+
+
+def make_areas(n_areas, people_per_area, seed=0):
+    rng = np.random.default_rng(seed)
+    # roughly the age pyramid of England
+    age_weights = np.concatenate(
+        [np.full(18, 1.2), np.full(47, 1.3), np.linspace(1.1, 0.05, 35)]
+    )
+    age_weights /= age_weights.sum()
+    areas = []
+    for i in range(n_areas):
+        area = Area(name=f"area_{i}", coordinates=(51.0, 0.0))
+        ages = rng.choice(100, size=people_per_area, p=age_weights)
+        sexes = rng.choice(["m", "f"], size=people_per_area)
+        area.people = [
+            Person.from_attributes(age=int(age), sex=sex)
+            for age, sex in zip(ages, sexes)
+        ]
+        areas.append(area)
+    return areas
+
+
+def make_pools(area, pool_class):
+    men_by_age, women_by_age = pool_class(), pool_class()
+    for person in area.people:
+        pool = men_by_age if person.sex == "m" else women_by_age
+        if pool_class is PeopleByAge:
+            pool.add(person)
+        else:
+            pool[person.age].append(person)
+    return men_by_age, women_by_age
+
+
+def distribute(distributor, areas, pool_class):
+    np.random.seed(0)
+    random.seed(0)
+    n_households = 0
+    t1 = time.perf_counter()
+    for area in areas:
+        for person in area.people:
+            person.subgroups.residence = None
+        men_by_age, women_by_age = make_pools(area, pool_class)
+        households = distributor.distribute_people_to_households(
+            men_by_age, women_by_age, area, composition_numbers, 0, 0
+        )
+        n_households += len(households)
+    return time.perf_counter() - t1, n_households
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_areas", type=int, default=2000)
+    parser.add_argument("--people_per_area", type=int, default=300)
+    args = parser.parse_args()
+    distributor = HouseholdDistributor(
+        first_kid_parent_age_differences={age: 1 / 21 for age in range(20, 41)},
+        second_kid_parent_age_differences={age: 1 / 21 for age in range(22, 43)},
+        couples_age_differences={age: 1 / 11 for age in range(-5, 6)},
+    )
+    areas = make_areas(args.n_areas, args.people_per_area)
+    t_dict, n_dict = distribute(distributor, areas, lambda: defaultdict(list))
+    t_pool, n_pool = distribute(distributor, areas, PeopleByAge)
+    print(f"areas: {len(areas)}, people: {len(areas) * args.people_per_area}")
+    print(f"dict pools:      {t_dict:8.3f} s ({n_dict} households)")
+    print(f"PeopleByAge:     {t_pool:8.3f} s ({n_pool} households)")
@@ -0,0 +1,86 @@
+"""
+Benchmark of the start up time of a JUNE process.
+
+Measures, in fresh interpreters, the time to ``import june`` and
+``import june.simulator`` as reported by ``python -X importtime``, listing the
+slowest modules, and the time of the first call of the numba kernels with
+an empty and with a warm compilation cache.
+
+Usage: python benchmarks/benchmark_import_time.py --repeats 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+kernels_snippet = """
+import time
+import numpy as np
+t1 = time.perf_counter()
+from june.epidemiology.infection.transmission import gamma_pdf, gamma_pdf_vectorized
+from june.epidemiology.infection.transmission_xnexp import xnexp, update_probability
+from june.groups.group.interactive import _get_processed_contact_matrix
+from june.groups.school import _translate_school_subgroup
+from june.groups.leisure.social_venue_distributor import random_choice_numba
+t2 = time.perf_counter()
+gamma_pdf(1.0, 2.0, 0.0, 1.0)
+gamma_pdf_vectorized(np.linspace(0, 5, 10), 2.0, 0.0, 1.0)
+xnexp(1.0, 2.0, 1.0)
+update_probability(2.0, 1.0, 1.0, 1.0, 1.0, 2.0)
+_get_processed_contact_matrix(np.ones((2, 2)), 2.0, np.ones((2, 2)))
+_translate_school_subgroup(1, np.array([3, 4]))
+random_choice_numba(np.arange(3), np.array([0.2, 0.3, 0.5]))
+print(time.perf_counter() - t2)
+"""
+
+
+def run_python(args, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def import_times(module):
+    """
+    Cumulative import time in seconds of every module imported by
+    ``import module``.
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def first_call_time(cache_dir):
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    return float(run_python(["-c", kernels_snippet], env=env).stdout.split()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--n_slowest", type=int, default=10)
+    args = parser.parse_args()
+    for module in ("june", "june.simulator"):
+        runs = [import_times(module) for _ in range(args.repeats)]
+        best = min(runs, key=lambda times: times[module])
+        print(f"import {module}: {best[module]:.3f} s")
+        slowest = sorted(
+            (name for name in best if name != module), key=best.get, reverse=True
+        )[: args.n_slowest]
+        for name in slowest:
+            print(f"    {name:50s} {best[name]:.3f} s")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = first_call_time(cache_dir)
+        warm = min(first_call_time(cache_dir) for _ in range(args.repeats))
+    print(f"numba kernels first call, empty cache: {cold:.3f} s")
+    print(f"numba kernels first call, warm cache:  {warm:.3f} s")
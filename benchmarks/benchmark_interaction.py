@@ -0,0 +1,105 @@
+"""
+Benchmark of the allocations made by the interaction step.
+
+Builds a synthetic population spread over households, companies and schools,
+infects a fraction of it, and runs the interaction over every group, as the
+simulator does in one time step. The step is run twice: allocating new
+buffers for every interactive group (as done before the interaction workspace
+existed), and reusing the workspace of the ``Interaction``. For each, the time,
+the number of garbage collections and the peak traced memory per time step
+are reported.
+
+Usage: python benchmarks/benchmark_interaction.py --n_people 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+from june.demography import Person
+from june.epidemiology.infection import Infection, TransmissionConstant
+from june.geography import Area, SuperArea
+from june.geography.geography import Region
+from june.groups import Household, Company, School
+from june.groups.group.interactive import InteractionWorkspace
+from june.interaction import Interaction
+
+
+def make_groups(n_people, infected_fraction):
+    rng = np.random.default_rng(0)
+    region = Region(name="London")
+    super_area = SuperArea(name="sa", coordinates=[51.5, 0.0], region=region)
+    area = Area(super_area=super_area, coordinates=[51.5, 0.0])
+    households, companies, schools = [], [], []
+    company = school = None
+    household = Household(area=area)
+    for i in range(n_people):
+        person = Person.from_attributes(age=int(rng.integers(0, 90)))
+        if rng.random() < infected_fraction:
+            person.infection = Infection(
+                symptoms=None, transmission=TransmissionConstant(probability=0.2)
+            )
+        if len(household.people) >= rng.integers(1, 6):
+            households.append(household)
+            household = Household(area=area)
+        household.add(person)
+        if 5 <= person.age < 18:
+            if school is None or school.n_pupils >= 500:
+                school = School(age_min=5, age_max=17, area=area)
+                schools.append(school)
+            school.add(person)
+        elif 18 <= person.age < 65:
+            if company is None or company.size >= rng.integers(5, 100):
+                company = Company(super_area=super_area)
+                companies.append(company)
+            company.add(person)
+    households.append(household)
+    return households + companies + schools
+
+
+def time_step(interaction, groups):
+    n_infected = 0
+    for group in groups:
+        infected_ids, _, _ = interaction.time_step_for_group(
+            group=group, delta_time=0.1
+        )
+        n_infected += len(infected_ids)
+    return n_infected
+
+
+def measure(interaction, groups, reuse_workspace, n_steps):
+    # without a workspace, every interactive group allocates its own buffers
+    interaction.workspace = InteractionWorkspace() if reuse_workspace else None
+    time_step(interaction, groups)  # warm up
+    collections = sum(stat["collections"] for stat in gc.get_stats())
+    tracemalloc.start()
+    t1 = time.perf_counter()
+    for _ in range(n_steps):
+        time_step(interaction, groups)
+    elapsed = time.perf_counter() - t1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(stat["collections"] for stat in gc.get_stats()) - collections
+    return elapsed / n_steps, collections / n_steps, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_people", type=int, default=50_000)
+    parser.add_argument("--infected_fraction", type=float, default=0.05)
+    parser.add_argument("--n_steps", type=int, default=3)
+    args = parser.parse_args()
+    groups = make_groups(args.n_people, args.infected_fraction)
+    interaction = Interaction.from_file()
+    print(f"groups: {len(groups)}")
+    for label, reuse_workspace in (("new buffers", False), ("workspace", True)):
+        step_time, collections, peak = measure(
+            interaction, groups, reuse_workspace, args.n_steps
+        )
+        print(
+            f"{label:12s} {step_time:8.3f} s per step, "
+            f"{collections:8.1f} gc collections per step, "
+            f"peak traced memory {peak / 1e6:8.2f} MB"
+        )
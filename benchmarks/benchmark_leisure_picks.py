@@ -0,0 +1,93 @@
+"""
+Benchmark of picking leisure venues for the people of synthetic areas.
+
+Each time step a fraction of the residents of every area looks for a pub,
+in the order of the population, as the activity manager goes through them.
+Times picking them one person at a time with a random index into
+``area.social_venues`` and with the venues drawn for every area at the start
+of the time step (``SocialVenueDistributor.draw_area_venues``), including
+the draw.
+
+Usage: python benchmarks/benchmark_leisure_picks.py --n_areas 2000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from june.demography import Person
+from june.geography import Area
+from june.groups.leisure import Pubs, PubDistributor
+
+
+def make_areas(n_areas, people_per_area, venues_per_area):
+    coordinates = np.random.random((n_areas * venues_per_area, 2))
+    pubs = Pubs.from_coordinates(coordinates, super_areas=None)
+    areas, people = [], []
+    for i in range(n_areas):
+        area = Area(coordinates=coordinates[i])
+        area.social_venues["pub"] = tuple(
+            pubs[i * venues_per_area : (i + 1) * venues_per_area]
+        )
+        for _ in range(people_per_area):
+            person = Person.from_attributes()
+            person.area = area
+            area.people.append(person)
+            people.append(person)
+        areas.append(area)
+    return pubs, areas, people
+
+
+def per_person(distributor, leisure_goers):
+    # what get_leisure_group did before the venues were drawn per time step
+    for person in leisure_goers:
+        candidates = person.area.social_venues[distributor.spec]
+        n_candidates = len(candidates)
+        if n_candidates == 0:
+            continue
+        elif n_candidates == 1:
+            candidates[0]
+        else:
+            candidates[random.randint(0, n_candidates - 1)]
+
+
+def drawn_per_time_step(distributor, leisure_goers):
+    distributor.draw_area_venues()
+    for person in leisure_goers:
+        distributor.get_leisure_group(person)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_areas", type=int, default=2000)
+    parser.add_argument("--people_per_area", type=int, default=300)
+    parser.add_argument("--venues_per_area", type=int, default=5)
+    parser.add_argument("--leisure_fraction", type=float, default=0.3)
+    parser.add_argument("--n_timesteps", type=int, default=5)
+    args = parser.parse_args()
+    pubs, areas, people = make_areas(
+        args.n_areas, args.people_per_area, args.venues_per_area
+    )
+    distributor = PubDistributor.from_config(pubs)
+    distributor.set_area_candidates(areas)
+    n_leisure_goers = int(args.leisure_fraction * len(people))
+    print(f"{len(people)} people, {n_leisure_goers} leisure goers per time step")
+    for name, function in (
+        ("per person", per_person),
+        ("drawn per time step", drawn_per_time_step),
+    ):
+        elapsed = 0.0
+        for _ in range(args.n_timesteps):
+            leisure_goers = [
+                people[i]
+                for i in sorted(random.sample(range(len(people)), n_leisure_goers))
+            ]
+            tick = time.perf_counter()
+            function(distributor, leisure_goers)
+            elapsed += time.perf_counter() - tick
+        print(f"{name:20s} {elapsed / args.n_timesteps:.3f} s per time step")
+
+
+if __name__ == "__main__":
+    main()
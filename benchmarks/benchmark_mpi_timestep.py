@@ -0,0 +1,138 @@
+"""
+Benchmark of the MPI communication of a time step on synthetic domains.
+
+Every rank sends ``n_people`` visitors to every other rank and does some
+local work standing for the moving of people, the interaction and the
+health update, ``rank_imbalance`` times more on each rank than on the
+previous one. The time steps are run once as they used to be, in phases
+separated by barriers with blocking exchanges, and once overlapping the
+exchange of the visitors with the interaction of the groups without visitors,
+and the exchange of the infections, packed in a single ``Ialltoallv``, with
+the health update, as ``Simulator.do_timestep`` does now. Each way is run
+``--repeats`` times, alternating, and the fastest run is reported.
+
+Usage: mpirun -n 4 python benchmarks/benchmark_mpi_timestep.py --n_people 20000
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from june.demography import Person
+from june.mpi_setup import (
+    MovablePeople,
+    MovablePeopleExchange,
+    move_info,
+    start_move_info,
+    mpi_comm,
+    mpi_rank,
+    mpi_size,
+)
+
+
+def make_movable_people(n_people, n_groups):
+    movable_people = MovablePeople()
+    for rank in range(mpi_size):
+        if rank == mpi_rank:
+            continue
+        for i in range(n_people):
+            external_subgroup = SimpleNamespace(
+                domain_id=rank,
+                spec="company",
+                group_id=i % n_groups,
+                subgroup_type=0,
+            )
+            movable_people.add_person(Person.from_attributes(age=30), external_subgroup)
+    return movable_people
+
+
+def work(n_units):
+    values = np.random.random(20000)
+    for _ in range(n_units):
+        np.sort(values)
+
+
+def infections_to_send(n_infections, n_fields=1):
+    return [
+        np.zeros((n_infections if rank != mpi_rank else 0, n_fields), dtype=np.uint32)
+        for rank in range(mpi_size)
+    ]
+
+
+def blocking_exchange(movable_people):
+    reqs = []
+    for rank in range(mpi_size):
+        if rank == mpi_rank:
+            continue
+        keys, data, _ = movable_people.serialise(rank)
+        reqs.append(mpi_comm.isend(keys, dest=rank, tag=100))
+        reqs.append(mpi_comm.isend(data, dest=rank, tag=200))
+    for rank in range(mpi_size):
+        if rank == mpi_rank:
+            continue
+        keys = mpi_comm.recv(source=rank, tag=100)
+        data = mpi_comm.recv(source=rank, tag=200)
+        movable_people.update(rank, keys, data)
+    for req in reqs:
+        req.wait()
+
+
+def phased_timestep(movable_people, work_units, args):
+    work(work_units)  # move people
+    mpi_comm.Barrier()
+    blocking_exchange(movable_people)
+    work(work_units)  # interaction in groups without visitors
+    work(work_units // 4)  # interaction in groups with visitors
+    mpi_comm.Barrier()
+    mpi_comm.Barrier()
+    infections = infections_to_send(args.n_infections)
+    move_info(infections)
+    move_info(infections)
+    work(work_units)  # health update
+    mpi_comm.Barrier()
+
+
+def overlapped_timestep(movable_people, work_units, args):
+    work(work_units)  # move people
+    exchange = MovablePeopleExchange(movable_people)
+    for _ in range(4):
+        work(work_units // 4)  # interaction in groups without visitors
+        exchange.progress()
+    exchange.finish()
+    work(work_units // 4)  # interaction in groups with visitors
+    request = start_move_info(infections_to_send(args.n_infections, n_fields=2))[0]
+    work(work_units)  # health update
+    request.Wait()
+
+
+def run(timestep, args):
+    movable_people = make_movable_people(args.n_people, args.n_groups)
+    work_units = int(args.work_units * (1 + args.rank_imbalance * mpi_rank))
+    mpi_comm.Barrier()
+    t1 = time.perf_counter()
+    for _ in range(args.n_timesteps):
+        movable_people.skinny_in = {}
+        timestep(movable_people, work_units, args)
+    elapsed = time.perf_counter() - t1
+    return max(mpi_comm.allgather(elapsed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_people", type=int, default=20000)
+    parser.add_argument("--n_groups", type=int, default=500)
+    parser.add_argument("--n_infections", type=int, default=1000)
+    parser.add_argument("--n_timesteps", type=int, default=10)
+    parser.add_argument("--work_units", type=int, default=100)
+    parser.add_argument("--rank_imbalance", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    t_phased, t_overlapped = float("inf"), float("inf")
+    for _ in range(args.repeats):
+        t_phased = min(t_phased, run(phased_timestep, args))
+        t_overlapped = min(t_overlapped, run(overlapped_timestep, args))
+    if mpi_rank == 0:
+        print(f"ranks: {mpi_size}, visitors per rank pair: {args.n_people}")
+        print(f"phased:     {t_phased:8.3f} s")
+        print(f"overlapped: {t_overlapped:8.3f} s")
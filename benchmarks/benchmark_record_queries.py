@@ -0,0 +1,124 @@
+"""
+Benchmark of event queries on a synthetic record with and without indexes.
+
+Writes a record with ``n_events`` infections and deaths spread over a year,
+a few regions and location specs, makes a copy with completely sorted indexes
+built by ``index_record_tables``, and times the ``RecordReader`` query methods
+on both files.
+
+Usage: python benchmarks/benchmark_record_queries.py --n_events 1000000
+"""
+import argparse
+import datetime
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import tables
+
+from june.records import RecordReader
+from june.records.event_records_writer import InfectionRecord, DeathsRecord
+from june.records.records_writer import index_record_tables
+
+regions = [
+    "London",
+    "South East",
+    "South West",
+    "East of England",
+    "West Midlands",
+    "East Midlands",
+    "Yorkshire and The Humber",
+    "North West",
+    "North East",
+]
+location_specs = ["household", "school", "company", "care_home", "hospital", "pub"]
+
+
+def write_record(path, n_events, n_days, n_people, n_hospitals):
+    rng = np.random.default_rng(0)
+    filename = path / "june_record.h5"
+    infections = InfectionRecord(filename)
+    deaths = DeathsRecord(filename)
+    events_per_day = n_events // n_days
+    start = datetime.datetime(2020, 3, 1)
+    with tables.open_file(filename, mode="a") as f:
+        for day in range(n_days):
+            infections.location_specs = list(rng.choice(location_specs, events_per_day))
+            infections.location_ids = list(rng.integers(0, 10_000, events_per_day))
+            infections.region_names = list(rng.choice(regions, events_per_day))
+            infections.infector_ids = list(rng.integers(0, n_people, events_per_day))
+            infections.infected_ids = list(rng.integers(0, n_people, events_per_day))
+            infections.infection_ids = [0] * events_per_day
+            infections.record(f, timestamp=start + datetime.timedelta(days=day))
+            n_deaths = events_per_day // 10
+            deaths.location_specs = list(
+                rng.choice(["hospital", "household", "care_home"], n_deaths)
+            )
+            deaths.location_ids = list(rng.integers(0, n_hospitals, n_deaths))
+            deaths.dead_person_ids = list(rng.integers(0, n_people, n_deaths))
+            deaths.record(f, timestamp=start + datetime.timedelta(days=day))
+    return filename
+
+
+def time_query(query, repeats, **kwargs):
+    t1 = time.perf_counter()
+    for _ in range(repeats):
+        df = query(**kwargs)
+    return (time.perf_counter() - t1) / repeats, len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_events", type=int, default=1_000_000)
+    parser.add_argument("--n_days", type=int, default=365)
+    parser.add_argument("--n_people", type=int, default=10_000_000)
+    parser.add_argument("--n_hospitals", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = Path(tmp) / "plain"
+        indexed_path = Path(tmp) / "indexed"
+        plain_path.mkdir()
+        indexed_path.mkdir()
+        t1 = time.perf_counter()
+        filename = write_record(
+            plain_path, args.n_events, args.n_days, args.n_people, args.n_hospitals
+        )
+        print(f"write record:  {time.perf_counter() - t1:8.3f} s")
+        shutil.copy(filename, indexed_path)
+        t1 = time.perf_counter()
+        index_record_tables(indexed_path / filename.name)
+        print(f"build indexes: {time.perf_counter() - t1:8.3f} s")
+        plain = RecordReader(plain_path)
+        indexed = RecordReader(indexed_path)
+        queries = {
+            "infections in region, 2 weeks": (
+                "query_infections",
+                {
+                    "start_date": "2020-06-01",
+                    "end_date": "2020-06-14",
+                    "region_names": "North East",
+                },
+            ),
+            "school infections, 1 day": (
+                "query_infections",
+                {
+                    "start_date": "2020-09-10",
+                    "end_date": "2020-09-10",
+                    "location_specs": "school",
+                },
+            ),
+            "deaths at hospital": (
+                "query_deaths",
+                {"location_specs": "hospital", "location_ids": 17},
+            ),
+        }
+        for name, (method, kwargs) in queries.items():
+            t_plain, n_rows = time_query(getattr(plain, method), args.repeats, **kwargs)
+            t_indexed, _ = time_query(getattr(indexed, method), args.repeats, **kwargs)
+            print(
+                f"{name:32s} {n_rows:8d} rows: {1e3 * t_plain:9.2f} ms -> "
+                f"{1e3 * t_indexed:9.2f} ms indexed"
+            )
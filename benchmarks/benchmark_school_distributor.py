@@ -0,0 +1,132 @@
+"""
+Benchmark of the distribution of kids to schools on synthetic areas.
+
+Distributes the kids of ``n_areas`` areas of ~300 people to ``n_schools``
+schools, once one area and one kid at a time (checking the capacity of each
+candidate school, as the distributor used to do) and once with the batched
+``SchoolDistributor.distribute_kids_to_school``, and reports the throughput.
+
+Usage: python benchmarks/benchmark_school_distributor.py --n_areas 2000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from june.demography import Person
+from june.distributors import SchoolDistributor
+from june.geography import Area
+from june.groups import School, Schools
+
+
+def make_schools(n_schools, n_pupils_max, seed=0):
+    rng = np.random.default_rng(seed)
+    is_primary = rng.random(n_schools) < 0.8
+    school_df = pd.DataFrame(
+        {
+            "latitude": rng.uniform(51, 53, n_schools),
+            "longitude": rng.uniform(-2, 0, n_schools),
+            "age_min": np.where(is_primary, 4, 11),
+            "age_max": np.where(is_primary, 11, 18),
+        }
+    )
+    schools = [
+        School(
+            coordinates=(latitude, longitude),
+            n_pupils_max=n_pupils_max,
+            age_min=int(age_min),
+            age_max=int(age_max),
+        )
+        for latitude, longitude, age_min, age_max in school_df.values
+    ]
+    school_trees, agegroup_to_global_indices = Schools.init_trees(school_df, (0, 19))
+    return Schools(
+        schools,
+        school_trees=school_trees,
+        agegroup_to_global_indices=agegroup_to_global_indices,
+    )
+
+
+def make_areas(n_areas, people_per_area, seed=0):
+    rng = np.random.default_rng(seed)
+    areas = []
+    for i in range(n_areas):
+        area = Area(
+            name=f"area_{i}", coordinates=(rng.uniform(51, 53), rng.uniform(-2, 0))
+        )
+        area.people = [
+            Person.from_attributes(age=int(age))
+            for age in rng.integers(0, 90, people_per_area)
+        ]
+        areas.append(area)
+    return areas
+
+
+def distribute_per_area(school_distributor, areas):
+    schools = school_distributor.schools
+    coordinates = np.array([area.coordinates for area in areas])
+    closest_schools_idx_by_age = {
+        age: schools.school_agegroup_to_global_indices[age][
+            schools.get_closest_schools_idx(
+                age, coordinates, school_distributor.neighbour_schools
+            )
+        ]
+        for age in schools.school_trees
+    }
+    for i, area in enumerate(areas):
+        closest_schools_by_age = {}
+        is_school_full = {}
+        for age, closest_schools_idx in closest_schools_idx_by_age.items():
+            closest_schools_by_age[age] = [
+                schools.members[idx] for idx in closest_schools_idx[i]
+            ]
+            is_school_full[age] = False
+        school_distributor.distribute_mandatory_kids_to_school(
+            area, is_school_full, closest_schools_by_age
+        )
+        school_distributor.distribute_non_mandatory_kids_to_school(
+            area, is_school_full, closest_schools_by_age
+        )
+
+
+def run(distribute, args):
+    np.random.seed(0)
+    schools = make_schools(args.n_schools, args.n_pupils_max)
+    areas = make_areas(args.n_areas, args.people_per_area)
+    school_distributor = SchoolDistributor(schools)
+    t1 = time.perf_counter()
+    distribute(school_distributor, areas)
+    elapsed = time.perf_counter() - t1
+    return elapsed, np.array([school.n_pupils for school in schools])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n_areas", type=int, default=2000)
+    parser.add_argument("--people_per_area", type=int, default=300)
+    parser.add_argument("--n_schools", type=int, default=200)
+    parser.add_argument("--n_pupils_max", type=int, default=500)
+    args = parser.parse_args()
+    t_area, pupils_area = run(distribute_per_area, args)
+    t_batch, pupils_batch = run(
+        lambda distributor, areas: distributor.distribute_kids_to_school(areas), args
+    )
+    print(f"areas: {args.n_areas}, people: {args.n_areas * args.people_per_area}")
+    for name, elapsed, pupils in (
+        ("per area", t_area, pupils_area),
+        ("batched", t_batch, pupils_batch),
+    ):
+        n_pupils = pupils.sum()
+        print(
+            f"{name + ':':9s} {elapsed:8.3f} s, {n_pupils} pupils, "
+            f"{n_pupils / elapsed:9.0f} kids/s, "
+            f"{(pupils >= args.n_pupils_max).sum()} full schools"
+        )
+    # both distributions should fill the same schools up to the random
+    # placement of the kids that find all their candidates full
+    print(
+        f"pupils per school: mean absolute difference "
+        f"{np.abs(pupils_area - pupils_batch).mean():.2f}, "
+        f"correlation {np.corrcoef(pupils_area, pupils_batch)[0, 1]:.4f}"
+    )
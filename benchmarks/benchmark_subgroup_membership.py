@@ -0,0 +1,75 @@
+"""
+Benchmark of the membership operations of subgroups.
+
+Fills subgroups of the sizes of typical venues (households, classes,
+companies, care homes, hospitals, stations) and times appending everyone,
+checking whether people are in the subgroup and removing half of them,
+with ``Subgroup`` and with a plain list of people as reference.
+
+Usage: python benchmarks/benchmark_subgroup_membership.py --sizes 4 30 300 3000
+"""
+import argparse
+import random
+from time import perf_counter
+
+from june.demography import Person
+from june.groups import Household
+
+
+def time_list(people, to_check, to_remove):
+    tick = perf_counter()
+    members = []
+    for person in people:
+        members.append(person)
+    tock_append = perf_counter()
+    for person in to_check:
+        person in members
+    tock_contains = perf_counter()
+    for person in to_remove:
+        members.remove(person)
+    tock_remove = perf_counter()
+    return tock_append - tick, tock_contains - tock_append, tock_remove - tock_contains
+
+
+def time_subgroup(people, to_check, to_remove):
+    household = Household()
+    subgroup = household[household.SubgroupType.adults]
+    tick = perf_counter()
+    for person in people:
+        subgroup.append(person)
+    tock_append = perf_counter()
+    for person in to_check:
+        person in subgroup
+    tock_contains = perf_counter()
+    for person in to_remove:
+        subgroup.remove(person)
+    tock_remove = perf_counter()
+    return tock_append - tick, tock_contains - tock_append, tock_remove - tock_contains
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 30, 300, 3000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'size':>6s} {'':8s} {'append':>10s} {'contains':>10s} {'remove':>10s}")
+    for size in args.sizes:
+        people = [Person.from_attributes() for _ in range(size)]
+        to_check = random.sample(people, size)
+        to_remove = random.sample(people, size // 2 or 1)
+        for name, function in (("list", time_list), ("subgroup", time_subgroup)):
+            times = min(
+                (function(people, to_check, to_remove) for _ in range(args.repeats)),
+                key=sum,
+            )
+            # microseconds per operation
+            print(
+                f"{size:6d} {name:8s} "
+                f"{1e6 * times[0] / size:10.3f} "
+                f"{1e6 * times[1] / len(to_check):10.3f} "
+                f"{1e6 * times[2] / len(to_remove):10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@ import numba as nb
 import random
 import json
 from pathlib import Path
-from mpi4py import MPI
 import h5py
 import sys
 import cProfile
@@ -39,7 +38,7 @@ from june.event import Events
 from june import paths
 from june.records import Record
 from june.records.records_writer import combine_records
-from june.domains import Domain, DomainSplitter
+from june.domains import Domain, DomainSplitter, SuperAreaCostProfile
 from june.mpi_setup import mpi_comm, mpi_rank, mpi_size
 
 from june.tracker.tracker import Tracker
@@ -230,6 +229,12 @@ parser.add_argument(
     required=False,
     default=10,
 )
+parser.add_argument(
+    "--cost_profile",
+    help="Super area costs saved by a previous run, to balance the domains on",
+    required=False,
+    default=None,
+)
 
 args = parser.parse_args()
 args.save_path = Path(args.save_path)
@@ -351,7 +356,9 @@ def generate_simulator():
                 name.decode(): id for name, id in zip(super_area_names, super_area_ids)
             }
         super_areas_per_domain, score_per_domain = DomainSplitter.generate_world_split(
-            number_of_domains=mpi_size, world_path=args.world_path
+            number_of_domains=mpi_size,
+            world_path=args.world_path,
+            cost_profile=args.cost_profile,
         )
         super_area_names_to_domain_dict = {}
         super_area_ids_to_domain_dict = {}
@@ -554,6 +561,9 @@ def generate_simulator():
         config_filename=CONFIG_PATH,
         record=record,
         tracker=tracker,
+        cost_profile=SuperAreaCostProfile(
+            save_path=args.save_path / "super_area_costs.csv"
+        ),
     )
     return simulator
 
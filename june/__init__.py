@@ -1,3 +1,4 @@
+import importlib
 import logging.config
 import os
 
@@ -5,11 +6,6 @@ import yaml
 
 from june import paths
 from . import demography
-from . import distributors
-from . import groups
-from . import interaction
-from . import simulator
-from . import activity
 from .demography import Person
 from .exc import GroupException
 from .time import Timer
@@ -25,3 +21,22 @@ else:
     print("The logging config file does not exist.")
     log_file = os.path.join("./", "world_creation.log")
     logging.basicConfig(filename=log_file, level=logging.DEBUG)
+
+# the heavier subpackages are imported the first time they are accessed,
+# so that ``import june`` stays fast on every MPI rank
+_lazy_submodules = (
+    "activity",
+    "data_formatting",
+    "distributors",
+    "groups",
+    "hdf5_savers",
+    "interaction",
+    "simulator",
+    "tracker",
+)
+
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
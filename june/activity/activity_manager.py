@@ -4,14 +4,13 @@ from datetime import datetime
 from itertools import chain
 from typing import List, Optional
 from time import perf_counter
-from time import time as wall_clock
 
 from june.demography import Person
 from june.exc import SimulatorError
 from june.groups import Subgroup
 from june.groups.leisure import Leisure
 from june.groups.travel import Travel
-from june.mpi_setup import mpi_comm, mpi_size, mpi_rank, MovablePeople
+from june.mpi_setup import mpi_size, mpi_rank, MovablePeople, MovablePeopleExchange
 from june.records import Record
 
 logger = logging.getLogger("activity_manager")
@@ -50,6 +49,8 @@ class ActivityManager:
         self.timer = timer
         self.leisure = leisure
         self.travel = travel
+        if self.travel is not None and self.travel.commute_routes is None:
+            self.travel.build_commute_routes(world)
         self.all_activities = all_activities
 
         self.activity_to_super_group_dict = {
@@ -183,6 +184,26 @@ class ActivityManager:
         return getattr(person, activity)
 
     def do_timestep(self, record=None):
+        exchange = self.start_timestep(record=record)
+        (
+            people_from_abroad,
+            n_people_from_abroad,
+            n_people_going_abroad,
+        ) = self.finish_people_exchange(exchange)
+        return (
+            people_from_abroad,
+            n_people_from_abroad,
+            n_people_going_abroad,
+            exchange.movable_people,
+        )
+
+    def start_timestep(self, record=None) -> MovablePeopleExchange:
+        """
+        Moves people to their active subgroups and starts sending the people
+        going abroad to their domains. The exchange has to be finished with
+        ``finish_people_exchange`` before running the interaction of the
+        groups that have visitors from abroad.
+        """
         # get time data
         tick_interaction_timestep = perf_counter()
         date = self.timer.date
@@ -209,23 +230,7 @@ class ActivityManager:
         rank_logger.info(
             f"Rank {mpi_rank} -- move_people -- {tock_interaction_timestep-tick_interaction_timestep}"
         )
-        tick_waiting = perf_counter()
-        mpi_comm.Barrier()
-        tock_waiting = perf_counter()
-        rank_logger.info(
-            f"Rank {mpi_rank} -- move_people_waiting -- {tock_waiting-tick_waiting}"
-        )
-        (
-            people_from_abroad,
-            n_people_from_abroad,
-            n_people_going_abroad,
-        ) = self.send_and_receive_people_from_abroad(to_send_abroad)
-        return (
-            people_from_abroad,
-            n_people_from_abroad,
-            n_people_going_abroad,
-            to_send_abroad,
-        )
+        return self.start_people_exchange(to_send_abroad)
 
     def move_people_to_active_subgroups(
         self,
@@ -246,17 +251,19 @@ class ActivityManager:
         active_individual_policies = self.policies.individual_policies.get_active(
             date=date
         )
-        to_send_abroad = MovablePeople()
-        counter = 0
-        for person in self.world.people:
-            counter += 1
+        compiled_individual_policies = self.policies.individual_policies.compile(
+            active_policies=active_individual_policies,
+            people=self.world.people,
+            activities=activities,
+            days_from_start=days_from_start,
+        )
+        # in a single process nobody goes abroad
+        to_send_abroad = MovablePeople() if mpi_size > 1 else None
+        for index, person in enumerate(self.world.people):
             if person.dead or person.busy:
                 continue
-            allowed_activities = self.policies.individual_policies.apply(
-                active_policies=active_individual_policies,
-                person=person,
-                activities=activities,
-                days_from_start=days_from_start,
+            allowed_activities = compiled_individual_policies.apply(
+                person=person, index=index
             )
             external_subgroup = self.move_to_active_subgroup(
                 allowed_activities, person, to_send_abroad
@@ -310,43 +317,21 @@ class ActivityManager:
         """
         Deal with the MPI comms.
         """
-        n_people_going_abroad = 0
-        n_people_from_abroad = 0
-        tick, tickw = perf_counter(), wall_clock()
-        reqs = []
-
-        for rank in range(mpi_size):
-
-            if mpi_rank == rank:
-                continue
-            keys, data, n_this_rank = movable_people.serialise(rank)
-            if n_this_rank:
-                reqs.append(mpi_comm.isend(keys, dest=rank, tag=100))
-                reqs.append(mpi_comm.isend(data, dest=rank, tag=200))
-                n_people_going_abroad += n_this_rank
-            else:
-                reqs.append(mpi_comm.isend(None, dest=rank, tag=100))
-                reqs.append(mpi_comm.isend(None, dest=rank, tag=200))
+        return self.finish_people_exchange(self.start_people_exchange(movable_people))
 
-        # now it has all been sent, we can start the receiving.
+    def start_people_exchange(self, movable_people) -> MovablePeopleExchange:
+        return MovablePeopleExchange(movable_people)
 
-        for rank in range(mpi_size):
-
-            if rank == mpi_rank:
-                continue
-            keys = mpi_comm.recv(source=rank, tag=100)
-            data = mpi_comm.recv(source=rank, tag=200)
-
-            if keys is not None:
-                movable_people.update(rank, keys, data)
-                n_people_from_abroad += data.shape[0]
-
-        for r in reqs:
-            r.wait()
-
-        tock, tockw = perf_counter(), wall_clock()
+    def finish_people_exchange(self, exchange: MovablePeopleExchange):
+        (
+            people_from_abroad,
+            n_people_from_abroad,
+            n_people_going_abroad,
+        ) = exchange.finish()
+        # time spent in the exchange, not counting the computation overlapped with it
+        comms_time = exchange.comms_time
         logger.info(
-            f"CMS: People COMS for rank {mpi_rank}/{mpi_size} - {tock - tick},{tockw - tickw} - {self.timer.date}"
+            f"CMS: People COMS for rank {mpi_rank}/{mpi_size} - {comms_time} - {self.timer.date}"
         )
-        mpi_logger.info(f"{self.timer.date},{mpi_rank},people_comms,{tock-tick}")
-        return movable_people.skinny_in, n_people_from_abroad, n_people_going_abroad
+        mpi_logger.info(f"{self.timer.date},{mpi_rank},people_comms,{comms_time}")
+        return people_from_abroad, n_people_from_abroad, n_people_going_abroad
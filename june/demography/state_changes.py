@@ -0,0 +1,29 @@
+"""
+Keeps the ids of the people whose infection, immunity, vaccination,
+hospitalisation or death changed, so that a world can be reset by only
+visiting them. Nothing is kept until ``track_state_changes`` is called.
+"""
+from typing import Optional, Set
+
+_changed_ids: Optional[Set[int]] = None
+
+
+def track_state_changes() -> Set[int]:
+    """
+    Starts keeping the ids of the people whose state changes, and returns
+    the set they are added to.
+    """
+    global _changed_ids
+    if _changed_ids is None:
+        _changed_ids = set()
+    return _changed_ids
+
+
+def stop_tracking_state_changes():
+    global _changed_ids
+    _changed_ids = None
+
+
+def mark_state_changed(person):
+    if _changed_ids is not None:
+        _changed_ids.add(person.id)
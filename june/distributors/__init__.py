@@ -1,7 +1,7 @@
 from .worker_distributor import WorkerDistributor, load_sex_per_sector, load_workflow_df
 from .care_home_distributor import CareHomeDistributor
 from .company_distributor import CompanyDistributor
-from .household_distributor_v2 import HouseholdDistributor
+from .household_distributor import HouseholdDistributor
 from .hospital_distributor import HospitalDistributor
 from .school_distributor import SchoolDistributor
 from .university_distributor import UniversityDistributor
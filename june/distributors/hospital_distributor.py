@@ -166,7 +166,13 @@ class HospitalDistributor:
     def assign_closest_hospitals_to_super_areas(self, super_areas):
         if not self.hospitals.members:
             return
-        for super_area in super_areas:
-            super_area.closest_hospitals = self.hospitals.get_closest_hospitals(
-                super_area.coordinates, self.hospitals.neighbour_hospitals
-            )
+        super_areas = list(super_areas)
+        if not super_areas:
+            return
+        coordinates = np.array([super_area.coordinates for super_area in super_areas])
+        closest_hospitals_idx = self.hospitals.get_closest_hospitals_idx(
+            coordinates, self.hospitals.neighbour_hospitals
+        )
+        hospitals = self.hospitals.members
+        for super_area, hospitals_idx in zip(super_areas, closest_hospitals_idx):
+            super_area.closest_hospitals = [hospitals[idx] for idx in hospitals_idx]
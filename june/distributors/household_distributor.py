@@ -1,5 +1,4 @@
 from collections import OrderedDict
-from collections import defaultdict
 from typing import List
 import logging
 
@@ -13,6 +12,7 @@ from june import paths
 from june.demography import Person
 from june.geography import Area
 from june.groups import Household, Households
+from june.distributors.people_by_age import PeopleByAge
 from test_june.unit.groups.test_carehomes import default_config_file
 
 logger = logging.getLogger("household_distributor")
@@ -61,6 +61,22 @@ def get_closest_element_in_array(array, value):
     return array[min_idx]
 
 
+def get_closest_age(people_by_age, age, min_age=0, max_age=100):
+    """
+    Closest age to ``age`` within [min_age, max_age] that has people in the
+    people_by_age dictionary, or None if there are none.
+    """
+    if isinstance(people_by_age, PeopleByAge):
+        return people_by_age.closest_age(age, min_age=min_age, max_age=max_age)
+    compatible_ages = np.array(list(people_by_age.keys()))
+    compatible_ages = compatible_ages[
+        (min_age <= compatible_ages) & (compatible_ages <= max_age)
+    ]
+    if not compatible_ages.size:
+        return
+    return get_closest_element_in_array(compatible_ages, age)
+
+
 def count_items_in_dict(dictionary):
     counter = 0
     for age in dictionary:
@@ -198,16 +214,16 @@ class HouseholdDistributor:
         """
         Creates dictionaries with the men and women per age key living in the area.
         """
-        men_by_age = defaultdict(list)
-        women_by_age = defaultdict(list)
+        men_by_age = PeopleByAge()
+        women_by_age = PeopleByAge()
         for person in area.people:
             if person.residence is not None:
                 continue
             try:
                 if person.sex == 'm':
-                    men_by_age[person.age].append(person)
+                    men_by_age.add(person)
                 elif person.sex == 'f':
-                    women_by_age[person.age].append(person)
+                    women_by_age.add(person)
                 else:
                     raise KeyError
             except KeyError:
@@ -712,12 +728,13 @@ class HouseholdDistributor:
             area:
                 the area to check.
         """
-        ret = False
-        for age in range(65, 100):
-            if age in women_by_age or age in men_by_age:
-                ret = True
-                break
-        return ret
+        for people_by_age in (women_by_age, men_by_age):
+            if isinstance(people_by_age, PeopleByAge):
+                if people_by_age.has_ages_between(65, 99):
+                    return True
+            elif any(age in people_by_age for age in range(65, 100)):
+                return True
+        return False
 
     def _get_closest_person_of_age(
         self, first_dict: dict, second_dict: dict, age: int, min_age=0, max_age=100
@@ -742,19 +759,12 @@ class HouseholdDistributor:
         if age < min_age or age > max_age:
             return
 
-        compatible_ages = np.array(list(first_dict.keys()))
-        compatible_ages = compatible_ages[
-            (min_age <= compatible_ages) & (compatible_ages <= max_age)
-        ]
-        if not compatible_ages.size:
-            compatible_ages = np.array(list(second_dict.keys()))
-            compatible_ages = compatible_ages[
-                (min_age <= compatible_ages) & (compatible_ages <= max_age)
-            ]
-            if not compatible_ages.size:
+        closest_age = get_closest_age(first_dict, age, min_age, max_age)
+        if closest_age is None:
+            closest_age = get_closest_age(second_dict, age, min_age, max_age)
+            if closest_age is None:
                 return
             first_dict = second_dict
-        closest_age = get_closest_element_in_array(compatible_ages, age)
         person = first_dict[closest_age].pop()
         self._check_if_age_dict_is_empty(first_dict, closest_age)
         return person
@@ -892,18 +902,14 @@ class HouseholdDistributor:
             closest_male = np.inf
         else:
             closest_male = (
-                get_closest_element_in_array(
-                    np.array(list(men_by_age.keys())), target_age
-                )
+                get_closest_age(men_by_age, target_age, min_age=0, max_age=np.inf)
                 - target_age
             )
         if not women_by_age:
             closest_female = np.inf
         else:
             closest_female = (
-                get_closest_element_in_array(
-                    np.array(list(women_by_age.keys())), target_age
-                )
+                get_closest_age(women_by_age, target_age, min_age=0, max_age=np.inf)
                 - target_age
             )
         if closest_male < closest_female:
@@ -0,0 +1,123 @@
+from typing import Optional
+
+from june.demography import Person
+
+
+class PeopleByAge(dict):
+    """
+    People left to allocate, stored as a dictionary with ages as keys and lists
+    of people of that age as values, as the distributors expect.
+
+    On top of the dictionary, the set of ages with people left is kept as a bit
+    mask (bit ``age`` is set if there are people of that age), so the closest
+    age with people left within an age bracket is found with a couple of
+    bit operations on a ~100 bit integer instead of scanning all the ages.
+    Keys must be deleted when their list becomes empty, as the distributors do.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._set_ages_mask()
+
+    def _set_ages_mask(self):
+        self.ages_mask = 0
+        for age in self.keys():
+            self.ages_mask |= 1 << int(age)
+
+    def __setitem__(self, age: int, people: list):
+        super().__setitem__(age, people)
+        self.ages_mask |= 1 << int(age)
+
+    def __delitem__(self, age: int):
+        super().__delitem__(age)
+        self.ages_mask &= ~(1 << int(age))
+
+    def pop(self, age: int, *default):
+        if age in self:
+            self.ages_mask &= ~(1 << int(age))
+        return super().pop(age, *default)
+
+    def popitem(self):
+        age, people = super().popitem()
+        self.ages_mask &= ~(1 << int(age))
+        return age, people
+
+    def setdefault(self, age: int, default: list = None):
+        self.ages_mask |= 1 << int(age)
+        return super().setdefault(age, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._set_ages_mask()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.ages_mask = 0
+
+    def add(self, person: Person):
+        if person.age in self:
+            self[person.age].append(person)
+        else:
+            self[person.age] = [person]
+
+    def next_age(self, age: int, max_age: Optional[int] = None) -> Optional[int]:
+        """
+        Smallest age with people left that is >= age (and <= max_age).
+        """
+        age = max(int(age), 0)
+        mask = self.ages_mask >> age
+        if not mask:
+            return
+        next_age = age + (mask & -mask).bit_length() - 1
+        if max_age is not None and next_age > max_age:
+            return
+        return next_age
+
+    def previous_age(self, age: int, min_age: int = 0) -> Optional[int]:
+        """
+        Largest age with people left that is <= age (and >= min_age).
+        """
+        age = int(age)
+        if age < 0:
+            return
+        mask = self.ages_mask & ((1 << (age + 1)) - 1)
+        if not mask:
+            return
+        previous_age = mask.bit_length() - 1
+        if previous_age < min_age:
+            return
+        return previous_age
+
+    def closest_age(
+        self, age: int, min_age: int = 0, max_age: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Age with people left closest to the given one, within [min_age, max_age].
+        Returns None if there is nobody in the bracket. Ties go to the younger
+        age, whereas the key scan of plain dictionaries picks whichever of the
+        two ages was inserted first.
+        """
+        age = int(age)
+        if max_age is not None:
+            age_below = self.previous_age(min(age, max_age), min_age=min_age)
+        else:
+            age_below = self.previous_age(age, min_age=min_age)
+        age_above = self.next_age(max(age, min_age), max_age=max_age)
+        if age_below is None:
+            return age_above
+        if age_above is None:
+            return age_below
+        if age_above - age < age - age_below:
+            return age_above
+        return age_below
+
+    def has_ages_between(self, min_age: int, max_age: int) -> bool:
+        return self.next_age(min_age, max_age=max_age) is not None
+
+    @property
+    def n_people(self) -> int:
+        return sum(len(people) for people in self.values())
@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import List, Tuple
 
 import numpy as np
@@ -112,33 +113,201 @@ class SchoolDistributor:
 
     def distribute_kids_to_school(self, areas: List[Area]):
         """
-        Function to distribute kids to schools according to distance
+        Function to distribute kids to schools according to distance.
+
+        The closest schools of all the areas are found with one query per age
+        group. The kids of each area and age are then sent in batches to the
+        closest school with vacancies, keeping the number of pupils of every
+        school in arrays: the mandatory age kids go first, and are sent to a
+        random school among the closest ones once they are all full, then the
+        non-mandatory age kids, who stay at home if there are no vacancies.
         """
         logger.info("Distributing kids to schools")
-        for i, area in enumerate(areas):
-            if i % 4000 == 0:
+        start_time = time.perf_counter()
+        areas = list(areas)
+        closest_schools_idx_by_age = self._get_closest_schools_idx_for_areas(areas)
+        area_idx, ages, mandatory, kids = self._get_school_age_kids(
+            areas, closest_schools_idx_by_age
+        )
+        schools = self.schools.members
+        n_pupils = np.array([school.n_pupils for school in schools], dtype=float)
+        n_pupils_max = np.array(
+            [school.n_pupils_max for school in schools], dtype=float
+        )
+        n_pupils_by_year = {}
+        # groups of kids of the same area and age, mandatory ages first
+        order = np.lexsort((ages, ~mandatory, area_idx))
+        keys = np.stack((area_idx, ages, mandatory), axis=1)[order]
+        boundaries = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        starts = np.concatenate(([0], boundaries)) if len(order) else []
+        stops = np.concatenate((boundaries, [len(order)]))
+        n_assigned = 0
+        next_log = 0
+        for start, stop in zip(starts, stops):
+            i, age, is_mandatory = keys[start]
+            if i >= next_log:
                 logger.info(f"Distributed kids in {i} of {len(areas)} areas.")
-            closest_schools_by_age = {}
-            is_school_full = {}
-            for agegroup in self.schools.school_trees:
-                closest_schools = []
-                closest_schools_idx = self.schools.get_closest_schools(
-                    agegroup, area.coordinates, self.neighbour_schools
+                next_log = (i // 4000 + 1) * 4000
+            candidates = closest_schools_idx_by_age[age][i][: self.neighbour_schools]
+            if is_mandatory:
+                school_idx = self._get_schools_for_mandatory_kids(
+                    stop - start, candidates, n_pupils, n_pupils_max
                 )
-                for idx in closest_schools_idx:
-                    real_idx = self.schools.school_agegroup_to_global_indices[agegroup][
-                        idx
-                    ]
-                    closest_schools.append(self.schools.members[real_idx])
-                closest_schools_by_age[agegroup] = closest_schools
-                is_school_full[agegroup] = False
-            self.distribute_mandatory_kids_to_school(
-                area, is_school_full, closest_schools_by_age
-            )
-            self.distribute_non_mandatory_kids_to_school(
-                area, is_school_full, closest_schools_by_age
+            else:
+                school_idx = self._get_schools_for_non_mandatory_kids(
+                    stop - start,
+                    age,
+                    candidates,
+                    n_pupils,
+                    n_pupils_max,
+                    n_pupils_by_year,
+                )
+            for kid_idx, school_id in zip(order[start:stop], school_idx):
+                if school_id < 0:
+                    continue
+                person = kids[kid_idx]
+                if person.work_super_area is not None:
+                    person.work_super_area.remove_worker(person)
+                schools[school_id].add(person)
+                n_assigned += 1
+        elapsed = time.perf_counter() - start_time
+        logger.info(
+            f"Kids distributed to schools: {n_assigned} kids from {len(areas)} "
+            f"areas in {elapsed:.2f} s "
+            f"({n_assigned / max(elapsed, 1e-9):.0f} kids/s)."
+        )
+
+    def _get_school_age_kids(self, areas: List[Area], closest_schools_idx_by_age):
+        """
+        Arrays with the area index, age and whether school is mandatory for
+        each kid that may go to school, and the list of those kids.
+        """
+        area_idx, ages, kids = [], [], []
+        for i, area in enumerate(areas):
+            for person in area.people:
+                if person.age not in closest_schools_idx_by_age:
+                    continue
+                in_school_age = (
+                    self.school_age_range[0] < person.age < self.school_age_range[1]
+                )
+                in_mandatory_school_age = (
+                    self.mandatory_school_age_range[0]
+                    <= person.age
+                    <= self.mandatory_school_age_range[1]
+                )
+                if not (in_school_age or in_mandatory_school_age):
+                    continue
+                area_idx.append(i)
+                ages.append(person.age)
+                kids.append(person)
+        area_idx = np.array(area_idx, dtype=int)
+        ages = np.array(ages, dtype=int)
+        mandatory = (ages >= self.mandatory_school_age_range[0]) & (
+            ages <= self.mandatory_school_age_range[1]
+        )
+        return area_idx, ages, mandatory, kids
+
+    @staticmethod
+    def _fill_closest_schools(n_kids: int, vacancies: np.ndarray) -> np.ndarray:
+        """
+        Number of kids that go to each of the candidate schools, filling them
+        in order up to their vacancies.
+        """
+        vacancies = np.maximum(np.ceil(vacancies), 0).astype(int)
+        n_before = np.cumsum(vacancies) - vacancies
+        return np.clip(n_kids - n_before, 0, vacancies)
+
+    def _get_schools_for_mandatory_kids(
+        self,
+        n_kids: int,
+        candidates: np.ndarray,
+        n_pupils: np.ndarray,
+        n_pupils_max: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Fills the candidate schools in order of distance up to their capacity.
+        Kids left when they are all full go to a random candidate.
+        Updates ``n_pupils`` and returns the school of each kid.
+        """
+        n_new = self._fill_closest_schools(
+            n_kids, n_pupils_max[candidates] - n_pupils[candidates]
+        )
+        n_pupils[candidates] += n_new
+        school_idx = np.repeat(candidates, n_new)
+        n_left = n_kids - len(school_idx)
+        if n_left > 0:
+            random_schools = candidates[
+                np.random.randint(0, len(candidates), size=n_left)
+            ]
+            np.add.at(n_pupils, random_schools, 1)
+            school_idx = np.concatenate((school_idx, random_schools))
+        return school_idx
+
+    def _get_schools_for_non_mandatory_kids(
+        self,
+        n_kids: int,
+        age: int,
+        candidates: np.ndarray,
+        n_pupils: np.ndarray,
+        n_pupils_max: np.ndarray,
+        n_pupils_by_year: dict,
+    ) -> np.ndarray:
+        """
+        Fills the candidate schools in order of distance up to their capacity
+        and the capacity of the year of the kids. Kids left when they are
+        all full don't go to school (school index -1).
+        Updates ``n_pupils`` and ``n_pupils_by_year`` and returns the school
+        of each kid.
+        """
+        schools = self.schools.members
+        n_pupils_year = np.empty(len(candidates))
+        n_pupils_year_max = np.full(len(candidates), np.inf)
+        for i, candidate in enumerate(candidates):
+            school = schools[candidate]
+            key = (candidate, age)
+            if key not in n_pupils_by_year:
+                yearindex = age - school.age_min + 1
+                n_pupils_by_year[key] = len(school.subgroups[yearindex].people)
+            n_pupils_year[i] = n_pupils_by_year[key]
+            if school.age_max > school.age_min:
+                n_pupils_year_max[i] = n_pupils_max[candidate] / (
+                    school.age_max - school.age_min
+                )
+        n_new = self._fill_closest_schools(
+            n_kids,
+            np.minimum(
+                n_pupils_max[candidates] - n_pupils[candidates],
+                n_pupils_year_max - n_pupils_year,
+            ),
+        )
+        n_pupils[candidates] += n_new
+        for candidate, n in zip(candidates[n_new > 0], n_new[n_new > 0]):
+            n_pupils_by_year[(candidate, age)] += n
+        school_idx = np.repeat(candidates, n_new)
+        return np.concatenate(
+            (school_idx, np.full(n_kids - len(school_idx), -1, dtype=int))
+        )
+
+    def _get_closest_schools_idx_for_areas(self, areas: List[Area]):
+        """
+        Queries the school trees once per age group for all the areas at once.
+        Returns a dictionary mapping each age group to an (n_areas, k) array of
+        indices into ``self.schools.members``, sorted by distance.
+        """
+        if not areas:
+            return {}
+        coordinates = np.array([area.coordinates for area in areas])
+        closest_schools_idx_by_age = {}
+        for agegroup in self.schools.school_trees:
+            closest_schools_idx = self.schools.get_closest_schools_idx(
+                agegroup, coordinates, self.neighbour_schools
             )
-        logger.info("Kids distributed to schools")
+            closest_schools_idx_by_age[
+                agegroup
+            ] = self.schools.school_agegroup_to_global_indices[agegroup][
+                closest_schools_idx
+            ]
+        return closest_schools_idx_by_age
 
     def distribute_mandatory_kids_to_school(
         self, area: Area, is_school_full: dict, closest_schools_by_age: dict
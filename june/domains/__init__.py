@@ -1,2 +1,4 @@
 from .domain import Domain
 from .domain_decomposition import DomainSplitter
+from .cost_profile import SuperAreaCostProfile
+from .domain_rebalancer import DomainRebalancer
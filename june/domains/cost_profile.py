@@ -0,0 +1,141 @@
+import logging
+from collections import defaultdict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from june.utils.rank_csv import gather_rank_dfs, save_gathered_csv
+
+logger = logging.getLogger("domain")
+
+cost_columns = ("interaction_time", "n_interactions", "n_people_moved", "mpi_bytes")
+
+default_cost_weights = {
+    "interaction_time": 1.0,
+    "n_people_moved": 0.1,
+    "mpi_bytes": 0.1,
+}
+
+
+def _estimate_view_nbytes(view) -> int:
+    """
+    Approximate size of the skinny profile of a person sent to another rank:
+    six scalars plus the immunity arrays.
+    """
+    return 48 + view[4].nbytes + view[5].nbytes
+
+
+class SuperAreaCostProfile:
+    """
+    Per super area cost counters measured during a run, used to rebalance
+    the domain decomposition of the next runs (see
+    ``DomainSplitter.generate_world_split``).
+
+    For each super area it accumulates the time spent running the interaction
+    of its groups, the number of people interacting in them, and the number of
+    its residents sent to other ranks with the (estimated) bytes sent for them.
+    """
+
+    def __init__(self, save_path: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        save_path
+            csv file where the profile is saved at the end of the run. If None,
+            the profile has to be saved explicitly with ``save``.
+        """
+        self.save_path = save_path
+        self.costs = defaultdict(lambda: np.zeros(len(cost_columns)))
+        self.n_time_steps = 0
+
+    def add_group(self, group, interaction_time: float, group_size: int):
+        super_area = group.super_area
+        if super_area is None:
+            return
+        costs = self.costs[super_area.name]
+        costs[0] += interaction_time
+        costs[1] += group_size
+
+    def add_people_going_abroad(self, movable_people, people):
+        """
+        Counts the people sent to other ranks in this time step by their home
+        super area.
+
+        Parameters
+        ----------
+        movable_people
+            the ``MovablePeople`` returned by the activity manager
+        people
+            the population of this rank
+        """
+        for groups in movable_people.skinny_out.values():
+            for group_ids in groups.values():
+                for subgroups in group_ids.values():
+                    for views in subgroups.values():
+                        for person_id, view in views.items():
+                            super_area = people.get_from_id(person_id).super_area
+                            if super_area is None:
+                                continue
+                            costs = self.costs[super_area.name]
+                            costs[2] += 1
+                            costs[3] += _estimate_view_nbytes(view)
+
+    def time_step(self):
+        self.n_time_steps += 1
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Costs of the super areas of this rank.
+        """
+        df = pd.DataFrame.from_dict(
+            {name: costs for name, costs in self.costs.items()},
+            orient="index",
+            columns=list(cost_columns),
+        )
+        df.index.name = "super_area"
+        return df
+
+    def gather(self) -> Optional[pd.DataFrame]:
+        """
+        Costs of all the super areas, summed over ranks. Returns the
+        DataFrame on rank 0 and None on the other ranks.
+        """
+        return gather_rank_dfs(
+            self.to_df(), combine=lambda dfs: pd.concat(dfs).groupby(level=0).sum()
+        )
+
+    def save(self, save_path: Optional[str] = None):
+        """
+        Gathers the costs of all ranks and writes them to a csv file from
+        rank 0. Needs to be called by every rank.
+        """
+        save_path = self.save_path if save_path is None else save_path
+        df = save_gathered_csv(self.gather, save_path, name="super area cost profile")
+        if df is None:
+            return
+        logger.info(
+            f"Saved the cost of {len(df)} super areas over "
+            f"{self.n_time_steps} time steps to {save_path}"
+        )
+
+    @staticmethod
+    def load(file_path: str) -> pd.DataFrame:
+        return pd.read_csv(file_path, index_col=0)
+
+
+def get_super_area_costs(
+    cost_profile: pd.DataFrame, weights: dict = default_cost_weights
+) -> pd.Series:
+    """
+    Combines the counters of a cost profile into one cost per super area.
+    Each counter is normalised by its total, so the weights give the share of
+    the cost that each counter accounts for.
+    """
+    costs = pd.Series(0.0, index=cost_profile.index)
+    for column, weight in weights.items():
+        total = cost_profile[column].sum()
+        if weight == 0 or total == 0:
+            continue
+        costs += weight * cost_profile[column] / total
+    return costs
@@ -1,7 +1,5 @@
 from itertools import count
 
-from june.hdf5_savers import generate_domain_from_hdf5
-
 
 class Domain:
     """
@@ -33,6 +31,8 @@ class Domain:
         hdf5_file_path: str,
         interaction_config: str = None,
     ):
+        from june.hdf5_savers import generate_domain_from_hdf5
+
         domain = generate_domain_from_hdf5(
             domain_id=domain_id,
             super_areas_to_domain_dict=super_areas_to_domain_dict,
@@ -1,11 +1,18 @@
 import logging
 import json
+from collections import deque
+from typing import Optional, Union
+
 import pandas as pd
 import numpy as np
 from score_clustering import Point, ScoreClustering
 
 from june import paths
-from june.hdf5_savers import load_data_for_domain_decomposition
+from .cost_profile import (
+    SuperAreaCostProfile,
+    default_cost_weights,
+    get_super_area_costs,
+)
 
 default_super_area_adjaceny_graph_path = (
     paths.data_path / "input/geography/super_area_adjacency_graph.json"
@@ -20,6 +27,150 @@ logger = logging.getLogger("domain")
 default_weights = {"population": 5.0, "workers": 1.0, "commuters": 1.0}
 
 
+def refine_split(
+    super_areas_per_domain: dict,
+    scores: dict,
+    commuters: dict,
+    neighbours: dict,
+    max_moves: Optional[int] = None,
+) -> dict:
+    """
+    Moves super areas on the boundaries of the domains to improve a split.
+    First, super areas of the most loaded domain are moved to a neighbouring
+    domain while that lowers its load, choosing the moves that cut the
+    fewest commuter edges. Then, super areas are moved if that reduces
+    the commuter edges cut without raising the maximum load. Domains are
+    kept connected.
+
+    Parameters
+    ----------
+    super_areas_per_domain
+        dictionary mapping each domain to its list of super areas
+    scores
+        load of each super area
+    commuters
+        commuters of each super area, an adjacency edge weighs the mean of
+        the commuters of its ends
+    neighbours
+        set of neighbouring super areas of each super area
+    max_moves
+        maximum number of super areas moved, defaults to the number of
+        super areas
+
+    Returns
+    -------
+    The refined super areas per domain.
+    """
+    members = {
+        domain_id: set(super_areas)
+        for domain_id, super_areas in super_areas_per_domain.items()
+    }
+    domain_of = {
+        super_area: domain_id
+        for domain_id, super_areas in members.items()
+        for super_area in super_areas
+    }
+    loads = {
+        domain_id: sum(scores[super_area] for super_area in super_areas)
+        for domain_id, super_areas in members.items()
+    }
+    if max_moves is None:
+        max_moves = len(domain_of)
+
+    def cut_change(super_area, target):
+        change = 0.0
+        for neighbour in neighbours[super_area]:
+            weight = (commuters[super_area] + commuters[neighbour]) / 2
+            if domain_of[neighbour] == domain_of[super_area]:
+                change += weight
+            elif domain_of[neighbour] == target:
+                change -= weight
+        return change
+
+    def keeps_domain_connected(super_area):
+        domain = members[domain_of[super_area]]
+        if len(domain) == 1:
+            return False
+        to_find = {n for n in neighbours[super_area] if n in domain}
+        if len(to_find) <= 1:
+            return True
+        start = to_find.pop()
+        seen = {start, super_area}
+        queue = deque([start])
+        while queue and to_find:
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour in domain and neighbour not in seen:
+                    seen.add(neighbour)
+                    to_find.discard(neighbour)
+                    queue.append(neighbour)
+        return not to_find
+
+    def move(super_area, target):
+        source = domain_of[super_area]
+        members[source].remove(super_area)
+        members[target].add(super_area)
+        loads[source] -= scores[super_area]
+        loads[target] += scores[super_area]
+        domain_of[super_area] = target
+
+    n_moves = 0
+    # reduce the maximum load
+    while n_moves < max_moves:
+        heaviest = max(loads, key=loads.get)
+        candidates = []
+        for super_area in members[heaviest]:
+            for target in {domain_of[n] for n in neighbours[super_area]}:
+                if target == heaviest:
+                    continue
+                if loads[target] + scores[super_area] >= loads[heaviest]:
+                    continue
+                new_max = max(
+                    loads[heaviest] - scores[super_area],
+                    loads[target] + scores[super_area],
+                )
+                candidates.append(
+                    (cut_change(super_area, target), new_max, super_area, target)
+                )
+        candidates.sort(key=lambda candidate: candidate[:2])
+        for _, _, super_area, target in candidates:
+            if keeps_domain_connected(super_area):
+                move(super_area, target)
+                n_moves += 1
+                break
+        else:
+            break
+    # reduce the commuter edges cut without raising the maximum load
+    max_load = max(loads.values())
+    improved = True
+    while improved and n_moves < max_moves:
+        improved = False
+        for super_area in sorted(domain_of):
+            source = domain_of[super_area]
+            for target in sorted({domain_of[n] for n in neighbours[super_area]}):
+                if target == source:
+                    continue
+                if loads[target] + scores[super_area] > max_load:
+                    continue
+                if cut_change(super_area, target) >= 0:
+                    continue
+                if not keeps_domain_connected(super_area):
+                    continue
+                move(super_area, target)
+                n_moves += 1
+                improved = True
+                break
+    logger.info(f"Refined the domain split with {n_moves} moves.")
+    return {
+        domain_id: [
+            super_area
+            for super_area in super_areas_per_domain[domain_id]
+            if domain_of[super_area] == domain_id
+        ]
+        + sorted(members[domain_id].difference(super_areas_per_domain[domain_id]))
+        for domain_id in super_areas_per_domain
+    }
+
+
 class DomainSplitter:
     """
     Class used to split the world into ``n`` domains containing an equal number
@@ -33,6 +184,8 @@ class DomainSplitter:
         super_area_centroids_path: str = default_super_area_centroids_path,
         super_area_adjacency_graph_path: str = default_super_area_adjaceny_graph_path,
         weights=default_weights,
+        cost_profile: Optional[pd.DataFrame] = None,
+        cost_weights=default_cost_weights,
     ):
         """
         Parameters
@@ -42,8 +195,17 @@ class DomainSplitter:
         super_area_data
             dictionary specifying the number of people, workers, pupils and commmuters
             per super area
+        cost_profile
+            costs per super area measured in a previous run (see
+            ``SuperAreaCostProfile``). If given, the scores of the profiled
+            super areas are the measured costs, rescaled to the total of their
+            static scores, and the people they sent to other ranks are added
+            to their commuters when weighting the cut edges.
+        cost_weights
+            weight of each of the measured counters in the cost of a super area
         """
         self.number_of_domains = number_of_domains
+        self.has_cost_profile = cost_profile is not None
         with open(super_area_adjacency_graph_path, "r") as f:
             self.adjacency_graph = json.load(f)
         self.super_area_data = super_area_data
@@ -53,6 +215,12 @@ class DomainSplitter:
             map(lambda x: self.get_score(x, weights=weights), self.super_area_df.index)
         )
         self.super_area_df.loc[:, "score"] = super_area_scores
+        self.super_area_df.loc[:, "commuters"] = [
+            super_area_data[super_area]["n_commuters"]
+            for super_area in self.super_area_df.index
+        ]
+        if cost_profile is not None:
+            self.apply_cost_profile(cost_profile, cost_weights=cost_weights)
 
     @classmethod
     def generate_world_split(
@@ -63,16 +231,31 @@ class DomainSplitter:
         super_area_centroids_path: str = default_super_area_centroids_path,
         super_area_adjacency_graph_path: str = default_super_area_adjaceny_graph_path,
         maxiter=100,
+        cost_profile: Optional[Union[str, pd.DataFrame]] = None,
+        cost_weights=default_cost_weights,
+        refine: Optional[bool] = None,
     ):
+        """
+        Splits the world saved in ``world_path``. If ``cost_profile`` (a
+        DataFrame or the path of a csv saved by ``SuperAreaCostProfile``) is
+        given, the split is balanced on the costs measured in a previous run.
+        See ``generate_domain_split`` for ``refine``.
+        """
+        from june.hdf5_savers import load_data_for_domain_decomposition
+
         super_area_data = load_data_for_domain_decomposition(world_path)
+        if cost_profile is not None and not isinstance(cost_profile, pd.DataFrame):
+            cost_profile = SuperAreaCostProfile.load(cost_profile)
         ds = cls(
             number_of_domains=number_of_domains,
             super_area_data=super_area_data,
             super_area_centroids_path=super_area_centroids_path,
             super_area_adjacency_graph_path=super_area_adjacency_graph_path,
             weights=weights,
+            cost_profile=cost_profile,
+            cost_weights=cost_weights,
         )
-        return ds.generate_domain_split(maxiter=maxiter)
+        return ds.generate_domain_split(maxiter=maxiter, refine=refine)
 
     def get_score(self, super_area, weights=default_weights):
         data = self.super_area_data[super_area]
@@ -82,7 +265,86 @@ class DomainSplitter:
             + weights["commuters"] * data["n_commuters"]
         )
 
-    def generate_domain_split(self, maxiter=100):
+    def apply_cost_profile(
+        self, cost_profile: pd.DataFrame, cost_weights=default_cost_weights
+    ):
+        """
+        Replaces the scores of the profiled super areas by their measured
+        costs. Costs are rescaled so that the profiled super areas keep the
+        total of their static scores, and super areas missing from the
+        profile keep their static score.
+        """
+        costs = get_super_area_costs(cost_profile, weights=cost_weights).reindex(
+            self.super_area_df.index
+        )
+        profiled = costs.notna() & (costs > 0)
+        if not profiled.any():
+            logger.warning("No super area of this world is in the cost profile.")
+            return
+        scale = self.super_area_df.loc[profiled, "score"].sum() / costs[profiled].sum()
+        self.super_area_df.loc[profiled, "score"] = costs[profiled] * scale
+        if "n_people_moved" in cost_profile.columns:
+            n_people_moved = (
+                cost_profile["n_people_moved"]
+                .reindex(self.super_area_df.index)
+                .fillna(0)
+            )
+            self.super_area_df.loc[:, "commuters"] += n_people_moved.values
+
+    def get_neighbours(self) -> dict:
+        """
+        Neighbouring super areas of each super area, from the adjacency graph.
+        """
+        names = list(self.super_area_df.index)
+        neighbours = {name: set() for name in names}
+        for name in names:
+            for i in np.where(self.adjacency_graph[name])[0]:
+                if i < len(names) and names[i] != name:
+                    neighbours[name].add(names[i])
+                    neighbours[names[i]].add(name)
+        return neighbours
+
+    def get_cut_weight(self, super_areas_per_domain: dict) -> float:
+        """
+        Sum of the weights of the adjacency edges between super areas of
+        different domains. Edges are weighted by the commuters of both ends.
+        """
+        domain_of = {
+            super_area: domain_id
+            for domain_id, super_areas in super_areas_per_domain.items()
+            for super_area in super_areas
+        }
+        commuters = self.super_area_df["commuters"].to_dict()
+        cut_weight = 0.0
+        for super_area, neighbours in self.get_neighbours().items():
+            for neighbour in neighbours:
+                if domain_of[super_area] != domain_of[neighbour]:
+                    cut_weight += (commuters[super_area] + commuters[neighbour]) / 2
+        # every edge is counted from both ends
+        return cut_weight / 2
+
+    def refine_domain_split(self, super_areas_per_domain: dict, max_moves=None):
+        """
+        Moves super areas on the boundaries of the domains to improve a split,
+        see ``refine_split``. Returns the refined super areas per domain.
+        """
+        return refine_split(
+            super_areas_per_domain,
+            scores=self.super_area_df["score"].to_dict(),
+            commuters=self.super_area_df["commuters"].to_dict(),
+            neighbours=self.get_neighbours(),
+            max_moves=max_moves,
+        )
+
+    def generate_domain_split(self, maxiter=100, refine: Optional[bool] = None):
+        """
+        Splits the super areas into domains of similar scores. If ``refine``,
+        the clusters are then improved with ``refine_domain_split``. By
+        default they are only refined when the scores come from a cost
+        profile, so splits of static scores are the same as before.
+        """
+        if refine is None:
+            refine = self.has_cost_profile
         points = list(
             self.super_area_df.apply(
                 lambda row: Point(row["X"], row["Y"], row["score"], row.name), axis=1
@@ -102,4 +364,16 @@ class DomainSplitter:
             super_areas_per_domain[i] = [point.name for point in cluster.points]
             score_per_domain[i] = cluster.score
         print(f"Score is {sc.calculate_score_unbalance(clusters)}")
+        if refine:
+            super_areas_per_domain = self.refine_domain_split(super_areas_per_domain)
+            scores = self.super_area_df["score"]
+            score_per_domain = {
+                domain_id: scores.loc[super_areas].sum()
+                for domain_id, super_areas in super_areas_per_domain.items()
+            }
+            logger.info(
+                f"Refined score is "
+                f"{max(score_per_domain.values()) / min(score_per_domain.values())},"
+                f" commuter edges cut {self.get_cut_weight(super_areas_per_domain)}"
+            )
         return super_areas_per_domain, score_per_domain
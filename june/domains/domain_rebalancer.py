@@ -0,0 +1,322 @@
+import logging
+from collections import Counter
+from typing import Callable, List, Optional, TYPE_CHECKING
+
+import h5py
+import numpy as np
+
+from june.demography.person import Activities
+from june.geography.spatial_index import SpatialIndex
+from june.mpi_setup import mpi_comm, mpi_rank, mpi_size
+from .domain import Domain
+from .domain_decomposition import refine_split
+
+if TYPE_CHECKING:
+    from june.simulator import Simulator
+    from june.world import World
+
+logger = logging.getLogger("domain")
+
+# attributes of the simulator that depend on the domain, taken from the
+# simulator built for the new domain
+domain_dependent_attributes = (
+    "world",
+    "activity_manager",
+    "interaction",
+    "epidemiology",
+    "events",
+    "tracker",
+)
+
+
+class DomainRebalancer:
+    """
+    Rebalances the domains of an MPI run at day boundaries.
+
+    Every rank measures the time it spends on its time steps. Every
+    ``check_every_days`` days the times are gathered and, if the slowest rank
+    is more than ``imbalance_threshold`` times slower than the mean, super
+    areas on the boundaries of the slow domains are moved to neighbouring
+    domains (see ``refine_split``). The time of each rank is spread over its
+    super areas proportionally to their measured interaction time if the
+    simulator has a cost profile, or to their residents otherwise.
+
+    The state of the people (infection, immunity, vaccines and deaths) is
+    sent to their new ranks over MPI, each rank loads its new domain from the
+    world file, which rebuilds the external groups and subgroups that point
+    to the other domains, and the simulator takes the world dependent parts
+    of the simulator built by ``simulator_factory`` for the new domain.
+    As with checkpoints, people in hospital are placed again by the medical
+    care policies in the next time step.
+    """
+
+    def __init__(
+        self,
+        world_path: str,
+        super_areas_to_domain_dict: dict,
+        simulator_factory: Callable[[Domain], "Simulator"],
+        interaction_config: Optional[str] = None,
+        imbalance_threshold: float = 1.2,
+        check_every_days: int = 1,
+        max_fraction_moved: float = 0.05,
+        n_neighbours: int = 6,
+    ):
+        """
+        Parameters
+        ----------
+        world_path
+            path of the world hdf5 file the domains are loaded from
+        super_areas_to_domain_dict
+            current domain of each super area id
+        simulator_factory
+            function that builds a simulator for a new domain, as the one being
+            run was built. It should not take a record, the record of the
+            running simulator is kept.
+        interaction_config
+            interaction config used to load the domains
+        imbalance_threshold
+            ratio of the maximum to the mean time per rank above which the
+            domains are rebalanced
+        check_every_days
+            number of days between imbalance checks
+        max_fraction_moved
+            maximum fraction of the super areas moved in one rebalance
+        n_neighbours
+            super areas are neighbours of their ``n_neighbours`` closest ones
+        """
+        self.world_path = world_path
+        self.super_areas_to_domain_dict = super_areas_to_domain_dict
+        self.simulator_factory = simulator_factory
+        self.interaction_config = interaction_config
+        self.imbalance_threshold = imbalance_threshold
+        self.check_every_days = check_every_days
+        self.max_fraction_moved = max_fraction_moved
+        self.n_neighbours = n_neighbours
+        self.timestep_time = 0.0
+        self.n_days = 0
+        self.n_rebalances = 0
+        self._neighbours = None
+
+    def add_timestep_time(self, timestep_time: float):
+        self.timestep_time += timestep_time
+
+    def get_rank_times(self) -> List[float]:
+        """
+        Time spent by every rank since the last check.
+        """
+        rank_times = mpi_comm.allgather(self.timestep_time)
+        self.timestep_time = 0.0
+        return rank_times
+
+    @staticmethod
+    def get_imbalance(rank_times: List[float]) -> float:
+        mean_time = np.mean(rank_times)
+        if mean_time == 0:
+            return 1.0
+        return max(rank_times) / mean_time
+
+    @staticmethod
+    def get_super_area_weights(world: "World", cost_profile=None) -> dict:
+        """
+        Share of the load of a rank of each of its super areas.
+        """
+        weights = Counter(
+            person.area.super_area.id
+            for person in world.people
+            if person.area is not None
+        )
+        if cost_profile is not None:
+            interaction_time = cost_profile.to_df()["interaction_time"].to_dict()
+            measured = {
+                super_area.id: interaction_time.get(super_area.name, 0.0)
+                for super_area in world.super_areas
+            }
+            if sum(measured.values()) > 0:
+                weights = measured
+        return {
+            super_area.id: float(weights.get(super_area.id, 0.0))
+            for super_area in world.super_areas
+        }
+
+    @property
+    def neighbours(self) -> dict:
+        """
+        Neighbouring super areas of each super area, the closest ones to it.
+        """
+        if self._neighbours is None:
+            with h5py.File(self.world_path, "r") as f:
+                super_area_ids = f["geography"]["super_area_id"][:]
+                coordinates = f["geography"]["super_area_coordinates"][:]
+            closest = SpatialIndex(coordinates).query(
+                coordinates, k=self.n_neighbours + 1
+            )
+            neighbours = {int(super_area_id): set() for super_area_id in super_area_ids}
+            for super_area_id, closest_idx in zip(super_area_ids, closest):
+                for neighbour_id in super_area_ids[closest_idx]:
+                    if neighbour_id != super_area_id:
+                        neighbours[int(super_area_id)].add(int(neighbour_id))
+                        neighbours[int(neighbour_id)].add(int(super_area_id))
+            self._neighbours = neighbours
+        return self._neighbours
+
+    @staticmethod
+    def compute_split(
+        super_areas_to_domain_dict: dict,
+        rank_times: List[float],
+        super_area_weights_per_rank: List[dict],
+        neighbours: dict,
+        max_moves: Optional[int] = None,
+    ) -> dict:
+        """
+        New domain of each super area, moving super areas on the boundaries
+        of the slow domains. The time of each rank is shared among its super
+        areas according to their weights.
+        """
+        scores = {super_area: 0.0 for super_area in super_areas_to_domain_dict}
+        for rank_time, weights in zip(rank_times, super_area_weights_per_rank):
+            total_weight = sum(weights.values())
+            if total_weight == 0:
+                continue
+            for super_area, weight in weights.items():
+                scores[super_area] = rank_time * weight / total_weight
+        super_areas_per_domain = {domain_id: [] for domain_id in range(len(rank_times))}
+        for super_area, domain_id in super_areas_to_domain_dict.items():
+            super_areas_per_domain[domain_id].append(super_area)
+        super_areas_per_domain = refine_split(
+            super_areas_per_domain,
+            scores=scores,
+            commuters={super_area: 1.0 for super_area in scores},
+            neighbours=neighbours,
+            max_moves=max_moves,
+        )
+        return {
+            super_area: domain_id
+            for domain_id, super_areas in super_areas_per_domain.items()
+            for super_area in super_areas
+        }
+
+    def get_new_split(self, rank_times: List[float], super_area_weights: dict):
+        """
+        Computes the new split on rank 0 and sends it to every rank. Returns
+        None if no super area changes domain.
+        """
+        super_area_weights_per_rank = mpi_comm.gather(super_area_weights, root=0)
+        new_split = None
+        if mpi_rank == 0:
+            max_moves = int(
+                np.ceil(self.max_fraction_moved * len(self.super_areas_to_domain_dict))
+            )
+            new_split = self.compute_split(
+                self.super_areas_to_domain_dict,
+                rank_times=rank_times,
+                super_area_weights_per_rank=super_area_weights_per_rank,
+                neighbours=self.neighbours,
+                max_moves=max_moves,
+            )
+        new_split = mpi_comm.bcast(new_split, root=0)
+        if new_split == self.super_areas_to_domain_dict:
+            return None
+        return new_split
+
+    @staticmethod
+    def get_people_states(world: "World", super_areas_to_domain_dict: dict):
+        """
+        State of the people of the world, split by the rank their home
+        super area belongs to. People without an area have no home super
+        area to be sent to and are left out.
+        """
+        states = [{} for _ in range(mpi_size)]
+        for person in world.people:
+            if person.area is None:
+                continue
+            domain_id = super_areas_to_domain_dict[person.area.super_area.id]
+            states[domain_id][person.id] = (
+                person.dead,
+                person.infection,
+                person.immunity,
+                person.vaccine_trajectory,
+                person.vaccinated,
+                person.vaccine_type,
+            )
+        return states
+
+    @staticmethod
+    def exchange_people_states(states: List[dict]) -> dict:
+        """
+        Sends the state of the people to their new ranks, and returns the
+        state of the people of this rank.
+        """
+        own_states = states[mpi_rank]
+        states[mpi_rank] = None
+        received = mpi_comm.alltoall(states)
+        received[mpi_rank] = own_states
+        people_states = {}
+        for rank_states in received:
+            people_states.update(rank_states)
+        return people_states
+
+    @staticmethod
+    def restore_people_states(world: "World", people_states: dict):
+        for person in world.people:
+            state = people_states.get(person.id)
+            if state is None:
+                continue
+            (
+                dead,
+                person.infection,
+                person.immunity,
+                person.vaccine_trajectory,
+                person.vaccinated,
+                person.vaccine_type,
+            ) = state
+            if dead:
+                person.dead = True
+                cemetery = world.cemeteries.get_nearest(person)
+                cemetery.add(person)
+                person.subgroups = Activities(None, None, None, None, None, None)
+
+    def rebalance(self, simulator: "Simulator") -> bool:
+        """
+        Called by every rank at the end of each day. Returns whether the
+        domains have been rebalanced.
+        """
+        self.n_days += 1
+        if mpi_size == 1 or self.n_days % self.check_every_days != 0:
+            return False
+        rank_times = self.get_rank_times()
+        imbalance = self.get_imbalance(rank_times)
+        if imbalance < self.imbalance_threshold:
+            return False
+        super_area_weights = self.get_super_area_weights(
+            simulator.world, cost_profile=simulator.cost_profile
+        )
+        new_split = self.get_new_split(rank_times, super_area_weights)
+        if new_split is None:
+            return False
+        n_moved = sum(
+            domain_id != self.super_areas_to_domain_dict[super_area]
+            for super_area, domain_id in new_split.items()
+        )
+        if mpi_rank == 0:
+            logger.info(
+                f"Rank time imbalance {imbalance:.2f}, "
+                f"moving {n_moved} super areas between domains"
+            )
+        states = self.get_people_states(simulator.world, new_split)
+        people_states = self.exchange_people_states(states)
+        domain = Domain.from_hdf5(
+            domain_id=mpi_rank,
+            super_areas_to_domain_dict=new_split,
+            hdf5_file_path=self.world_path,
+            interaction_config=self.interaction_config,
+        )
+        new_simulator = self.simulator_factory(domain)
+        self.restore_people_states(domain, people_states)
+        for attribute in domain_dependent_attributes:
+            setattr(simulator, attribute, getattr(new_simulator, attribute))
+        simulator.activity_manager.timer = simulator.timer
+        if simulator.activity_manager.policies is not None:
+            simulator.activity_manager.policies.individual_policies.reset_population()
+        self.super_areas_to_domain_dict = new_split
+        self.n_rebalances += 1
+        return True
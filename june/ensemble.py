@@ -0,0 +1,277 @@
+import copy
+import gc
+import logging
+import multiprocessing
+import random
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, List, Optional, TYPE_CHECKING
+
+import numba as nb
+import numpy as np
+import pandas as pd
+
+from june.demography.state_changes import track_state_changes
+from june.utils.memory import get_unique_rss
+
+if TYPE_CHECKING:
+    from june.simulator import Simulator
+    from june.world import World
+
+logger = logging.getLogger("ensemble")
+
+# state of a person that has not been infected, vaccinated or hospitalised:
+# infection, dead, vaccine trajectory, vaccinated, vaccine type,
+# susceptibilities, effective multipliers and medical facility
+default_person_state = (None, False, None, None, None, {}, {}, None)
+
+
+@nb.njit(cache=True)
+def _set_seed_numba(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def set_random_seed(seed: int):
+    """
+    Sets the seeds of random, numpy and numbaized numpy.
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+    _set_seed_numba(seed)
+
+
+def _get_person_state(person):
+    return (
+        person.infection,
+        person.dead,
+        person.vaccine_trajectory,
+        person.vaccinated,
+        person.vaccine_type,
+        dict(person.immunity.susceptibility_dict),
+        dict(person.immunity.effective_multiplier_dict),
+        person.subgroups.medical_facility,
+    )
+
+
+class WorldSnapshot:
+    """
+    Snapshot of the state of a world that changes during a run: the
+    infections, immunities and vaccines of the people, their hospitals and
+    deaths, the residents of the households, the cemeteries, the hospital
+    wards and the policies of the regions.
+
+    Most people start a run in the default state, so only the people that do
+    not are stored. From the snapshot on, the ids of the people that are
+    infected, vaccinated, hospitalised or die are kept as it happens (see
+    ``june.demography.state_changes``), and ``restore`` only rebuilds the
+    state of those people and of the groups they touched.
+    """
+
+    def __init__(self, world: "World"):
+        self.world = world
+        self.people = list(world.people)
+        self.person_indices = {
+            person.id: index for index, person in enumerate(self.people)
+        }
+        self.changed_ids = track_state_changes()
+        self.subgroups = [person.subgroups for person in self.people]
+        self.person_states = {}
+        for index, person in enumerate(self.people):
+            state = _get_person_state(person)
+            if state != default_person_state:
+                self.person_states[index] = state
+        self.household_residents = {}
+        if world.households is not None:
+            self.household_residents = {
+                id(household): household.residents for household in world.households
+            }
+        self.cemetery_people = [
+            list(cemetery[0].people) for cemetery in world.cemeteries
+        ]
+        self.hospital_patients = []
+        if world.hospitals is not None:
+            self.hospital_patients = [
+                (set(hospital.ward_ids), set(hospital.icu_ids))
+                for hospital in world.hospitals
+            ]
+        self.region_policies = []
+        if world.regions is not None:
+            self.region_policies = [
+                copy.deepcopy(region.policy) for region in world.regions
+            ]
+
+    def changed_people(self) -> List[int]:
+        """
+        Indices of the people whose state changed since the snapshot, or since
+        it was last restored.
+        """
+        person_indices = self.person_indices
+        return sorted(
+            person_indices[person_id]
+            for person_id in self.changed_ids
+            if person_id in person_indices
+        )
+
+    def restore(self) -> int:
+        """
+        Brings the world back to the state of the snapshot. Returns the
+        number of people restored.
+        """
+        changed = self.changed_people()
+        households = {}
+        for index in changed:
+            person = self.people[index]
+            (
+                person.infection,
+                person.dead,
+                person.vaccine_trajectory,
+                person.vaccinated,
+                person.vaccine_type,
+                susceptibility_dict,
+                effective_multiplier_dict,
+                medical_facility,
+            ) = self.person_states.get(index, default_person_state)
+            person.immunity.susceptibility_dict = dict(susceptibility_dict)
+            person.immunity.effective_multiplier_dict = dict(effective_multiplier_dict)
+            person.subgroups = self.subgroups[index]
+            person.subgroups.medical_facility = medical_facility
+            person.busy = False
+            residence = person.subgroups.residence
+            if residence is not None and residence.spec == "household":
+                households[id(residence.group)] = residence.group
+                # bury_the_dead sets the residents of the subgroup
+                vars(residence).pop("residents", None)
+        for household_id, household in households.items():
+            household.residents = self.household_residents[household_id]
+        for cemetery, people in zip(self.world.cemeteries, self.cemetery_people):
+            cemetery[0].people[:] = people
+        if self.world.hospitals is not None:
+            for hospital, (ward_ids, icu_ids) in zip(
+                self.world.hospitals, self.hospital_patients
+            ):
+                hospital.ward_ids = set(ward_ids)
+                hospital.icu_ids = set(icu_ids)
+        if self.world.regions is not None:
+            for region, policy in zip(self.world.regions, self.region_policies):
+                region.policy = copy.deepcopy(policy)
+        self.changed_ids.difference_update(self.people[index].id for index in changed)
+        return len(changed)
+
+
+def default_summary(simulator: "Simulator") -> dict:
+    n_infected, n_dead, n_vaccinated = 0, 0, 0
+    for person in simulator.world.people:
+        n_infected += person.infected
+        n_dead += person.dead
+        n_vaccinated += person.vaccinated is not None
+    return {"n_infected": n_infected, "n_dead": n_dead, "n_vaccinated": n_vaccinated}
+
+
+# the runner of the ensemble, inherited by the forked workers
+_ensemble_runner = None
+
+
+def _run_realisation_in_worker(realisation):
+    return _ensemble_runner.run_realisation(realisation)
+
+
+class EnsembleRunner:
+    """
+    Runs many stochastic realisations of a simulation on the same world,
+    loaded only once. Between realisations the world is reset to the
+    snapshot taken when the runner is created.
+
+    Realisations are dictionaries of parameters (a "seed", betas, policies...)
+    passed to ``simulator_factory``, which builds the simulator of each
+    realisation on the shared world. Expensive parts that do not depend on the
+    parameters, such as the leisure and travel, can be built once and reused
+    by the factory. The realisations run one after the other, or in
+    ``n_workers`` forked processes that share the pages of the world
+    copy-on-write. Running a realisation reads every person, so each worker
+    still copies the pages of the people. The memory each worker did not
+    share is reported as "unique_rss".
+    """
+
+    def __init__(
+        self,
+        world: "World",
+        simulator_factory: Callable[["World", dict], "Simulator"],
+        summary_function: Callable[["Simulator"], dict] = default_summary,
+        n_workers: int = 1,
+        output_path: Optional[str] = None,
+    ):
+        """
+        Parameters
+        ----------
+        world
+            world shared by all the realisations
+        simulator_factory
+            function that builds the simulator of a realisation from the world
+            and the parameters of the realisation
+        summary_function
+            function that returns a dictionary summarising a realisation from
+            its simulator, at the end of the run
+        n_workers
+            number of forked processes that run realisations. With 1 they run
+            sequentially in this process.
+        output_path
+            csv file where the summaries of all the realisations are saved
+        """
+        self.world = world
+        self.simulator_factory = simulator_factory
+        self.summary_function = summary_function
+        self.n_workers = n_workers
+        self.output_path = output_path
+        self.snapshot = WorldSnapshot(world)
+
+    def run_realisation(self, realisation: dict) -> dict:
+        tick = perf_counter()
+        n_restored = self.snapshot.restore()
+        set_random_seed(realisation.get("seed", 0))
+        simulator = self.simulator_factory(self.world, realisation)
+        # the factory may reuse policies that have seen the previous realisation
+        if simulator.activity_manager.policies is not None:
+            simulator.activity_manager.policies.individual_policies.reset_population()
+        simulator.run()
+        summary = dict(realisation)
+        summary.update(self.summary_function(simulator))
+        summary["run_time"] = perf_counter() - tick
+        summary["unique_rss"] = get_unique_rss()
+        logger.info(
+            f"Realisation {realisation} done in {summary['run_time']:.1f} s, "
+            f"restored {n_restored} people"
+        )
+        return summary
+
+    def run(self, realisations: List[dict]) -> pd.DataFrame:
+        """
+        Runs the realisations and returns their summaries, one row per
+        realisation, in the order they were given.
+        """
+        global _ensemble_runner
+        if self.n_workers == 1:
+            summaries = [
+                self.run_realisation(realisation) for realisation in realisations
+            ]
+        else:
+            _ensemble_runner = self
+            context = multiprocessing.get_context("fork")
+            gc.collect()
+            gc.freeze()
+            try:
+                with context.Pool(self.n_workers) as pool:
+                    summaries = pool.map(
+                        _run_realisation_in_worker, realisations, chunksize=1
+                    )
+            finally:
+                gc.unfreeze()
+                _ensemble_runner = None
+        # leave the world of this process as it was loaded
+        self.snapshot.restore()
+        summaries = pd.DataFrame(summaries)
+        if self.output_path is not None:
+            output_path = Path(self.output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            summaries.to_csv(output_path, index=False)
+        return summaries
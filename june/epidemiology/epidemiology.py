@@ -1,13 +1,13 @@
 import numpy as np
 from time import perf_counter
-from time import time as wall_clock
 import logging
 
 from .infection import InfectionSelectors, ImmunitySetter
 from june.demography import Activities
+from june.demography.state_changes import mark_state_changed
 from june.policy import MedicalCarePolicies
 from june.epidemiology.vaccines import VaccinationCampaigns
-from june.mpi_setup import mpi_comm, mpi_size, mpi_rank, move_info
+from june.mpi_setup import MPI, mpi_comm, mpi_size, mpi_rank, start_move_info
 from june.groups import MedicalFacilities
 from june.records import Record
 from june.world import World
@@ -62,6 +62,11 @@ class Epidemiology:
         self.medical_facilities = medical_facilities
         self.vaccination_campaigns = vaccination_campaigns
         self.current_date = None
+        # bytes of the infections sent to and received from other domains
+        # in the last time step, and time spent in the collectives of that
+        # exchange, which includes waiting for the other ranks
+        self.infection_nbytes = 0
+        self.infection_waiting_time = 0.0
 
     def set_immunity(self, world):
         if self.immunity_setter:
@@ -108,6 +113,9 @@ class Epidemiology:
             vaccinate = False
 
         # infect the people that got exposed
+        infection_exchange = None
+        self.infection_nbytes = 0
+        self.infection_waiting_time = 0.0
         if self.infection_selectors:
             infect_in_domains = self.infect_people(
                 world=world,
@@ -116,11 +124,12 @@ class Epidemiology:
                 infection_ids=infection_ids,
                 people_from_abroad_dict=people_from_abroad_dict,
             )
-            self.tell_domains_to_infect(
-                world=world, timer=timer, infect_in_domains=infect_in_domains
+            infection_exchange = self.start_telling_domains_to_infect(
+                infect_in_domains=infect_in_domains
             )
 
-        # update the health status of the population
+        # update the health status of the population, while the people
+        # infected in other domains are in flight
         self.update_health_status(
             world=world,
             time=timer.now,
@@ -129,6 +138,18 @@ class Epidemiology:
             record=record,
             vaccinate=vaccinate,
         )
+        if infection_exchange is not None:
+            infected_from_abroad = self.finish_telling_domains_to_infect(
+                world=world, timer=timer, infection_exchange=infection_exchange
+            )
+            for person in infected_from_abroad:
+                self.update_infected_person(
+                    world=world,
+                    person=person,
+                    time=timer.now,
+                    duration=timer.duration,
+                    record=record,
+                )
         if record:
             record.summarise_time_step(timestamp=timer.date, world=world)
             record.time_step(timestamp=timer.date)
@@ -156,6 +177,7 @@ class Epidemiology:
                 location_id=death_location.id,
                 dead_person_id=person.id,
             )
+        mark_state_changed(person)
         person.dead = True
         person.infection = None
         cemetery = world.cemeteries.get_nearest(person)
@@ -186,6 +208,7 @@ class Epidemiology:
                 infection_id=person.infection.infection_id(),
             )
         person.infection = None
+        mark_state_changed(person)
 
     def update_health_status(
         self,
@@ -210,28 +233,13 @@ class Epidemiology:
         """
         for person in world.people:
             if person.infected:
-                previous_tag = person.infection.tag
-                new_status = person.infection.update_health_status(time, duration)
-                if record is not None:
-                    if previous_tag != person.infection.tag:
-                        record.accumulate(
-                            table_name="symptoms",
-                            infected_id=person.id,
-                            symptoms=person.infection.tag.value,
-                            infection_id=person.infection.infection_id(),
-                        )
-                # Take actions on new symptoms
-                if self.medical_care_policies:
-                    self.medical_care_policies.apply(
-                        person=person,
-                        medical_facilities=self.medical_facilities,
-                        days_from_start=time,
-                        record=record,
-                    )
-                if new_status == "recovered":
-                    self.recover(person, record=record)
-                elif new_status == "dead":
-                    self.bury_the_dead(world, person, record=record)
+                self.update_infected_person(
+                    world=world,
+                    person=person,
+                    time=time,
+                    duration=duration,
+                    record=record,
+                )
             if person.dead:
                 continue
             if vaccinate:
@@ -243,6 +251,41 @@ class Epidemiology:
                         person=person, date=date, record=record
                     )
 
+    def update_infected_person(
+        self,
+        world: World,
+        person: "Person",
+        time: float,
+        duration: float,
+        record: Record = None,
+    ):
+        """
+        Updates the symptoms of an infected person, and sends them to
+        hospital, recovers them or buries them if necessary.
+        """
+        previous_tag = person.infection.tag
+        new_status = person.infection.update_health_status(time, duration)
+        if record is not None:
+            if previous_tag != person.infection.tag:
+                record.accumulate(
+                    table_name="symptoms",
+                    infected_id=person.id,
+                    symptoms=person.infection.tag.value,
+                    infection_id=person.infection.infection_id(),
+                )
+        # Take actions on new symptoms
+        if self.medical_care_policies:
+            self.medical_care_policies.apply(
+                person=person,
+                medical_facilities=self.medical_facilities,
+                days_from_start=time,
+                record=record,
+            )
+        if new_status == "recovered":
+            self.recover(person, record=record)
+        elif new_status == "dead":
+            self.bury_the_dead(world, person, record=record)
+
     def infect_people(
         self, world, time, infected_ids, infection_ids, people_from_abroad_dict
     ):
@@ -298,42 +341,74 @@ class Epidemiology:
         """
         Sends information about the people who got infected in this domain to the other domains.
         """
-        mpi_comm.Barrier()
-        tick, tickw = perf_counter(), wall_clock()
-
-        invalid_id = 4294967295  # largest possible uint32
-        empty = np.array([invalid_id], dtype=np.uint32)
-
-        # we want to make sure we transfer something for every domain.
-        # (we have an np.concatenate which doesn't work on empty arrays)
-
-        people_ids = [empty for x in range(mpi_size)]
-        infection_ids = [empty for x in range(mpi_size)]
+        infection_exchange = self.start_telling_domains_to_infect(infect_in_domains)
+        return self.finish_telling_domains_to_infect(
+            world=world, timer=timer, infection_exchange=infection_exchange
+        )
 
+    def start_telling_domains_to_infect(self, infect_in_domains):
+        """
+        Starts sending the people who got infected in this domain to their
+        domains, one (person id, infection id) row per person, with a single
+        non-blocking ``Ialltoallv``. Returns the pending exchange, to be
+        finished with ``finish_telling_domains_to_infect``, or None if there is
+        a single domain or no domain has infected people from other domains.
+        """
+        if mpi_size == 1:
+            return None
+        tick = perf_counter()
+        infections = [np.empty((0, 2), dtype=np.uint32) for _ in range(mpi_size)]
         # FIXME: domain id should not be floats! Origin is well upstream!
         for x in infect_in_domains:
-            people_ids[int(x)] = np.array(infect_in_domains[x]["id"], dtype=np.uint32)
-            infection_ids[int(x)] = np.array(
-                infect_in_domains[x]["inf_id"], dtype=np.uint32
-            )
-
-        people_to_infect, n_sending, n_receiving = move_info(people_ids)
-        infection_to_infect, n_sending, n_receiving = move_info(infection_ids)
+            infections[int(x)] = np.column_stack(
+                (infect_in_domains[x]["id"], infect_in_domains[x]["inf_id"])
+            ).astype(np.uint32)
+
+        # most time steps nobody is infected across domains
+        n_infections = np.array([sum(len(x) for x in infections)])
+        n_infections_total = np.empty(1, dtype=n_infections.dtype)
+        tick_waiting = perf_counter()
+        mpi_comm.Allreduce(n_infections, n_infections_total, op=MPI.SUM)
+        if n_infections_total[0] == 0:
+            self.infection_waiting_time += perf_counter() - tick_waiting
+            return None
+
+        request, infections_to_do, n_sending, n_receiving = start_move_info(infections)
+        self.infection_waiting_time += perf_counter() - tick_waiting
+        self.infection_nbytes = (
+            sum(x.nbytes for x in infections) + infections_to_do.nbytes
+        )
+        return (
+            request,
+            infections_to_do,
+            n_sending + n_receiving,
+            perf_counter() - tick,
+        )
 
-        tock, tockw = perf_counter(), wall_clock()
+    def finish_telling_domains_to_infect(self, world, timer, infection_exchange):
+        """
+        Waits for the people infected in other domains and infects them.
+        Returns the people infected.
+        """
+        if infection_exchange is None:
+            return []
+        request, infections_to_do, n_moved, comms_time = infection_exchange
+        tick = perf_counter()
+        request.Wait()
+        self.infection_waiting_time += perf_counter() - tick
+        comms_time += perf_counter() - tick
         logger.info(
-            f"CMS: Infection COMS-v2 for rank {mpi_rank}/{mpi_size}({n_sending+n_receiving})"
-            f"{tock-tick},{tockw-tickw} - {timer.date}"
+            f"CMS: Infection COMS-v2 for rank {mpi_rank}/{mpi_size}({n_moved})"
+            f"{comms_time} - {timer.date}"
         )
-        mpi_logger.info(f"{timer.date},{mpi_rank},infection,{tock-tick}")
+        mpi_logger.info(f"{timer.date},{mpi_rank},infection,{comms_time}")
 
-        for person_id, infection_id in zip(people_to_infect, infection_to_infect):
-            try:
-                person = world.people.get_from_id(person_id)
-                self.infection_selectors.infect_person_at_time(
-                    person=person, time=timer.now, infection_id=infection_id
-                )
-            except Exception:
-                if person_id == invalid_id:
-                    continue
-                raise
+        infected_people = [
+            world.people.get_from_id(person_id) for person_id in infections_to_do[:, 0]
+        ]
+        self.infection_selectors.infect_people_at_time(
+            people=infected_people,
+            time=timer.now,
+            infection_ids=infections_to_do[:, 1],
+        )
+        return infected_people
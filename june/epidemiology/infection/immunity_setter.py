@@ -4,6 +4,7 @@ import numpy as np
 import yaml
 from random import random
 
+from june.demography.state_changes import mark_state_changed
 from june.utils import (
     parse_age_probabilities,
     parse_prevalence_comorbidities_in_reference_population,
@@ -172,6 +173,14 @@ class ImmunitySetter:
             self.set_previous_infections(world)
         if self.vaccination_dict:
             self.set_vaccinations(world.people)
+        if (
+            self.multiplier_dict
+            or self.susceptibility_dict
+            or self.previous_infections_dict
+            or self.vaccination_dict
+        ):
+            for person in world.people:
+                mark_state_changed(person)
 
     def get_multiplier_from_reference_prevalence(self, age, sex):
         """
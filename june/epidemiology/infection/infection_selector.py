@@ -1,6 +1,8 @@
+import numpy as np
 import yaml
 
 from june import paths
+from june.demography.state_changes import mark_state_changed
 from .health_index.health_index import HealthIndexGenerator
 from . import Infection, Covid19
 from .symptoms import Symptoms
@@ -9,7 +11,7 @@ from .transmission import TransmissionConstant, TransmissionGamma
 from .transmission_xnexp import TransmissionXNExp
 from .trajectory_maker import CompletionTime
 
-from typing import TYPE_CHECKING
+from typing import List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from june.demography import Person
@@ -93,6 +95,7 @@ class InfectionSelector:
         """
         person.infection = self._make_infection(person, time)
         person.immunity.add_immunity(person.infection.immunity_ids())
+        mark_state_changed(person)
 
     def _make_infection(self, person: "Person", time: float):
         """
@@ -298,6 +301,19 @@ class InfectionSelectors:
         selector = self.infection_id_to_selector[infection_id]
         selector.infect_person_at_time(person=person, time=time)
 
+    def infect_people_at_time(
+        self, people: List["Person"], time: float, infection_ids: np.ndarray
+    ):
+        """
+        Infects a batch of people at a given time, each one with the infection
+        of the same index in ``infection_ids``.
+        """
+        infection_ids = np.asarray(infection_ids)
+        for infection_id in np.unique(infection_ids):
+            selector = self.infection_id_to_selector[int(infection_id)]
+            for index in np.flatnonzero(infection_ids == infection_id):
+                selector.infect_person_at_time(person=people[index], time=time)
+
     def __iter__(self):
         return iter(self._infection_selectors)
 
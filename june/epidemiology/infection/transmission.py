@@ -44,7 +44,7 @@ class TransmissionConstant(Transmission):
         pass
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def gamma_pdf(x: float, a: float, loc: float, scale: float) -> float:
     """
     Implementation of gamma PDF in numba
@@ -75,7 +75,7 @@ def gamma_pdf(x: float, a: float, loc: float, scale: float) -> float:
     )
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def gamma_pdf_vectorized(x: float, a: float, loc: float, scale: float) -> float:
     """
     Implementation of gamma PDF in numba
@@ -11,7 +11,7 @@ default_config_path = (
 )
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def xnexp(x: float, n: float, alpha: float) -> float:
     """
     Implementation of x^n exp(-x/alpha)
@@ -32,7 +32,7 @@ def xnexp(x: float, n: float, alpha: float) -> float:
     return x**n * np.exp(-x / alpha)
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def update_probability(
     time_from_infection: float,
     time_first_infectious: float,
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 import numpy as np
 
 from june import paths
+from june.demography.state_changes import mark_state_changed
 from june.epidemiology.infection import infection as infection_module
 from june.utils.parse_probabilities import parse_age_probabilities
 
@@ -310,6 +311,7 @@ class VaccineTrajectory:
         dose_number = self.current_dose
         person.vaccinated = dose_number
         person.vaccine_type = self.name
+        mark_state_changed(person)
         if record is not None:
             record.events["vaccines"].accumulate(person.id, self.name, dose_number)
 
@@ -327,6 +329,7 @@ class VaccineTrajectory:
         record :
             record
         """
+        mark_state_changed(person)
         if self.is_finished(date=date):
             person.vaccine_trajectory = None
             return
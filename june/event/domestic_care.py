@@ -3,6 +3,8 @@ from random import random, shuffle
 import logging
 import datetime
 
+import numpy as np
+
 from .event import Event
 from june.utils import parse_age_probabilities
 
@@ -29,6 +31,11 @@ class DomesticCare(Event):
     relative_frequency
         relative factor to scale the overall probabilities in needs_care_probabilities
         useful for when we want to change the caring frequency with lockdowns, etc.
+
+    The households linked when the event is initialised are kept in a roster
+    of (carer household, cared household) pairs, with the adult residents of
+    each carer household, so that applying the event only touches the linked
+    households.
     """
 
     def __init__(
@@ -43,6 +50,7 @@ class DomesticCare(Event):
             needs_care_probabilities
         )
         self.daily_going_probability = daily_going_probability
+        self._set_roster([])
 
     def initialise(self, world):
         self._link_carers_to_households(world=world)
@@ -59,23 +67,48 @@ class DomesticCare(Event):
             or "primary_activity" in activities
         ):
             return
-        for household in world.households:
-            if household.household_to_care is not None:
-                household_to_care = household.household_to_care
-                carers = list(household.residents)
-                shuffle(carers)
-                receives_care = False
-                for person in carers:
-                    if person.age > 18 and person.available:
-                        household_to_care.add(person, activity="leisure")
-                        receives_care = True
-                        break
-                if receives_care:
-                    household_to_care.receiving_care = True
-                    # make residents stay at home
-                    for person in household_to_care.residents:
-                        if person.available:
-                            person.residence.append(person)
+        if not self._cared_households:
+            return
+        # a random available adult of each carer household goes, by taking the
+        # available adult with the highest random key of the household
+        available = np.fromiter(
+            (person.available for person in self._carers),
+            dtype=bool,
+            count=len(self._carers),
+        )
+        keys = np.random.random(len(self._carers)) + available
+        order = np.lexsort((keys, self._carer_link))
+        chosen = order[self._carers_indptr[1:] - 1]
+        for link in np.flatnonzero(available[chosen]):
+            household_to_care = self._cared_households[link]
+            household_to_care.add(self._carers[chosen[link]], activity="leisure")
+            household_to_care.receiving_care = True
+            # make residents stay at home
+            for person in household_to_care.residents:
+                if person.available:
+                    person.residence.append(person)
+
+    def _set_roster(self, links):
+        """
+        Keeps the (carer household, cared household) pairs whose carer
+        household has adults, and the adults of the carer households: the
+        adults of link i are ``_carers[_carers_indptr[i]:_carers_indptr[i+1]]``,
+        and ``_carer_link`` is the link of each adult.
+        """
+        self._cared_households = []
+        self._carers = []
+        indptr = [0]
+        for carer_household, cared_household in links:
+            adults = [person for person in carer_household.residents if person.age > 18]
+            if not adults:
+                continue
+            self._cared_households.append(cared_household)
+            self._carers += adults
+            indptr.append(len(self._carers))
+        self._carers_indptr = np.array(indptr, dtype=np.int64)
+        self._carer_link = np.repeat(
+            np.arange(len(self._cared_households)), np.diff(self._carers_indptr)
+        )
 
     def _link_carers_to_households(self, world):
         """
@@ -83,6 +116,7 @@ class DomesticCare(Event):
         All linking is restricted to the super area level.
         """
         total_need_care = 0
+        links = []
         for super_area in world.super_areas:
             # get households that need care
             need_care = []
@@ -102,6 +136,8 @@ class DomesticCare(Event):
             for needer, provider in zip(need_care, can_provide_care):
                 total_need_care += 1
                 provider.household_to_care = needer
+                links.append((provider, needer))
+        self._set_roster(links)
 
     def _check_household_needs_care(self, household):
         """
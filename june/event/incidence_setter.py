@@ -2,6 +2,7 @@ from typing import Union, Dict
 import datetime
 from random import sample, choices
 
+from june.demography.state_changes import mark_state_changed
 from .event import Event
 
 
@@ -37,6 +38,7 @@ class IncidenceSetter(Event):
                     to_cure = sample(infected_people, n_to_remove)
                     for person in to_cure:
                         person.infection = None
+                        mark_state_changed(person)
                 elif incidence < target_incidence:
                     n_to_add = int((target_incidence - incidence) * len(people))
                     to_infect = sample(people, k=2 * n_to_add)
@@ -2,6 +2,7 @@ import datetime
 from typing import Union, Dict
 from random import random
 
+from june.demography.state_changes import mark_state_changed
 from june.epidemiology.infection import B117
 from .event import Event
 
@@ -60,3 +61,4 @@ class Mutation(Event):
                     new_infection.start_time = person.infection.start_time
                     new_infection.symptoms = person.infection.symptoms
                     person.infection = new_infection
+                    mark_state_changed(person)
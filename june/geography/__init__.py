@@ -8,6 +8,7 @@ from .geography import (
     Region,
     Regions,
 )
+from .spatial_index import SpatialIndex
 from .city import City, Cities, ExternalCity
 from .station import (
     Station,
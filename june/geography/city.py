@@ -90,10 +90,7 @@ class City:
         if not self.has_stations:
             return
         if person.id in self.internal_commuter_ids:
-            internal_station = self.city_stations[
-                randint(0, len(self.city_stations) - 1)
-            ]
-            return internal_station.get_commute_subgroup()
+            return self.get_internal_commute_subgroup()
         else:
             closest_inter_city_station = (
                 person.super_area.closest_inter_city_station_for_city[self.name]
@@ -101,6 +98,14 @@ class City:
             if person.id in closest_inter_city_station.commuter_ids:
                 return closest_inter_city_station.get_commute_subgroup()
 
+    def get_internal_commute_subgroup(self):
+        """
+        Gets a commute subgroup for an internal commuter of the city,
+        from one of the city stations at random.
+        """
+        internal_station = self.city_stations[randint(0, len(self.city_stations) - 1)]
+        return internal_station.get_commute_subgroup()
+
     def get_closest_inter_city_station(self, coordinates):
         return self.inter_city_stations.get_closest_station(coordinates)
 
@@ -233,6 +238,14 @@ class ExternalCity(ExternalGroup):
     def has_stations(self):
         return len(self.city_stations) > 0
 
+    def get_internal_commute_subgroup(self):
+        """
+        Gets a commute subgroup for an internal commuter of the city,
+        from one of the city stations at random.
+        """
+        internal_station = self.city_stations[randint(0, len(self.city_stations) - 1)]
+        return internal_station.get_commute_subgroup()
+
     def get_commute_subgroup(self, person):
         """
         Gets the commute subgroup of the person. We first check if
@@ -243,10 +256,7 @@ class ExternalCity(ExternalGroup):
         if not self.has_stations:
             return
         if person.id in self.internal_commuter_ids:
-            internal_station = self.city_stations[
-                randint(0, len(self.city_stations) - 1)
-            ]
-            return internal_station.get_commute_subgroup()
+            return self.get_internal_commute_subgroup()
         else:
             closest_inter_city_station = (
                 person.super_area.closest_inter_city_station_for_city[self.name]
@@ -3,10 +3,10 @@ from itertools import count, chain
 from typing import List, Dict, Tuple, Optional
 import pandas as pd
 import numpy as np
-from sklearn.neighbors import BallTree
 
 from june import paths
 from june.demography.person import Person
+from .spatial_index import SpatialIndex, earth_radius
 
 default_hierarchy_filename = (
     paths.data_path / "input/geography/area_super_area_region.csv"
@@ -23,8 +23,6 @@ default_area_socioeconomic_index_filename = (
 
 logger = logging.getLogger(__name__)
 
-earth_radius = 6371  # km
-
 
 class GeographyError(BaseException):
     pass
@@ -86,7 +84,7 @@ class Area:
 
 
 class Areas:
-    __slots__ = "members_by_id", "super_area", "ball_tree", "members_by_name"
+    __slots__ = "members_by_id", "super_area", "spatial_index", "members_by_name"
 
     def __init__(self, areas: List[Area], super_area=None, ball_tree: bool = True):
         self.members_by_id = {area.id: area for area in areas}
@@ -96,9 +94,11 @@ class Areas:
             self.members_by_name = None
         self.super_area = super_area
         if ball_tree:
-            self.ball_tree = self.construct_ball_tree()
+            self.spatial_index = SpatialIndex(
+                [area.coordinates for area in self.members_by_id.values()]
+            )
         else:
-            self.ball_tree = None
+            self.spatial_index = None
 
     def __iter__(self):
         return iter(self.members)
@@ -119,35 +119,46 @@ class Areas:
     def members(self):
         return list(self.members_by_id.values())
 
+    @property
+    def ball_tree(self):
+        if self.spatial_index is None:
+            return None
+        return self.spatial_index.ball_tree
+
     def construct_ball_tree(self):
-        all_members = self.members
-        coordinates = np.array([np.deg2rad(area.coordinates) for area in all_members])
-        ball_tree = BallTree(coordinates, metric="haversine")
-        return ball_tree
+        return self.ball_tree
+
+    def get_closest_areas_idx(self, coordinates, k=1, return_distance=False):
+        """
+        Batched version of ``get_closest_areas``. Returns an (n, k) array with the
+        indices of the closest areas (in ``self.members`` order) to each coordinate,
+        and optionally their distances in km.
+        """
+        if self.spatial_index is None:
+            raise GeographyError("Areas initialized without a BallTree")
+        return self.spatial_index.query(
+            coordinates, k=k, return_distance=return_distance
+        )
 
     def get_closest_areas(self, coordinates, k=1, return_distance=False):
         coordinates = np.array(coordinates)
-        if self.ball_tree is None:
-            raise GeographyError("Areas initialized without a BallTree")
         if coordinates.shape == (2,):
             coordinates = coordinates.reshape(1, -1)
+        all_areas = self.members
         if return_distance:
-            distances, indcs = self.ball_tree.query(
-                np.deg2rad(coordinates), return_distance=return_distance, k=k
+            indcs, distances = self.get_closest_areas_idx(
+                coordinates, k=k, return_distance=return_distance
             )
             if coordinates.shape == (1, 2):
-                all_areas = self.members
                 areas = [all_areas[idx] for idx in indcs[0]]
-                return areas, distances[0] * earth_radius
+                return areas, distances[0]
             else:
-                all_areas = self.members
                 areas = [all_areas[idx] for idx in indcs[:, 0]]
-                return areas, distances[:, 0] * earth_radius
+                return areas, distances[:, 0]
         else:
-            indcs = self.ball_tree.query(
-                np.deg2rad(coordinates), return_distance=return_distance, k=k
+            indcs = self.get_closest_areas_idx(
+                coordinates, k=k, return_distance=return_distance
             )
-            all_areas = self.members
             areas = [all_areas[idx] for idx in indcs.flatten()]
             return areas
 
@@ -222,7 +233,7 @@ class SuperArea:
 
 
 class SuperAreas:
-    __slots__ = "members_by_id", "ball_tree", "members_by_name"
+    __slots__ = "members_by_id", "spatial_index", "members_by_name"
 
     def __init__(self, super_areas: List[SuperArea], ball_tree: bool = True):
         """
@@ -233,7 +244,8 @@ class SuperAreas:
         super_areas
             list of super areas
         ball_tree
-            whether to construct a NN tree for the super areas
+            whether to construct a NN tree for the super areas. The tree
+            itself is only built the first time it is queried.
         """
         self.members_by_id = {area.id: area for area in super_areas}
         try:
@@ -243,9 +255,11 @@ class SuperAreas:
         except AttributeError:
             self.members_by_name = None
         if ball_tree:
-            self.ball_tree = self.construct_ball_tree()
+            self.spatial_index = SpatialIndex(
+                [super_area.coordinates for super_area in self.members_by_id.values()]
+            )
         else:
-            self.ball_tree = None
+            self.spatial_index = None
 
     def __iter__(self):
         return iter(self.members)
@@ -266,40 +280,39 @@ class SuperAreas:
     def members(self):
         return list(self.members_by_id.values())
 
+    @property
+    def ball_tree(self):
+        if self.spatial_index is None:
+            return None
+        return self.spatial_index.ball_tree
+
     def construct_ball_tree(self):
-        all_members = self.members
-        coordinates = np.array(
-            [np.deg2rad(super_area.coordinates) for super_area in all_members]
+        return self.ball_tree
+
+    def get_closest_super_areas_idx(self, coordinates, k=1, return_distance=False):
+        """
+        Batched version of ``get_closest_super_areas``. Returns an (n, k) array with
+        the indices of the closest super areas (in ``self.members`` order) to each
+        coordinate, and optionally their distances in km.
+        """
+        if self.spatial_index is None:
+            raise GeographyError("Areas initialized without a BallTree")
+        return self.spatial_index.query(
+            coordinates, k=k, return_distance=return_distance
         )
-        ball_tree = BallTree(coordinates, metric="haversine")
-        return ball_tree
 
     def get_closest_super_areas(self, coordinates, k=1, return_distance=False):
-        coordinates = np.array(coordinates)
-        if self.ball_tree is None:
-            raise GeographyError("Areas initialized without a BallTree")
-        if coordinates.shape == (2,):
-            coordinates = coordinates.reshape(1, -1)
+        all_super_areas = self.members
         if return_distance:
-            distances, indcs = self.ball_tree.query(
-                np.deg2rad(coordinates),
-                return_distance=return_distance,
-                k=k,
-                sort_results=True,
+            indcs, distances = self.get_closest_super_areas_idx(
+                coordinates, k=k, return_distance=return_distance
             )
-            indcs = chain.from_iterable(indcs)
-            all_super_areas = self.members
-            super_areas = [all_super_areas[idx] for idx in indcs]
-            distances = distances.flatten()
-            return super_areas, distances * earth_radius
+            super_areas = [all_super_areas[idx] for idx in indcs.flatten()]
+            return super_areas, distances.flatten()
         else:
-            indcs = self.ball_tree.query(
-                np.deg2rad(coordinates),
-                return_distance=return_distance,
-                k=k,
-                sort_results=True,
+            indcs = self.get_closest_super_areas_idx(
+                coordinates, k=k, return_distance=return_distance
             )
-            all_super_areas = self.members
             super_areas = [all_super_areas[idx] for idx in indcs.flatten()]
             return super_areas
 
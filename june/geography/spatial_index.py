@@ -0,0 +1,122 @@
+from typing import Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+earth_radius = 6371  # km
+
+
+class SpatialIndex:
+    """
+    Nearest neighbour index on the sphere for a fixed set of coordinates.
+
+    Coordinates are given in the format [latitude, longitude] in degrees. The
+    underlying haversine BallTree is only built the first time it is queried,
+    so supergroups that are loaded from HDF5 and never queried don't pay for it.
+    All queries are batched: they take an array of shape (n, 2) and return the
+    neighbours of every point at once, as index arrays into the coordinates
+    the index was built from.
+    """
+
+    __slots__ = "coordinates", "_ball_tree"
+
+    def __init__(self, coordinates, ball_tree: BallTree = None):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self._ball_tree = ball_tree
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    @property
+    def is_built(self) -> bool:
+        return self._ball_tree is not None
+
+    @property
+    def ball_tree(self) -> BallTree:
+        if self._ball_tree is None:
+            self._ball_tree = self._build_ball_tree(self.coordinates)
+        return self._ball_tree
+
+    @staticmethod
+    def _build_ball_tree(coordinates: np.ndarray) -> BallTree:
+        return BallTree(np.deg2rad(coordinates), metric="haversine")
+
+    @staticmethod
+    def _to_radians(coordinates) -> np.ndarray:
+        return np.deg2rad(np.asarray(coordinates, dtype=np.float64).reshape(-1, 2))
+
+    def query(self, coordinates, k: int = 1, return_distance: bool = False):
+        """
+        Finds the k closest points to each of the given coordinates.
+
+        Parameters
+        ----------
+        coordinates
+            array of shape (n, 2) (or a single point of shape (2,))
+        k
+            number of neighbours, capped to the size of the index
+        return_distance
+            whether to also return the distances in km
+
+        Returns
+        -------
+        An (n, k) array of neighbour indices sorted by distance, and optionally
+        an (n, k) array of distances in km.
+        """
+        k = min(k, len(self))
+        if return_distance:
+            distances, indices = self.ball_tree.query(
+                self._to_radians(coordinates), k=k, sort_results=True
+            )
+            return indices, distances * earth_radius
+        return self.ball_tree.query(
+            self._to_radians(coordinates),
+            k=k,
+            return_distance=False,
+            sort_results=True,
+        )
+
+    def query_radius(
+        self, coordinates, radius: float, return_distance: bool = False
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Finds all the points within ``radius`` km of each of the given coordinates.
+        The result is returned in CSR format: the neighbours of point i are
+        ``indices[indptr[i] : indptr[i + 1]]``, sorted by distance.
+
+        Parameters
+        ----------
+        coordinates
+            array of shape (n, 2) (or a single point of shape (2,))
+        radius
+            radius in km
+        return_distance
+            whether to also return the distances in km, in the same layout
+            as the indices
+
+        Returns
+        -------
+        indptr, indices and optionally distances.
+        """
+        indices, distances = self.ball_tree.query_radius(
+            self._to_radians(coordinates),
+            r=radius / earth_radius,
+            return_distance=True,
+            sort_results=True,
+        )
+        counts = np.fromiter(
+            (len(point_indices) for point_indices in indices),
+            dtype=np.int64,
+            count=len(indices),
+        )
+        indptr = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        if indptr[-1] == 0:
+            flat_indices = np.empty(0, dtype=np.int64)
+            flat_distances = np.empty(0, dtype=np.float64)
+        else:
+            flat_indices = np.concatenate(indices).astype(np.int64)
+            flat_distances = np.concatenate(distances) * earth_radius
+        if return_distance:
+            return indptr, flat_indices, flat_distances
+        return indptr, flat_indices
@@ -87,8 +87,10 @@ class Company(Group):
     def area(self):
         return self.super_area.areas[0]
 
-    def get_interactive_group(self, people_from_abroad=None):
-        return InteractiveCompany(self, people_from_abroad=people_from_abroad)
+    def get_interactive_group(self, people_from_abroad=None, workspace=None):
+        return InteractiveCompany(
+            self, people_from_abroad=people_from_abroad, workspace=workspace
+        )
 
 
 class Companies(Supergroup):
@@ -230,8 +232,10 @@ def _read_sector_betas():
 class InteractiveCompany(InteractiveGroup):
     sector_betas = _read_sector_betas()
 
-    def __init__(self, group: "Group", people_from_abroad=None):
-        super().__init__(group=group, people_from_abroad=people_from_abroad)
+    def __init__(self, group: "Group", people_from_abroad=None, workspace=None):
+        super().__init__(
+            group=group, people_from_abroad=people_from_abroad, workspace=workspace
+        )
         self.sector = group.sector
 
     def get_processed_beta(self, betas, beta_reductions):
@@ -234,8 +234,10 @@ class Group(AbstractGroup):
         for subgroup in self.subgroups:
             subgroup.clear()
 
-    def get_interactive_group(self, people_from_abroad=None):
-        return InteractiveGroup(self, people_from_abroad=people_from_abroad)
+    def get_interactive_group(self, people_from_abroad=None, workspace=None):
+        return InteractiveGroup(
+            self, people_from_abroad=people_from_abroad, workspace=workspace
+        )
 
     def get_leisure_subgroup(self, person, subgroup_type=None, to_send_abroad=None):
         if self.subgroup_type == "Age":
@@ -1,13 +1,14 @@
 from collections import defaultdict
 import numba as nb
+import numpy as np
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from june.groups.group.group import Group
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def _get_processed_contact_matrix(contact_matrix, alpha_physical, proportion_physical):
     """
     Computes the contact matrix used in the interaction,
@@ -23,6 +24,96 @@ def _get_processed_contact_matrix(contact_matrix, alpha_physical, proportion_phy
     return contact_matrix * (1.0 + (alpha_physical - 1.0) * proportion_physical)
 
 
+class InteractionWorkspace:
+    """
+    Preallocated buffers that interactive groups fill with the information of their
+    infectors and susceptibles, instead of allocating new containers for every group.
+    A single workspace is reused for all the groups of a time step: it is reset at the
+    beginning of each group, and grows (doubling its size) when a group larger than
+    any seen before comes along, so it ends up sized to the largest group.
+
+    Susceptibilities are stored as a matrix with one row per susceptible and one
+    column per infection id (variant), with a default value of 1.
+    """
+
+    def __init__(self, size: int = 64, n_subgroups: int = 8, n_infections: int = 4):
+        self.infector_ids = np.empty(size, dtype=np.int64)
+        self.infector_infection_ids = np.empty(size, dtype=np.int64)
+        self.infector_subgroups = np.empty(size, dtype=np.int64)
+        self.infector_trans_probs = np.empty(size, dtype=np.float64)
+        self.susceptible_ids = np.empty(size, dtype=np.int64)
+        self.susceptible_subgroups = np.empty(size, dtype=np.int64)
+        self.susceptibilities = np.ones((size, n_infections), dtype=np.float64)
+        self.subgroup_sizes = np.zeros(n_subgroups, dtype=np.int64)
+        self.infection_columns = {}  # maps infection id -> susceptibility column
+        self.n_infectors = 0
+        self.n_susceptibles = 0
+
+    def reset(self, n_subgroups: int):
+        """
+        Clears the buffers for a new group with ``n_subgroups`` subgroups.
+        """
+        self.susceptibilities[: self.n_susceptibles] = 1.0
+        self.n_infectors = 0
+        self.n_susceptibles = 0
+        if n_subgroups > len(self.subgroup_sizes):
+            self.subgroup_sizes = np.zeros(2 * n_subgroups, dtype=np.int64)
+        else:
+            self.subgroup_sizes[:n_subgroups] = 0
+
+    @staticmethod
+    def _grow(array: np.ndarray, fill_value=None) -> np.ndarray:
+        shape = (2 * len(array),) + array.shape[1:]
+        if fill_value is None:
+            new_array = np.empty(shape, dtype=array.dtype)
+        else:
+            new_array = np.full(shape, fill_value, dtype=array.dtype)
+        new_array[: len(array)] = array
+        return new_array
+
+    def _get_infection_column(self, infection_id: int) -> int:
+        column = self.infection_columns.get(infection_id)
+        if column is None:
+            column = len(self.infection_columns)
+            self.infection_columns[infection_id] = column
+            if column == self.susceptibilities.shape[1]:
+                susceptibilities = np.ones(
+                    (len(self.susceptibilities), 2 * column), dtype=np.float64
+                )
+                susceptibilities[:, :column] = self.susceptibilities
+                self.susceptibilities = susceptibilities
+        return column
+
+    def add_infector(
+        self, id: int, subgroup_index: int, infection_id: int, trans_prob: float
+    ):
+        n = self.n_infectors
+        if n == len(self.infector_ids):
+            self.infector_ids = self._grow(self.infector_ids)
+            self.infector_infection_ids = self._grow(self.infector_infection_ids)
+            self.infector_subgroups = self._grow(self.infector_subgroups)
+            self.infector_trans_probs = self._grow(self.infector_trans_probs)
+        self.infector_ids[n] = id
+        self.infector_infection_ids[n] = infection_id
+        self.infector_subgroups[n] = subgroup_index
+        self.infector_trans_probs[n] = trans_prob
+        self.n_infectors = n + 1
+
+    def add_susceptible(self, id: int, subgroup_index: int, susceptibility_dict: dict):
+        n = self.n_susceptibles
+        if n == len(self.susceptible_ids):
+            self.susceptible_ids = self._grow(self.susceptible_ids)
+            self.susceptible_subgroups = self._grow(self.susceptible_subgroups)
+            self.susceptibilities = self._grow(self.susceptibilities, fill_value=1.0)
+        self.susceptible_ids[n] = id
+        self.susceptible_subgroups[n] = subgroup_index
+        for infection_id, susceptibility in susceptibility_dict.items():
+            # the column lookup can grow the susceptibilities, so it goes first
+            column = self._get_infection_column(infection_id)
+            self.susceptibilities[n, column] = susceptibility
+        self.n_susceptibles = n + 1
+
+
 class InteractiveGroup:
     """
     Extracts the necessary information about a group to perform an interaction time
@@ -32,9 +123,21 @@ class InteractiveGroup:
     Parameters
     ----------
     - group : group that we want to prepare for interaction.
+    - people_from_abroad : information of the people from other domains in the group.
+    - workspace : buffers to store the group information in. The arrays of the
+      interactive group are views on them, and are only valid until the workspace
+      is used for another group. If not given, a new workspace is created.
+
+    The susceptibles are only extracted if the group has infectors, otherwise only
+    their number is counted.
     """
 
-    def __init__(self, group: "Group", people_from_abroad=None):
+    def __init__(
+        self,
+        group: "Group",
+        people_from_abroad=None,
+        workspace: Optional[InteractionWorkspace] = None,
+    ):
         """
         This function is very long to avoid function calls for performance reasons.
         InteractiveGroups are created millions of times. Given a group, we need to extract:
@@ -50,70 +153,145 @@ class InteractiveGroup:
         """
         people_from_abroad = people_from_abroad or {}
         self.group = group
-        self.infectors_per_infection_per_subgroup = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list))
-        )  # maps virus variant -> subgroup -> infectors -> {infector ids, transmission probs}
-        self.susceptibles_per_subgroup = defaultdict(
-            dict
-        )  # maps subgroup -> susceptible id -> {variant -> susceptibility}
-        self.subgroup_sizes = {}
+        if workspace is None:
+            workspace = InteractionWorkspace()
+        subgroups = group.subgroups
+        n_subgroups = len(subgroups)
+        workspace.reset(n_subgroups)
+        subgroup_sizes = workspace.subgroup_sizes
+        add_infector = workspace.add_infector
         group_size = 0
+        n_susceptibles = 0
 
-        for subgroup_index, subgroup in enumerate(group.subgroups):
+        # first pass: infectors, and number of susceptibles
+        for subgroup_index, subgroup in enumerate(subgroups):
             subgroup_size = len(subgroup.people)
-            if subgroup.subgroup_type in people_from_abroad:
-                people_abroad_data = people_from_abroad[subgroup.subgroup_type]
-                people_abroad_ids = people_abroad_data.keys()
-                subgroup_size += len(people_abroad_ids)
-            else:
-                people_abroad_data = None
-                people_abroad_ids = []
+            people_abroad_data = people_from_abroad.get(subgroup.subgroup_type)
+            if people_abroad_data is not None:
+                subgroup_size += len(people_abroad_data)
             if subgroup_size == 0:
                 continue
-            self.subgroup_sizes[subgroup_index] = subgroup_size
+            subgroup_sizes[subgroup_index] = subgroup_size
             group_size += subgroup_size
-
-            # Get susceptible people
             # local
             for person in subgroup:
-                if not person.infected:
-                    self.susceptibles_per_subgroup[subgroup_index][
-                        person.id
-                    ] = person.immunity.susceptibility_dict
+                infection = person.infection
+                if infection is None:
+                    n_susceptibles += 1
+                else:
+                    add_infector(
+                        person.id,
+                        subgroup_index,
+                        infection.infection_id(),
+                        infection.transmission.probability,
+                    )
             # from abroad
-            for id in people_abroad_ids:
-                if people_abroad_data[id]["susc"]:
-                    dd = {
-                        key: value
-                        for key, value in zip(
-                            people_abroad_data[id]["immunity_inf_ids"],
-                            people_abroad_data[id]["immunity_suscs"],
+            if people_abroad_data is not None:
+                for id, person_abroad_data in people_abroad_data.items():
+                    if person_abroad_data["susc"]:
+                        n_susceptibles += 1
+                    if person_abroad_data["inf_id"] != 0:
+                        add_infector(
+                            id,
+                            subgroup_index,
+                            person_abroad_data["inf_id"],
+                            person_abroad_data["inf_prob"],
                         )
-                    }
-                    self.susceptibles_per_subgroup[subgroup_index][id] = dd
-
-            # Get infectors
-            for person in subgroup:
-                if person.infection is not None:
-                    infection_id = person.infection.infection_id()
-                    self.infectors_per_infection_per_subgroup[infection_id][
-                        subgroup_index
-                    ]["ids"].append(person.id)
-                    self.infectors_per_infection_per_subgroup[infection_id][
-                        subgroup_index
-                    ]["trans_probs"].append(person.infection.transmission.probability)
-            for id in people_abroad_ids:
-                if people_abroad_data[id]["inf_id"] != 0:
-                    infection_id = people_abroad_data[id]["inf_id"]
-                    self.infectors_per_infection_per_subgroup[infection_id][
-                        subgroup_index
-                    ]["ids"].append(id)
-                    self.infectors_per_infection_per_subgroup[infection_id][
-                        subgroup_index
-                    ]["trans_probs"].append(people_abroad_data[id]["inf_prob"])
+        self.n_susceptibles = n_susceptibles
+        self.n_infectors = workspace.n_infectors
         self.must_timestep = self.has_susceptible and self.has_infectors
+
+        # second pass: susceptibles, only needed if there is someone to infect them
+        if self.must_timestep:
+            add_susceptible = workspace.add_susceptible
+            for subgroup_index, subgroup in enumerate(subgroups):
+                for person in subgroup:
+                    if person.infection is None:
+                        add_susceptible(
+                            person.id,
+                            subgroup_index,
+                            person.immunity.susceptibility_dict,
+                        )
+                people_abroad_data = people_from_abroad.get(subgroup.subgroup_type)
+                if people_abroad_data is not None:
+                    for id, person_abroad_data in people_abroad_data.items():
+                        if person_abroad_data["susc"]:
+                            add_susceptible(
+                                id,
+                                subgroup_index,
+                                dict(
+                                    zip(
+                                        person_abroad_data["immunity_inf_ids"],
+                                        person_abroad_data["immunity_suscs"],
+                                    )
+                                ),
+                            )
+        n_infectors = workspace.n_infectors
+        n_extracted_susceptibles = workspace.n_susceptibles
+        self.infector_ids = workspace.infector_ids[:n_infectors]
+        self.infector_infection_ids = workspace.infector_infection_ids[:n_infectors]
+        self.infector_subgroups = workspace.infector_subgroups[:n_infectors]
+        self.infector_trans_probs = workspace.infector_trans_probs[:n_infectors]
+        self.susceptible_ids = workspace.susceptible_ids[:n_extracted_susceptibles]
+        self.susceptible_subgroups = workspace.susceptible_subgroups[
+            :n_extracted_susceptibles
+        ]
+        self.susceptibilities = workspace.susceptibilities[:n_extracted_susceptibles]
+        self.infection_columns = workspace.infection_columns
+        self.subgroup_sizes = workspace.subgroup_sizes[:n_subgroups]
         self.size = group_size
 
+    def get_susceptibilities(self, infection_ids) -> np.ndarray:
+        """
+        Returns the susceptibility of every susceptible to each of the given
+        infection ids, as an array of shape (n_susceptibles, n_infection_ids).
+        """
+        susceptibilities = np.ones(
+            (len(self.susceptible_ids), len(infection_ids)), dtype=np.float64
+        )
+        for i, infection_id in enumerate(infection_ids):
+            column = self.infection_columns.get(infection_id)
+            if column is not None:
+                susceptibilities[:, i] = self.susceptibilities[:, column]
+        return susceptibilities
+
+    @property
+    def infectors_per_infection_per_subgroup(self) -> dict:
+        """
+        Maps virus variant -> subgroup -> infectors -> {infector ids, transmission probs}
+        """
+        ret = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        for id, infection_id, subgroup_index, trans_prob in zip(
+            self.infector_ids.tolist(),
+            self.infector_infection_ids.tolist(),
+            self.infector_subgroups.tolist(),
+            self.infector_trans_probs.tolist(),
+        ):
+            ret[infection_id][subgroup_index]["ids"].append(id)
+            ret[infection_id][subgroup_index]["trans_probs"].append(trans_prob)
+        return ret
+
+    @property
+    def susceptibles_per_subgroup(self) -> dict:
+        """
+        Maps subgroup -> susceptible id -> {variant -> susceptibility}, only
+        listing the susceptibilities that differ from 1.
+        """
+        ret = defaultdict(dict)
+        infection_ids = list(self.infection_columns)
+        columns = list(self.infection_columns.values())
+        for id, subgroup_index, susceptibilities in zip(
+            self.susceptible_ids.tolist(),
+            self.susceptible_subgroups.tolist(),
+            self.susceptibilities[:, columns].tolist(),
+        ):
+            ret[subgroup_index][id] = {
+                infection_id: susceptibility
+                for infection_id, susceptibility in zip(infection_ids, susceptibilities)
+                if susceptibility != 1.0
+            }
+        return ret
+
     @classmethod
     def get_raw_contact_matrix(
         cls, contact_matrix, alpha_physical, proportion_physical, characteristic_time
@@ -156,6 +334,13 @@ class InteractiveGroup:
     def get_processed_contact_matrix(self, contact_matrix):
         return contact_matrix
 
+    @property
+    def contact_matrix_key(self):
+        """
+        What the processed contact matrix depends on, besides the spec.
+        """
+        return None
+
     @property
     def spec(self):
         return self.group.spec
@@ -170,8 +355,8 @@ class InteractiveGroup:
 
     @property
     def has_susceptible(self):
-        return bool(self.susceptibles_per_subgroup)
+        return self.n_susceptibles > 0
 
     @property
     def has_infectors(self):
-        return bool(self.infectors_per_infection_per_subgroup)
+        return self.n_infectors > 0
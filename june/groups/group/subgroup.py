@@ -4,16 +4,26 @@ from typing import List
 
 
 class Subgroup(AbstractGroup):
+    """
+    A group within a group. For example, children in a household.
+
+    Small subgroups find people with a scan of ``people``. Once a subgroup
+    holds ``index_threshold`` people it also keeps the position of each
+    person in ``people``, so that checking whether someone is in it and
+    removing them take constant time. Removals then move the last person to
+    the freed position, which keeps the order deterministic but not the
+    order of arrival.
+    """
+
     external = False
-    __slots__ = ("group", "subgroup_type", "people")
+    index_threshold = 32
+    __slots__ = ("group", "subgroup_type", "people", "_index")
 
     def __init__(self, group, subgroup_type: int):
-        """
-        A group within a group. For example, children in a household.
-        """
         self.group = group
         self.subgroup_type = subgroup_type
         self.people = []
+        self._index = None
 
     def _collate(self, attribute: str) -> List[Person]:
         return [person for person in self.people if getattr(person, attribute)]
@@ -43,7 +53,9 @@ class Subgroup(AbstractGroup):
         return self._collate("in_hospital")
 
     def __contains__(self, item):
-        return item in self.people
+        if self._index is None:
+            return item in self.people
+        return item in self._index
 
     def __iter__(self):
         return iter(self.people)
@@ -53,6 +65,7 @@ class Subgroup(AbstractGroup):
 
     def clear(self):
         self.people = []
+        self._index = None
 
     @property
     def contains_people(self) -> bool:
@@ -65,12 +78,26 @@ class Subgroup(AbstractGroup):
         """
         Add a person to this group
         """
+        if self._index is not None:
+            self._index[person] = len(self.people)
         self.people.append(person)
+        if self._index is None and len(self.people) >= self.index_threshold:
+            self._index = {person: i for i, person in enumerate(self.people)}
         person.busy = True
 
     def remove(self, person: Person):
-        self.people.remove(person)
+        if self._index is None:
+            self.people.remove(person)
+        else:
+            try:
+                position = self._index.pop(person)
+            except KeyError:
+                raise ValueError(f"Person {person.id} is not in the subgroup")
+            last = self.people.pop()
+            if last is not person:
+                self.people[position] = last
+                self._index[last] = position
         person.busy = False
 
     def __getitem__(self, item):
-        return list(self.people)[item]
+        return self.people[item]
@@ -5,8 +5,9 @@ from june import paths
 from typing import List, Tuple, Optional
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import BallTree
 
+from june.demography.state_changes import mark_state_changed
+from june.geography import SpatialIndex
 from june.groups import Group, Supergroup, ExternalGroup, ExternalSubgroup
 from june.exc import HospitalError
 from june.groups.group.make_subgroups import SubgroupParams
@@ -37,6 +38,7 @@ class AbstractHospital:
     def add_to_ward(self, person):
         self.ward_ids.add(person.id)
         person.subgroups.medical_facility = self.ward
+        mark_state_changed(person)
 
     def remove_from_ward(self, person):
         self.ward_ids.remove(person.id)
@@ -45,6 +47,7 @@ class AbstractHospital:
     def add_to_icu(self, person):
         self.icu_ids.add(person.id)
         person.subgroups.medical_facility = self.icu
+        mark_state_changed(person)
 
     def remove_from_icu(self, person):
         self.icu_ids.remove(person.id)
@@ -224,6 +227,7 @@ class Hospitals(Supergroup, MedicalFacilities):
         """
         super().__init__(members=hospitals)
         self.neighbour_hospitals = neighbour_hospitals
+        self.spatial_index = None
         if ball_tree and self.members:
             coordinates = np.array([hospital.coordinates for hospital in hospitals])
             self.init_trees(coordinates)
@@ -329,9 +333,9 @@ class Hospitals(Supergroup, MedicalFacilities):
             hospitals.append(hospital)
         return hospitals
 
-    def init_trees(self, hospital_coordinates: np.array) -> BallTree:
+    def init_trees(self, hospital_coordinates: np.array) -> SpatialIndex:
         """
-        Reads hospital location and sizes, it initializes a KD tree on a sphere,
+        Reads hospital location and sizes, it initializes a spatial index on a sphere,
         to query the closest hospital to a given location.
 
         Parameters
@@ -341,17 +345,24 @@ class Hospitals(Supergroup, MedicalFacilities):
 
         Returns
         -------
-        Tree to query nearby schools
+        Index to query nearby hospitals
         """
-        self.hospital_trees = BallTree(
-            np.deg2rad(hospital_coordinates), metric="haversine"
-        )
+        self.spatial_index = SpatialIndex(hospital_coordinates)
+        return self.spatial_index
+
+    @property
+    def hospital_trees(self):
+        if self.spatial_index is None:
+            return None
+        return self.spatial_index.ball_tree
 
     def get_closest_hospitals_idx(
         self, coordinates: Tuple[float, float], k: int
     ) -> Tuple[float, float]:
         """
-        Get the k-th closest hospital to a given coordinate
+        Get the k-th closest hospital to a given coordinate. If an array of
+        coordinates of shape (n, 2) is given, the closest hospitals to all of them
+        are returned at once as an (n, k) array.
 
         Parameters
         ---------
@@ -365,11 +376,11 @@ class Hospitals(Supergroup, MedicalFacilities):
         ID of the k-th closest hospital
 
         """
-        k = min(k, len(list(self.hospital_trees.data)))
-        distances, neighbours = self.hospital_trees.query(
-            np.deg2rad(coordinates.reshape(1, -1)), k=k, sort_results=True
-        )
-        return neighbours[0]
+        coordinates = np.asarray(coordinates)
+        neighbours = self.spatial_index.query(coordinates, k=k)
+        if coordinates.ndim == 1:
+            return neighbours[0]
+        return neighbours
 
     def get_closest_hospitals(
         self, coordinates: Tuple[float, float], k: int
@@ -389,10 +400,7 @@ class Hospitals(Supergroup, MedicalFacilities):
         ID of the k-th closest hospital
 
         """
-        k = min(k, len(list(self.hospital_trees.data)))
-        distances, neighbours = self.hospital_trees.query(
-            np.deg2rad(coordinates.reshape(1, -1)), k=k, sort_results=True
-        )
+        neighbours = self.spatial_index.query(coordinates, k=k)
         return [self.members[index] for index in neighbours[0]]
 
 
@@ -173,8 +173,10 @@ class Household(Group):
         self.being_visited = False
         self.receiving_care = False
 
-    def get_interactive_group(self, people_from_abroad=None):
-        return InteractiveHousehold(self, people_from_abroad=people_from_abroad)
+    def get_interactive_group(self, people_from_abroad=None, workspace=None):
+        return InteractiveHousehold(
+            self, people_from_abroad=people_from_abroad, workspace=workspace
+        )
 
     def get_leisure_subgroup(self, person, subgroup_type, to_send_abroad):
         self.being_visited = True
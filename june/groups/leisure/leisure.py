@@ -145,20 +145,23 @@ class Leisure:
             )
         logger.info("Done")
         logger.info("Distributing social venues to areas")
-        for i, area in enumerate(areas):
-            if i % 2000 == 0:
-                logger.info(f"Distributed in {i} of {len(areas)} areas.")
-            for activity, distributor in self.leisure_distributors.items():
-                if "visits" in activity:
-                    continue
-                social_venues = distributor.get_possible_venues_for_area(area)
+        areas = list(areas)
+        for activity, distributor in self.leisure_distributors.items():
+            if "visits" in activity:
+                continue
+            logger.info(f"Distributing {activity} to {len(areas)} areas.")
+            social_venues_per_area = distributor.get_possible_venues_for_areas(areas)
+            for area, social_venues in zip(areas, social_venues_per_area):
                 if social_venues is not None:
                     area.social_venues[activity] = social_venues
+            distributor.set_area_candidates(areas)
         logger.info(f"Distributed in {len(areas)} of {len(areas)} areas.")
 
     def generate_leisure_probabilities_for_timestep(
         self, delta_time: float, working_hours: bool, date: str
     ):
+        for distributor in self.leisure_distributors.values():
+            distributor.draw_area_venues()
         self.probabilities_by_region_sex_age = {}
         if self.regions:
             for region in self.regions:
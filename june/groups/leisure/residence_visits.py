@@ -1,5 +1,5 @@
 import yaml
-from random import shuffle, randint
+from random import randint
 import numpy as np
 
 from june.groups.leisure import SocialVenueDistributor
@@ -32,6 +32,9 @@ class ResidenceVisitsDistributor(SocialVenueDistributor):
     ):
         # it is necessary to make them arrays for performance
         self.residence_type_probabilities = residence_type_probabilities
+        # probabilities of the residence types of each combination of
+        # types that households visit
+        self._residence_type_probabilities_cache = {}
         self.policy_reductions = {}
         super().__init__(
             social_venues=None,
@@ -50,6 +53,38 @@ class ResidenceVisitsDistributor(SocialVenueDistributor):
             config = yaml.load(f, Loader=yaml.FullLoader)
         return cls(daytypes=daytypes, **config)
 
+    @property
+    def policy_reductions(self):
+        return self._policy_reductions
+
+    @policy_reductions.setter
+    def policy_reductions(self, policy_reductions):
+        self._policy_reductions = policy_reductions
+        self._residence_type_probabilities_cache.clear()
+
+    def _get_residence_type_probabilities(self, residence_types):
+        """
+        Indices and normalised probabilities of visiting each of the given
+        residence types.
+        """
+        try:
+            return self._residence_type_probabilities_cache[residence_types]
+        except KeyError:
+            pass
+        if self.policy_reductions:
+            probabilities = self.policy_reductions
+        else:
+            probabilities = self.residence_type_probabilities
+        residence_type_probabilities = np.array(
+            [probabilities[residence_type] for residence_type in residence_types]
+        )
+        residence_type_probabilities = (
+            residence_type_probabilities / residence_type_probabilities.sum()
+        )
+        ret = (np.arange(len(residence_types)), residence_type_probabilities)
+        self._residence_type_probabilities_cache[residence_types] = ret
+        return ret
+
     def link_households_to_households(self, super_areas):
         """
         Links people between households. Strategy: We pair each household with 0, 1,
@@ -64,25 +99,27 @@ class ResidenceVisitsDistributor(SocialVenueDistributor):
         """
         for super_area in super_areas:
             households_in_super_area = [
-                household for area in super_area.areas for household in area.households
+                household
+                for area in super_area.areas
+                for household in area.households
+                if household.n_residents > 0
             ]
-            for household in households_in_super_area:
-                if household.n_residents == 0:
-                    continue
-                households_to_link_n = randint(2, 4)
-                households_to_visit = []
-                n_linked = 0
-                while n_linked < households_to_link_n:
-                    house_idx = randint(0, len(households_in_super_area) - 1)
-                    house = households_in_super_area[house_idx]
-                    if house.id == household.id or not house.residents:
-                        continue
-                    households_to_visit.append(house)
-                    n_linked += 1
-                if households_to_visit:
-                    household.residences_to_visit["household"] = tuple(
-                        households_to_visit
-                    )
+            n_households = len(households_in_super_area)
+            if n_households < 2:
+                continue
+            # links of household i are links[indptr[i]:indptr[i+1]]
+            n_links = np.random.randint(2, 5, size=n_households)
+            indptr = np.concatenate(([0], np.cumsum(n_links)))
+            # draw among the other households by skipping the household itself
+            households_idx = np.repeat(np.arange(n_households), n_links)
+            links = np.random.randint(0, n_households - 1, size=indptr[-1])
+            links += links >= households_idx
+            households_to_visit = [households_in_super_area[j] for j in links.tolist()]
+            indptr = indptr.tolist()
+            for i, household in enumerate(households_in_super_area):
+                household.residences_to_visit["household"] = tuple(
+                    households_to_visit[indptr[i] : indptr[i + 1]]
+                )
 
     def link_households_to_care_homes(self, super_areas):
         """
@@ -103,7 +140,8 @@ class ResidenceVisitsDistributor(SocialVenueDistributor):
                     for household in area.households
                     if household.type in ["families", "ya_parents", "nokids"]
                 ]
-            shuffle(households_super_area)
+            order = np.random.permutation(len(households_super_area))
+            households_super_area = [households_super_area[i] for i in order]
             for area in super_area.areas:
                 if area.care_home is not None:
                     people_in_care_home = [
@@ -117,27 +155,18 @@ class ResidenceVisitsDistributor(SocialVenueDistributor):
                         )
 
     def get_leisure_group(self, person):
-        residence_types = list(person.residence.group.residences_to_visit.keys())
+        residence_types = tuple(person.residence.group.residences_to_visit)
         if not residence_types:
             return
-        if len(residence_types) == 0:
+        if len(residence_types) == 1:
             which_type = residence_types[0]
         else:
-            if self.policy_reductions:
-                probabilities = self.policy_reductions
-            else:
-                probabilities = self.residence_type_probabilities
-            residence_type_probabilities = np.array(
-                [probabilities[residence_type] for residence_type in residence_types]
-            )
-            residence_type_probabilities = (
-                residence_type_probabilities / residence_type_probabilities.sum()
+            type_indices, probabilities = self._get_residence_type_probabilities(
+                residence_types
             )
-            type_sample = random_choice_numba(
-                tuple(range(len(residence_type_probabilities))),
-                residence_type_probabilities,
-            )
-            which_type = residence_types[type_sample]
+            which_type = residence_types[
+                random_choice_numba(type_indices, probabilities)
+            ]
         candidates = person.residence.group.residences_to_visit[which_type]
         n_candidates = len(candidates)
         if n_candidates == 0:
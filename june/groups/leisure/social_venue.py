@@ -3,14 +3,11 @@ import pandas as pd
 import logging
 from typing import List, Optional
 from enum import IntEnum
-from sklearn.neighbors import BallTree
 
 from june.groups import Supergroup, Group
-from june.geography import Area, Areas, SuperArea, SuperAreas, Geography
+from june.geography import Area, Areas, SuperArea, SuperAreas, Geography, SpatialIndex
 from june.mpi_setup import mpi_rank
 
-earth_radius = 6371  # km
-
 logger = logging.getLogger("social_venue")
 if mpi_rank > 0:
     logger.propagate = False
@@ -55,7 +52,7 @@ class SocialVenues(Supergroup):
     def __init__(self, social_venues: List[venue_class], make_tree=True):
         super().__init__(members=social_venues)
         logger.info(f"Domain {mpi_rank} has {len(self)} {self.spec}(s)")
-        self.ball_tree = None
+        self.spatial_index = None
         if make_tree:
             if not social_venues:
                 logger.warning(f"No social venues of type {self.spec} in this domain")
@@ -209,9 +206,13 @@ class SocialVenues(Supergroup):
         return cls(social_venues)
 
     def make_tree(self):
-        self.ball_tree = BallTree(
-            np.array([np.deg2rad(sv.coordinates) for sv in self]), metric="haversine"
-        )
+        self.spatial_index = SpatialIndex([sv.coordinates for sv in self])
+
+    @property
+    def ball_tree(self):
+        if self.spatial_index is None:
+            return None
+        return self.spatial_index.ball_tree
 
     def add_to_areas(self, areas: Areas):
         """
@@ -224,6 +225,46 @@ class SocialVenues(Supergroup):
                 )
             venue.area = areas.get_closest_areas(venue.coordinates)[0]
 
+    def get_closest_venues_idx(self, coordinates, k=1):
+        """
+        Batched query of the closest venues to each of the given coordinates.
+
+        Parameters
+        ----------
+        coordinates
+            array of coordinates of shape (n, 2) in the format [Latitude, Longitude]
+        k
+            number of neighbours desired
+
+        Returns
+        -------
+        An (n, k) array of indices into ``self.members``, sorted by distance.
+        """
+        if self.spatial_index is None:
+            raise SocialVenueError("Initialise ball tree first with self.make_tree()")
+        return self.spatial_index.query(coordinates, k=k)
+
+    def get_venues_in_radius_idx(self, coordinates, radius=5):
+        """
+        Batched query of the venues within a radius of each of the given coordinates.
+
+        Parameters
+        ----------
+        coordinates
+            array of coordinates of shape (n, 2) in the format [Latitude, Longitude]
+        radius
+            radius in km to query
+
+        Returns
+        -------
+        The venues in CSR format ``(indptr, indices)``: the venues close to
+        the i-th coordinate are ``indices[indptr[i] : indptr[i + 1]]``, as indices
+        into ``self.members`` sorted by distance.
+        """
+        if self.spatial_index is None:
+            raise SocialVenueError("Initialise ball tree first with self.make_tree()")
+        return self.spatial_index.query_radius(coordinates, radius=radius)
+
     def get_closest_venues(self, coordinates, k=1):
         """
         Queries the ball tree for the closests venues.
@@ -237,11 +278,7 @@ class SocialVenues(Supergroup):
         """
         if not self.members:
             return
-        if self.ball_tree is None:
-            raise SocialVenueError("Initialise ball tree first with self.make_tree()")
-        venue_idxs = self.ball_tree.query(
-            np.deg2rad(coordinates).reshape(1, -1), return_distance=False, k=k
-        ).flatten()
+        venue_idxs = self.get_closest_venues_idx(coordinates, k=k)[0]
         social_venues = self.members
         return [social_venues[idx] for idx in venue_idxs]
 
@@ -258,16 +295,7 @@ class SocialVenues(Supergroup):
         """
         if not self.members:
             return
-        if self.ball_tree is None:
-            raise SocialVenueError("Initialise ball tree first with self.make_tree()")
-        radius = radius / earth_radius
-        venue_idxs, _ = self.ball_tree.query_radius(
-            np.deg2rad(coordinates).reshape(1, -1),
-            r=radius,
-            sort_results=True,
-            return_distance=True,
-        )
-        venue_idxs = venue_idxs[0]
+        _, venue_idxs = self.get_venues_in_radius_idx(coordinates, radius=radius)
         if not venue_idxs.size:
             return None
         social_venues = self.members
@@ -1,7 +1,8 @@
 import numpy as np
+from array import array
 from random import random, sample, randint
 from numba import jit
-from typing import Dict
+from typing import Dict, List
 import yaml
 import re
 
@@ -10,7 +11,7 @@ from june.utils.parse_probabilities import parse_age_probabilities
 from june.geography import Area
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def random_choice_numba(arr, prob):
     """
     Fast implementation of np.random.choice
@@ -100,6 +101,16 @@ class SocialVenueDistributor:
         self.spec = re.findall("[A-Z][^A-Z]*", self.__class__.__name__)[:-1]
         self.spec = "_".join(self.spec).lower()
         self.nearest_venues_to_visit = nearest_venues_to_visit
+        # candidate venues of the areas in CSR form, and the venues drawn for
+        # their residents in the current time step (see draw_area_venues)
+        self._areas = []
+        self._area_rows = {}
+        self._area_slots = []
+        self._candidates = []
+        self._candidates_indptr = [0]
+        self._picks = array("q")
+        self._pick_cursor = array("q")
+        self._pick_end = array("q")
 
     @classmethod
     def from_config(
@@ -220,25 +231,117 @@ class SocialVenueDistributor:
         of them randomly, or ``nearest_venues_to_visit`` of them sorting by distance ascending.
         If there are no social venues inside the maximum distance, it returns the closest one.
         """
-        area_location = area.coordinates
-        potential_venues = self.social_venues.get_venues_in_radius(
-            area_location, self.maximum_distance
+        return self.get_possible_venues_for_areas([area])[0]
+
+    def get_possible_venues_for_areas(self, areas: List[Area]):
+        """
+        Batched version of ``get_possible_venues_for_area``. The venues in radius
+        of all the areas are found with a single query to the spatial index,
+        and the areas with no venue nearby are then assigned their closest one
+        in a second single query.
+
+        Returns
+        -------
+        A list with a tuple of venues (or None) for each area.
+        """
+        if not self.social_venues.members or not areas:
+            return [None for _ in areas]
+        coordinates = np.array([area.coordinates for area in areas])
+        indptr, venues_idx = self.social_venues.get_venues_in_radius_idx(
+            coordinates, self.maximum_distance
         )
-        if potential_venues is None:
-            closest_venue = self.social_venues.get_closest_venues(area_location, k=1)
-            if closest_venue is None:
-                return
-            return (closest_venue[0],)
-        if self.nearest_venues_to_visit > 0:
-            indices_len = min(len(potential_venues), self.nearest_venues_to_visit)
-            return tuple([potential_venues[idx] for idx in range(indices_len)])
-        else:
-            indices_len = min(len(potential_venues), self.neighbours_to_consider)
-            random_idx_choice = sample(range(len(potential_venues)), indices_len)
-            return tuple([potential_venues[idx] for idx in random_idx_choice])
+        n_venues_in_radius = np.diff(indptr)
+        areas_without_venues = np.flatnonzero(n_venues_in_radius == 0)
+        closest_venue_idx = {}
+        if areas_without_venues.size:
+            closest_venues = self.social_venues.get_closest_venues_idx(
+                coordinates[areas_without_venues], k=1
+            )[:, 0]
+            closest_venue_idx = dict(zip(areas_without_venues, closest_venues))
+        social_venues = self.social_venues.members
+        ret = []
+        for i in range(len(areas)):
+            if n_venues_in_radius[i] == 0:
+                ret.append((social_venues[closest_venue_idx[i]],))
+                continue
+            potential_venues_idx = venues_idx[indptr[i] : indptr[i + 1]]
+            if self.nearest_venues_to_visit > 0:
+                indices_len = min(
+                    len(potential_venues_idx), self.nearest_venues_to_visit
+                )
+                chosen_idx = potential_venues_idx[:indices_len]
+            else:
+                indices_len = min(
+                    len(potential_venues_idx), self.neighbours_to_consider
+                )
+                random_idx_choice = sample(
+                    range(len(potential_venues_idx)), indices_len
+                )
+                chosen_idx = potential_venues_idx[random_idx_choice]
+            ret.append(tuple([social_venues[idx] for idx in chosen_idx]))
+        return ret
+
+    def set_area_candidates(self, areas: List[Area]):
+        """
+        Stores the candidate venues of the areas (``area.social_venues``) in
+        CSR form: the candidates of the area in row i are
+        ``_candidates[_candidates_indptr[i]:_candidates_indptr[i+1]]``.
+        Areas not given here are added the first time one of their
+        residents looks for a venue.
+        """
+        for area in areas:
+            if id(area) not in self._area_rows:
+                self._add_area(area)
+
+    def _add_area(self, area: Area):
+        self._area_rows[id(area)] = len(self._areas)
+        # the areas are kept so that their ids are not reused
+        self._areas.append(area)
+        # one pick per resident, areas without people get one
+        self._area_slots.append(max(len(getattr(area, "people", ())), 1))
+        self._candidates += area.social_venues.get(self.spec, ())
+        self._candidates_indptr.append(len(self._candidates))
+
+    def draw_area_venues(self):
+        """
+        Draws, with a single vectorised draw, a venue for each resident of
+        every area for the coming time step. ``get_leisure_group`` then hands
+        out the venues of an area in turn, so the residents of an area still
+        pick their venues independently of each other. Called once per time
+        step by ``Leisure``.
+        """
+        if not self._areas:
+            return
+        indptr = np.array(self._candidates_indptr, dtype=np.int64)
+        slots = np.array(self._area_slots, dtype=np.int64)
+        row_of_slot = np.repeat(np.arange(len(slots)), slots)
+        starts = indptr[:-1][row_of_slot]
+        n_candidates = (indptr[1:] - indptr[:-1])[row_of_slot]
+        picks = starts + (np.random.random(len(row_of_slot)) * n_candidates).astype(
+            np.int64
+        )
+        picks[n_candidates == 0] = -1
+        slot_indptr = np.concatenate(([0], np.cumsum(slots)))
+        # compact arrays that are cheaper to index one by one than numpy
+        self._picks = array("q", picks.tobytes())
+        self._pick_cursor = array("q", slot_indptr[:-1].tobytes())
+        self._pick_end = array("q", slot_indptr[1:].tobytes())
 
     def get_leisure_group(self, person):
-        candidates = person.area.social_venues[self.spec]
+        area = person.area
+        row = self._area_rows.get(id(area))
+        if row is None:
+            self._add_area(area)
+        elif row < len(self._pick_end):
+            cursor = self._pick_cursor[row]
+            if cursor < self._pick_end[row]:
+                self._pick_cursor[row] = cursor + 1
+                pick = self._picks[cursor]
+                if pick < 0:
+                    return
+                return self._candidates[pick]
+        # areas added in this time step, or with all their venues handed out
+        candidates = area.social_venues[self.spec]
         n_candidates = len(candidates)
         if n_candidates == 0:
             return
@@ -278,27 +381,25 @@ class SocialVenueDistributor:
         ):
             return
         subgroup = person.leisure
-        if self.person_drags_household():
-            for mate in person.residence.group.residents:
-                if mate != person:
-                    if mate.busy:
-                        if (
-                            mate.leisure is not None
-                        ):  # this perosn has already been assigned somewhere
-                            if not mate.leisure.external:
-                                if mate not in mate.leisure.people:
-                                    # person active somewhere else, let's not disturb them
-                                    continue
-                                mate.leisure.remove(mate)
-                            else:
-                                ret = to_send_abroad.delete_person(mate, mate.leisure)
-                                if ret:
-                                    # person active somewhere else, let's not disturb them
-                                    continue
-                            if not subgroup.external:
-                                subgroup.append(mate)
-                            else:
-                                to_send_abroad.add_person(mate, subgroup)
-                    mate.subgroups.leisure = (
-                        subgroup  # person will be added later in the simulator.
-                    )
+        if not self.person_drags_household():
+            return
+        for mate in person.residence.group.residents:
+            if mate is person:
+                continue
+            mate_leisure = mate.leisure
+            # a busy mate already assigned to a venue is moved to this one
+            if mate.busy and mate_leisure is not None:
+                if not mate_leisure.external:
+                    if mate not in mate_leisure:
+                        # person active somewhere else, let's not disturb them
+                        continue
+                    mate_leisure.remove(mate)
+                elif to_send_abroad.delete_person(mate, mate_leisure):
+                    # person active somewhere else, let's not disturb them
+                    continue
+                if not subgroup.external:
+                    subgroup.append(mate)
+                else:
+                    to_send_abroad.add_person(mate, subgroup)
+            # person will be added later in the simulator.
+            mate.subgroups.leisure = subgroup
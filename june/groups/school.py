@@ -8,9 +8,8 @@ from typing import List, Tuple, Dict, Optional
 
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import BallTree
 
-from june.geography import Geography, Areas, Area
+from june.geography import Geography, Areas, Area, SpatialIndex
 from june.groups import Group, Subgroup, Supergroup
 from june.groups.group.interactive import InteractiveGroup
 
@@ -110,8 +109,10 @@ class School(Group):
         else:
             self.years = tuple(years)
 
-    def get_interactive_group(self, people_from_abroad=None):
-        return InteractiveSchool(self, people_from_abroad=people_from_abroad)
+    def get_interactive_group(self, people_from_abroad=None, workspace=None):
+        return InteractiveSchool(
+            self, people_from_abroad=people_from_abroad, workspace=workspace
+        )
 
     def add(self, person):
         if person.age <= self.age_max:
@@ -195,7 +196,7 @@ class Schools(Supergroup):
     def __init__(
         self,
         schools: List["venue_class"],
-        school_trees: Optional[Dict[int, BallTree]] = None,
+        school_trees: Optional[Dict[int, SpatialIndex]] = None,
         agegroup_to_global_indices: dict = None,
     ):
         """
@@ -207,8 +208,9 @@ class Schools(Supergroup):
             list of areas for which to build schools
         schools:
             list of school instances
-        school_tree:
-            BallTree built on all schools coordinates
+        school_trees:
+            spatial index per age, built on the coordinates of the schools
+            that accept pupils of that age
         agegroup_to_global_indices:
             dictionary to map the
         """
@@ -357,9 +359,9 @@ class Schools(Supergroup):
         return school_trees, school_agegroup_to_global_indices
 
     @staticmethod
-    def _create_school_tree(schools_coordinates: np.ndarray) -> BallTree:
+    def _create_school_tree(schools_coordinates: np.ndarray) -> SpatialIndex:
         """
-        Reads school location and sizes, it initializes a KD tree on a sphere,
+        Reads school location and sizes, it initializes a spatial index on a sphere,
         to query the closest schools to a given location.
 
         Parameters
@@ -372,8 +374,7 @@ class Schools(Supergroup):
         Tree to query nearby schools
 
         """
-        school_tree = BallTree(np.deg2rad(schools_coordinates), metric="haversine")
-        return school_tree
+        return SpatialIndex(schools_coordinates)
 
     def get_closest_schools(
         self, age: int, coordinates: Tuple[float, float], k: int
@@ -397,13 +398,29 @@ class Schools(Supergroup):
         a given age group
 
         """
-        school_tree = self.school_trees[age]
-        coordinates_rad = np.deg2rad(coordinates).reshape(1, -1)
-        k = min(k, school_tree.data.shape[0])
-        distances, neighbours = school_tree.query(
-            coordinates_rad, k=k, sort_results=True
-        )
-        return neighbours[0]
+        return self.get_closest_schools_idx(age, coordinates, k)[0]
+
+    def get_closest_schools_idx(self, age: int, coordinates: np.ndarray, k: int):
+        """
+        Batched version of ``get_closest_schools``.
+
+        Parameters
+        ----------
+        age:
+            age of the pupils
+        coordinates:
+            array of shape (n, 2) with latitudes and longitudes
+        k:
+            number of neighbours
+
+        Returns
+        -------
+        An (n, k) array with the indices of the closest schools within the
+        school tree of the given age group, sorted by distance. Use
+        ``self.school_agegroup_to_global_indices[age]`` to map them to
+        ``self.members``.
+        """
+        return self.school_trees[age].query(coordinates, k=k)
 
     @property
     def n_teachers(self):
@@ -414,7 +431,7 @@ class Schools(Supergroup):
         return sum([school.n_pupils for school in self.members])
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, cache=True)
 def _translate_school_subgroup(idx, school_years):
     if idx > 0:
         idx = school_years[idx - 1] + 1
@@ -422,8 +439,10 @@ def _translate_school_subgroup(idx, school_years):
 
 
 class InteractiveSchool(InteractiveGroup):
-    def __init__(self, group: "Group", people_from_abroad=None):
-        super().__init__(group=group, people_from_abroad=people_from_abroad)
+    def __init__(self, group: "Group", people_from_abroad=None, workspace=None):
+        super().__init__(
+            group=group, people_from_abroad=people_from_abroad, workspace=workspace
+        )
         self.school_years = group.years
         self.sector = group.sector
 
@@ -490,6 +509,10 @@ class InteractiveSchool(InteractiveGroup):
                             ret[i, j] = contact_matrix[year_idx_i, year_idx_j]
         return ret
 
+    @property
+    def contact_matrix_key(self):
+        return tuple(self.school_years)
+
     def get_processed_beta(self, betas, beta_reductions):
         """
         Returns the processed contact intensity, by taking into account the policies
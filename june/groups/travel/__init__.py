@@ -1,4 +1,5 @@
 from .mode_of_transport import ModeOfTransport, ModeOfTransportGenerator
+from .commute_routes import CommuteRoutes
 from .travel import Travel
 from .transport import (
     Transport,
@@ -0,0 +1,106 @@
+import logging
+from typing import List
+
+import numpy as np
+
+from june.geography import Cities
+
+logger = logging.getLogger("commute_routes")
+
+
+class CommuteRoutes:
+    """
+    Precomputed commute route of every public transport commuter.
+
+    Each commuter is mapped to a route, which is either the internal commute of
+    their working city (a random city station), or the inter-city station they
+    go through. The routes are stored in a dense array indexed by person id, so
+    that finding the commute subgroup of a person is a single array lookup instead
+    of checking the person id against the commuter containers of their city and
+    closest station.
+    """
+
+    no_route = -1
+
+    def __init__(self, route_per_person: np.ndarray, id_offset: int, routes: List):
+        """
+        Parameters
+        ----------
+        route_per_person
+            array with the route index of each person, indexed by
+            ``person.id - id_offset``. People without a route have ``no_route``.
+        id_offset
+            id of the first person in ``route_per_person``
+        routes
+            list of callables returning a commute subgroup, one per route.
+        """
+        self.route_per_person = route_per_person
+        self.id_offset = id_offset
+        self.routes = routes
+
+    @classmethod
+    def from_cities(cls, cities: Cities) -> "CommuteRoutes":
+        """
+        Builds the routes table from the commuters of the given cities and of their
+        inter-city stations. Internal commuters take precedence over inter-city
+        ones, as in ``City.get_commute_subgroup``.
+        """
+        routes = []
+        inter_city_ids, inter_city_routes = [], []
+        internal_ids, internal_routes = [], []
+        for city in cities or []:
+            if not city.has_stations:
+                continue
+            for station in city.inter_city_stations:
+                if not station.commuter_ids:
+                    continue
+                inter_city_ids.append(np.fromiter(station.commuter_ids, dtype=np.int64))
+                inter_city_routes.append(
+                    np.full(len(station.commuter_ids), len(routes), dtype=np.int32)
+                )
+                routes.append(station.get_commute_subgroup)
+            if city.internal_commuter_ids and len(city.city_stations) > 0:
+                internal_ids.append(
+                    np.fromiter(city.internal_commuter_ids, dtype=np.int64)
+                )
+                internal_routes.append(
+                    np.full(
+                        len(city.internal_commuter_ids), len(routes), dtype=np.int32
+                    )
+                )
+                routes.append(city.get_internal_commute_subgroup)
+        person_ids = inter_city_ids + internal_ids
+        if not person_ids:
+            return cls(np.empty(0, dtype=np.int32), 0, routes)
+        person_ids = np.concatenate(person_ids)
+        person_routes = np.concatenate(inter_city_routes + internal_routes)
+        id_offset = person_ids.min()
+        route_per_person = np.full(
+            person_ids.max() - id_offset + 1, cls.no_route, dtype=np.int32
+        )
+        # later assignments win, so internal commuters overwrite inter-city ones
+        route_per_person[person_ids - id_offset] = person_routes
+        logger.info(
+            f"Built commute routes for {len(person_ids)} commuters "
+            f"through {len(routes)} routes."
+        )
+        return cls(route_per_person, int(id_offset), routes)
+
+    def __len__(self):
+        return np.count_nonzero(self.route_per_person != self.no_route)
+
+    def get_route(self, person_id: int) -> int:
+        idx = person_id - self.id_offset
+        if idx < 0 or idx >= len(self.route_per_person):
+            return self.no_route
+        return self.route_per_person[idx]
+
+    def get_commute_subgroup(self, person):
+        """
+        Gets the commute subgroup of the person, or None if the person
+        does not commute through any station.
+        """
+        route = self.get_route(person.id)
+        if route == self.no_route:
+            return
+        return self.routes[route]()
@@ -7,6 +7,7 @@ from june.geography import Cities, Stations
 from june.world import World
 from .mode_of_transport import ModeOfTransport, ModeOfTransportGenerator
 from .transport import CityTransports, InterCityTransports
+from .commute_routes import CommuteRoutes
 
 
 logger = logging.getLogger("travel")
@@ -35,6 +36,7 @@ class Travel:
         self.city_stations_filename = city_stations_filename
         with open(commute_config_filename) as f:
             self.commute_config = yaml.load(f, Loader=yaml.FullLoader)
+        self.commute_routes = None
 
     def initialise_commute(
         self, world: World, maximum_number_commuters_per_city_station=200000
@@ -57,12 +59,24 @@ class Travel:
             world=world, commuters_dict=commuters_dict
         )
         self._create_transports_in_cities(world)
+        self.build_commute_routes(world)
+
+    def build_commute_routes(self, world: World):
+        """
+        Precomputes the commute route of every commuter in the world, so that
+        their commute subgroup can be found with a single lookup. Needs to be
+        called again if the commuters of the cities or stations change.
+        """
+        self.commute_routes = CommuteRoutes.from_cities(getattr(world, "cities", None))
 
     def get_commute_subgroup(self, person):
         work_city = person.work_city
         if work_city is None or not person.mode_of_transport.is_public:
             return
-        subgroup = work_city.get_commute_subgroup(person)
+        if self.commute_routes is None:
+            subgroup = work_city.get_commute_subgroup(person)
+        else:
+            subgroup = self.commute_routes.get_commute_subgroup(person)
         person.subgroups.commute = subgroup
         return subgroup
 
@@ -3,7 +3,7 @@ import yaml
 from random import random
 from typing import List, Dict
 
-from june.groups.group.interactive import InteractiveGroup
+from june.groups.group.interactive import InteractiveGroup, InteractionWorkspace
 from june.groups import InteractiveSchool
 from june.records import Record
 from june import paths
@@ -41,7 +41,11 @@ class Interaction:
             groups=self.betas.keys(),
             alpha_physical=alpha_physical,
         )
+        # contact matrices scaled by beta and delta time, see get_kernel
+        self._kernels = {}
         self.beta_reductions = {}
+        # buffers reused by the interactive groups of every time step
+        self.workspace = InteractionWorkspace()
 
     @classmethod
     def from_file(cls, config_filename: str = default_config_filename) -> "Interaction":
@@ -54,6 +58,16 @@ class Interaction:
             contact_matrices=contact_matrices,
         )
 
+    @property
+    def beta_reductions(self):
+        return self._beta_reductions
+
+    @beta_reductions.setter
+    def beta_reductions(self, beta_reductions):
+        # the interaction policies set them at every time step
+        self._beta_reductions = beta_reductions
+        self._kernels.clear()
+
     def get_raw_contact_matrices(
         self, groups: List[str], input_contact_matrices: dict, alpha_physical: float
     ):
@@ -103,34 +117,64 @@ class Interaction:
             betas=self.betas, beta_reductions=self.beta_reductions
         )
 
-    def create_infector_tensor(
-        self,
-        infectors_per_infection_per_subgroup,
-        subgroup_sizes,
-        contact_matrix,
-        beta,
-        delta_time,
-    ):
-        ret = {}
-        for inf_id in infectors_per_infection_per_subgroup:
-            infector_matrix = np.zeros_like(contact_matrix, dtype=np.float64)
-            for subgroup_id in infectors_per_infection_per_subgroup[inf_id]:
-                subgroup_trans_prob = sum(
-                    infectors_per_infection_per_subgroup[inf_id][subgroup_id][
-                        "trans_probs"
-                    ]
-                )
-                for i in range(len(contact_matrix)):
-                    subgroup_size = subgroup_sizes[subgroup_id]
-                    if i == subgroup_id:
-                        subgroup_size = max(1, subgroup_size - 1)
-                    infector_matrix[i, subgroup_id] = (
-                        contact_matrix[i, subgroup_id]
-                        * subgroup_trans_prob
-                        / subgroup_size
-                    )
-            ret[inf_id] = infector_matrix * beta * delta_time
-        return ret
+    def get_kernel(
+        self, interactive_group: InteractiveGroup, beta: float, delta_time: float
+    ) -> np.ndarray:
+        """
+        Processed contact matrix of the group multiplied by its beta and the
+        time step. Groups of a spec share the same matrix (schools with the
+        same years), and their betas only change with the policies and the
+        regional compliances, so the kernels are cached by spec, matrix key,
+        beta and time step. The cache is cleared when the beta reductions
+        change.
+        """
+        key = (
+            interactive_group.spec,
+            interactive_group.contact_matrix_key,
+            beta,
+            delta_time,
+        )
+        kernel = self._kernels.get(key)
+        if kernel is None:
+            contact_matrix = interactive_group.get_processed_contact_matrix(
+                self.contact_matrices[interactive_group.spec]
+            )
+            kernel = contact_matrix * (beta * delta_time)
+            self._kernels[key] = kernel
+        return kernel
+
+    @staticmethod
+    def _get_infector_arrays(interactive_group: InteractiveGroup, n_subgroups: int):
+        """
+        Infection ids present in the group, in the order they first appear
+        among the infectors, the summed transmission probability of each
+        infection in each subgroup, and the number of people each person meets
+        in each subgroup (not counting themselves).
+        """
+        unique_ids, first_indices, unique_indices = np.unique(
+            interactive_group.infector_infection_ids,
+            return_index=True,
+            return_inverse=True,
+        )
+        # the variant drawn for each infected person depends on this order
+        order = np.argsort(first_indices)
+        infection_ids = unique_ids[order]
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+        infection_indices = ranks[unique_indices.reshape(-1)]
+        trans_probs = np.bincount(
+            infection_indices * n_subgroups + interactive_group.infector_subgroups,
+            weights=interactive_group.infector_trans_probs,
+            minlength=len(infection_ids) * n_subgroups,
+        ).reshape(len(infection_ids), n_subgroups)
+        subgroup_sizes = np.zeros(n_subgroups, dtype=np.float64)
+        n_sizes = min(n_subgroups, len(interactive_group.subgroup_sizes))
+        subgroup_sizes[:n_sizes] = interactive_group.subgroup_sizes[:n_sizes]
+        # people don't interact with themselves
+        size_matrix = np.tile(subgroup_sizes, (n_subgroups, 1))
+        size_matrix[np.diag_indices(n_subgroups)] -= 1
+        np.maximum(size_matrix, 1, out=size_matrix)
+        return infection_ids, trans_probs, size_matrix
 
     def time_step_for_group(
         self,
@@ -144,9 +188,9 @@ class Interaction:
         give the beta and contact matrix to the group to process it. There may be groups
         that change the betas depending on the situation, ie, a school interactive group,
         has to treat the contact matrix on a special way, or the company beta may change
-        due to the company's sector. Second, we iterate over all subgroups that contain
-        susceptible people, and compute the interaction between them and the subgroups that
-        contain infected people.
+        due to the company's sector. Second, we compute for every susceptible the
+        transmission from the subgroups that contain infected people, and check who
+        got infected.
 
         Parameters
         ----------
@@ -156,125 +200,87 @@ class Interaction:
             Time interval of the interaction
         """
         interactive_group = group.get_interactive_group(
-            people_from_abroad=people_from_abroad
+            people_from_abroad=people_from_abroad, workspace=self.workspace
         )
         if not interactive_group.must_timestep:
             return [], [], interactive_group.size
-        infected_ids = []
-        infection_ids = []
-        to_blame_subgroups = []
         beta = self._get_interactive_group_beta(interactive_group)
-        contact_matrix_raw = self.contact_matrices[group.spec]
-        contact_matrix = interactive_group.get_processed_contact_matrix(
-            contact_matrix_raw
+        kernel = self.get_kernel(interactive_group, beta, delta_time)
+        infection_ids, trans_probs, size_matrix = self._get_infector_arrays(
+            interactive_group, len(kernel)
         )
-        infector_tensor = self.create_infector_tensor(
-            interactive_group.infectors_per_infection_per_subgroup,
-            interactive_group.subgroup_sizes,
-            contact_matrix,
-            beta,
-            delta_time,
+        contacts_per_person = kernel / size_matrix
+        # transmission from each infection to each subgroup, for every
+        # susceptible
+        subgroup_transmissions = trans_probs @ contacts_per_person.T
+        transmission_parameters = subgroup_transmissions[
+            :, interactive_group.susceptible_subgroups
+        ].T * interactive_group.get_susceptibilities(infection_ids)
+        total_transmissions = transmission_parameters.sum(axis=1)
+        # one draw per susceptible, in order
+        draws = np.fromiter(
+            (random() for _ in range(len(total_transmissions))),
+            dtype=np.float64,
+            count=len(total_transmissions),
         )
-
-        for (
-            susceptible_subgroup_id,
-            subgroup_susceptibles,
-        ) in interactive_group.susceptibles_per_subgroup.items():
-            (
-                new_infected_ids,
-                new_infection_ids,
-                new_to_blame_subgroups,
-            ) = self._time_step_for_subgroup(
-                infector_tensor=infector_tensor,
-                susceptible_subgroup_id=susceptible_subgroup_id,
-                subgroup_susceptibles=subgroup_susceptibles,
+        infected = np.flatnonzero(draws < 1 - np.exp(-total_transmissions))
+        # the variant and subgroup of every infection are drawn first, then the
+        # infectors
+        infected_ids = []
+        new_infection_ids = []
+        to_blame_subgroups = []
+        for susceptible_index in infected:
+            if len(infection_ids) == 1:
+                infection_index = 0
+            else:
+                infection_index = np.random.choice(
+                    len(infection_ids),
+                    p=transmission_parameters[susceptible_index]
+                    / total_transmissions[susceptible_index],
+                )
+            to_blame_subgroups.append(
+                self._blame_subgroup(
+                    contacts_per_person[
+                        interactive_group.susceptible_subgroups[susceptible_index]
+                    ]
+                    * trans_probs[infection_index]
+                )
             )
-            infected_ids += new_infected_ids
-            infection_ids += new_infection_ids
-            to_blame_subgroups += new_to_blame_subgroups
-        to_blame_ids = self._blame_individuals(
-            to_blame_subgroups,
-            infection_ids,
-            interactive_group.infectors_per_infection_per_subgroup,
-        )
+            infected_ids.append(
+                int(interactive_group.susceptible_ids[susceptible_index])
+            )
+            new_infection_ids.append(int(infection_ids[infection_index]))
+        to_blame_ids = [
+            self._blame_individual(interactive_group, infection_id, subgroup)
+            for infection_id, subgroup in zip(new_infection_ids, to_blame_subgroups)
+        ]
         if record:
             self._log_infections_to_record(
                 infected_ids=infected_ids,
-                infection_ids=infection_ids,
+                infection_ids=new_infection_ids,
                 to_blame_ids=to_blame_ids,
                 record=record,
                 group=group,
             )
-        return infected_ids, infection_ids, interactive_group.size
-
-    def _time_step_for_subgroup(
-        self, infector_tensor, susceptible_subgroup_id, subgroup_susceptibles
-    ):
-        """
-        Time step for one susceptible subgroup. We first compute the combined
-        effective transmission probability of all the subgroups that contain infected
-        people, and then run this effective transmission over the susceptible subgroup,
-        to check who got infected.
-
-        Parameters
-        ----------
-        """
-        new_infected_ids = []
-        new_infection_ids = []
-        new_to_blame_subgroups = []
-        infection_ids = list(infector_tensor.keys())
-        for susceptible_id, susceptibility_dict in subgroup_susceptibles.items():
-            infection_transmission_parameters = []
-            for infection_id in infector_tensor:
-                susceptibility = susceptibility_dict.get(infection_id, 1.0)
-                infector_transmission = infector_tensor[infection_id][
-                    susceptible_subgroup_id
-                ].sum()
-                infection_transmission_parameters.append(
-                    infector_transmission * susceptibility
-                )
-            infection_id = self._gets_infected(
-                np.array(infection_transmission_parameters), infection_ids
-            )
-            if infection_id is not None:
-                new_infected_ids.append(susceptible_id)
-                new_infection_ids.append(infection_id)
-                new_to_blame_subgroups.append(
-                    self._blame_subgroup(
-                        infector_tensor[infection_id][susceptible_subgroup_id]
-                    )
-                )
-        return new_infected_ids, new_infection_ids, new_to_blame_subgroups
-
-    def _gets_infected(self, infection_transmission_parameters, infection_ids):
-        total_exp = infection_transmission_parameters.sum()
-        if random() < 1 - np.exp(-total_exp):
-            if len(infection_ids) == 1:
-                return infection_ids[0]
-            return np.random.choice(
-                infection_ids, p=infection_transmission_parameters / total_exp
-            )
+        return infected_ids, new_infection_ids, interactive_group.size
 
     def _blame_subgroup(self, vector):
         probs = vector / vector.sum()
         return np.random.choice(len(vector), p=probs)
 
-    def _blame_individuals(
-        self, to_blame_subgroups, infection_ids, infectors_per_infection_per_subgroup
-    ):
-        ret = []
-        for infection_id, subgroup in zip(infection_ids, to_blame_subgroups):
-            candidates_ids = infectors_per_infection_per_subgroup[infection_id][
-                subgroup
-            ]["ids"]
-            candidates_probs = np.array(
-                infectors_per_infection_per_subgroup[infection_id][subgroup][
-                    "trans_probs"
-                ]
+    def _blame_individual(
+        self, interactive_group: InteractiveGroup, infection_id: int, subgroup: int
+    ) -> int:
+        candidates = (interactive_group.infector_infection_ids == infection_id) & (
+            interactive_group.infector_subgroups == subgroup
+        )
+        candidates_probs = interactive_group.infector_trans_probs[candidates]
+        return int(
+            np.random.choice(
+                interactive_group.infector_ids[candidates],
+                p=candidates_probs / candidates_probs.sum(),
             )
-            candidates_probs /= candidates_probs.sum()
-            ret.append(np.random.choice(candidates_ids, p=candidates_probs))
-        return ret
+        )
 
     def _log_infections_to_record(
         self,
@@ -13,24 +13,37 @@ This handler is used to deal with logging with mpi4py in Python3.
 """
 
 # %% mpi4py logging handler
-from mpi4py import MPI
 import logging
 from os.path import abspath
 
+from june.mpi_setup import MPI, SerialComm, mpi_comm
+
 
 class MPIFileHandler(logging.FileHandler):
+    """
+    Handler writing the records of every rank to a shared file. In serial
+    runs, where MPI is not started, it is a plain ``FileHandler`` appending
+    to the file.
+    """
+
     def __init__(
         self,
         filename,
         mode=MPI.MODE_WRONLY | MPI.MODE_CREATE | MPI.MODE_APPEND,
         encoding="utf-8",
         delay=False,
-        comm=MPI.COMM_WORLD,
+        comm=None,
     ):
+        self.comm = mpi_comm if comm is None else comm
+        self.serial = isinstance(self.comm, SerialComm)
+        if self.serial:
+            logging.FileHandler.__init__(
+                self, filename, mode="a", encoding=encoding, delay=delay
+            )
+            return
         self.baseFilename = abspath(filename)
         self.mode = mode
         self.encoding = encoding
-        self.comm = comm
         if delay:
             # We don't open the stream, but we still need to call the
             # Handler constructor to set level, formatter, lock etc.
@@ -40,6 +53,8 @@ class MPIFileHandler(logging.FileHandler):
             logging.StreamHandler.__init__(self, self._open())
 
     def _open(self):
+        if self.serial:
+            return logging.FileHandler._open(self)
         stream = MPI.File.Open(self.comm, self.baseFilename, self.mode)
         stream.Set_atomicity(True)
         return stream
@@ -61,6 +76,9 @@ class MPIFileHandler(logging.FileHandler):
             bytestring, so `encode` is used. `Write_shared` should be invoked
             only once in each all of this emit function to keep atomicity.
         """
+        if self.serial:
+            logging.FileHandler.emit(self, record)
+            return
         try:
             msg = self.format(record)
             stream = self.stream
@@ -70,6 +88,9 @@ class MPIFileHandler(logging.FileHandler):
             self.handleError(record)
 
     def close(self):
+        if self.serial:
+            logging.FileHandler.close(self)
+            return
         if self.stream:
             self.stream.Sync()
             self.stream.Close()
@@ -78,8 +99,7 @@ class MPIFileHandler(logging.FileHandler):
 
 # %% example code
 if __name__ == "__main__":
-    comm = MPI.COMM_WORLD
-    logger = logging.getLogger("rank[%i]" % comm.rank)
+    logger = logging.getLogger("rank[%i]" % mpi_comm.Get_rank())
     logger.setLevel(logging.DEBUG)
 
     mh = MPIFileHandler("logfile.log")
@@ -1,8 +1,99 @@
-from mpi4py import MPI
+import os
+import pickle
+from time import perf_counter
+from typing import Optional
+
+import mpi4py
 import numpy as np
 
+# environment variables set by the MPI launchers (mpirun, mpiexec, srun)
+mpi_launcher_variables = (
+    "OMPI_COMM_WORLD_SIZE",
+    "PMI_SIZE",
+    "PMIX_RANK",
+    "MPI_LOCALNRANKS",
+)
+
+
+def launched_with_mpi() -> bool:
+    """
+    Whether this process has been started by an MPI launcher. It can be
+    forced with the JUNE_USE_MPI environment variable (0 or 1).
+    """
+    use_mpi = os.environ.get("JUNE_USE_MPI")
+    if use_mpi is not None:
+        return use_mpi.lower() not in ("0", "false", "no")
+    return any(variable in os.environ for variable in mpi_launcher_variables)
+
+
+class SerialRequest:
+    """
+    Request of a communication of a ``SerialComm``, which is always complete.
+    """
+
+    def Wait(self):
+        return None
+
+    def Test(self):
+        return True
+
+
+class SerialComm:
+    """
+    Communicator of a run with a single process, with the interface of the
+    mpi4py communicator that JUNE uses. Nothing is sent: the collectives
+    return the data of the only rank. It is used when the process is not
+    launched with MPI, so serial runs do not initialise MPI.
+    """
+
+    def Get_rank(self):
+        return 0
+
+    def Get_size(self):
+        return 1
+
+    def Barrier(self):
+        pass
+
+    def bcast(self, obj, root=0):
+        return obj
+
+    def gather(self, obj, root=0):
+        return [obj]
+
+    def allgather(self, obj):
+        return [obj]
+
+    def alltoall(self, objs):
+        return list(objs)
+
+    def Alltoall(self, sendbuf, recvbuf):
+        recvbuf[:] = sendbuf
+
+    def Allreduce(self, sendbuf, recvbuf, op=None):
+        recvbuf[:] = sendbuf
+
+    def Alltoallv(self, sendbuf, recvbuf):
+        buffer, count, displ, _ = sendbuf
+        r_buffer, _, rdispl, _ = recvbuf
+        r_buffer[rdispl[0] : rdispl[0] + count[0]] = buffer[
+            displ[0] : displ[0] + count[0]
+        ]
+
+    def Ialltoallv(self, sendbuf, recvbuf):
+        self.Alltoallv(sendbuf, recvbuf)
+        return SerialRequest()
+
 
-mpi_comm = MPI.COMM_WORLD
+if not launched_with_mpi():
+    # the MPI constants can be used, but MPI is not started
+    mpi4py.rc.initialize = False
+from mpi4py import MPI  # noqa: E402
+
+if MPI.Is_initialized():
+    mpi_comm = MPI.COMM_WORLD
+else:
+    mpi_comm = SerialComm()
 mpi_rank = mpi_comm.Get_rank()
 mpi_size = mpi_comm.Get_size()
 
@@ -150,34 +241,158 @@ class MovablePeople:
                 raise
 
 
-def move_info(info2move):
+class MovablePeopleExchange:
     """
-    Send a list of arrays of uint32 integers to all ranks,
-    and receive arrays from all ranks.
+    Non-blocking exchange of the movable people between ranks.
+
+    The group structure of the people sent to each rank (the keys of
+    ``MovablePeople.serialise``) is small and is exchanged straight away,
+    so every rank knows which of its groups have visitors from abroad.
+    The people data is pickled and sent with a non-blocking ``Ialltoallv``,
+    and only needs to be waited for with ``finish`` before running the
+    interaction of the groups with visitors. The other groups can run
+    their interaction while the data is in flight.
+    """
+
+    def __init__(self, movable_people: Optional[MovablePeople]):
+        tick = perf_counter()
+        self.movable_people = movable_people
+        self.n_people_going_abroad = 0
+        if movable_people is None:
+            # single process, there is nobody to send or receive
+            self.keys = [None] * mpi_size
+            self.groups_from_abroad = set()
+            self.n_people_from_abroad = 0
+            self.nbytes = 0
+            self._request = SerialRequest()
+            self.comms_time = 0.0
+            return
+        payloads, headers = [], []
+        for rank in range(mpi_size):
+            if rank == mpi_rank:
+                keys, payload = None, b""
+            else:
+                keys, data, n_this_rank = movable_people.serialise(rank)
+                payload = (
+                    pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+                    if n_this_rank
+                    else b""
+                )
+                self.n_people_going_abroad += n_this_rank
+            payloads.append(payload)
+            headers.append((keys, len(payload)))
+        headers = mpi_comm.alltoall(headers)
+        self.keys = [keys for keys, _ in headers]
+        send_count = np.array([len(payload) for payload in payloads])
+        recv_count = np.array([nbytes for _, nbytes in headers])
+        self._send_buffer = np.frombuffer(b"".join(payloads), dtype=np.uint8)
+        self._recv_buffer = np.empty(recv_count.sum(), dtype=np.uint8)
+        self._recv_displ = np.concatenate(([0], np.cumsum(recv_count)[:-1]))
+        self._recv_count = recv_count
+        self.nbytes = int(send_count.sum() + recv_count.sum())
+        self._request = mpi_comm.Ialltoallv(
+            [
+                self._send_buffer,
+                send_count,
+                np.concatenate(([0], np.cumsum(send_count)[:-1])),
+                MPI.BYTE,
+            ],
+            [self._recv_buffer, recv_count, self._recv_displ, MPI.BYTE],
+        )
+        self.groups_from_abroad = {
+            (group_spec, group_id)
+            for rank_keys in self.keys
+            if rank_keys is not None
+            for group_spec, group_id, _, _ in rank_keys
+        }
+        self.n_people_from_abroad = sum(
+            n_data
+            for rank_keys in self.keys
+            if rank_keys is not None
+            for _, _, _, n_data in rank_keys
+        )
+        self.comms_time = perf_counter() - tick
+
+    def progress(self):
+        """
+        Lets MPI progress the exchange while the rank is computing.
+        """
+        return self._request.Test()
+
+    def finish(self):
+        """
+        Waits for the people data and updates the movable people with it.
+        Returns the people from abroad, and the number of people coming from
+        and going abroad.
+        """
+        tick = perf_counter()
+        self._request.Wait()
+        if self.movable_people is None:
+            return {}, 0, 0
+        for rank, keys in enumerate(self.keys):
+            if not keys:
+                continue
+            start = self._recv_displ[rank]
+            data = pickle.loads(
+                self._recv_buffer[start : start + self._recv_count[rank]].tobytes()
+            )
+            self.movable_people.update(rank, keys, data)
+        self.comms_time += perf_counter() - tick
+        return (
+            self.movable_people.skinny_in,
+            self.n_people_from_abroad,
+            self.n_people_going_abroad,
+        )
+
+
+def start_move_info(info2move):
+    """
+    Starts sending a list of arrays of uint32 integers to all ranks,
+    and receiving arrays from all ranks, without waiting for it to finish.
+    The arrays can have several columns, packing the fields of each item
+    in one row, so they are sent with a single count exchange and a single
+    ``Ialltoallv``. The received data can be read from the buffer after
+    ``request.Wait()``.
 
+    Returns
+    -------
+    request, receive buffer (with the same columns as the arrays sent),
+    number of items sent and number of items received
     """
     # flatten list of uneven vectors of data, ensure correct type
     assert len(info2move) == mpi_size
-    buffer = np.concatenate(info2move)
+    n_fields = 1 if info2move[0].ndim == 1 else info2move[0].shape[1]
+    buffer = np.concatenate([np.ravel(x) for x in info2move])
     assert buffer.dtype == np.uint32
 
-    n_sending = len(buffer)
-    count = np.array([len(x) for x in info2move])
-    displ = np.array([sum(count[:p]) for p in range(len(info2move))])
+    count = np.array([x.size for x in info2move], dtype=np.int64)
+    displ = np.concatenate(([0], np.cumsum(count)[:-1]))
 
     # send my count to all processes
-    values = mpi_comm.alltoall(count)
-
-    n_receiving = sum(values)
+    values = np.empty(mpi_size, dtype=np.int64)
+    mpi_comm.Alltoall(count, values)
 
     # now all processes know how much data they will get,
     # and how much from each rank
 
-    r_buffer = np.zeros(n_receiving, dtype=np.uint32)
-    rdisp = np.array([sum(values[:p]) for p in range(len(values))])
+    r_buffer = np.zeros(values.sum(), dtype=np.uint32)
+    rdisp = np.concatenate(([0], np.cumsum(values)[:-1]))
 
-    mpi_comm.Alltoallv(
+    request = mpi_comm.Ialltoallv(
         [buffer, count, displ, MPI.UINT32_T], [r_buffer, values, rdisp, MPI.UINT32_T]
     )
+    if n_fields > 1:
+        r_buffer = r_buffer.reshape(-1, n_fields)
+
+    return request, r_buffer, len(buffer) // n_fields, len(r_buffer)
+
 
+def move_info(info2move):
+    """
+    Send a list of arrays of uint32 integers to all ranks,
+    and receive arrays from all ranks.
+
+    """
+    request, r_buffer, n_sending, n_receiving = start_move_info(info2move)
+    request.Wait()
     return r_buffer, n_sending, n_receiving
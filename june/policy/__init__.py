@@ -16,9 +16,11 @@ from .leisure_policies import (
     ChangeLeisureProbability,
     ChangeVisitsProbability,
 )
+from .policy_population import PolicyPopulation
 from .individual_policies import (
     IndividualPolicy,
     IndividualPolicies,
+    CompiledIndividualPolicies,
     StayHome,
     SevereSymptomsStayHome,
     Quarantine,
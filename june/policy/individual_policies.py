@@ -1,16 +1,21 @@
 import numpy as np
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 import datetime
 from random import random
 
 from june.epidemiology.infection import SymptomTag
 from june.demography.person import Person
 from june.policy import Policy, PolicyCollection
+from june.policy.policy_population import PolicyPopulation
 from june.mpi_setup import mpi_size
 from june.utils.distances import haversine_distance
 
 
 class IndividualPolicy(Policy):
+    # policies with a vectorised form implement ``get_stay_home_mask`` or
+    # ``get_skip_mask``, and are evaluated for the whole population at once.
+    vectorised = False
+
     def __init__(
         self,
         start_time: Union[str, datetime.datetime],
@@ -21,15 +26,240 @@ class IndividualPolicy(Policy):
         self.policy_subtype = None
 
 
+def _send_guardian_home(person: Person, min_age_home_alone: int):
+    """
+    If a kid has to stay home and there are no adults in the household, a
+    guardian is sent home to look after them.
+    """
+    # TODO: make it work with parallelisation
+    if mpi_size == 1:
+        if person.age < min_age_home_alone:  # can't stay home alone
+            possible_guardians = [
+                housemate
+                for housemate in person.residence.group.people
+                if housemate.age >= 18
+            ]
+            if not possible_guardians:
+                guardian = person.find_guardian()
+                if guardian is not None:
+                    if guardian.busy:
+                        for subgroup in guardian.subgroups.iter():
+                            if subgroup is not None and guardian in subgroup:
+                                subgroup.remove(guardian)
+                                break
+                    guardian.residence.append(guardian)
+
+
+class CompiledIndividualPolicies:
+    """
+    The active individual policies of one time step, evaluated for a whole
+    population. The vectorised policies are turned into an allowed-activity
+    bitmask per person (bit j set if ``activities[j]`` is allowed), while
+    the policies without a vectorised form are checked person by person
+    in ``apply``, in the same order as in ``IndividualPolicies.apply``.
+    """
+
+    def __init__(
+        self,
+        activities: List[str],
+        days_from_start: float,
+        allowed: Optional[np.ndarray] = None,
+        stays_home: Optional[np.ndarray] = None,
+        fallback_policies: Optional[List] = None,
+        min_age_home_alone: int = 15,
+    ):
+        """
+        Parameters
+        ----------
+        activities
+            activities of the time step
+        days_from_start
+            time past from beginning of simulation, in units of days
+        allowed
+            allowed-activity bitmask of each person, None if no policy
+            restricts any activity
+        stays_home
+            boolean mask of the people sent home by a vectorised policy
+        fallback_policies
+            list of (policy, stays_home_before) tuples for the policies
+            that have to be checked per person. ``stays_home_before`` is a boolean
+            mask of the people already sent home by an earlier vectorised policy,
+            for whom the policy is not checked, or None.
+        min_age_home_alone
+            kids younger than this get a guardian sent home with them
+        """
+        self.activities = tuple(activities)
+        self.days_from_start = days_from_start
+        self.allowed = allowed
+        self.stays_home = stays_home
+        self.min_age_home_alone = min_age_home_alone
+        self.fallback_policies = [
+            (
+                policy,
+                stays_home_before,
+                policy.get_activities_bitmask(self.activities)
+                if policy.policy_subtype == "skip_activity"
+                else 0,
+            )
+            for policy, stays_home_before in fallback_policies or []
+        ]
+        self.all_activities_mask = (1 << len(self.activities)) - 1
+        self.stay_home_activities = StayHome.stay_home_activities(self.activities)
+        self._activities_per_mask = {}
+
+    def activities_from_mask(self, mask: int) -> Tuple[str]:
+        activities = self._activities_per_mask.get(mask)
+        if activities is None:
+            activities = tuple(
+                activity for i, activity in enumerate(self.activities) if mask >> i & 1
+            )
+            self._activities_per_mask[mask] = activities
+        return activities
+
+    def apply(self, person: Person, index: int) -> Tuple[str]:
+        """
+        Returns the activities the person is allowed to do.
+
+        Parameters
+        ----------
+        person
+            person to whom the policies are applied
+        index
+            position of the person in the population the policies were
+            compiled for
+        """
+        if self.allowed is None:
+            mask = self.all_activities_mask
+            stays_home = False
+        else:
+            mask = int(self.allowed[index])
+            stays_home = self.stays_home[index]
+        for policy, stays_home_before, activities_bitmask in self.fallback_policies:
+            if stays_home_before is not None and stays_home_before[index]:
+                break
+            if policy.policy_subtype == "stay_home":
+                if policy.check_stay_home_condition(person, self.days_from_start):
+                    stays_home = True
+                    break
+            elif policy.check_skips_activity(person):
+                mask &= ~activities_bitmask
+        if stays_home:
+            _send_guardian_home(person, self.min_age_home_alone)
+            return self.stay_home_activities
+        return self.activities_from_mask(mask)
+
+
+def get_activities_bitmask(activities: Tuple[str], activities_to_select) -> int:
+    """
+    Bitmask with bit j set if ``activities[j]`` is in ``activities_to_select``.
+    """
+    mask = 0
+    for i, activity in enumerate(activities):
+        if activity in activities_to_select:
+            mask |= 1 << i
+    return mask
+
+
 class IndividualPolicies(PolicyCollection):
     policy_type = "individual"
     min_age_home_alone = 15
 
+    def __init__(self, policies: List[IndividualPolicy]):
+        super().__init__(policies)
+        self.population = None
+
     def get_active(self, date: datetime.date):
         return IndividualPolicies(
             [policy for policy in self.policies if policy.is_active(date)]
         )
 
+    def get_population(self, people: List[Person]) -> PolicyPopulation:
+        """
+        Returns the column view of ``people``, built the first time it is requested.
+        """
+        if (
+            self.population is None
+            or self.population.people is not people
+            or len(self.population) != len(people)
+        ):
+            self.population = PolicyPopulation(people)
+        return self.population
+
+    def reset_population(self):
+        """
+        Drops the column view of the people, so that it is built again from
+        their current attributes the next time the policies are compiled.
+        Needs to be called when the people of the world are replaced or
+        reassigned, as their primary activities and residences are only read
+        when the view is built.
+        """
+        self.population = None
+
+    def compile(
+        self,
+        active_policies,
+        people: List[Person],
+        activities: List[str],
+        days_from_start: float,
+    ) -> CompiledIndividualPolicies:
+        """
+        Evaluates the vectorised active policies for all the people at once,
+        producing the allowed-activity bitmask of every person for this time step.
+        Policies without a vectorised form are left to be checked per person
+        by the returned ``CompiledIndividualPolicies.apply``.
+
+        Parameters
+        ----------
+        active_policies
+            individual policies active on this time step
+        people
+            people the policies apply to, indexed in the same order in
+            ``CompiledIndividualPolicies.apply``
+        activities
+            activities of the time step
+        days_from_start
+            time past from beginning of simulation, in units of days
+        """
+        activities = tuple(activities)
+        compiled_kwargs = {
+            "activities": activities,
+            "days_from_start": days_from_start,
+            "min_age_home_alone": self.min_age_home_alone,
+        }
+        for policy in active_policies:
+            if policy.policy_subtype not in ("stay_home", "skip_activity"):
+                raise ValueError("policy type not expected")
+        if not any(policy.vectorised for policy in active_policies):
+            return CompiledIndividualPolicies(
+                fallback_policies=[(policy, None) for policy in active_policies],
+                **compiled_kwargs,
+            )
+        population = self.get_population(people)
+        population.refresh()
+        stays_home = np.zeros(len(population), dtype=bool)
+        removed = np.zeros(len(population), dtype=np.uint16)
+        fallback_policies = []
+        for policy in active_policies:
+            if not policy.vectorised:
+                stays_home_before = stays_home.copy() if stays_home.any() else None
+                fallback_policies.append((policy, stays_home_before))
+            elif policy.policy_subtype == "stay_home":
+                stays_home |= policy.get_stay_home_mask(population, days_from_start)
+            else:
+                activities_bitmask = policy.get_activities_bitmask(activities)
+                if activities_bitmask:
+                    removed[policy.get_skip_mask(population)] |= activities_bitmask
+        allowed = ((1 << len(activities)) - 1) & ~removed
+        allowed[stays_home] = get_activities_bitmask(
+            activities, StayHome.stay_home_activities(activities)
+        )
+        return CompiledIndividualPolicies(
+            allowed=allowed,
+            stays_home=stays_home,
+            fallback_policies=fallback_policies,
+            **compiled_kwargs,
+        )
+
     def apply(
         self,
         active_policies,
@@ -50,28 +280,7 @@ class IndividualPolicies(PolicyCollection):
                         days_from_start=days_from_start,
                         activities=activities,
                     )
-                    # TODO: make it work with parallelisation
-                    if mpi_size == 1:
-                        if (
-                            person.age < self.min_age_home_alone
-                        ):  # can't stay home alone
-                            possible_guardians = [
-                                housemate
-                                for housemate in person.residence.group.people
-                                if housemate.age >= 18
-                            ]
-                            if not possible_guardians:
-                                guardian = person.find_guardian()
-                                if guardian is not None:
-                                    if guardian.busy:
-                                        for subgroup in guardian.subgroups.iter():
-                                            if (
-                                                subgroup is not None
-                                                and guardian in subgroup
-                                            ):
-                                                subgroup.remove(guardian)
-                                                break
-                                    guardian.residence.append(guardian)
+                    _send_guardian_home(person, self.min_age_home_alone)
                     return activities  # if it stays at home we don't need to check the rest
             elif policy.policy_subtype == "skip_activity":
                 if policy.check_skips_activity(person):
@@ -90,15 +299,19 @@ class StayHome(IndividualPolicy):
         super().__init__(start_time=start_time, end_time=end_time)
         self.policy_subtype = "stay_home"
 
-    def apply(self, person: Person, days_from_start: float, activities: List[str]):
-        """
-        Removes all activities but residence if the person has to stay at home.
-        """
+    @staticmethod
+    def stay_home_activities(activities: List[str]) -> Tuple[str]:
         if "medical_facility" in activities:
             return ("medical_facility", "residence")
         else:
             return ("residence",)
 
+    def apply(self, person: Person, days_from_start: float, activities: List[str]):
+        """
+        Removes all activities but residence if the person has to stay at home.
+        """
+        return self.stay_home_activities(activities)
+
     def check_stay_home_condition(self, person: Person, days_from_start: float):
         """
         Returns true if a person must stay at home.
@@ -114,13 +327,32 @@ class StayHome(IndividualPolicy):
             f"Need to implement check_stay_home_condition for policy {self.__class__.__name__}"
         )
 
+    def get_stay_home_mask(
+        self, population: PolicyPopulation, days_from_start: float
+    ) -> np.ndarray:
+        """
+        Vectorised form of ``check_stay_home_condition``. Returns a boolean array
+        that is True for the people of the population that must stay at home.
+        Only needs to be implemented by policies with ``vectorised = True``.
+        """
+        raise NotImplementedError(
+            f"Policy {self.__class__.__name__} has no vectorised form"
+        )
+
 
 class SevereSymptomsStayHome(StayHome):
+    vectorised = True
+
     def check_stay_home_condition(self, person: Person, days_from_start: float) -> bool:
         return (
             person.infection is not None and person.infection.tag is SymptomTag.severe
         )
 
+    def get_stay_home_mask(
+        self, population: PolicyPopulation, days_from_start: float
+    ) -> np.ndarray:
+        return population.symptom_tags == SymptomTag.severe
+
 
 class Quarantine(StayHome):
     def __init__(
@@ -196,7 +428,112 @@ class Quarantine(StayHome):
         return housemates_quarantine
 
 
+class ClassroomQuarantineTable:
+    """
+    Quarantine starting date of every school classroom attended by a population,
+    stored as a dense array. Pupils (and teachers) are mapped to the index of
+    their classroom once, so that the quarantine state of everyone is found with
+    a single array lookup. The classrooms remain the owners of their
+    ``quarantine_starting_date``: the dates are read back from them on every
+    update, so changes made from outside the policy (such as resetting the
+    world) are seen.
+    """
+
+    def __init__(self, population: PolicyPopulation):
+        self.population = population
+        self.in_school = population.primary_activity_is("school") & (
+            ~population.primary_activity_external
+        )
+        self.pupil_indices = np.flatnonzero(self.in_school)
+        _, first_pupils, classroom_per_pupil = np.unique(
+            np.stack(
+                (
+                    population.primary_activity_ids[self.pupil_indices],
+                    population.primary_activity_subgroups[self.pupil_indices],
+                ),
+                axis=1,
+            ),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        self.classrooms = [
+            population.people[self.pupil_indices[pupil]].primary_activity
+            for pupil in first_pupils
+        ]
+        self.classroom_indices = np.full(
+            len(population), PolicyPopulation.no_code, dtype=np.int64
+        )
+        self.classroom_indices[self.pupil_indices] = classroom_per_pupil.reshape(-1)
+        self.read_quarantine_starting_dates()
+
+    def __len__(self):
+        return len(self.classrooms)
+
+    def read_quarantine_starting_dates(self):
+        self.quarantine_starting_dates = np.array(
+            [classroom.quarantine_starting_date for classroom in self.classrooms],
+            dtype=np.float64,
+        )
+
+    def update(
+        self, times_start_quarantine: np.ndarray, days_from_start: float, n_days: int
+    ):
+        """
+        Updates the quarantine starting date of the classrooms from the times at
+        which their pupils start a quarantine (nan for those who don't).
+        A classroom quarantine starts at the earliest time, among its current
+        date and the new ones, that has not expired yet.
+
+        Parameters
+        ----------
+        times_start_quarantine
+            time at which each person of the population triggers a quarantine
+        days_from_start
+            time past from beginning of simulation, in units of days
+        n_days
+            length of the quarantine
+        """
+        self.read_quarantine_starting_dates()
+        times = times_start_quarantine[self.pupil_indices]
+        triggering = ~np.isnan(times)
+        if not triggering.any():
+            return
+        classrooms = self.classroom_indices[self.pupil_indices[triggering]]
+        times = times[triggering]
+        dates = self.quarantine_starting_dates
+        earliest = dates.copy()
+        np.minimum.at(earliest, classrooms, times)
+        not_expired = days_from_start - times <= n_days
+        earliest_not_expired = np.where(
+            days_from_start - dates <= n_days, dates, np.inf
+        )
+        np.minimum.at(earliest_not_expired, classrooms[not_expired], times[not_expired])
+        new_dates = np.where(
+            np.isinf(earliest_not_expired), earliest, earliest_not_expired
+        )
+        for classroom_index in np.flatnonzero(new_dates != dates):
+            self.classrooms[classroom_index].quarantine_starting_date = new_dates[
+                classroom_index
+            ]
+        self.quarantine_starting_dates = new_dates
+
+    def in_quarantine(self, days_from_start: float, n_days: int) -> np.ndarray:
+        """
+        Boolean mask of the people whose classroom is in quarantine.
+        """
+        days_in_quarantine = np.full(len(self.population), np.nan)
+        days_in_quarantine[self.pupil_indices] = (
+            days_from_start
+            - self.quarantine_starting_dates[self.classroom_indices[self.pupil_indices]]
+        )
+        with np.errstate(invalid="ignore"):
+            return (0 < days_in_quarantine) & (days_in_quarantine < n_days)
+
+
 class SchoolQuarantine(StayHome):
+    vectorised = True
+
     def __init__(
         self,
         start_time: Union[str, datetime.datetime] = "1900-01-01",
@@ -228,6 +565,7 @@ class SchoolQuarantine(StayHome):
         self.compliance = compliance
         self.n_days = n_days
         self.isolate_on = isolate_on
+        self.classroom_quarantine_table = None
 
     def check_stay_home_condition(self, person: Person, days_from_start):
         try:
@@ -281,8 +619,43 @@ class SchoolQuarantine(StayHome):
             return random() < compliance
         return False
 
+    def get_classroom_quarantine_table(
+        self, population: PolicyPopulation
+    ) -> ClassroomQuarantineTable:
+        if (
+            self.classroom_quarantine_table is None
+            or self.classroom_quarantine_table.population is not population
+        ):
+            self.classroom_quarantine_table = ClassroomQuarantineTable(population)
+        return self.classroom_quarantine_table
+
+    def get_stay_home_mask(
+        self, population: PolicyPopulation, days_from_start: float
+    ) -> np.ndarray:
+        table = self.get_classroom_quarantine_table(population)
+        if self.isolate_on == "infection":
+            times_start_quarantine = population.infection_start_times
+        else:
+            # as in check_stay_home_condition, a symptoms onset at time 0
+            # does not trigger a quarantine
+            times_of_symptoms_onset = np.where(
+                population.times_of_symptoms_onset == 0,
+                np.nan,
+                population.times_of_symptoms_onset,
+            )
+            times_start_quarantine = (
+                population.infection_start_times + times_of_symptoms_onset
+            )
+        table.update(times_start_quarantine, days_from_start, self.n_days)
+        return table.in_quarantine(days_from_start, self.n_days) & (
+            np.random.random(len(population))
+            < self.compliance * population.regional_compliance
+        )
+
 
 class Shielding(StayHome):
+    vectorised = True
+
     def __init__(
         self,
         start_time: str,
@@ -307,6 +680,16 @@ class Shielding(StayHome):
                 return True
         return False
 
+    def get_stay_home_mask(
+        self, population: PolicyPopulation, days_from_start: float
+    ) -> np.ndarray:
+        mask = population.ages >= self.min_age
+        if self.compliance is not None:
+            mask &= np.random.random(len(population)) < (
+                self.compliance * population.regional_compliance
+            )
+        return mask
+
 
 class SkipActivity(IndividualPolicy):
     """
@@ -328,6 +711,22 @@ class SkipActivity(IndividualPolicy):
         Returns True if the activity is to be skipped, otherwise False
         """
 
+    def get_skip_mask(self, population: PolicyPopulation) -> np.ndarray:
+        """
+        Vectorised form of ``check_skips_activity``. Returns a boolean array
+        that is True for the people of the population that skip the activities.
+        Only needs to be implemented by policies with ``vectorised = True``.
+        """
+        raise NotImplementedError(
+            f"Policy {self.__class__.__name__} has no vectorised form"
+        )
+
+    def get_activities_bitmask(self, activities: Tuple[str]) -> int:
+        """
+        Bitmask of the activities of the time step removed by this policy.
+        """
+        return get_activities_bitmask(activities, self.activities_to_remove)
+
     def apply(self, activities: List[str]) -> List[str]:
         """
         Remove an activity from a list of activities
@@ -347,6 +746,8 @@ class SkipActivity(IndividualPolicy):
 
 
 class CloseSchools(SkipActivity):
+    vectorised = True
+
     def __init__(
         self,
         start_time: str,
@@ -398,8 +799,30 @@ class CloseSchools(SkipActivity):
             return False
         return False
 
+    def get_skip_mask(self, population: PolicyPopulation) -> np.ndarray:
+        mask = population.primary_activity_is("school")
+        if self.full_closure:
+            return mask
+        # kids without a household with residents are let through, as in
+        # check_skips_activity
+        goes_to_school = (population.ages < 14) & (
+            (population.key_workers_at_home > 1)
+            | (population.key_workers_at_home == PolicyPopulation.no_code)
+        )
+        mask &= ~goes_to_school
+        if self.years_to_close:
+            closed_year = np.isin(population.ages, self.years_to_close)
+        else:
+            closed_year = np.zeros(len(population), dtype=bool)
+        return mask & (
+            closed_year
+            | (np.random.random(len(population)) > self.attending_compliance)
+        )
+
 
 class CloseUniversities(SkipActivity):
+    vectorised = True
+
     def __init__(self, start_time: str, end_time: str):
         super().__init__(
             start_time, end_time, activities_to_remove=("primary_activity")
@@ -416,6 +839,9 @@ class CloseUniversities(SkipActivity):
             return True
         return False
 
+    def get_skip_mask(self, population: PolicyPopulation) -> np.ndarray:
+        return population.primary_activity_is("university")
+
 
 class CloseCompaniesLockdownTiers(SkipActivity):
     TIERS = set([3, 4])
@@ -471,6 +897,7 @@ class CloseCompaniesLockdownTiers(SkipActivity):
 
 
 class CloseCompanies(SkipActivity):
+    vectorised = True
     furlough_ratio = None
     key_ratio = None
     random_ratio = None
@@ -638,6 +1065,90 @@ class CloseCompanies(SkipActivity):
 
         return False
 
+    def get_skip_mask(self, population: PolicyPopulation) -> np.ndarray:
+        """
+        Vectorised form of ``check_skips_activity``, following the same branches.
+        Each random draw of the per person version is an independent uniform array.
+        """
+        n_people = len(population)
+        company = population.primary_activity_is("company")
+        if self.full_closure:
+            return company
+        skip = np.zeros(n_people, dtype=bool)
+        furlough = company & population.lockdown_status_is("furlough")
+        if self.furlough_ratio is not None and self.furlough_probability is not None:
+            if self.furlough_ratio < self.furlough_probability:
+                skip |= furlough
+            else:
+                furlough_skips = np.random.random(n_people) < (
+                    self.furlough_probability / self.furlough_ratio
+                )
+                if self.avoid_work_probability is not None:
+                    furlough_skips |= (
+                        np.random.random(n_people) < self.avoid_work_probability
+                    )
+                skip |= furlough & furlough_skips
+        else:
+            skip |= furlough
+        if (
+            self.key_ratio is not None
+            and self.key_probability is not None
+            and self.key_ratio > self.key_probability
+        ):
+            key_worker = company & population.lockdown_status_is("key_worker")
+            skip |= key_worker & (
+                np.random.random(n_people) > self.key_probability / self.key_ratio
+            )
+        if self.avoid_work_probability is not None:
+            skip |= self._get_random_workers_skip_mask(
+                population, company & population.lockdown_status_is("random")
+            )
+        return skip
+
+    def _get_random_workers_skip_mask(
+        self, population: PolicyPopulation, random_workers: np.ndarray
+    ) -> np.ndarray:
+        n_people = len(population)
+        skip = np.zeros(n_people, dtype=bool)
+        # people whose outcome is decided before the final avoid work draw
+        decided = np.zeros(n_people, dtype=bool)
+        furlough_known = (
+            self.furlough_ratio is not None and self.furlough_probability is not None
+        )
+        key_known = self.key_ratio is not None and self.key_probability is not None
+        if furlough_known and key_known and self.random_ratio is not None:
+            too_few_furloughed = self.furlough_ratio < self.furlough_probability
+            too_few_key = self.key_ratio < self.key_probability
+            if too_few_furloughed:
+                missing_furloughed = self.furlough_probability - self.furlough_ratio
+                skip = np.random.random(n_people) < (
+                    missing_furloughed / self.random_ratio
+                )
+                decided |= skip
+                if too_few_key:
+                    # correct for some random workers now being treated as furloughed
+                    decided |= np.random.random(n_people) < (
+                        self.key_probability - self.key_ratio
+                    ) / (self.random_ratio - missing_furloughed)
+            elif too_few_key:
+                decided |= np.random.random(n_people) < (
+                    (self.key_probability - self.key_ratio) / self.random_ratio
+                )
+        elif furlough_known and self.random_ratio is not None:
+            if self.furlough_ratio < self.furlough_probability:
+                skip = np.random.random(n_people) < (
+                    (self.furlough_probability - self.furlough_ratio)
+                    / self.random_ratio
+                )
+                decided |= skip
+        elif key_known and self.random_ratio is not None:
+            if self.key_ratio < self.key_probability:
+                decided |= np.random.random(n_people) < (
+                    (self.key_probability - self.key_ratio) / self.random_ratio
+                )
+        skip |= ~decided & (np.random.random(n_people) < self.avoid_work_probability)
+        return random_workers & skip
+
 
 class LimitLongCommute(SkipActivity):
     """
@@ -646,6 +1157,7 @@ class LimitLongCommute(SkipActivity):
     then their probability of going to work every day decreases.
     """
 
+    vectorised = True
     long_distance_commuter_ids = set()
     apply_from_distance = 150
 
@@ -662,6 +1174,7 @@ class LimitLongCommute(SkipActivity):
         self.going_to_work_probability = going_to_work_probability
         self.__class__.apply_from_distance = apply_from_distance
         self.__class__.long_distance_commuter_ids = set()
+        self._long_commuters = None
 
     def initialize(self, world, date, record):
         return self.get_long_commuters(world.people)
@@ -691,3 +1204,22 @@ class LimitLongCommute(SkipActivity):
                 return True
             else:
                 return False
+
+    def get_skip_mask(self, population: PolicyPopulation) -> np.ndarray:
+        if (
+            self._long_commuters is None
+            or self._long_commuters[0] is not population
+            or self._long_commuters[1] != len(self.long_distance_commuter_ids)
+        ):
+            long_commuters = np.isin(
+                population.ids,
+                np.fromiter(self.long_distance_commuter_ids, dtype=np.int64),
+            )
+            self._long_commuters = (
+                population,
+                len(self.long_distance_commuter_ids),
+                long_commuters,
+            )
+        return self._long_commuters[2] & (
+            np.random.random(len(population)) < self.going_to_work_probability
+        )
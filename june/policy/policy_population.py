@@ -0,0 +1,170 @@
+import numpy as np
+from typing import List
+
+from june.demography.person import Person
+from june.epidemiology.infection import SymptomTag
+
+
+class PolicyPopulation:
+    """
+    Column view of a population, used to evaluate individual policies for
+    everyone at once.
+
+    The attributes policies depend on are read from the people once and stored
+    as arrays, indexed by the position of the person in the list the population
+    was built from. String attributes (sector, lockdown status, primary activity
+    spec) are stored as integer codes, and can be compared through the ``*_is``
+    methods. The attributes that change during the simulation are refreshed
+    every time step: regional compliance through ``refresh``, and the infection
+    state lazily, the first time it is requested after a refresh, with a loop
+    over all the people.
+    """
+
+    no_code = -1
+
+    def __init__(self, people: List[Person]):
+        self.people = people
+        n_people = len(people)
+        self.ids = np.empty(n_people, dtype=np.int64)
+        self.ages = np.empty(n_people, dtype=np.int16)
+        self.sectors = np.full(n_people, self.no_code, dtype=np.int16)
+        self.lockdown_statuses = np.full(n_people, self.no_code, dtype=np.int8)
+        self.primary_activity_specs = np.full(n_people, self.no_code, dtype=np.int8)
+        self.primary_activity_external = np.zeros(n_people, dtype=bool)
+        self.primary_activity_ids = np.full(n_people, self.no_code, dtype=np.int64)
+        self.primary_activity_subgroups = np.full(
+            n_people, self.no_code, dtype=np.int16
+        )
+        self.region_indices = np.full(n_people, self.no_code, dtype=np.int32)
+        # -1 if the person has no residence with residents
+        self.key_workers_at_home = np.full(n_people, self.no_code, dtype=np.int16)
+        self.sector_codes = {}
+        self.lockdown_status_codes = {}
+        self.primary_activity_spec_codes = {}
+        self.regions = []
+        region_codes = {}
+        key_workers_per_residence = {}
+        for i, person in enumerate(people):
+            self.ids[i] = person.id
+            self.ages[i] = person.age
+            if person.sector is not None:
+                self.sectors[i] = self.sector_codes.setdefault(
+                    person.sector, len(self.sector_codes)
+                )
+            if person.lockdown_status is not None:
+                self.lockdown_statuses[i] = self.lockdown_status_codes.setdefault(
+                    person.lockdown_status, len(self.lockdown_status_codes)
+                )
+            primary_activity = person.primary_activity
+            if primary_activity is not None:
+                group = primary_activity.group
+                self.primary_activity_specs[
+                    i
+                ] = self.primary_activity_spec_codes.setdefault(
+                    group.spec, len(self.primary_activity_spec_codes)
+                )
+                self.primary_activity_external[i] = group.external
+                self.primary_activity_ids[i] = group.id
+                self.primary_activity_subgroups[i] = primary_activity.subgroup_type
+            region = person.region
+            if region is not None:
+                if region.id not in region_codes:
+                    region_codes[region.id] = len(self.regions)
+                    self.regions.append(region)
+                self.region_indices[i] = region_codes[region.id]
+            residence = person.residence
+            residents = getattr(getattr(residence, "group", None), "residents", None)
+            if residents is not None:
+                residence_key = (residence.group.spec, residence.group.id)
+                if residence_key not in key_workers_per_residence:
+                    key_workers_per_residence[residence_key] = sum(
+                        resident.lockdown_status == "key_worker"
+                        for resident in residents
+                    )
+                self.key_workers_at_home[i] = key_workers_per_residence[residence_key]
+        self.regional_compliance = np.ones(n_people, dtype=np.float64)
+        self._infections_are_current = False
+        self._symptom_tags = None
+        self._infection_start_times = None
+        self._times_of_symptoms_onset = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _code_mask(self, codes: np.ndarray, code_dict: dict, value) -> np.ndarray:
+        if value not in code_dict:
+            return np.zeros(len(self), dtype=bool)
+        return codes == code_dict[value]
+
+    def sector_is(self, sector: str) -> np.ndarray:
+        return self._code_mask(self.sectors, self.sector_codes, sector)
+
+    def lockdown_status_is(self, lockdown_status: str) -> np.ndarray:
+        return self._code_mask(
+            self.lockdown_statuses, self.lockdown_status_codes, lockdown_status
+        )
+
+    def primary_activity_is(self, spec: str) -> np.ndarray:
+        return self._code_mask(
+            self.primary_activity_specs, self.primary_activity_spec_codes, spec
+        )
+
+    def refresh(self):
+        """
+        Updates the attributes that can change between time steps. To be called
+        once per time step, before evaluating the policies.
+        """
+        if self.regions:
+            compliance_per_region = np.array(
+                [region.regional_compliance for region in self.regions] + [1.0]
+            )
+            # people without region (index -1) get the trailing 1.0
+            self.regional_compliance = compliance_per_region[self.region_indices]
+        self._infections_are_current = False
+
+    def _refresh_infections(self):
+        n_people = len(self)
+        symptom_tags = np.full(n_people, SymptomTag.healthy, dtype=np.int8)
+        start_times = np.full(n_people, np.nan, dtype=np.float64)
+        times_of_symptoms_onset = np.full(n_people, np.nan, dtype=np.float64)
+        for i, person in enumerate(self.people):
+            infection = person.infection
+            if infection is None:
+                continue
+            symptom_tags[i] = infection.tag
+            start_times[i] = infection.start_time
+            time_of_symptoms_onset = infection.time_of_symptoms_onset
+            if time_of_symptoms_onset is not None:
+                times_of_symptoms_onset[i] = time_of_symptoms_onset
+        self._symptom_tags = symptom_tags
+        self._infection_start_times = start_times
+        self._times_of_symptoms_onset = times_of_symptoms_onset
+        self._infections_are_current = True
+
+    @property
+    def symptom_tags(self) -> np.ndarray:
+        """
+        Symptom tag of each person, ``SymptomTag.healthy`` if not infected.
+        """
+        if not self._infections_are_current:
+            self._refresh_infections()
+        return self._symptom_tags
+
+    @property
+    def infection_start_times(self) -> np.ndarray:
+        """
+        Infection start time of each person, nan if not infected.
+        """
+        if not self._infections_are_current:
+            self._refresh_infections()
+        return self._infection_start_times
+
+    @property
+    def times_of_symptoms_onset(self) -> np.ndarray:
+        """
+        Time of symptoms onset of each person, relative to the infection start
+        time, nan if not infected or asymptomatic.
+        """
+        if not self._infections_are_current:
+            self._refresh_infections()
+        return self._times_of_symptoms_onset
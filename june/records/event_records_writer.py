@@ -13,7 +13,8 @@ class EventRecord:
         self.attributes = int_names + float_names + str_names
         for attribute in self.attributes:
             setattr(self, attribute, [])
-        self._create_table(int_names, float_names, str_names)
+        if hdf5_filename is not None:
+            self._create_table(int_names, float_names, str_names)
 
     def _create_table(self, int_names, float_names, str_names):
         with tables.open_file(self.filename, mode="a") as file:
@@ -31,6 +32,10 @@ class EventRecord:
     def number_of_events(self):
         return len(getattr(self, self.attributes[0]))
 
+    def clear(self):
+        for attribute in self.attributes:
+            setattr(self, attribute, [])
+
     def accumulate(self):
         pass
 
@@ -53,8 +58,7 @@ class EventRecord:
         table = getattr(hdf5_file.root, self.table_name)
         table.append(data)
         table.flush()
-        for attribute in self.attributes:
-            setattr(self, attribute, [])
+        self.clear()
 
 
 class InfectionRecord(EventRecord):
@@ -0,0 +1,222 @@
+"""
+Parquet backend of the records. Tables are stored as hive partitioned
+Parquet datasets, one directory per table:
+
+    june_record.parquet/{table_name}/timestamp={YYYY-MM-DD}/rank={rank}/part-{n}.parquet
+
+for the event tables, and
+
+    june_record.parquet/{table_name}/rank={rank}/part-0.parquet
+
+for the static ones. Every rank writes its own partitions, so the records
+of an MPI run don't need to be merged. String columns are dictionary encoded.
+pyarrow is only needed when this backend is used.
+"""
+import shutil
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+parquet_record_name = "june_record.parquet"
+
+
+def _check_pyarrow():
+    if pa is None:
+        raise ImportError("The parquet record backend needs pyarrow to be installed.")
+
+
+def _to_arrow_table(int_names, float_names, str_names, int_data, float_data, str_data):
+    columns, names = [], []
+    for name, values in zip(int_names, int_data):
+        columns.append(pa.array(np.asarray(values, dtype=np.int32)))
+        names.append(name)
+    for name, values in zip(float_names, float_data):
+        columns.append(pa.array(np.asarray(values, dtype=np.float32)))
+        names.append(name)
+    for name, values in zip(str_names, str_data):
+        columns.append(
+            pa.array(
+                [str(value) for value in values], type=pa.string()
+            ).dictionary_encode()
+        )
+        names.append(name)
+    return pa.Table.from_arrays(columns, names=names)
+
+
+class ParquetRecordWriter:
+    """
+    Writes the event and static records of one rank to the Parquet datasets.
+    """
+
+    def __init__(self, record_path, rank: Optional[int] = None):
+        _check_pyarrow()
+        self.path = Path(record_path) / parquet_record_name
+        self.rank = 0 if rank is None else rank
+        self.n_parts = {}
+        self._remove_rank_partitions()
+
+    def _remove_rank_partitions(self):
+        # partitions left by a previous run of this rank
+        if not self.path.exists():
+            return
+        for pattern in (f"*/rank={self.rank}", f"*/*/rank={self.rank}"):
+            for partition in self.path.glob(pattern):
+                shutil.rmtree(partition)
+
+    def write_events(self, events: dict, timestamp):
+        """
+        Writes the events accumulated during a time step, one file per table
+        with events, and clears them.
+        """
+        date = timestamp.strftime("%Y-%m-%d")
+        for table_name, event in events.items():
+            if event.number_of_events == 0:
+                continue
+            table = _to_arrow_table(
+                event.int_names,
+                event.float_names,
+                event.str_names,
+                [getattr(event, name) for name in event.int_names],
+                [getattr(event, name) for name in event.float_names],
+                [getattr(event, name) for name in event.str_names],
+            )
+            partition = (
+                self.path / table_name / f"timestamp={date}" / f"rank={self.rank}"
+            )
+            partition.mkdir(parents=True, exist_ok=True)
+            n_part = self.n_parts.get(table_name, 0)
+            pq.write_table(table, partition / f"part-{n_part}.parquet")
+            self.n_parts[table_name] = n_part + 1
+            event.clear()
+
+    def write_static(self, statics: dict, world):
+        for static in statics.values():
+            int_data, float_data, str_data = static.get_table_data(world=world)
+            table = _to_arrow_table(
+                static.int_names,
+                static.float_names,
+                static.str_names,
+                int_data,
+                float_data,
+                str_data,
+            )
+            partition = self.path / static.table_name / f"rank={self.rank}"
+            partition.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table, partition / "part-0.parquet")
+
+
+def get_dataset(record_path, table_name: str) -> "ds.Dataset":
+    _check_pyarrow()
+    table_path = Path(record_path) / table_name
+    if not table_path.exists():
+        raise ValueError(f"Table {table_name} not found in {record_path}")
+    partition_fields = [("rank", pa.int32())]
+    if any(child.name.startswith("timestamp=") for child in table_path.iterdir()):
+        partition_fields = [("timestamp", pa.string())] + partition_fields
+    partitioning = ds.partitioning(pa.schema(partition_fields), flavor="hive")
+    return ds.dataset(table_path, format="parquet", partitioning=partitioning)
+
+
+def get_table_columns(dataset: "ds.Dataset"):
+    """
+    Columns of the table in the order of the hdf5 tables: timestamp first,
+    without the rank partition.
+    """
+    names = [name for name in dataset.schema.names if name != "rank"]
+    if "timestamp" in names:
+        names = ["timestamp"] + [name for name in names if name != "timestamp"]
+    return names
+
+
+def build_filter(
+    start_date: Optional[str] = None, end_date: Optional[str] = None, **values
+) -> Optional["ds.Expression"]:
+    """
+    Parquet counterpart of ``RecordReader.build_condition``. Conditions on the
+    timestamp only read the matching date partitions.
+    """
+    _check_pyarrow()
+    expressions = []
+    if start_date is not None:
+        expressions.append(ds.field("timestamp") >= str(start_date))
+    if end_date is not None:
+        expressions.append(ds.field("timestamp") <= str(end_date))
+    for column, value in values.items():
+        if isinstance(value, (list, tuple, set, np.ndarray)):
+            expressions.append(ds.field(column).isin(list(value)))
+        else:
+            expressions.append(ds.field(column) == value)
+    if not expressions:
+        return None
+    expression = expressions[0]
+    for other in expressions[1:]:
+        expression = expression & other
+    return expression
+
+
+def iter_parquet_chunks(
+    record_path,
+    table_name: str,
+    index: Optional[str] = "id",
+    fields: Optional[Iterable[str]] = None,
+    where: Optional["ds.Expression"] = None,
+    chunk_size: Optional[int] = 1_000_000,
+    categorical: Union[bool, Iterable[str]] = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Iterates over a table in DataFrames of at most ``chunk_size`` rows,
+    see ``RecordReader.iter_table_chunks``. ``where`` is a pyarrow
+    expression, see ``build_filter``.
+    """
+    dataset = get_dataset(record_path, table_name)
+    if fields is None:
+        fields = get_table_columns(dataset)
+    else:
+        fields = list(fields)
+        if index is not None and index not in fields:
+            fields = [index] + fields
+    scanner_kwargs = {"columns": fields, "filter": where}
+    if chunk_size is not None:
+        scanner_kwargs["batch_size"] = chunk_size
+    empty = True
+    for batch in dataset.to_batches(**scanner_kwargs):
+        if batch.num_rows == 0:
+            continue
+        empty = False
+        yield _batch_to_df(batch, index=index, categorical=categorical)
+    if empty:
+        schema = pa.schema([dataset.schema.field(name) for name in fields])
+        yield _batch_to_df(
+            pa.RecordBatch.from_pylist([], schema=schema),
+            index=index,
+            categorical=categorical,
+        )
+
+
+def _batch_to_df(batch, index, categorical):
+    data = {}
+    for name, column in zip(batch.schema.names, batch.columns):
+        is_categorical = (
+            categorical if isinstance(categorical, bool) else name in categorical
+        )
+        if pa.types.is_dictionary(column.type):
+            values = column.to_pandas().values
+            data[name] = values if is_categorical else np.asarray(values, dtype=object)
+        elif pa.types.is_string(column.type):
+            values = column.to_numpy(zero_copy_only=False)
+            data[name] = pd.Categorical(values) if is_categorical else values
+        else:
+            data[name] = column.to_numpy()
+    df = pd.DataFrame(data)
+    if index is not None:
+        df.set_index(index, inplace=True)
+    return df
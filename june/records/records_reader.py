@@ -1,16 +1,28 @@
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union, Iterable, Iterator
 import numpy as np
 import pandas as pd
 import tables
 import logging
 
+from june.records.parquet_records import (
+    parquet_record_name,
+    build_filter,
+    iter_parquet_chunks,
+)
+
 
 logger = logging.getLogger(__name__)
 
 
 class RecordReader:
     def __init__(self, results_path=Path("results"), record_name: str = None):
+        """
+        Reads the record saved by ``june.records.Record`` in ``results_path``,
+        written with either the hdf5 or the parquet backend. If no record
+        name is given, june_record.h5 is read if it exists, and the parquet
+        datasets otherwise.
+        """
         self.results_path = Path(results_path)
         try:
             self.regional_summary = self.get_regional_summary(
@@ -22,9 +34,17 @@ class RecordReader:
         if self.regional_summary is not None:
             self.world_summary = self.get_world_summary()
         if record_name is None:
-            self.record_name = "june_record.h5"
+            if (self.results_path / parquet_record_name).is_dir() and not (
+                self.results_path / "june_record.h5"
+            ).exists():
+                record_name = parquet_record_name
+            else:
+                record_name = "june_record.h5"
+        self.record_name = record_name
+        if (self.results_path / self.record_name).is_dir():
+            self.backend = "parquet"
         else:
-            self.record_name = record_name
+            self.backend = "hdf5"
 
     def decode_bytes_columns(self, df):
         str_df = df.select_dtypes([object])
@@ -32,6 +52,64 @@ class RecordReader:
             df[col] = str_df[col].str.decode("utf-8")
         return df
 
+    @staticmethod
+    def decode_bytes_array(values: np.ndarray, categorical: bool = False):
+        """
+        Decodes a byte string array read from a table. If categorical,
+        only the unique values are decoded and a pandas Categorical is returned,
+        which is much lighter for columns with few distinct values such as
+        location specs or region names.
+        """
+        if not categorical:
+            return np.char.decode(values, "utf-8").astype(object)
+        uniques, codes = np.unique(values, return_inverse=True)
+        return pd.Categorical.from_codes(
+            codes, categories=np.char.decode(uniques, "utf-8").astype(object)
+        )
+
+    @staticmethod
+    def build_condition(
+        start_date: Optional[str] = None, end_date: Optional[str] = None, **values
+    ) -> Tuple[Optional[str], dict]:
+        """
+        Builds a PyTables condition selecting the rows with timestamps in
+        [start_date, end_date] and whose columns take the given values.
+        A list of values selects any of them.
+
+        Example
+        -------
+        >>> RecordReader.build_condition(
+        ...     start_date="2020-03-01", region_names=["London", "North East"]
+        ... )
+
+        Returns
+        -------
+        The condition (None if there is nothing to select on) and the
+        variables it refers to, to be passed as ``where`` and ``condvars``.
+        """
+        clauses, condvars = [], {}
+        # dates are stored as YYYY-MM-DD, so they sort lexicographically
+        if start_date is not None:
+            condvars["start_date"] = str(start_date).encode("utf-8")
+            clauses.append("(timestamp >= start_date)")
+        if end_date is not None:
+            condvars["end_date"] = str(end_date).encode("utf-8")
+            clauses.append("(timestamp <= end_date)")
+        for column, value in values.items():
+            if isinstance(value, (list, tuple, set, np.ndarray)):
+                options = []
+                for i, option in enumerate(value):
+                    name = f"{column}_{i}"
+                    condvars[name] = _to_condition_value(option)
+                    options.append(f"({column} == {name})")
+                clauses.append("(" + " | ".join(options) + ")")
+            else:
+                condvars[f"{column}_0"] = _to_condition_value(value)
+                clauses.append(f"({column} == {column}_0)")
+        if not clauses:
+            return None, condvars
+        return " & ".join(clauses), condvars
+
     def get_regional_summary(self, summary_path):
         df = pd.read_csv(summary_path)
         cols = [col for col in df.columns if col not in ["time_stamp", "region"]]
@@ -48,15 +126,251 @@ class RecordReader:
             .agg(self.aggregator)
         )
 
+    def _read_columns(
+        self,
+        table: tables.Table,
+        fields: Iterable[str],
+        start: int,
+        stop: int,
+        where: Optional[str] = None,
+        condvars: Optional[dict] = None,
+    ) -> dict:
+        """
+        Reads the given columns of the rows in [start, stop), one column at a
+        time so that the unselected columns are never loaded.
+        """
+        if where is None:
+            return {
+                field: table.read(start=start, stop=stop, field=field)
+                for field in fields
+            }
+        # sorted, so that rows come in table order also when an index is used
+        coordinates = table.get_where_list(
+            where, condvars=condvars, start=start, stop=stop, sort=True
+        )
+        return {
+            field: table.read_coordinates(coordinates, field=field) for field in fields
+        }
+
+    def _columns_to_df(
+        self,
+        columns: dict,
+        index: Optional[str],
+        categorical: Union[bool, Iterable[str]] = False,
+    ) -> pd.DataFrame:
+        data = {}
+        for name, values in columns.items():
+            if values.dtype.kind == "S":
+                is_categorical = (
+                    categorical
+                    if isinstance(categorical, bool)
+                    else name in categorical
+                )
+                data[name] = self.decode_bytes_array(values, is_categorical)
+            else:
+                data[name] = values
+        df = pd.DataFrame(data)
+        if index is not None:
+            df.set_index(index, inplace=True)
+        return df
+
+    def iter_table_chunks(
+        self,
+        table_name: str,
+        index: Optional[str] = "id",
+        fields: Optional[Iterable[str]] = None,
+        where: Optional[str] = None,
+        condvars: Optional[dict] = None,
+        chunk_size: Optional[int] = 1_000_000,
+        categorical: Union[bool, Iterable[str]] = False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterates over a table in DataFrames of at most ``chunk_size`` rows,
+        so that tables that do not fit in memory can be processed piece by piece.
+
+        Parameters
+        ----------
+        table_name
+            name of the table in the record
+        index
+            column to use as index
+        fields
+            columns to read, all of them if None. The index is always read.
+        where
+            PyTables condition that rows must satisfy, for instance
+            ``'(timestamp >= b"2020-03-01") & (location_specs == b"school")'``.
+            See ``build_condition``. For parquet records, a pyarrow
+            expression, see ``june.records.parquet_records.build_filter``.
+        condvars
+            variables referred to by the condition
+        chunk_size
+            number of table rows scanned per chunk, the whole table if None.
+            When a condition is given, chunks only contain the rows that
+            satisfy it.
+        categorical
+            whether to decode the byte string columns as pandas Categoricals.
+            Can also be a list of the columns to decode as categoricals.
+        """
+        if self.backend == "parquet":
+            yield from iter_parquet_chunks(
+                self.results_path / self.record_name,
+                table_name,
+                index=index,
+                fields=fields,
+                where=where,
+                chunk_size=chunk_size,
+                categorical=categorical,
+            )
+            return
+        with tables.open_file(self.results_path / self.record_name, mode="r") as f:
+            table = getattr(f.root, table_name)
+            if fields is None:
+                fields = table.colnames
+            else:
+                fields = list(fields)
+                if index is not None and index not in fields:
+                    fields = [index] + fields
+            n_rows = table.nrows
+            if chunk_size is None:
+                chunk_size = max(n_rows, 1)
+            for start in range(0, max(n_rows, 1), chunk_size):
+                columns = self._read_columns(
+                    table,
+                    fields=fields,
+                    start=start,
+                    stop=min(start + chunk_size, n_rows),
+                    where=where,
+                    condvars=condvars,
+                )
+                yield self._columns_to_df(columns, index=index, categorical=categorical)
+
     def table_to_df(
-        self, table_name: str, index: str = "id", fields: Optional[Tuple] = None
+        self,
+        table_name: str,
+        index: str = "id",
+        fields: Optional[Tuple] = None,
+        where: Optional[str] = None,
+        condvars: Optional[dict] = None,
+        chunk_size: Optional[int] = None,
+        categorical: Union[bool, Iterable[str]] = False,
     ) -> pd.DataFrame:
-        # TODO: include fields to read only certain columns
+        """
+        Reads a table (or the selected columns and rows of it) into a DataFrame.
+        See ``iter_table_chunks`` for the meaning of the parameters. When
+        ``chunk_size`` is given, the table is read in chunks, which lowers the
+        peak memory when a condition selects a small part of the table.
+        """
+        chunks = self.iter_table_chunks(
+            table_name,
+            index=index,
+            fields=fields,
+            where=where,
+            condvars=condvars,
+            chunk_size=chunk_size,
+            categorical=categorical,
+        )
+        return _concat_chunks(list(chunks))
+
+    def get_indexed_columns(self, table_name: str) -> Tuple[str]:
+        """
+        Columns of the table that have an index, see
+        ``june.records.records_writer.index_record_tables``.
+        """
+        if self.backend == "parquet":
+            return ()
+        with tables.open_file(self.results_path / self.record_name, mode="r") as f:
+            return tuple(getattr(f.root, table_name).colindexes.keys())
+
+    def query_uses_indexes(
+        self, table_name: str, where: str, condvars: Optional[dict] = None
+    ) -> bool:
+        if self.backend == "parquet":
+            return False
         with tables.open_file(self.results_path / self.record_name, mode="r") as f:
             table = getattr(f.root, table_name)
-            df = pd.DataFrame.from_records(table.read(), index=index)
-        df = self.decode_bytes_columns(df)
-        return df
+            return bool(table.will_query_use_indexing(where, condvars=condvars))
+
+    def query_table(
+        self,
+        table_name: str,
+        index: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        categorical: Union[bool, Iterable[str]] = False,
+        **values,
+    ) -> pd.DataFrame:
+        """
+        Reads the events of a table between two dates (both included) whose
+        columns take the given values, for instance
+        ``query_table("deaths", location_specs="hospital", location_ids=3)``.
+        The selection is done by PyTables, which uses the column indexes if
+        the record has them, and reads only the matching rows otherwise.
+        For parquet records, only the partitions of the selected dates are read.
+        """
+        if self.backend == "parquet":
+            where = build_filter(start_date=start_date, end_date=end_date, **values)
+            condvars = None
+        else:
+            where, condvars = self.build_condition(
+                start_date=start_date, end_date=end_date, **values
+            )
+        return self.table_to_df(
+            table_name,
+            index=index,
+            fields=fields,
+            where=where,
+            condvars=condvars,
+            categorical=categorical,
+        )
+
+    def query_infections(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        region_names=None,
+        location_specs=None,
+        **values,
+    ) -> pd.DataFrame:
+        """
+        Infections between two dates, optionally in the given region(s) and
+        location spec(s).
+        """
+        if region_names is not None:
+            values["region_names"] = region_names
+        if location_specs is not None:
+            values["location_specs"] = location_specs
+        return self.query_table(
+            "infections",
+            index="infected_ids",
+            start_date=start_date,
+            end_date=end_date,
+            **values,
+        )
+
+    def query_deaths(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        location_specs=None,
+        location_ids=None,
+        **values,
+    ) -> pd.DataFrame:
+        """
+        Deaths between two dates, optionally at the given location(s), such as
+        ``location_specs="hospital", location_ids=hospital_id``.
+        """
+        if location_specs is not None:
+            values["location_specs"] = location_specs
+        if location_ids is not None:
+            values["location_ids"] = location_ids
+        return self.query_table(
+            "deaths",
+            index="dead_person_ids",
+            start_date=start_date,
+            end_date=end_date,
+            **values,
+        )
 
     def get_geography_df(
         self,
@@ -79,7 +393,29 @@ class RecordReader:
             columns={geography_df.index.name: "area_id", "name": "name_region"}
         )
 
-    def get_table_with_extras(
+    def get_people_index(
+        self, people_fields: Optional[Iterable[str]] = ("area_id",)
+    ) -> "PeopleIndex":
+        """
+        Reads the person ids and the given population columns (all of them if
+        None) into a ``PeopleIndex``, without building a population DataFrame.
+        """
+        if self.backend == "parquet":
+            if people_fields is not None:
+                people_fields = ["id"] + list(people_fields)
+            df = self.table_to_df("population", index=None, fields=people_fields)
+            columns = {name: df[name].values for name in df.columns}
+            return PeopleIndex(columns.pop("id"), columns)
+        with tables.open_file(self.results_path / self.record_name, mode="r") as f:
+            table = f.root.population
+            if people_fields is None:
+                people_fields = [name for name in table.colnames if name != "id"]
+            columns = {
+                field: table.read(field=field) for field in ["id"] + list(people_fields)
+            }
+        return PeopleIndex(columns.pop("id"), columns)
+
+    def iter_table_with_extras(
         self,
         table_name,
         index,
@@ -87,26 +423,165 @@ class RecordReader:
         with_geography=True,
         people_df=None,
         geography_df=None,
-    ):
+        fields=None,
+        where=None,
+        condvars=None,
+        chunk_size=1_000_000,
+        people_fields=None,
+        categorical=False,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields a table in chunks joined with the people it refers to (through
+        the ``index`` column) and with the geography of their area. Each chunk
+        is joined against a ``PeopleIndex`` holding only the requested
+        population columns, so at most one joined chunk is held at a time,
+        and the full population is never built as a DataFrame.
+
+        Parameters
+        ----------
+        people_fields
+            population columns to add, all of them if None. The area id is
+            always read when the geography is requested.
+        people_df
+            population DataFrame (indexed by person id) to join against
+            instead of reading the population table.
+        fields, where, condvars, chunk_size, categorical
+            see ``iter_table_chunks``
+        """
         logger.info(f"Loading {table_name} table")
-        df = self.table_to_df(table_name, index=index)
+        people_index = None
         if with_people:
-            logger.info("Loading population table")
             if people_df is None:
-                people_df = self.table_to_df("population", index="id")
-            logger.info("Merging infection and population tables")
-            df = df.merge(people_df, how="inner", left_index=True, right_index=True)
-            if with_geography:
+                logger.info("Loading population index")
+                if (
+                    with_geography
+                    and people_fields is not None
+                    and "area_id" not in people_fields
+                ):
+                    people_fields = list(people_fields) + ["area_id"]
+                people_index = self.get_people_index(people_fields)
+            if with_geography and geography_df is None:
                 logger.info("Loading geography table")
-                if geography_df is None:
-                    geography_df = self.get_geography_df()
-                logger.info("Mergeing infection and geography tables")
-                df = df.merge(
-                    geography_df.drop_duplicates(),
-                    left_on="area_id",
-                    right_index=True,
-                    how="inner",
+                geography_df = self.get_geography_df()
+            if with_geography:
+                geography_df = geography_df.drop_duplicates()
+        for df in self.iter_table_chunks(
+            table_name,
+            index=index,
+            fields=fields,
+            where=where,
+            condvars=condvars,
+            chunk_size=chunk_size,
+            categorical=categorical,
+        ):
+            if with_people:
+                if people_index is not None:
+                    df = people_index.join(df, categorical=categorical)
+                else:
+                    df = df.merge(
+                        people_df, how="inner", left_index=True, right_index=True
+                    )
+                if with_geography:
+                    df = df.merge(
+                        geography_df,
+                        left_on="area_id",
+                        right_index=True,
+                        how="inner",
+                    )
+            if "timestamp" in df.columns:
+                df["timestamp"] = _to_datetime(df["timestamp"])
+            yield df
+
+    def get_table_with_extras(self, *args, **kwargs) -> pd.DataFrame:
+        """
+        Reads a whole table joined with the people it refers to and with the
+        geography of their area, as a single DataFrame. Takes the same
+        parameters as ``iter_table_with_extras``, which should be used
+        instead to aggregate tables that do not fit in memory once joined.
+        """
+        return _concat_chunks(list(self.iter_table_with_extras(*args, **kwargs)))
+
+
+class PeopleIndex:
+    """
+    Compact lookup from person id to population columns, stored as sorted
+    numpy arrays. Used to join event tables against the population in chunks.
+    """
+
+    def __init__(self, ids: np.ndarray, columns: dict):
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.columns = {name: values[order] for name, values in columns.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_positions(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Position of each id in the index, -1 for ids not in the population.
+        """
+        ids = np.asarray(ids)
+        if len(self.ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        positions[positions == len(self.ids)] = 0
+        positions[self.ids[positions] != ids] = -1
+        return positions
+
+    def join(
+        self, df: pd.DataFrame, categorical: Union[bool, Iterable[str]] = False
+    ) -> pd.DataFrame:
+        """
+        Inner join of a DataFrame indexed by person id with the indexed columns.
+        """
+        positions = self.get_positions(df.index.values)
+        found = positions >= 0
+        df = df[found].copy()
+        positions = positions[found]
+        for name, values in self.columns.items():
+            values = values[positions]
+            if values.dtype.kind == "S":
+                is_categorical = (
+                    categorical
+                    if isinstance(categorical, bool)
+                    else name in categorical
                 )
-        if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
+                values = RecordReader.decode_bytes_array(values, is_categorical)
+            df[name] = values
         return df
+
+
+def _to_condition_value(value):
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return value
+
+
+def _to_datetime(timestamps: pd.Series) -> pd.Series:
+    # parse each distinct date once
+    if isinstance(timestamps.dtype, pd.CategoricalDtype):
+        uniques = timestamps.cat.categories.values.astype(str)
+        codes = timestamps.cat.codes.values
+    else:
+        uniques, codes = np.unique(timestamps.values.astype(str), return_inverse=True)
+    return pd.Series(
+        pd.to_datetime(uniques).values[codes], index=timestamps.index, name="timestamp"
+    )
+
+
+def _concat_chunks(chunks):
+    """
+    Concatenates DataFrame chunks, keeping the categorical columns categorical
+    even when the chunks have different categories.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    for column in chunks[0].columns:
+        if not isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            continue
+        categories = pd.api.types.union_categoricals(
+            [chunk[column].values for chunk in chunks]
+        ).categories
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks)
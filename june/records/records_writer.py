@@ -9,9 +9,16 @@ import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext, ExitStack
 import logging
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
 import june
 from june.records.event_records_writer import (
     InfectionRecord,
@@ -30,6 +37,7 @@ from june.records.static_records_writer import (
     SuperAreaRecord,
     RegionRecord,
 )
+from june.records.parquet_records import ParquetRecordWriter
 
 from typing import TYPE_CHECKING
 
@@ -43,11 +51,53 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("records_writer")
 
+# columns of the event tables that queries usually select on
+indexed_columns = (
+    "timestamp",
+    "location_specs",
+    "location_ids",
+    "region_names",
+    "infected_ids",
+    "infector_ids",
+    "dead_person_ids",
+    "recovered_person_ids",
+    "vaccinated_ids",
+    "hospital_ids",
+    "patient_ids",
+)
+
 
 class Record:
     def __init__(
-        self, record_path: str, record_static_data=False, mpi_rank: Optional[int] = None
+        self,
+        record_path: str,
+        record_static_data=False,
+        mpi_rank: Optional[int] = None,
+        index_tables=False,
+        backend: str = "hdf5",
     ):
+        """
+        Parameters
+        ----------
+        record_path
+            directory where the record is saved
+        record_static_data
+            whether to save the population and geography tables
+        mpi_rank
+            rank of the process, used to name the per rank files
+        index_tables
+            whether to build completely sorted indexes on the event table
+            columns queries select on (``indexed_columns``) at the end of the run
+            and when combining the per rank records. Indexes make the
+            ``RecordReader.query_*`` methods avoid full table scans.
+        backend
+            either "hdf5", to write the tables to june_record.h5, or "parquet",
+            to write them as Parquet datasets partitioned by date and rank,
+            see ``june.records.parquet_records``. The parquet backend
+            needs pyarrow.
+        """
+        if backend not in ("hdf5", "parquet"):
+            raise ValueError(f"Unknown record backend {backend}")
         self.record_path = Path(record_path)
         self.record_path.mkdir(parents=True, exist_ok=True)
         self.mpi_rank = mpi_rank
@@ -59,11 +109,20 @@ class Record:
             self.summary_filename = "summary.csv"
         self.configs_filename = "config.yaml"
         self.record_static_data = record_static_data
+        self.index_tables = index_tables
+        self.backend = backend
         try:
             os.remove(self.record_path / self.filename)
         except OSError:
             pass
-        filename = self.record_path / self.filename
+        if backend == "parquet":
+            self.parquet_writer = ParquetRecordWriter(
+                self.record_path, rank=self.mpi_rank
+            )
+            filename = None
+        else:
+            self.parquet_writer = None
+            filename = self.record_path / self.filename
         self.events = {
             "infections": InfectionRecord(hdf5_filename=filename),
             "hospital_admissions": HospitalAdmissionsRecord(hdf5_filename=filename),
@@ -104,7 +163,12 @@ class Record:
             yaml.dump(description, f)
 
     def static_data(self, world: "World"):
-        with tables.open_file(self.record_path / self.filename, mode="a") as file:
+        if self.parquet_writer is not None:
+            self.parquet_writer.write_static(self.statics, world=world)
+            return
+        with self._lock(), tables.open_file(
+            self.record_path / self.filename, mode="a"
+        ) as file:
             for static_name in self.statics.keys():
                 self.statics[static_name].record(hdf5_file=file, world=world)
 
@@ -112,10 +176,37 @@ class Record:
         self.events[table_name].accumulate(**kwargs)
 
     def time_step(self, timestamp: str):
-        with tables.open_file(self.record_path / self.filename, mode="a") as file:
+        if self.parquet_writer is not None:
+            self.parquet_writer.write_events(self.events, timestamp=timestamp)
+            return
+        with self._lock(), tables.open_file(
+            self.record_path / self.filename, mode="a"
+        ) as file:
             for event_name in self.events.keys():
                 self.events[event_name].record(hdf5_file=file, timestamp=timestamp)
 
+    def build_indexes(self, columns=indexed_columns):
+        """
+        Builds completely sorted indexes on the given columns of the event tables.
+        Parquet records are not indexed, their scans are pruned by date partition.
+        """
+        if self.parquet_writer is not None:
+            return
+        with self._lock():
+            index_record_tables(
+                self.record_path / self.filename,
+                table_names=self.events.keys(),
+                columns=columns,
+            )
+
+    def _lock(self):
+        """
+        Lock held while writing to a per rank record, see ``lock_record_file``.
+        """
+        if self.mpi_rank is None:
+            return nullcontext(True)
+        return lock_record_file(self.record_path / self.filename)
+
     def summarise_hospitalisations(self, world: "World"):
         hospital_admissions, icu_admissions = defaultdict(int), defaultdict(int)
         for hospital_id in self.events["hospital_admissions"].hospital_ids:
@@ -194,7 +285,15 @@ class Record:
                     )
 
     def combine_outputs(self, remove_left_overs=True):
-        combine_records(self.record_path, remove_left_overs=remove_left_overs)
+        if self.parquet_writer is not None:
+            # the ranks write their own partitions, only the summaries are merged
+            combine_summaries(self.record_path, remove_left_overs=remove_left_overs)
+            return
+        combine_records(
+            self.record_path,
+            remove_left_overs=remove_left_overs,
+            index_tables=self.index_tables,
+        )
 
     def append_dict_to_configs(self, config_dict):
         with open(self.record_path / self.configs_filename, "r") as f:
@@ -319,23 +418,127 @@ class Record:
                 yaml.safe_dump(configs, f)
 
 
-def combine_summaries(record_path, remove_left_overs=False, save_dir=None):
-    record_path = Path(record_path)
-    summary_files = record_path.glob("summary.*.csv")
-    dfs = []
-    for summary_file in summary_files:
-        df = pd.read_csv(summary_file)
-        if len(df) == 0:
+def _get_rank(rank_file: Path) -> int:
+    # files are named {name}.{rank}.{extension}
+    try:
+        return int(rank_file.name.split(".")[-2])
+    except (ValueError, IndexError):
+        return -1
+
+
+def _sorted_by_rank(rank_files):
+    return sorted(
+        rank_files, key=lambda rank_file: (_get_rank(rank_file), rank_file.name)
+    )
+
+
+@contextmanager
+def lock_record_file(record_file, blocking=True):
+    """
+    Exclusive lock on a per rank record, through the lock file
+    {record_file}.lock. Ranks hold it while they write to their record and
+    ``RecordMerger`` while it reads them, so records are only read while
+    they are closed. Yields whether the lock was acquired, which is always
+    the case if ``blocking``. Without ``fcntl`` (on Windows) nothing is
+    locked.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(f"{record_file}.lock", "a") as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _map_bounded(function, arguments, n_workers=1):
+    """
+    Lazily maps ``function`` over ``arguments`` in order, on a pool of
+    ``n_workers`` processes. At most twice as many tasks as workers are in
+    flight, so results that are not consumed yet do not pile up in memory.
+    """
+    if n_workers is None or n_workers <= 1:
+        for argument in arguments:
+            yield function(*argument)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = deque()
+        for argument in arguments:
+            futures.append(executor.submit(function, *argument))
+            if len(futures) >= 2 * n_workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def _aggregate_summary(summary_file, chunk_size):
+    """
+    Aggregates one rank summary over its region and time stamp, averaging
+    the current counts and summing the daily ones, reading the csv in chunks.
+    """
+    sums, counts = [], []
+    for chunk in pd.read_csv(summary_file, chunksize=chunk_size):
+        if len(chunk) == 0:
             continue
-        aggregator = {
-            col: np.mean if "current" in col else sum for col in df.columns[2:]
-        }
-        df = df.groupby(["region", "time_stamp"], as_index=False).agg(aggregator)
-        dfs.append(df)
-        if remove_left_overs:
+        grouped = chunk.groupby(["region", "time_stamp"])
+        sums.append(grouped.sum())
+        counts.append(grouped.size())
+    if not sums:
+        return None
+    summary = pd.concat(sums).groupby(level=[0, 1]).sum()
+    count = pd.concat(counts).groupby(level=[0, 1]).sum()
+    current = [col for col in summary.columns if "current" in col]
+    summary[current] = summary[current].div(count, axis=0)
+    return summary
+
+
+def combine_summaries(
+    record_path,
+    remove_left_overs=False,
+    save_dir=None,
+    n_workers=1,
+    chunk_size=100_000,
+    fold_every=32,
+):
+    """
+    Combines the per rank summaries summary.{rank}.csv into summary.csv.
+    Each rank summary is aggregated on its own, reading it in chunks of
+    ``chunk_size`` rows, and the results are folded into the combined summary
+    every ``fold_every`` ranks, so the memory needed does not grow with the
+    number of ranks. Rank summaries are aggregated on ``n_workers`` processes.
+    """
+    record_path = Path(record_path)
+    summary_files = _sorted_by_rank(record_path.glob("summary.*.csv"))
+    if not summary_files:
+        logger.warning(f"No summaries to combine in {record_path}")
+        return
+    summary, pending = None, []
+    rank_summaries = _map_bounded(
+        _aggregate_summary,
+        [(summary_file, chunk_size) for summary_file in summary_files],
+        n_workers=n_workers,
+    )
+    for rank_summary in rank_summaries:
+        if rank_summary is not None:
+            pending.append(rank_summary)
+        if len(pending) >= fold_every:
+            summary = _fold_summaries(summary, pending)
+            pending = []
+    summary = _fold_summaries(summary, pending)
+    if summary is None:
+        # nothing was recorded, keep the header
+        columns = pd.read_csv(summary_files[0], nrows=0).columns
+        summary = pd.DataFrame(columns=columns).set_index(["region", "time_stamp"])
+    if remove_left_overs:
+        for summary_file in summary_files:
             summary_file.unlink()
-    summary = pd.concat(dfs)
-    summary = summary.groupby(["region", "time_stamp"]).sum()
     if save_dir is None:
         save_path = record_path
     else:
@@ -344,43 +547,215 @@ def combine_summaries(record_path, remove_left_overs=False, save_dir=None):
     summary.to_csv(full_summary_save_path)
 
 
+def _fold_summaries(summary, rank_summaries):
+    if summary is not None:
+        rank_summaries = [summary] + rank_summaries
+    if not rank_summaries:
+        return summary
+    return pd.concat(rank_summaries).groupby(level=[0, 1]).sum()
+
+
+def index_record_tables(record_file, table_names=None, columns=indexed_columns):
+    """
+    Builds completely sorted (CSI) indexes on the given columns of the tables
+    of a record file, so that PyTables can answer conditions on those columns
+    without scanning the tables. Columns that are already indexed get their
+    index refreshed if rows have been appended since it was built.
+
+    Parameters
+    ----------
+    record_file
+        path to the hdf5 record
+    table_names
+        tables to index, all of them if None
+    columns
+        columns to index in each table, if the table has them
+    """
+    with tables.open_file(str(record_file), mode="a") as f:
+        for table in f.root._f_list_nodes(classname="Table"):
+            if table_names is not None and table.name not in table_names:
+                continue
+            for name in columns:
+                if name not in table.colnames:
+                    continue
+                column = table.cols._f_col(name)
+                if not column.is_indexed:
+                    column.create_csindex()
+                elif column.index.dirty:
+                    column.reindex_dirty()
+            table.flush()
+
+
+def _read_table_chunk(record_file, table_name, start, stop):
+    with tables.open_file(str(record_file), "r") as record:
+        return getattr(record.root, table_name).read(start=start, stop=stop)
+
+
+class RecordMerger:
+    """
+    Merges the per rank records june_record.{rank}.h5 into a single
+    june_record.h5, copying the tables in chunks of at most ``chunk_size``
+    rows, which are read from the rank files on ``n_workers`` processes.
+
+    The number of rows already copied from each rank file is kept in the
+    attributes of the merged tables, so ``merge`` can be called repeatedly while
+    the simulation is still running, and each call only copies the rows the
+    ranks have appended since the previous one. Rows are appended to the merged
+    tables grouped by rank within each call. Rank files are read under their
+    ``lock_record_file`` lock, and ranks wait for the merge to finish before
+    writing to a file it is reading. While the simulation runs, files a rank
+    is writing, or that cannot be read, are skipped and picked up by the next
+    merge. The ``final`` merge waits for the ranks instead, and raises if a
+    rank file cannot be read, so the merged record never misses a rank.
+    """
+
+    def __init__(self, record_path, save_dir=None, chunk_size=1_000_000, n_workers=1):
+        self.record_path = Path(record_path)
+        if save_dir is None:
+            save_dir = self.record_path
+        self.merged_record_path = Path(save_dir) / "june_record.h5"
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+
+    def _get_rank_tables(self, record_files, final=False):
+        """
+        Description and number of rows of every table in the rank files.
+        Files that cannot be opened are skipped, and picked up by the next
+        merge, unless the merge is ``final``.
+        """
+        rank_tables = {}
+        for record_file in record_files:
+            try:
+                with tables.open_file(str(record_file), "r") as record:
+                    rank_tables[record_file] = {
+                        table.name: (table.description, table.nrows)
+                        for table in record.root._f_list_nodes(classname="Table")
+                    }
+            except (OSError, tables.HDF5ExtError):
+                if final:
+                    raise
+                logger.warning(f"Could not read {record_file}, skipping it for now")
+        return rank_tables
+
+    def merge(self, remove_left_overs=False, final=False) -> int:
+        """
+        Copies the rows not merged yet. Returns the number of rows copied.
+
+        Parameters
+        ----------
+        remove_left_overs
+            whether to delete the rank files once they are fully merged
+        final
+            whether the ranks are done writing. The merge then waits for the
+            locks of the rank files, raises if one cannot be read, and
+            removes the lock files.
+        """
+        record_files = _sorted_by_rank(self.record_path.glob("june_record.*.h5"))
+        if not record_files:
+            return 0
+        with ExitStack() as locks:
+            closed_record_files = [
+                record_file
+                for record_file in record_files
+                if locks.enter_context(lock_record_file(record_file, blocking=final))
+            ]
+            rank_tables = self._get_rank_tables(closed_record_files, final=final)
+            n_copied = self._copy_rows(rank_tables)
+            if remove_left_overs:
+                for record_file in rank_tables:
+                    record_file.unlink()
+        if remove_left_overs or final:
+            for record_file in rank_tables:
+                Path(f"{record_file}.lock").unlink(missing_ok=True)
+        logger.info(
+            f"Merged {n_copied} rows from {len(rank_tables)} records "
+            f"into {self.merged_record_path}"
+        )
+        return n_copied
+
+    def _copy_rows(self, rank_tables) -> int:
+        tasks = []
+        with tables.open_file(str(self.merged_record_path), "a") as merged_record:
+            for record_file, rank_file_tables in rank_tables.items():
+                for table_name, (description, nrows) in rank_file_tables.items():
+                    if table_name not in merged_record.root:
+                        expectedrows = sum(
+                            file_tables.get(table_name, (None, 0))[1]
+                            for file_tables in rank_tables.values()
+                        )
+                        table = merged_record.create_table(
+                            merged_record.root,
+                            table_name,
+                            description=description,
+                            expectedrows=max(expectedrows, 1),
+                        )
+                        table.attrs.merged_rows = {}
+                    merged_rows = getattr(
+                        merged_record.root, table_name
+                    ).attrs.merged_rows
+                    for start in range(
+                        merged_rows.get(record_file.name, 0), nrows, self.chunk_size
+                    ):
+                        stop = min(start + self.chunk_size, nrows)
+                        tasks.append((record_file, table_name, start, stop))
+            chunks = _map_bounded(_read_table_chunk, tasks, n_workers=self.n_workers)
+            n_copied = 0
+            for (record_file, table_name, _, stop), chunk in zip(tasks, chunks):
+                table = getattr(merged_record.root, table_name)
+                if len(chunk) > 0:
+                    table.append(chunk)
+                    table.flush()
+                merged_rows = table.attrs.merged_rows
+                merged_rows[record_file.name] = stop
+                table.attrs.merged_rows = merged_rows
+                n_copied += len(chunk)
+        return n_copied
+
+
 def combine_hdf5s(
     record_path,
     table_names=("infections", "population"),
     remove_left_overs=False,
     save_dir=None,
+    index_tables=False,
+    chunk_size=1_000_000,
+    n_workers=1,
 ):
-    record_files = record_path.glob("june_record.*.h5")
-    if save_dir is None:
-        save_path = Path(record_path)
-    else:
-        save_path = Path(save_dir)
-    full_record_save_path = save_path / "june_record.h5"
-    with tables.open_file(full_record_save_path, "w") as merged_record:
-        for i, record_file in enumerate(record_files):
-            with tables.open_file(str(record_file), "r") as record:
-                datasets = record.root._f_list_nodes()
-                for dataset in datasets:
-                    arr_data = dataset[:]
-                    if i == 0:
-                        description = getattr(record.root, dataset.name).description
-                        merged_record.create_table(
-                            merged_record.root, dataset.name, description=description
-                        )
-                    if len(arr_data) > 0:
-                        table = getattr(merged_record.root, dataset.name)
-                        table.append(arr_data)
-                        table.flush()
-            if remove_left_overs:
-                record_file.unlink()
+    """
+    Merges the per rank records into a new june_record.h5, once the ranks are
+    done writing them. See ``RecordMerger``.
+    """
+    merger = RecordMerger(
+        record_path, save_dir=save_dir, chunk_size=chunk_size, n_workers=n_workers
+    )
+    if merger.merged_record_path.exists():
+        merger.merged_record_path.unlink()
+    merger.merge(remove_left_overs=remove_left_overs, final=True)
+    if index_tables:
+        index_record_tables(merger.merged_record_path)
 
 
-def combine_records(record_path, remove_left_overs=False, save_dir=None):
+def combine_records(
+    record_path,
+    remove_left_overs=False,
+    save_dir=None,
+    index_tables=False,
+    n_workers=1,
+):
     record_path = Path(record_path)
     combine_summaries(
-        record_path, remove_left_overs=remove_left_overs, save_dir=save_dir
+        record_path,
+        remove_left_overs=remove_left_overs,
+        save_dir=save_dir,
+        n_workers=n_workers,
+    )
+    combine_hdf5s(
+        record_path,
+        remove_left_overs=remove_left_overs,
+        save_dir=save_dir,
+        index_tables=index_tables,
+        n_workers=n_workers,
     )
-    combine_hdf5s(record_path, remove_left_overs=remove_left_overs, save_dir=save_dir)
 
 
 def prepend_checkpoint_hdf5(
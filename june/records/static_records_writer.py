@@ -39,7 +39,12 @@ class StaticRecord:
     def get_data(self, world):
         pass
 
-    def record(self, hdf5_file, world):
+    def get_table_data(self, world):
+        """
+        Data of every column of the table, including the extra data, as lists of
+        int, float and str columns ordered as ``int_names``, ``float_names`` and
+        ``str_names``, which are extended with the names of the extra columns.
+        """
         int_data, float_data, str_data = self.get_data(world=world)
         if self.extra_int_data is not None:
             self.int_names += list(self.extra_int_data.keys())
@@ -53,6 +58,10 @@ class StaticRecord:
             self.str_names += list(self.extra_str_data.keys())
             for value in self.extra_str_data.values():
                 str_data += [value]
+        return int_data, float_data, str_data
+
+    def record(self, hdf5_file, world):
+        int_data, float_data, str_data = self.get_table_data(world=world)
         self._create_table(
             hdf5_file,
             self.int_names,
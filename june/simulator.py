@@ -1,7 +1,7 @@
 import logging
 import datetime
 import yaml
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from pathlib import Path
 from time import perf_counter
 from time import time as wall_clock
@@ -13,13 +13,17 @@ from june.groups.leisure import Leisure
 from june.groups.travel import Travel
 from june.epidemiology.epidemiology import Epidemiology
 from june.interaction import Interaction
-from june.tracker import Tracker
 from june.policy import Policies
 from june.event import Events
 from june.time import Timer
 from june.records import Record
 from june.world import World
-from june.mpi_setup import mpi_comm, mpi_size, mpi_rank
+from june.domains import SuperAreaCostProfile, DomainRebalancer
+from june.mpi_setup import mpi_size, mpi_rank
+from june.utils.profiler import PhaseProfiler
+
+if TYPE_CHECKING:
+    from june.tracker import Tracker
 
 default_config_filename = paths.configs_path / "config_example.yaml"
 
@@ -76,11 +80,14 @@ class Simulator:
         timer: Timer,
         activity_manager: ActivityManager,
         epidemiology: Epidemiology,
-        tracker: Tracker,
+        tracker: "Tracker",
         events: Optional[Events] = None,
         record: Optional[Record] = None,
         checkpoint_save_dates: List[datetime.date] = None,
         checkpoint_save_path: str = None,
+        cost_profile: Optional[SuperAreaCostProfile] = None,
+        rebalancer: Optional[DomainRebalancer] = None,
+        phase_profiler: Optional[PhaseProfiler] = None,
     ):
         """
         Class to run an epidemic spread simulation on the world.
@@ -89,6 +96,16 @@ class Simulator:
         ----------
         world:
             instance of World class
+        cost_profile:
+            if given, the cost of each super area (interaction time, people
+            sent to other ranks) is measured and saved at the end of the run,
+            to rebalance the domain decomposition of the next runs.
+        rebalancer:
+            if given, the MPI domains are rebalanced at the end of the days
+            in which the time per rank is too uneven.
+        phase_profiler:
+            if given, the time of each phase of the time steps and the work
+            done in them are recorded, and saved at the end of the run.
         """
         self.activity_manager = activity_manager
         self.world = world
@@ -117,6 +134,9 @@ class Simulator:
         self.record = record
         if self.record is not None and self.record.record_static_data:
             self.record.static_data(world=world)
+        self.cost_profile = cost_profile
+        self.rebalancer = rebalancer
+        self.phase_profiler = phase_profiler
 
     @classmethod
     def from_file(
@@ -126,12 +146,15 @@ class Simulator:
         policies: Optional[Policies] = None,
         events: Optional[Events] = None,
         epidemiology: Optional[Epidemiology] = None,
-        tracker: Optional[Tracker] = None,
+        tracker: Optional["Tracker"] = None,
         leisure: Optional[Leisure] = None,
         travel: Optional[Travel] = None,
         config_filename: str = default_config_filename,
         checkpoint_save_path: str = None,
         record: Optional[Record] = None,
+        cost_profile: Optional[SuperAreaCostProfile] = None,
+        rebalancer: Optional[DomainRebalancer] = None,
+        phase_profiler: Optional[PhaseProfiler] = None,
     ) -> "Simulator":
 
         """
@@ -174,6 +197,9 @@ class Simulator:
             record=record,
             checkpoint_save_dates=checkpoint_save_dates,
             checkpoint_save_path=checkpoint_save_path,
+            cost_profile=cost_profile,
+            rebalancer=rebalancer,
+            phase_profiler=phase_profiler,
         )
 
     @classmethod
@@ -183,7 +209,7 @@ class Simulator:
         checkpoint_load_path: str,
         interaction: Interaction,
         epidemiology: Optional[Epidemiology] = None,
-        tracker: Optional[Tracker] = None,
+        tracker: Optional["Tracker"] = None,
         policies: Optional[Policies] = None,
         leisure: Optional[Leisure] = None,
         travel: Optional[Travel] = None,
@@ -226,6 +252,30 @@ class Simulator:
             person.busy = False
             person.subgroups.leisure = None
 
+    def interact_group(self, group, people_from_abroad, infected_ids, infection_ids):
+        """
+        Runs the interaction in a group, adding the people infected in it to
+        ``infected_ids`` and the infections they got to ``infection_ids``.
+        Returns the number of people in the group.
+        """
+        if self.cost_profile is not None:
+            tick_group = perf_counter()
+        (
+            new_infected_ids,
+            new_infection_ids,
+            group_size,
+        ) = self.interaction.time_step_for_group(
+            group=group,
+            people_from_abroad=people_from_abroad,
+            delta_time=self.timer.duration,
+            record=self.record,
+        )
+        if self.cost_profile is not None:
+            self.cost_profile.add_group(group, perf_counter() - tick_group, group_size)
+        infected_ids += new_infected_ids
+        infection_ids += new_infection_ids
+        return group_size
+
     def do_timestep(self):
         """
         Perform a time step in the simulation. First, ActivityManager is called
@@ -238,7 +288,6 @@ class Simulator:
         """
         output_logger.info("==================== timestep ====================")
         tick_s, tickw_s = perf_counter(), wall_clock()
-        tick, tickw = perf_counter(), wall_clock()
         if self.activity_manager.policies is not None:
             self.activity_manager.policies.interaction_policies.apply(
                 date=self.timer.date, interaction=self.interaction
@@ -259,12 +308,19 @@ class Simulator:
         if not activities or len(activities) == 0:
             output_logger.info("==== do_timestep(): no active groups found. ====")
             return
-        (
-            people_from_abroad_dict,
-            n_people_from_abroad,
-            n_people_going_abroad,
-            to_send_abroad,  # useful for knowing who's MPI-ing, so can send extra info as needed.
-        ) = self.activity_manager.do_timestep(record=self.record)
+        # the people going abroad are sent while the interaction runs in
+        # the groups that have no visitors from abroad
+        tick_activity = perf_counter()
+        people_exchange = self.activity_manager.start_timestep(record=self.record)
+        tock_activity = perf_counter()
+        # useful for knowing who's MPI-ing, so can send extra info as needed.
+        to_send_abroad = people_exchange.movable_people
+        if self.cost_profile is not None:
+            if to_send_abroad is not None:
+                self.cost_profile.add_people_going_abroad(
+                    to_send_abroad, self.world.people
+                )
+            self.cost_profile.time_step()
         tick_interaction = perf_counter()
 
         # get the supergroup instances that are active in this time step:
@@ -294,28 +350,43 @@ class Simulator:
         infected_ids = []  # ids of the newly infected people
         infection_ids = []  # ids of the viruses they got
 
+        groups_with_people_from_abroad = []
+        n_groups = 0
         for super_group in super_group_instances:
             for group in super_group:
                 if group.external:
                     continue
-                else:
-                    people_from_abroad = people_from_abroad_dict.get(
-                        group.spec, {}
-                    ).get(group.id, None)
-                    (
-                        new_infected_ids,
-                        new_infection_ids,
-                        group_size,
-                    ) = self.interaction.time_step_for_group(
-                        group=group,
-                        people_from_abroad=people_from_abroad,
-                        delta_time=self.timer.duration,
-                        record=self.record,
-                    )
-
-                    infected_ids += new_infected_ids
-                    infection_ids += new_infection_ids
-                    n_people += group_size
+                if (group.spec, group.id) in people_exchange.groups_from_abroad:
+                    groups_with_people_from_abroad.append(group)
+                    continue
+                n_groups += 1
+                n_people += self.interact_group(
+                    group=group,
+                    people_from_abroad=None,
+                    infected_ids=infected_ids,
+                    infection_ids=infection_ids,
+                )
+            people_exchange.progress()
+        tick_waiting = perf_counter()
+        (
+            people_from_abroad_dict,
+            n_people_from_abroad,
+            n_people_going_abroad,
+        ) = self.activity_manager.finish_people_exchange(people_exchange)
+        waiting_time = perf_counter() - tick_waiting
+        rank_logger.info(
+            f"Rank {mpi_rank} -- people_from_abroad_waiting -- {waiting_time}"
+        )
+        n_groups += len(groups_with_people_from_abroad)
+        for group in groups_with_people_from_abroad:
+            n_people += self.interact_group(
+                group=group,
+                people_from_abroad=people_from_abroad_dict.get(group.spec, {}).get(
+                    group.id, None
+                ),
+                infected_ids=infected_ids,
+                infection_ids=infection_ids,
+            )
 
         tock_interaction = perf_counter()
         rank_logger.info(
@@ -333,6 +404,7 @@ class Simulator:
         tock_tracker = perf_counter()
         rank_logger.info(f"Rank {mpi_rank} -- tracker -- {tock_tracker-tick_tracker}")
 
+        tick_epidemiology = perf_counter()
         self.epidemiology.do_timestep(
             world=self.world,
             timer=self.timer,
@@ -341,11 +413,18 @@ class Simulator:
             infection_ids=infection_ids,
             people_from_abroad_dict=people_from_abroad_dict,
         )
-
-        tick, tickw = perf_counter(), wall_clock()
-        mpi_comm.Barrier()
-        tock, tockw = perf_counter(), wall_clock()
-        rank_logger.info(f"Rank {mpi_rank} -- interaction_waiting -- {tock-tick}")
+        tock_epidemiology = perf_counter()
+
+        if self.rebalancer is not None:
+            # from the interaction to the health update, without waiting
+            # for the people from abroad nor for the other ranks in the
+            # infection exchange, so that fast ranks report their own time
+            self.rebalancer.add_timestep_time(
+                tock_epidemiology
+                - tick_interaction
+                - waiting_time
+                - self.epidemiology.infection_waiting_time
+            )
 
         # recount people active to check people conservation
         people_active = (
@@ -370,6 +449,27 @@ class Simulator:
             f"{tockw-tickw_s} - {self.timer.date}\n"
         )
         mpi_logger.info(f"{self.timer.date},{mpi_rank},timestep,{tock-tick_s}")
+        if self.phase_profiler is not None:
+            profiler = self.phase_profiler
+            profiler.add_time("activity", tock_activity - tick_activity)
+            profiler.add_time(
+                "interaction", tock_interaction - tick_interaction - waiting_time
+            )
+            profiler.add_time("people_from_abroad_waiting", waiting_time)
+            profiler.add_time("tracker", tock_tracker - tick_tracker)
+            profiler.add_time("epidemiology", tock_epidemiology - tick_epidemiology)
+            profiler.add_time("timestep", tock - tick_s)
+            profiler.add_count("n_groups", n_groups)
+            profiler.add_count("n_people", n_people)
+            profiler.add_count(
+                "n_people_moved", n_people_from_abroad + n_people_going_abroad
+            )
+            profiler.add_count("n_infections", len(infected_ids))
+            profiler.add_count(
+                "mpi_bytes",
+                people_exchange.nbytes + self.epidemiology.infection_nbytes,
+            )
+            profiler.time_step(self.timer.now)
 
     def run(self):
         """
@@ -391,13 +491,12 @@ class Simulator:
                 self.epidemiology.infection_seeds_timestep(
                     self.timer, record=self.record
                 )
-            mpi_comm.Barrier()
             if mpi_rank == 0:
                 rank_logger.info("Next timestep")
             self.do_timestep()
+            end_of_day = (self.timer.now + self.timer.duration).is_integer()
             if (
-                self.timer.date.date() in self.checkpoint_save_dates
-                and (self.timer.now + self.timer.duration).is_integer()
+                self.timer.date.date() in self.checkpoint_save_dates and end_of_day
             ):  # this saves in the last time step of the day
                 saving_date = self.timer.date.date()
                 # we can resume consistenly
@@ -405,7 +504,18 @@ class Simulator:
                     f"Saving simulation checkpoint at {self.timer.date.date()}"
                 )
                 self.save_checkpoint(saving_date)
+            if self.rebalancer is not None and end_of_day:
+                self.rebalancer.rebalance(self)
             next(self.timer)
+        if self.record is not None and self.record.index_tables:
+            self.record.build_indexes()
+        if self.cost_profile is not None and self.cost_profile.save_path is not None:
+            self.cost_profile.save()
+        if (
+            self.phase_profiler is not None
+            and self.phase_profiler.save_path is not None
+        ):
+            self.phase_profiler.save()
 
     def save_checkpoint(self, saving_date):
         from june.hdf5_savers.checkpoint_saver import save_checkpoint_to_hdf5
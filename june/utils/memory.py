@@ -0,0 +1,27 @@
+import os
+from typing import Optional
+
+
+def get_unique_rss(pid: Optional[int] = None) -> Optional[int]:
+    """
+    Memory of a process that is not shared with any other process (its
+    private clean and dirty pages), in bytes. For workers forked after
+    loading a world, this is the part of the world they have copied.
+    Returns None where /proc/<pid>/smaps_rollup is not available.
+
+    Parameters
+    ----------
+    pid
+        process id, this process by default
+    """
+    pid = os.getpid() if pid is None else pid
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    unique_rss = 0
+    for line in lines:
+        if line.startswith(("Private_Clean:", "Private_Dirty:")):
+            unique_rss += int(line.split()[1]) * 1024
+    return unique_rss
@@ -6,7 +6,7 @@ from random import random
 import numpy as np
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def random_choice_numba(arr, prob):
     """
     Fast implementation of np.random.choice
@@ -1,5 +1,14 @@
 import cProfile
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
 from june.mpi_setup import mpi_rank, mpi_comm
+from june.utils.rank_csv import gather_rank_dfs, save_gathered_csv
+
+logger = logging.getLogger("profiler")
 
 
 # a decorator for profiling
@@ -22,3 +31,163 @@ def profile(filename=None, comm=mpi_comm):
         return wrap_f
 
     return prof_decorator
+
+
+phase_columns = (
+    "activity",
+    "interaction",
+    "people_from_abroad_waiting",
+    "tracker",
+    "epidemiology",
+    "timestep",
+)
+counter_columns = (
+    "n_groups",
+    "n_people",
+    "n_people_moved",
+    "n_infections",
+    "mpi_bytes",
+)
+
+
+class PhaseProfiler:
+    """
+    Timeline of the time spent by this rank in each phase of the time steps
+    of a run, and of counters of the work done in them.
+
+    Each time step is a row of a numpy buffer, so timing a phase is just an
+    addition to it. The rows of all the ranks are gathered and written once,
+    at the end of the run (see ``get_phase_report`` to analyse them).
+    """
+
+    def __init__(
+        self,
+        save_path: Optional[str] = None,
+        phases: Tuple[str] = phase_columns,
+        counters: Tuple[str] = counter_columns,
+        initial_time_steps: int = 1024,
+    ):
+        """
+        Parameters
+        ----------
+        save_path
+            csv file where the timeline is saved at the end of the run. If
+            None, the timeline has to be saved explicitly with ``save``.
+        phases
+            names of the timed phases
+        counters
+            names of the counters
+        initial_time_steps
+            number of time steps the buffer is allocated for. It doubles its
+            size when it is full.
+        """
+        self.save_path = save_path
+        self.phases = tuple(phases)
+        self.counters = tuple(counters)
+        self.columns = ("time",) + self.phases + self.counters
+        self.column_index = {column: i for i, column in enumerate(self.columns)}
+        self.timeline = np.zeros((initial_time_steps, len(self.columns)))
+        self.n_time_steps = 0
+
+    def add_time(self, phase: str, time: float):
+        self.timeline[self.n_time_steps, self.column_index[phase]] += time
+
+    def add_count(self, counter: str, count: float = 1):
+        self.timeline[self.n_time_steps, self.column_index[counter]] += count
+
+    def time_step(self, time: float):
+        """
+        Closes the row of the current time step, which started at ``time``
+        days from the start of the simulation.
+        """
+        self.timeline[self.n_time_steps, 0] = time
+        self.n_time_steps += 1
+        if self.n_time_steps == len(self.timeline):
+            self.timeline = np.concatenate(
+                (self.timeline, np.zeros_like(self.timeline))
+            )
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Timeline of this rank, one row per time step.
+        """
+        df = pd.DataFrame(
+            self.timeline[: self.n_time_steps], columns=list(self.columns)
+        )
+        df.insert(0, "time_step", np.arange(self.n_time_steps))
+        df.insert(0, "rank", mpi_rank)
+        return df
+
+    def gather(self) -> Optional[pd.DataFrame]:
+        """
+        Timelines of all the ranks. Returns the DataFrame on rank 0 and None
+        on the other ranks.
+        """
+        return gather_rank_dfs(
+            self.to_df(), combine=lambda dfs: pd.concat(dfs, ignore_index=True)
+        )
+
+    def save(self, save_path: Optional[str] = None):
+        """
+        Gathers the timelines of all ranks and writes them to a csv file from
+        rank 0. Needs to be called by every rank.
+        """
+        save_path = self.save_path if save_path is None else save_path
+        df = save_gathered_csv(
+            self.gather, save_path, name="phase timeline", index=False
+        )
+        if df is None:
+            return
+        logger.info(
+            f"Saved the phase timeline of {self.n_time_steps} time steps "
+            f"to {save_path}"
+        )
+
+    @staticmethod
+    def load(file_path: str) -> pd.DataFrame:
+        return pd.read_csv(file_path)
+
+
+def get_phase_report(
+    timeline: pd.DataFrame,
+    phases: Tuple[str] = phase_columns,
+    imbalance_threshold: float = 0.2,
+) -> pd.DataFrame:
+    """
+    Summarises the timeline of a run per phase. All ranks wait for the
+    slowest one at the end of each time step, so the time a phase adds to
+    the run (its critical path) is the sum over time steps of its maximum
+    time across ranks. The imbalance is how much longer that is than the sum
+    of the mean times across ranks, and the phases whose imbalance is above
+    ``imbalance_threshold`` are flagged.
+
+    Parameters
+    ----------
+    timeline
+        the timeline of all the ranks, as saved by ``PhaseProfiler``
+    phases
+        the phases to report
+    imbalance_threshold
+        relative imbalance above which a phase is flagged
+    """
+    by_time_step = timeline.groupby("time_step")[list(phases)]
+    critical_path = by_time_step.max().sum()
+    mean = by_time_step.mean().sum()
+    slowest_rank = (
+        timeline.set_index("rank")
+        .groupby("time_step")[list(phases)]
+        .idxmax()
+        .mode()
+        .iloc[0]
+    )
+    report = pd.DataFrame(
+        {
+            "critical_path": critical_path,
+            "mean": mean,
+            "imbalance": (critical_path / mean - 1).where(mean > 0, 0.0),
+            "slowest_rank": slowest_rank,
+        }
+    )
+    report["imbalanced"] = report.imbalance > imbalance_threshold
+    report.index.name = "phase"
+    return report
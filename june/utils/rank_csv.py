@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from june.mpi_setup import mpi_comm, mpi_rank, mpi_size
+
+
+def gather_rank_dfs(
+    df: pd.DataFrame, combine: Callable[[List[pd.DataFrame]], pd.DataFrame]
+) -> Optional[pd.DataFrame]:
+    """
+    Gathers the DataFrame of every rank on rank 0 and combines them with
+    ``combine``. Returns the combined DataFrame on rank 0 and None on the
+    other ranks. Needs to be called by every rank.
+    """
+    if mpi_size == 1:
+        return combine([df])
+    dfs = mpi_comm.gather(df, root=0)
+    if mpi_rank > 0:
+        return None
+    return combine(dfs)
+
+
+def save_gathered_csv(
+    gather: Callable[[], Optional[pd.DataFrame]],
+    save_path: Optional[str],
+    name: str,
+    index=True,
+) -> Optional[pd.DataFrame]:
+    """
+    Gathers a DataFrame from all the ranks with ``gather`` and writes it to
+    a csv file from rank 0, creating its folder. Returns the DataFrame on
+    rank 0 and None on the other ranks. Needs to be called by every rank.
+
+    Parameters
+    ----------
+    gather
+        function returning the gathered DataFrame on rank 0 and None on
+        the other ranks, such as one built on ``gather_rank_dfs``
+    save_path
+        csv file to write
+    name
+        what the DataFrame holds, for the error raised if there is no path
+    index
+        whether to write the index of the DataFrame
+    """
+    if save_path is None:
+        raise ValueError(f"No path given to save the {name}.")
+    df = gather()
+    if df is None:
+        return None
+    save_path = Path(save_path)
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(save_path, index=index)
+    return df
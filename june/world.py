@@ -1,15 +1,6 @@
 import logging
 from typing import Optional
 from june.demography import Demography, Population
-from june.distributors import (
-    SchoolDistributor,
-    HospitalDistributor,
-    HouseholdDistributor,
-    CareHomeDistributor,
-    WorkerDistributor,
-    CompanyDistributor,
-    UniversityDistributor,
-)
 from june.geography import Geography, Areas
 from june.groups import Supergroup, Cemeteries
 
@@ -80,6 +71,16 @@ class World:
         """
         Distributes people to buildings assuming default configurations.
         """
+        from june.distributors import (
+            SchoolDistributor,
+            HospitalDistributor,
+            HouseholdDistributor,
+            CareHomeDistributor,
+            WorkerDistributor,
+            CompanyDistributor,
+            UniversityDistributor,
+        )
+
         if (
             self.companies is not None
             or self.hospitals is not None
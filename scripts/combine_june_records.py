@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Combines the per rank records and summaries of an MPI run.
+
+With --watch, the records are merged every --interval seconds while the
+simulation is running, and the run is finished off (summaries, removal of the
+rank files and indexes) once the file given by --done_file appears.
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from june.records.records_writer import (
+    RecordMerger,
+    combine_summaries,
+    combine_records,
+    index_record_tables,
+)
+
+logger = logging.getLogger("combine_june_records")
+
+parser = argparse.ArgumentParser(description="Combine the records of an MPI run")
+parser.add_argument("record_path", help="directory with the per rank records")
+parser.add_argument("--save_dir", default=None, help="where to save the records")
+parser.add_argument("--n_workers", type=int, default=1)
+parser.add_argument("--chunk_size", type=int, default=1_000_000)
+parser.add_argument("--remove_left_overs", action="store_true")
+parser.add_argument("--index_tables", action="store_true")
+parser.add_argument("--watch", action="store_true")
+parser.add_argument("--interval", type=float, default=60)
+parser.add_argument(
+    "--done_file",
+    default=None,
+    help="file whose existence marks the end of the run, when watching",
+)
+args = parser.parse_args()
+
+if not args.watch:
+    combine_records(
+        args.record_path,
+        remove_left_overs=args.remove_left_overs,
+        save_dir=args.save_dir,
+        index_tables=args.index_tables,
+        n_workers=args.n_workers,
+    )
+else:
+    if args.done_file is None:
+        raise ValueError("--watch needs a --done_file to know when the run is over")
+    merger = RecordMerger(
+        args.record_path,
+        save_dir=args.save_dir,
+        chunk_size=args.chunk_size,
+        n_workers=args.n_workers,
+    )
+    while not Path(args.done_file).exists():
+        merger.merge()
+        time.sleep(args.interval)
+    merger.merge(remove_left_overs=args.remove_left_overs)
+    combine_summaries(
+        args.record_path,
+        remove_left_overs=args.remove_left_overs,
+        save_dir=args.save_dir,
+        n_workers=args.n_workers,
+    )
+    if args.index_tables:
+        index_record_tables(merger.merged_record_path)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Reports the time of each phase of the time steps of a run, from the timeline
+saved by the PhaseProfiler of the simulator.
+
+For each phase it shows the critical path (the sum over time steps of the
+slowest rank), the mean over ranks, their relative difference and the rank
+that is most often the slowest, and flags the imbalanced phases.
+"""
+import argparse
+
+import pandas as pd
+
+from june.utils.profiler import PhaseProfiler, get_phase_report, phase_columns
+
+parser = argparse.ArgumentParser(description="Report the phase timeline of a run")
+parser.add_argument("timeline_path", help="csv file saved by the PhaseProfiler")
+parser.add_argument(
+    "--imbalance_threshold",
+    type=float,
+    default=0.2,
+    help="relative imbalance above which a phase is flagged",
+)
+args = parser.parse_args()
+
+timeline = PhaseProfiler.load(args.timeline_path)
+phases = [phase for phase in phase_columns if phase in timeline]
+report = get_phase_report(
+    timeline, phases=phases, imbalance_threshold=args.imbalance_threshold
+)
+n_ranks = timeline["rank"].nunique()
+n_time_steps = timeline["time_step"].nunique()
+print(f"{n_ranks} ranks, {n_time_steps} time steps")
+with pd.option_context(
+    "display.float_format", "{:.3f}".format, "display.max_columns", None
+):
+    print(report)
+counters = [column for column in timeline if column.startswith(("n_", "mpi_"))]
+if counters:
+    print("\ncounters per rank:")
+    print(timeline.groupby("rank")[counters].sum())
+for phase in report.index[report.imbalanced]:
+    print(
+        f"WARNING: {phase} is {100 * report.imbalance[phase]:.0f}% slower on the "
+        f"slowest rank than on average (rank {report.slowest_rank[phase]})"
+    )
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from june.demography import Person
+from june.distributors.household_distributor import get_closest_age
+from june.distributors.people_by_age import PeopleByAge
+
+
+def brute_force_closest_age(ages, age, min_age, max_age):
+    ages = [a for a in sorted(ages) if min_age <= a <= max_age]
+    if not ages:
+        return None
+    return min(ages, key=lambda a: (abs(a - age), a))
+
+
+@pytest.fixture(name="people_by_age")
+def make_people_by_age():
+    people_by_age = PeopleByAge()
+    for age in [0, 3, 4, 18, 30, 31, 45, 65, 99]:
+        for _ in range(2):
+            people_by_age.add(Person.from_attributes(age=age, sex="m"))
+    return people_by_age
+
+
+def test__mask_follows_keys(people_by_age):
+    assert people_by_age.n_people == 18
+    assert people_by_age.next_age(5) == 18
+    assert people_by_age.previous_age(5) == 4
+    del people_by_age[18]
+    assert people_by_age.next_age(5) == 30
+    people_by_age.pop(30)
+    assert people_by_age.next_age(5) == 31
+    people_by_age[20] = [Person.from_attributes(age=20)]
+    assert people_by_age.next_age(5) == 20
+    assert people_by_age.next_age(100) is None
+    assert people_by_age.previous_age(-1) is None
+    people_by_age.setdefault(10, []).append(Person.from_attributes(age=10))
+    assert people_by_age.next_age(5) == 10
+    people_by_age.update({7: [Person.from_attributes(age=7)]})
+    assert people_by_age.next_age(5) == 7
+    people_by_age |= {6: [Person.from_attributes(age=6)]}
+    assert people_by_age.next_age(5) == 6
+    age, _ = people_by_age.popitem()
+    assert age == 6
+    assert people_by_age.next_age(5) == 7
+    people_by_age.clear()
+    assert people_by_age.closest_age(50) is None
+    assert not people_by_age.has_ages_between(0, 100)
+
+
+def test__ties_go_to_the_younger_age(people_by_age):
+    assert people_by_age.closest_age(24) == 18
+    assert people_by_age.closest_age(38) == 31
+
+
+def test__closest_age_matches_brute_force(people_by_age):
+    ages = list(people_by_age.keys())
+    for age in range(-2, 105):
+        for min_age, max_age in [(0, 100), (18, 64), (0, 17), (40, 50), (66, 98)]:
+            expected = brute_force_closest_age(ages, age, min_age, max_age)
+            assert people_by_age.closest_age(age, min_age, max_age) == expected
+            closest = get_closest_age(dict(people_by_age), age, min_age, max_age)
+            if expected is None:
+                assert closest is None
+            else:
+                assert abs(closest - age) == abs(expected - age)
+
+
+def test__closest_person_is_removed(people_by_age):
+    # the distributor pops people and deletes the empty ages
+    for _ in range(2):
+        age = people_by_age.closest_age(np.int64(44), min_age=18, max_age=64)
+        assert age == 45
+        people_by_age[age].pop()
+        if not people_by_age[age]:
+            del people_by_age[age]
+    assert people_by_age.closest_age(44, min_age=18, max_age=64) == 31
+    assert people_by_age.has_ages_between(65, 99)
@@ -2,11 +2,13 @@ import os
 from pathlib import Path
 
 import numpy as np
+import pandas as pd
 import pytest
 
+from june.demography import Person
 from june.world import generate_world_from_geography
-from june.geography import Geography
-from june.groups.school import Schools
+from june.geography import Area, Geography
+from june.groups.school import School, Schools
 from june.distributors.school_distributor import SchoolDistributor
 
 default_config_filename = (
@@ -147,3 +149,123 @@ def test__limit_classroom_sizes(school_world):
             ]
         )
         assert n_pupils == school.n_pupils
+
+
+def make_synthetic_schools_and_areas(n_pupils_max, seed=0):
+    rng = np.random.default_rng(seed)
+    school_df = pd.DataFrame(
+        {
+            "latitude": rng.uniform(51, 52, 20),
+            "longitude": rng.uniform(-1, 0, 20),
+            "age_min": [4, 11] * 10,
+            "age_max": [11, 18] * 10,
+        }
+    )
+    schools = [
+        School(
+            coordinates=(latitude, longitude),
+            n_pupils_max=n_pupils_max,
+            age_min=int(age_min),
+            age_max=int(age_max),
+        )
+        for latitude, longitude, age_min, age_max in school_df.values
+    ]
+    school_trees, agegroup_to_global_indices = Schools.init_trees(school_df, (0, 19))
+    schools = Schools(
+        schools,
+        school_trees=school_trees,
+        agegroup_to_global_indices=agegroup_to_global_indices,
+    )
+    areas = []
+    for i in range(30):
+        area = Area(
+            name=f"area_{i}", coordinates=(rng.uniform(51, 52), rng.uniform(-1, 0))
+        )
+        area.people = [
+            Person.from_attributes(age=int(age)) for age in rng.integers(0, 25, 60)
+        ]
+        areas.append(area)
+    return schools, areas
+
+
+def distribute_kids_per_area(school_distributor, areas):
+    """
+    Reference distribution, one area and one kid at a time.
+    """
+    schools = school_distributor.schools
+    for area in areas:
+        closest_schools_by_age = {}
+        is_school_full = {}
+        for age in schools.school_trees:
+            closest_schools_idx = schools.get_closest_schools_idx(
+                age, np.array([area.coordinates]), school_distributor.neighbour_schools
+            )[0]
+            closest_schools_by_age[age] = [
+                schools.members[idx]
+                for idx in schools.school_agegroup_to_global_indices[age][
+                    closest_schools_idx
+                ]
+            ]
+            is_school_full[age] = False
+        school_distributor.distribute_mandatory_kids_to_school(
+            area, is_school_full, closest_schools_by_age
+        )
+        school_distributor.distribute_non_mandatory_kids_to_school(
+            area, is_school_full, closest_schools_by_age
+        )
+
+
+def get_school_ids(areas):
+    return [
+        None if person.primary_activity is None else person.primary_activity.group.id
+        for area in areas
+        for person in area.people
+    ]
+
+
+def test__batched_distribution_goes_to_closest_school():
+    # with no capacity limits every kid goes to the closest school
+    schools, areas = make_synthetic_schools_and_areas(n_pupils_max=10000)
+    SchoolDistributor(schools, neighbour_schools=5).distribute_kids_to_school(areas)
+    batched_ids = get_school_ids(areas)
+    reference_schools, reference_areas = make_synthetic_schools_and_areas(
+        n_pupils_max=10000
+    )
+    distribute_kids_per_area(
+        SchoolDistributor(reference_schools, neighbour_schools=5), reference_areas
+    )
+    school_to_position = {school.id: i for i, school in enumerate(schools)}
+    reference_to_position = {school.id: i for i, school in enumerate(reference_schools)}
+    assert [
+        None if school_id is None else school_to_position[school_id]
+        for school_id in batched_ids
+    ] == [
+        None if school_id is None else reference_to_position[school_id]
+        for school_id in get_school_ids(reference_areas)
+    ]
+
+
+@pytest.mark.parametrize("n_pupils_max", [1, 50])
+def test__batched_distribution_respects_capacity(n_pupils_max):
+    schools, areas = make_synthetic_schools_and_areas(n_pupils_max=n_pupils_max)
+    SchoolDistributor(schools, neighbour_schools=5).distribute_kids_to_school(areas)
+    for area in areas:
+        for person in area.people:
+            if 5 <= person.age <= 18:
+                assert person.primary_activity.group.spec == "school"
+            if person.primary_activity is not None:
+                school = person.primary_activity.group
+                assert school.age_min <= person.age <= school.age_max
+    if n_pupils_max == 1:
+        # mandatory kids fill all the schools, so no 4 year old goes
+        assert all(pupil.age >= 5 for school in schools for pupil in school.students)
+    # same number of pupils as the reference distribution, within noise
+    reference_schools, reference_areas = make_synthetic_schools_and_areas(
+        n_pupils_max=n_pupils_max
+    )
+    distribute_kids_per_area(
+        SchoolDistributor(reference_schools, neighbour_schools=5), reference_areas
+    )
+    n_pupils = sum(school.n_pupils for school in schools)
+    n_reference = sum(school.n_pupils for school in reference_schools)
+    assert n_pupils == pytest.approx(n_reference, rel=0.05)
@@ -159,3 +159,20 @@ class TestDomesticCare:
                     )
                     == 1.0
                 )
+
+    def test__carer_roster(self, domestic_care, world):
+        linked = [
+            household for household in world.households if household.household_to_care
+        ]
+        assert len(domestic_care._cared_households) == len(linked)
+        assert set(domestic_care._carers) == {
+            person for household in linked for person in household.residents
+        }
+        # the only available adult of each household goes
+        for household in linked:
+            household.residents[0].busy = True
+        domestic_care.apply(world=world, activities=["leisure"], day_type="weekday")
+        for household in linked:
+            carer = household.residents[1]
+            assert carer.leisure is not None
+            assert carer in household.household_to_care.people
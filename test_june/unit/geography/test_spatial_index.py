@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from june.geography import SpatialIndex, Area, Areas
+from june.groups.leisure import SocialVenues, SocialVenueDistributor
+
+
+@pytest.fixture(name="coordinates", scope="module")
+def make_coordinates():
+    np.random.seed(0)
+    latitudes = np.random.uniform(50, 55, 200)
+    longitudes = np.random.uniform(-3, 1, 200)
+    return np.vstack((latitudes, longitudes)).T
+
+
+class TestSpatialIndex:
+    def test__tree_is_built_lazily(self, coordinates):
+        index = SpatialIndex(coordinates)
+        assert not index.is_built
+        index.query(coordinates[0], k=1)
+        assert index.is_built
+
+    def test__batched_query_matches_single_queries(self, coordinates):
+        index = SpatialIndex(coordinates)
+        batched, distances = index.query(coordinates[:20], k=5, return_distance=True)
+        assert batched.shape == (20, 5)
+        for i in range(20):
+            single = index.query(coordinates[i], k=5)
+            assert np.array_equal(single[0], batched[i])
+            # a point is always its own closest neighbour
+            assert batched[i][0] == i
+            assert distances[i][0] == pytest.approx(0.0)
+            assert np.all(np.diff(distances[i]) >= 0)
+
+    def test__k_is_capped(self, coordinates):
+        index = SpatialIndex(coordinates[:3])
+        assert index.query(coordinates[:2], k=10).shape == (2, 3)
+
+    def test__query_radius_csr(self, coordinates):
+        index = SpatialIndex(coordinates)
+        indptr, indices, distances = index.query_radius(
+            coordinates[:10], radius=50, return_distance=True
+        )
+        assert len(indptr) == 11
+        assert indptr[-1] == len(indices) == len(distances)
+        assert np.all(distances <= 50)
+        for i in range(10):
+            neighbours = indices[indptr[i] : indptr[i + 1]]
+            assert neighbours[0] == i
+            _, single = index.query_radius(coordinates[i], radius=50)
+            assert np.array_equal(single, neighbours)
+
+    def test__query_radius_empty(self):
+        index = SpatialIndex([[50.0, 0.0]])
+        indptr, indices = index.query_radius([[10.0, 10.0], [-10.0, 0.0]], radius=1)
+        assert np.array_equal(indptr, [0, 0, 0])
+        assert indices.size == 0
+
+
+def test__areas_use_spatial_index(coordinates):
+    areas = Areas([Area(coordinates=coordinate) for coordinate in coordinates])
+    assert not areas.spatial_index.is_built
+    closest = areas.get_closest_area(coordinates[7])
+    assert closest == areas[7]
+    indices = areas.get_closest_areas_idx(coordinates[:5], k=1)
+    assert np.array_equal(indices[:, 0], np.arange(5))
+
+
+def test__possible_venues_for_areas(coordinates):
+    social_venues = SocialVenues.from_coordinates(coordinates[:50], super_areas=None)
+    distributor = SocialVenueDistributor(
+        social_venues,
+        times_per_week={
+            "weekday": {"male": {"0-100": 1}, "female": {"0-100": 1}},
+            "weekend": {"male": {"0-100": 1}, "female": {"0-100": 1}},
+        },
+        maximum_distance=20,
+        nearest_venues_to_visit=2,
+    )
+    areas = [Area(coordinates=coordinate) for coordinate in coordinates]
+    venues_per_area = distributor.get_possible_venues_for_areas(areas)
+    assert len(venues_per_area) == len(areas)
+    for area, venues in zip(areas, venues_per_area):
+        assert venues == distributor.get_possible_venues_for_area(area)
+        in_radius = social_venues.get_venues_in_radius(area.coordinates, 20)
+        if in_radius is None:
+            assert venues == tuple(social_venues.get_closest_venues(area.coordinates))
+        else:
+            assert venues == tuple(in_radius[:2])
@@ -96,6 +96,39 @@ class TestHouseholdVisits:
                     assert len(to_visit) in range(2, 5)
         assert has_visits
 
+    def test__households_do_not_link_to_themselves_or_empty_households(
+        self, rv_distributor
+    ):
+        area = Area()
+        for i in range(6):
+            household = Household(type="family")
+            if i % 3:
+                household.add(Person.from_attributes())
+            area.households.append(household)
+        rv_distributor.link_households_to_households([SuperArea(areas=[area])])
+        for household in area.households:
+            to_visit = household.residences_to_visit["household"]
+            if household.n_residents == 0:
+                assert to_visit == ()
+                continue
+            assert len(to_visit) in range(2, 5)
+            for residence in to_visit:
+                assert residence is not household
+                assert residence.n_residents > 0
+
+    def test__residence_type_probabilities_follow_policies(self, rv_distributor):
+        residence_types = ("household", "care_home")
+        _, probabilities = rv_distributor._get_residence_type_probabilities(
+            residence_types
+        )
+        assert np.allclose(probabilities, [0.7, 0.3])
+        rv_distributor.policy_reductions = {"household": 0.5, "care_home": 1.5}
+        _, probabilities = rv_distributor._get_residence_type_probabilities(
+            residence_types
+        )
+        assert np.allclose(probabilities, [0.25, 0.75])
+        rv_distributor.policy_reductions = {}
+
     def test__visitors_stay_home_when_visited(self, rv_distributor):
         visitor = Person.from_attributes(age=20)
         resident1 = Person.from_attributes()
@@ -1,6 +1,7 @@
 import numpy as np
-from june.groups.leisure import SocialVenues
-from june.geography import Geography
+from june.demography import Person
+from june.groups.leisure import SocialVenues, Pubs, PubDistributor
+from june.geography import Area, Geography
 
 
 def test__social_venue_from_coordinates():
@@ -27,3 +28,37 @@ def test__get_closest_venues():
     venues_in_radius = social_venues.get_venues_in_radius([51.7, -0.33], 10)
     assert venues_in_radius[0] == social_venues[1]
     assert venues_in_radius[1] == social_venues[0]
+
+
+def make_area(venues, n_people):
+    area = Area(coordinates=[51.7, -0.3])
+    area.social_venues["pub"] = tuple(venues)
+    for _ in range(n_people):
+        person = Person.from_attributes()
+        person.area = area
+        area.people.append(person)
+    return area
+
+
+def test__venues_drawn_per_time_step():
+    coordinate_list = np.array([[51.752179, -0.334667], [51.741485, -0.336645]])
+    pubs = Pubs.from_coordinates(coordinate_list, super_areas=None)
+    pub_distributor = PubDistributor.from_config(pubs)
+    areas = [make_area(pubs, 200), make_area((), 2)]
+    pub_distributor.set_area_candidates(areas)
+    assert pub_distributor._candidates_indptr == [0, 2, 2]
+    pub_distributor.draw_area_venues()
+    # every resident gets an independent pick
+    chosen = [pub_distributor.get_leisure_group(person) for person in areas[0].people]
+    assert set(chosen) == set(pubs)
+    assert pub_distributor.get_leisure_group(areas[1].people[0]) is None
+    # once the picks of the area are handed out, venues are drawn directly
+    person = areas[0].people[0]
+    assert pub_distributor.get_leisure_group(person) in pubs
+    # areas not seen before are drawn directly, and from the next time step on
+    new_area = make_area(pubs[1:], 1)
+    assert pub_distributor.get_leisure_group(new_area.people[0]) == pubs[1]
+    pub_distributor.draw_area_venues()
+    assert pub_distributor._pick_end[-1] - pub_distributor._pick_cursor[-1] == 1
+    assert pub_distributor.get_leisure_group(new_area.people[0]) == pubs[1]
+    assert pub_distributor._pick_end[-1] == pub_distributor._pick_cursor[-1]
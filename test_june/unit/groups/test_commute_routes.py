@@ -0,0 +1,79 @@
+import pytest
+
+from june.demography import Person
+from june.geography import (
+    Area,
+    SuperArea,
+    City,
+    Cities,
+    CityStation,
+    InterCityStation,
+)
+from june.groups.travel import (
+    CommuteRoutes,
+    CityTransport,
+    InterCityTransport,
+    ModeOfTransport,
+)
+
+
+@pytest.fixture(name="commute_world", scope="module")
+def make_commute_world():
+    home_super_area = SuperArea(name="home", coordinates=[51.0, 0.0])
+    work_super_area = SuperArea(name="work", coordinates=[51.5, 0.0])
+    home_area = Area(super_area=home_super_area, coordinates=[51.0, 0.0])
+    work_area = Area(super_area=work_super_area, coordinates=[51.5, 0.0])
+    home_super_area.areas = [home_area]
+    work_super_area.areas = [work_area]
+    city = City(name="London", super_areas=["work"], super_area=work_super_area)
+    work_super_area.city = city
+    city_station = CityStation(city="London", super_area=work_super_area)
+    city_station.city_transports = [CityTransport(station=city_station)]
+    inter_city_station = InterCityStation(city="London", super_area=home_super_area)
+    inter_city_station.inter_city_transports = [
+        InterCityTransport(station=inter_city_station)
+    ]
+    city.city_stations = [city_station]
+    city.inter_city_stations = [inter_city_station]
+    home_super_area.closest_inter_city_station_for_city["London"] = inter_city_station
+    work_super_area.closest_inter_city_station_for_city["London"] = inter_city_station
+    public = ModeOfTransport(description="Underground", is_public=True)
+    internal, external, driver = [Person.from_attributes(age=30) for _ in range(3)]
+    for person, area in zip(
+        [internal, external, driver], [work_area, home_area, home_area]
+    ):
+        area.add(person)
+        person.work_super_area = work_super_area
+        person.mode_of_transport = public
+    city.internal_commuter_ids = {internal.id}
+    inter_city_station.commuter_ids = {external.id}
+    return Cities([city], ball_tree=False), (internal, external, driver)
+
+
+def test__routes_match_city_lookup(commute_world):
+    cities, people = commute_world
+    city = cities[0]
+    routes = CommuteRoutes.from_cities(cities)
+    assert len(routes) == 2
+    for person in people:
+        expected = city.get_commute_subgroup(person)
+        subgroup = routes.get_commute_subgroup(person)
+        if expected is None:
+            assert subgroup is None
+        else:
+            assert subgroup == expected
+
+
+def test__unknown_people_have_no_route(commute_world):
+    cities, people = commute_world
+    routes = CommuteRoutes.from_cities(cities)
+    stranger = Person.from_attributes(age=30)
+    assert routes.get_route(stranger.id) == CommuteRoutes.no_route
+    assert routes.get_route(-10) == CommuteRoutes.no_route
+    assert routes.get_commute_subgroup(stranger) is None
+
+
+def test__empty_routes():
+    routes = CommuteRoutes.from_cities(Cities([], ball_tree=False))
+    assert len(routes) == 0
+    assert routes.get_commute_subgroup(Person.from_attributes()) is None
@@ -1,3 +1,5 @@
+import pytest
+
 from june.demography.person import Person
 from june.groups.care_home import CareHome
 from june.groups.household import Household
@@ -20,3 +22,41 @@ class TestGroup:
 
         assert care_home_2.id == care_home_1.id + 1
         assert care_home_1.name == f"CareHome_{care_home_1.id:05d}"
+
+
+class TestSubgroup:
+    def test__large_subgroups_remove_in_constant_time(self):
+        group = Household()
+        subgroup = group[group.SubgroupType.adults]
+        people = [Person.from_attributes() for _ in range(50)]
+        for person in people:
+            subgroup.append(person)
+        assert subgroup._index is not None
+        assert all(person in subgroup for person in people)
+        subgroup.remove(people[3])
+        subgroup.remove(people[-1])
+        assert people[3] not in subgroup
+        assert not people[3].busy
+        # the last person fills the place of the removed one
+        assert subgroup.people[3] is people[-2]
+        assert len(subgroup) == 48
+        assert {id(person) for person in subgroup} == {
+            id(person) for person in people[:3] + people[4:-1]
+        }
+        for i, person in enumerate(subgroup.people):
+            assert subgroup._index[person] == i
+        with pytest.raises(ValueError):
+            subgroup.remove(people[3])
+        subgroup.clear()
+        assert subgroup._index is None
+        assert people[0] not in subgroup
+
+    def test__small_subgroups_keep_order(self):
+        group = Household()
+        subgroup = group[group.SubgroupType.adults]
+        people = [Person.from_attributes() for _ in range(3)]
+        for person in people:
+            subgroup.append(person)
+        subgroup.remove(people[0])
+        assert subgroup._index is None
+        assert subgroup.people == people[1:]
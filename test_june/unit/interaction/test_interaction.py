@@ -1,4 +1,5 @@
 from june.interaction import Interaction
+from june.interaction import interaction as interaction_module
 from june.groups import School
 from june.demography import Person
 from june import paths
@@ -29,49 +30,41 @@ class TestInteractionFunctions:
             rtol=0.05,
         )
 
-    def test__create_infector_tensor(self):
-        infectors_per_infection_per_subgroup = {
-            1: {2: {"ids": [1, 2, 3], "trans_probs": [0.1, 0.2, 0.3]}},
-            2: {
-                0: {"ids": [4, 5], "trans_probs": [0.4, 0.5]},
-                1: {"ids": [6], "trans_probs": [0.8]},
-            },
-        }
-        subgroup_sizes = [3, 5, 7]
+    def test__infection_probabilities(self, selector, monkeypatch):
+        people, school = create_school(n_students=3, n_teachers=4)
+        for student, probability in zip(school.students[:2], (0.1, 0.2)):
+            selector.infect_person_at_time(student, time=0)
+            student.infection.transmission.probability = probability
         interaction = Interaction.from_file(config_filename=test_config)
-        contact_matrix = np.array([[1, 0, 1], [1, 1, 1], [0, 1, 0]])
-        infector_tensor = interaction.create_infector_tensor(
-            infectors_per_infection_per_subgroup, subgroup_sizes, contact_matrix, 1, 1
+        interactive_school = school.get_interactive_group()
+        beta = interaction._get_interactive_group_beta(interactive_school)
+        kernel = interaction.get_kernel(interactive_school, beta, 1)
+        # people don't interact with themselves
+        teacher_probability = 1 - np.exp(-kernel[0, 1] * 0.3 / 3)
+        student_probability = 1 - np.exp(-kernel[1, 1] * 0.3 / 2)
+        teacher_ids = [teacher.id for teacher in school.teachers]
+        student_ids = [school.students[2].id]
+        (low, low_ids), (high, high_ids) = sorted(
+            ((teacher_probability, teacher_ids), (student_probability, student_ids))
         )
-        expected = np.array([[0, 0, 0.6 / 7], [0, 0, 0.6 / 7], [0.0, 0.0, 0.0]])
-        assert np.allclose(infector_tensor[1], expected)
-        expected = np.array([[0.9 / 2, 0, 0], [0.9 / 3, 0.8 / 4, 0], [0, 0.8 / 5, 0]])
-        assert np.allclose(infector_tensor[2], expected)
+        assert low < high
+        for draw, expected in (
+            (0.999 * low, teacher_ids + student_ids),
+            ((low + high) / 2, high_ids),
+            (1.001 * high, []),
+        ):
+            monkeypatch.setattr(interaction_module, "random", lambda: draw)
+            infected_ids, _, _ = interaction.time_step_for_group(school, delta_time=1)
+            assert sorted(infected_ids) == sorted(expected)
 
-    def test__gets_infected(self):
-        interaction = Interaction.from_file(config_filename=test_config)
-        probs = np.array([0.1, 0.2, 0.3])
-        possible_infections = [1, 2, 3]
-        infections = []
-        misses = 0
-        n = 10000
-        for _ in range(n):
-            infection = interaction._gets_infected(probs, possible_infections)
-            if infection is None:
-                misses += 1
-                continue
-            infections.append(infection)
-        infections = np.array(infections)
-        misses_exp = np.exp(-0.6)
-        assert np.isclose(misses, misses_exp * n, rtol=0.1)
-        assert np.isclose(
-            len(infections[infections == 1]), 0.1 / 0.6 * n * (1 - misses_exp), rtol=0.1
-        )
+    def test__infection_ids_are_drawn_by_transmission(self):
+        infection_ids, _ = infections_from_abroad(n=300)
+        infection_ids = np.array(infection_ids)
         assert np.isclose(
-            len(infections[infections == 2]), 0.2 / 0.6 * n * (1 - misses_exp), rtol=0.1
+            (infection_ids == 200).sum(), 0.6 / 1.2 * len(infection_ids), rtol=0.1
         )
         assert np.isclose(
-            len(infections[infections == 3]), 0.3 / 0.6 * n * (1 - misses_exp), rtol=0.1
+            (infection_ids == 500).sum(), 0.6 / 1.2 * len(infection_ids), rtol=0.1
         )
 
     def test__blame_subgroup(self):
@@ -87,34 +80,52 @@ class TestInteractionFunctions:
         assert np.isclose(len(blames[blames == 1]), 30 / 150 * n, rtol=0.1)
         assert np.isclose(len(blames[blames == 2]), 100 / 150 * n, rtol=0.1)
 
-    def test__blame_individuals(self):
-        interaction = Interaction.from_file(config_filename=test_config)
-        infectors_per_infection_per_subgroup = {
-            "a": {
-                0: {"ids": [1, 2, 3], "trans_probs": [0.1, 0.2, 0.3]},
-                1: {"ids": [4], "trans_probs": [0.4]},
-            },
-            "b": {2: {"ids": [5, 6, 7], "trans_probs": [0.1, 0.2, 0.3]}},
-        }
-        infection_ids = ["a", "b"]
-        to_blame_subgroups = [0, 2]
-        blames1 = []
-        blames2 = []
-        n = 1000
-        for i in range(n):
-            to_blame_ids = interaction._blame_individuals(
-                to_blame_subgroups, infection_ids, infectors_per_infection_per_subgroup
+    def test__infectors_are_blamed_by_transmission(self):
+        infection_ids, to_blame_ids = infections_from_abroad(n=300)
+        blames = np.array(to_blame_ids)[np.array(infection_ids) == 200]
+        for infector, trans_prob in zip(range(3), (0.1, 0.2, 0.3)):
+            assert np.isclose(
+                (blames == 10**6 + infector).sum(),
+                trans_prob / 0.6 * len(blames),
+                rtol=0.15,
             )
-            blames1.append(to_blame_ids[0])
-            blames2.append(to_blame_ids[1])
-        blames1 = np.array(blames1)
-        blames2 = np.array(blames2)
-        assert np.isclose(len(blames1[blames1 == 1]), 0.1 / 0.6 * n, rtol=0.1)
-        assert np.isclose(len(blames1[blames1 == 2]), 0.2 / 0.6 * n, rtol=0.1)
-        assert np.isclose(len(blames1[blames1 == 3]), 0.3 / 0.6 * n, rtol=0.1)
-        assert np.isclose(len(blames2[blames2 == 5]), 0.1 / 0.6 * n, rtol=0.1)
-        assert np.isclose(len(blames2[blames2 == 6]), 0.2 / 0.6 * n, rtol=0.1)
-        assert np.isclose(len(blames2[blames2 == 7]), 0.3 / 0.6 * n, rtol=0.1)
+        assert set(np.array(to_blame_ids)[np.array(infection_ids) == 500]) == {
+            10**6 + 3
+        }
+
+
+def infections_from_abroad(n):
+    """
+    Runs n time steps of a school visited by infectors from abroad: three of
+    the infection 200 with transmission probabilities 0.1, 0.2 and 0.3, and
+    one of the infection 500 with 0.6. Returns the infection ids and the
+    infectors of all the infections.
+    """
+    people, school = create_school(n_students=20, n_teachers=20)
+    people_from_abroad = {0: {}}
+    for infector, (inf_id, trans_prob) in enumerate(
+        ((200, 0.1), (200, 0.2), (200, 0.3), (500, 0.6))
+    ):
+        people_from_abroad[0][10**6 + infector] = {
+            "susc": False,
+            "inf_id": inf_id,
+            "inf_prob": trans_prob,
+            "immunity_inf_ids": [],
+            "immunity_suscs": [],
+        }
+    interaction = Interaction.from_file(config_filename=test_config)
+    logged = {"infection_ids": [], "to_blame_ids": []}
+
+    def log_infections(infection_ids, to_blame_ids, **kwargs):
+        logged["infection_ids"] += infection_ids
+        logged["to_blame_ids"] += to_blame_ids
+
+    interaction._log_infections_to_record = log_infections
+    for _ in range(n):
+        interaction.time_step_for_group(
+            school, delta_time=1, people_from_abroad=people_from_abroad, record=True
+        )
+    return logged["infection_ids"], logged["to_blame_ids"]
 
 
 def days_to_infection(interaction, susceptible_person, group, people, n_students):
@@ -250,32 +261,14 @@ def test__super_spreaders(selector):
         selector.infect_person_at_time(student, time=0)
         student.infection.transmission.probability = transmission_probabilities[i]
         id_to_trans[student.id] = transmission_probabilities[i]
-    interactive_school = school.get_interactive_group()
     interaction = Interaction.from_file(config_filename=test_config)
-    beta = interaction._get_interactive_group_beta(interactive_school)
-    contact_matrix_raw = interaction.contact_matrices["school"]
-    contact_matrix = interactive_school.get_processed_contact_matrix(contact_matrix_raw)
-    infector_tensor = interaction.create_infector_tensor(
-        interactive_school.infectors_per_infection_per_subgroup,
-        interactive_school.subgroup_sizes,
-        contact_matrix,
-        beta,
-        delta_time=1,
-    )
-    (
-        subgroup_infected_ids,
-        subgroup_infection_ids,
-        to_blame_subgroups,
-    ) = interaction._time_step_for_subgroup(
-        infector_tensor=infector_tensor,
-        susceptible_subgroup_id=0,
-        subgroup_susceptibles=interactive_school.susceptibles_per_subgroup[0],
-    )
-    to_blame_ids = interaction._blame_individuals(
-        to_blame_subgroups,
-        subgroup_infection_ids,
-        interactive_school.infectors_per_infection_per_subgroup,
+    logged = {}
+    interaction._log_infections_to_record = lambda **kwargs: logged.update(kwargs)
+    # the students are all infected, so only teachers can be infected
+    subgroup_infected_ids, _, _ = interaction.time_step_for_group(
+        school, delta_time=1, record=True
     )
+    to_blame_ids = logged["to_blame_ids"]
     for id in subgroup_infected_ids:
         assert id in teacher_ids
     for id in to_blame_ids:
@@ -286,3 +279,19 @@ def test__super_spreaders(selector):
     for culpable_id, culpable_count in zip(culpable_ids, culpable_counts):
         expected = (id_to_trans[culpable_id] / total * n_infections,)
         assert np.isclose(culpable_count, expected, rtol=0.25)
+
+
+def test__kernels_are_cached_until_beta_reductions_change(selector):
+    people, school = create_school(n_students=5, n_teachers=5)
+    selector.infect_person_at_time(school.students[0], time=0)
+    interactive_school = school.get_interactive_group()
+    interaction = Interaction.from_file(config_filename=test_config)
+    beta = interaction._get_interactive_group_beta(interactive_school)
+    kernel = interaction.get_kernel(interactive_school, beta, 0.5)
+    contact_matrix = interactive_school.get_processed_contact_matrix(
+        interaction.contact_matrices["school"]
+    )
+    assert np.allclose(kernel, contact_matrix * beta * 0.5)
+    assert interaction.get_kernel(interactive_school, beta, 0.5) is kernel
+    interaction.beta_reductions = {"school": 0.5}
+    assert interaction.get_kernel(interactive_school, beta, 0.5) is not kernel
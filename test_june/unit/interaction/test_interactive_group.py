@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 from copy import deepcopy
 
 from june.geography import Area, SuperArea, Region
@@ -14,7 +15,7 @@ from june.groups import (
 )
 from june.interaction import Interaction
 from june.groups.school import _translate_school_subgroup
-from june.groups.group.interactive import InteractiveGroup
+from june.groups.group.interactive import InteractiveGroup, InteractionWorkspace
 from june import paths
 
 test_config = paths.configs_path / "tests/interaction.yaml"
@@ -270,3 +271,50 @@ class TestInteractiveHousehold:
         int_household = household.get_interactive_group()
         beta = int_household.get_processed_beta(betas, beta_reductions)
         assert np.isclose(beta, 0.2)
+
+
+class TestInteractionWorkspace:
+    def test__workspace_is_reused_and_grows(self, selector):
+        workspace = InteractionWorkspace(size=2, n_subgroups=1, n_infections=1)
+        hospital = Hospital(n_beds=None, n_icu_beds=None)
+        people = [Person.from_attributes() for _ in range(10)]
+        for i, person in enumerate(people):
+            person.immunity.susceptibility_dict[i] = 0.1 * i
+            hospital.add(person, subgroup_type=i % 3)
+        selector.infect_person_at_time(people[0], 1)
+        interactive_group = InteractiveGroup(hospital, workspace=workspace)
+        assert interactive_group.must_timestep
+        assert list(interactive_group.infector_ids) == [people[0].id]
+        assert len(interactive_group.susceptible_ids) == 9
+        assert len(interactive_group.subgroup_sizes) == 3
+        assert list(interactive_group.subgroup_sizes) == [4, 3, 3]
+        people_by_id = {person.id: i for i, person in enumerate(people)}
+        for id, subgroup, susceptibilities in zip(
+            interactive_group.susceptible_ids,
+            interactive_group.susceptible_subgroups,
+            interactive_group.get_susceptibilities(list(range(10))),
+        ):
+            i = people_by_id[id]
+            assert subgroup == i % 3
+            assert susceptibilities[i] == pytest.approx(0.1 * i)
+            assert susceptibilities.sum() == pytest.approx(9 + 0.1 * i)
+        # a smaller group reuses the same buffers, reset to the defaults
+        buffer = workspace.susceptible_ids
+        hospital.clear()
+        hospital.add(people[0], subgroup_type=0)
+        hospital.add(people[3], subgroup_type=0)
+        interactive_group = InteractiveGroup(hospital, workspace=workspace)
+        assert workspace.susceptible_ids is buffer
+        assert list(interactive_group.susceptible_ids) == [people[3].id]
+        susceptibilities = interactive_group.get_susceptibilities([3, 5])
+        assert susceptibilities[0] == pytest.approx([0.3, 1.0])
+
+    def test__susceptibles_only_extracted_with_infectors(self):
+        hospital = Hospital(n_beds=None, n_icu_beds=None)
+        for _ in range(3):
+            hospital.add(Person.from_attributes(), subgroup_type=0)
+        interactive_group = InteractiveGroup(hospital)
+        assert interactive_group.has_susceptible
+        assert interactive_group.n_susceptibles == 3
+        assert len(interactive_group.susceptible_ids) == 0
+        assert not interactive_group.must_timestep
@@ -0,0 +1,273 @@
+import numpy as np
+import pytest
+
+from june.demography import Person
+from june.geography import Area, SuperArea
+from june.geography.geography import Region
+from june.groups import Household, School, Company, University
+from june.policy import (
+    IndividualPolicies,
+    PolicyPopulation,
+    StayHome,
+    Shielding,
+    CloseSchools,
+    CloseCompanies,
+    CloseUniversities,
+    LimitLongCommute,
+    SchoolQuarantine,
+)
+from june.policy.individual_policies import ClassroomQuarantineTable
+
+activities = ["medical_facility", "commute", "primary_activity", "leisure", "residence"]
+
+
+@pytest.fixture(name="people")
+def make_people():
+    region = Region(name="North")
+    super_area = SuperArea(name="sa", coordinates=[51.0, 0.0], region=region)
+    area = Area(super_area=super_area, coordinates=[51.0, 0.0])
+    school = School(n_pupils_max=100, age_min=5, age_max=12)
+    university = University(n_students_max=100)
+    company = Company(sector="Q")
+    people = []
+    for i in range(20):
+        household = Household()
+        kid = Person.from_attributes(age=5 + i % 8)
+        student = Person.from_attributes(age=20)
+        worker = Person.from_attributes(age=40 + 2 * i)
+        worker.sector = "Q"
+        worker.lockdown_status = "key_worker" if i % 2 else "furlough"
+        for person in (kid, student, worker):
+            area.add(person)
+            household.add(person)
+            people.append(person)
+        school.add(kid)
+        university.add(student)
+        company.add(worker)
+    return people
+
+
+def test__population_arrays(people):
+    population = PolicyPopulation(people)
+    assert len(population) == len(people)
+    assert np.array_equal(population.ids, [person.id for person in people])
+    assert np.array_equal(
+        population.primary_activity_is("school"),
+        [person.primary_activity.group.spec == "school" for person in people],
+    )
+    assert population.sector_is("Q").sum() == 20
+    assert population.lockdown_status_is("key_worker").sum() == 10
+    assert not population.lockdown_status_is("random").any()
+    assert np.array_equal(
+        population.key_workers_at_home,
+        [
+            person.residence.group.residents[2].lockdown_status == "key_worker"
+            for person in people
+        ],
+    )
+    assert np.all(population.symptom_tags == -2)
+    assert np.all(np.isnan(population.infection_start_times))
+    people[0].region.regional_compliance = 0.5
+    population.refresh()
+    assert np.allclose(population.regional_compliance, 0.5)
+    people[0].region.regional_compliance = 1.0
+
+
+@pytest.mark.parametrize(
+    "policies",
+    [
+        [Shielding("2020-1-1", "2020-12-1", min_age=60)],
+        [CloseUniversities("2020-1-1", "2020-12-1")],
+        [CloseSchools("2020-1-1", "2020-12-1", full_closure=True)],
+        [CloseSchools("2020-1-1", "2020-12-1", years_to_close=[5, 6, 7])],
+        [
+            CloseCompanies("2020-1-1", "2020-12-1", full_closure=True),
+            Shielding("2020-1-1", "2020-12-1", min_age=70),
+        ],
+        [
+            CloseSchools("2020-1-1", "2020-12-1", years_to_close="all"),
+            CloseUniversities("2020-1-1", "2020-12-1"),
+            CloseCompanies("2020-1-1", "2020-12-1"),
+        ],
+    ],
+)
+def test__compiled_policies_match_per_person(people, policies):
+    individual_policies = IndividualPolicies(policies)
+    compiled = individual_policies.compile(
+        active_policies=policies,
+        people=people,
+        activities=activities,
+        days_from_start=0,
+    )
+    assert compiled.allowed is not None
+    for index, person in enumerate(people):
+        expected = individual_policies.apply(
+            active_policies=policies,
+            person=person,
+            activities=activities,
+            days_from_start=0,
+        )
+        assert compiled.apply(person=person, index=index) == tuple(expected)
+
+
+def test__reset_population_sees_reassigned_people(people):
+    close_schools = CloseSchools("2020-1-1", "2020-12-1", full_closure=True)
+    individual_policies = IndividualPolicies([close_schools])
+    kid = people[0]
+    compiled = individual_policies.compile(
+        active_policies=[close_schools],
+        people=people,
+        activities=activities,
+        days_from_start=0,
+    )
+    assert "primary_activity" not in compiled.apply(person=kid, index=0)
+    kid.primary_activity.remove(kid)
+    Company(sector="Q").add(kid)
+    individual_policies.reset_population()
+    compiled = individual_policies.compile(
+        active_policies=[close_schools],
+        people=people,
+        activities=activities,
+        days_from_start=0,
+    )
+    assert "primary_activity" in compiled.apply(person=kid, index=0)
+
+
+class StayHomeIfOdd(StayHome):
+    def check_stay_home_condition(self, person, days_from_start):
+        return person.id % 2 == 1
+
+
+def test__non_vectorised_policies_fall_back(people):
+    stay_home = StayHomeIfOdd()
+    close_universities = CloseUniversities("2020-1-1", "2020-12-1")
+    individual_policies = IndividualPolicies([stay_home, close_universities])
+    compiled = individual_policies.compile(
+        active_policies=[stay_home, close_universities],
+        people=people,
+        activities=activities,
+        days_from_start=0,
+    )
+    assert len(compiled.fallback_policies) == 1
+    for index, person in enumerate(people):
+        allowed = compiled.apply(person=person, index=index)
+        if person.id % 2 == 1:
+            assert allowed == ("medical_facility", "residence")
+        elif person.primary_activity.group.spec == "university":
+            assert "primary_activity" not in allowed
+        else:
+            assert allowed == tuple(activities)
+    # without vectorised policies nothing is computed upfront
+    compiled = individual_policies.compile(
+        active_policies=[stay_home],
+        people=people,
+        activities=activities,
+        days_from_start=0,
+    )
+    assert compiled.allowed is None
+    expected = individual_policies.apply([stay_home], people[0], 0, activities)
+    assert compiled.apply(person=people[0], index=0) == tuple(expected)
+
+
+def test__compiled_compliance(people):
+    np.random.seed(1)
+    population = PolicyPopulation(people * 500)
+    shielding = Shielding("2020-1-1", "2020-12-1", min_age=0, compliance=0.3)
+    population.refresh()
+    assert shielding.get_stay_home_mask(population, 0).mean() == pytest.approx(
+        0.3, abs=0.01
+    )
+    long_commute = LimitLongCommute(going_to_work_probability=0.5)
+    LimitLongCommute.long_distance_commuter_ids = {people[0].id}
+    mask = long_commute.get_skip_mask(population)
+    assert not mask[population.ids != people[0].id].any()
+    assert mask[population.ids == people[0].id].mean() == pytest.approx(0.5, abs=0.1)
+    LimitLongCommute.long_distance_commuter_ids = set()
+
+
+class TestClassroomQuarantine:
+    @pytest.fixture(name="pupils")
+    def make_pupils(self):
+        school = School(n_pupils_max=100, age_min=5, age_max=7)
+        household = Household()
+        pupils = []
+        for age in (5, 6, 7):
+            for _ in range(10):
+                pupil = Person.from_attributes(age=age)
+                school.add(pupil)
+                household.add(pupil)
+                pupils.append(pupil)
+        adult = Person.from_attributes(age=40)
+        household.add(adult)
+        return pupils + [adult]
+
+    @pytest.fixture(name="school_population")
+    def make_school_population(self, pupils):
+        return PolicyPopulation(pupils)
+
+    def test__table(self, school_population):
+        table = ClassroomQuarantineTable(school_population)
+        assert len(table) == 3
+        pupils = school_population.people[:-1]
+        for index, pupil in enumerate(pupils):
+            assert table.classrooms[table.classroom_indices[index]] is (
+                pupil.primary_activity
+            )
+        assert table.classroom_indices[-1] == PolicyPopulation.no_code
+        times = np.full(len(school_population), np.nan)
+        times[[10, 11]] = [3.0, 2.0]
+        table.update(times, days_from_start=3, n_days=7)
+        assert pupils[10].primary_activity.quarantine_starting_date == 2.0
+        assert pupils[0].primary_activity.quarantine_starting_date == -np.inf
+        in_quarantine = table.in_quarantine(days_from_start=3, n_days=7)
+        assert np.array_equal(np.flatnonzero(in_quarantine), np.arange(10, 20))
+        # expired quarantines are replaced by new ones
+        times[[10, 11]] = [np.nan, 12.0]
+        table.update(times, days_from_start=12.5, n_days=7)
+        assert table.quarantine_starting_dates[table.classroom_indices[10]] == 12.0
+
+    def get_pupils_at_home(self, individual_policies, pupils, days_from_start):
+        policies = individual_policies.policies
+        compiled = individual_policies.compile(
+            active_policies=policies,
+            people=pupils,
+            activities=activities,
+            days_from_start=days_from_start,
+        )
+        at_home = []
+        for index, pupil in enumerate(pupils):
+            allowed = compiled.apply(person=pupil, index=index)
+            expected = individual_policies.apply(
+                active_policies=policies,
+                person=pupil,
+                days_from_start=days_from_start,
+                activities=activities,
+            )
+            assert allowed == tuple(expected)
+            if "primary_activity" not in allowed:
+                at_home.append(index)
+        return at_home
+
+    def test__school_quarantine(self, pupils, selector):
+        individual_policies = IndividualPolicies(
+            [SchoolQuarantine(compliance=1.0, n_days=7)]
+        )
+        selector.infect_person_at_time(pupils[0], 0.0)
+        pupils[0].infection.symptoms.time_of_symptoms_onset = 1.5
+        assert self.get_pupils_at_home(individual_policies, pupils, 1) == []
+        assert self.get_pupils_at_home(individual_policies, pupils, 3) == list(
+            range(10)
+        )
+        assert self.get_pupils_at_home(individual_policies, pupils, 9) == []
+
+    def test__quarantine_reset_from_outside(self, pupils, selector):
+        individual_policies = IndividualPolicies(
+            [SchoolQuarantine(compliance=1.0, n_days=7)]
+        )
+        selector.infect_person_at_time(pupils[0], 0.0)
+        pupils[0].infection.symptoms.time_of_symptoms_onset = 1.5
+        assert len(self.get_pupils_at_home(individual_policies, pupils, 3)) == 10
+        # the world is reset, as between the realisations of an ensemble
+        pupils[0].infection = None
+        pupils[0].primary_activity.quarantine_starting_date = -np.inf
+        assert self.get_pupils_at_home(individual_policies, pupils, 3) == []
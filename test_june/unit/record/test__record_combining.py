@@ -0,0 +1,176 @@
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import tables
+from tables import open_file
+
+from june.records import Record, combine_records
+from june.records import records_writer
+from june.records.records_writer import (
+    RecordMerger,
+    combine_hdf5s,
+    combine_summaries,
+    lock_record_file,
+)
+
+n_ranks = 3
+
+
+def _record_infections(record, day, infected_ids):
+    with open_file(record.record_path / record.filename, mode="a") as f:
+        record.accumulate(
+            table_name="infections",
+            location_spec="household",
+            location_id=record.mpi_rank,
+            region_name="London",
+            infector_ids=[0] * len(infected_ids),
+            infected_ids=infected_ids,
+            infection_ids=[0] * len(infected_ids),
+        )
+        record.time_step(timestamp=datetime.datetime(2020, 3, day))
+
+
+def _infected_ids(rank, day):
+    return list(range(100 * rank + 10 * day, 100 * rank + 10 * day + rank + 1))
+
+
+@pytest.fixture(name="rank_records")
+def make_rank_records(tmp_path):
+    records = [Record(record_path=tmp_path, mpi_rank=rank) for rank in range(n_ranks)]
+    for day in (1, 2):
+        for record in records:
+            _record_infections(record, day, _infected_ids(record.mpi_rank, day))
+    return records
+
+
+def _read_infected_ids(path):
+    with open_file(path / "june_record.h5", mode="r") as f:
+        return list(f.root.infections.read(field="infected_ids"))
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test__combine_hdf5s_in_chunks(rank_records, tmp_path, n_workers):
+    merger = RecordMerger(tmp_path, chunk_size=2, n_workers=n_workers)
+    assert merger.merge() == sum(
+        len(_infected_ids(rank, day)) for rank in range(n_ranks) for day in (1, 2)
+    )
+    expected = [
+        infected_id
+        for rank in range(n_ranks)
+        for day in (1, 2)
+        for infected_id in _infected_ids(rank, day)
+    ]
+    assert _read_infected_ids(tmp_path) == expected
+    with open_file(tmp_path / "june_record.h5", mode="r") as f:
+        assert f.root.infections.attrs.merged_rows == {
+            f"june_record.{rank}.h5": 2 * (rank + 1) for rank in range(n_ranks)
+        }
+        # empty tables are created too
+        assert f.root.deaths.nrows == 0
+
+
+def test__incremental_merge(rank_records, tmp_path):
+    merger = RecordMerger(tmp_path)
+    merger.merge()
+    assert merger.merge() == 0
+    for record in rank_records:
+        _record_infections(record, 3, _infected_ids(record.mpi_rank, 3))
+    assert merger.merge() == sum(len(_infected_ids(rank, 3)) for rank in range(3))
+    infected_ids = _read_infected_ids(tmp_path)
+    assert len(infected_ids) == len(set(infected_ids))
+    assert set(infected_ids) == {
+        infected_id
+        for rank in range(n_ranks)
+        for day in (1, 2, 3)
+        for infected_id in _infected_ids(rank, day)
+    }
+    merger.merge(remove_left_overs=True)
+    assert not list(tmp_path.glob("june_record.*.h5"))
+
+
+def test__records_being_written_are_not_merged(rank_records, tmp_path):
+    merger = RecordMerger(tmp_path)
+    writing = rank_records[1]
+    with lock_record_file(writing.record_path / writing.filename) as locked:
+        assert locked
+        assert merger.merge() == 2 * (1 + 3)
+    # merged once the rank has closed it
+    assert merger.merge() == 2 * 2
+    assert sorted(_read_infected_ids(tmp_path)) == sorted(
+        infected_id
+        for rank in range(n_ranks)
+        for day in (1, 2)
+        for infected_id in _infected_ids(rank, day)
+    )
+
+
+def test__final_merge_waits_for_the_ranks(rank_records, tmp_path):
+    writing = rank_records[1]
+    record_file = writing.record_path / writing.filename
+    locked = threading.Event()
+
+    def write():
+        with lock_record_file(record_file):
+            locked.set()
+            time.sleep(0.2)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    locked.wait()
+    combine_hdf5s(tmp_path)
+    writer.join()
+    assert len(_read_infected_ids(tmp_path)) == 12
+    assert not list(tmp_path.glob("*.lock"))
+
+
+def test__final_merge_raises_on_unreadable_records(rank_records, tmp_path):
+    (tmp_path / "june_record.3.h5").write_bytes(b"not a record")
+    assert RecordMerger(tmp_path).merge() == 12
+    with pytest.raises((OSError, tables.HDF5ExtError)):
+        combine_hdf5s(tmp_path)
+
+
+def test__records_are_not_locked_without_fcntl(tmp_path, monkeypatch):
+    monkeypatch.setattr(records_writer, "fcntl", None)
+    with lock_record_file(tmp_path / "june_record.0.h5", blocking=False) as locked:
+        assert locked
+    assert not list(tmp_path.glob("*.lock"))
+
+
+def test__combine_records_starts_from_scratch(rank_records, tmp_path):
+    combine_records(tmp_path)
+    combine_records(tmp_path, remove_left_overs=True)
+    assert len(_read_infected_ids(tmp_path)) == 12
+    assert not list(tmp_path.glob("june_record.*.h5"))
+    assert not list(tmp_path.glob("summary.*.csv"))
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test__combine_summaries(tmp_path, n_workers):
+    header = "time_stamp,region,current_infected,daily_infected\n"
+    rows = [
+        [
+            "2020-03-01,London,2,1\n",
+            "2020-03-01,London,4,1\n",
+            "2020-03-01,Durham,1,1\n",
+            "2020-03-02,London,3,2\n",
+        ],
+        ["2020-03-01,London,6,3\n", "2020-03-02,Durham,5,5\n"],
+        [],
+    ]
+    for rank, rank_rows in enumerate(rows):
+        with open(tmp_path / f"summary.{rank}.csv", "w") as f:
+            f.write(header + "".join(rank_rows))
+    combine_summaries(tmp_path, n_workers=n_workers, chunk_size=1, fold_every=1)
+    summary = pd.read_csv(tmp_path / "summary.csv", index_col=["region", "time_stamp"])
+    # current counts are averaged within each rank and summed across ranks
+    assert summary.loc[("London", "2020-03-01"), "current_infected"] == 9
+    assert summary.loc[("London", "2020-03-01"), "daily_infected"] == 5
+    assert summary.loc[("London", "2020-03-02"), "current_infected"] == 3
+    assert summary.loc[("Durham", "2020-03-02"), "daily_infected"] == 5
+    assert len(summary) == 4
+    assert np.all(summary.index.get_level_values(0)[:2] == "Durham")
@@ -0,0 +1,107 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from june.demography import Person
+from june.records import Record, RecordReader
+from june.world import World
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(name="records", scope="module")
+def make_records(tmp_path_factory):
+    world = World()
+    world.people = [
+        Person.from_attributes(id=i, age=i, sex="mf"[i % 2]) for i in range(20)
+    ]
+    readers = {}
+    for backend in ("hdf5", "parquet"):
+        path = tmp_path_factory.mktemp(backend)
+        record = Record(record_path=path, record_static_data=True, backend=backend)
+        record.static_data(world=world)
+        for day in (1, 2, 3):
+            for hour in (8, 20):
+                record.accumulate(
+                    table_name="infections",
+                    location_spec="school" if hour == 8 else "household",
+                    location_id=day,
+                    region_name="London" if day < 3 else "Durham",
+                    infector_ids=[0, 0],
+                    infected_ids=[2 * day + hour // 20, 10 + 2 * day + hour // 20],
+                    infection_ids=[0, 0],
+                )
+                record.accumulate(
+                    table_name="deaths",
+                    location_spec="hospital",
+                    location_id=day,
+                    dead_person_id=day + hour,
+                )
+                record.time_step(timestamp=datetime.datetime(2020, 3, day, hour))
+        readers[backend] = RecordReader(results_path=path)
+    return readers
+
+
+def test__backend_is_detected(records):
+    assert records["hdf5"].backend == "hdf5"
+    assert records["parquet"].backend == "parquet"
+    partitions = records["parquet"].results_path / "june_record.parquet/infections"
+    assert sorted(child.name for child in partitions.iterdir()) == [
+        "timestamp=2020-03-01",
+        "timestamp=2020-03-02",
+        "timestamp=2020-03-03",
+    ]
+    assert (partitions / "timestamp=2020-03-01" / "rank=0").is_dir()
+
+
+@pytest.mark.parametrize(
+    "table_name, index",
+    [
+        ("infections", "infected_ids"),
+        ("deaths", "dead_person_ids"),
+        ("population", "id"),
+    ],
+)
+def test__tables_match_hdf5(records, table_name, index):
+    expected = records["hdf5"].table_to_df(table_name, index=index)
+    df = records["parquet"].table_to_df(table_name, index=index)
+    pd.testing.assert_frame_equal(df.sort_index(), expected.sort_index())
+
+
+def test__string_columns_are_dictionary_encoded(records):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        records["parquet"].results_path / "june_record.parquet/infections",
+        format="parquet",
+    )
+    assert str(dataset.schema.field("region_names").type).startswith("dictionary")
+    df = records["parquet"].table_to_df(
+        "infections", index="infected_ids", categorical=True
+    )
+    assert df.region_names.dtype == "category"
+    assert df.timestamp.dtype == "category"
+
+
+def test__queries_match_hdf5(records):
+    for kwargs in [
+        {"start_date": "2020-03-02"},
+        {"end_date": "2020-03-02", "location_specs": "school"},
+        {"region_names": ["Durham"], "location_ids": 3},
+    ]:
+        expected = records["hdf5"].query_infections(**kwargs)
+        df = records["parquet"].query_infections(**kwargs)
+        assert len(df) > 0
+        pd.testing.assert_frame_equal(df.sort_index(), expected.sort_index())
+    assert len(records["parquet"].query_deaths(start_date="2020-04-01")) == 0
+
+
+def test__table_with_extras(records):
+    expected = records["hdf5"].get_table_with_extras(
+        "infections", "infected_ids", with_geography=False
+    )
+    df = records["parquet"].get_table_with_extras(
+        "infections", "infected_ids", with_geography=False, chunk_size=3
+    )
+    pd.testing.assert_frame_equal(df.sort_index(), expected.sort_index())
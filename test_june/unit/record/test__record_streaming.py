@@ -0,0 +1,252 @@
+import datetime
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from tables import open_file
+
+from june.records import Record, RecordReader
+from june.records.records_writer import index_record_tables
+from june.records.event_records_writer import InfectionRecord
+from june.records.static_records_writer import (
+    PeopleRecord,
+    AreaRecord,
+    SuperAreaRecord,
+    RegionRecord,
+)
+
+n_people = 50
+
+
+def _write_static(f, record, int_data, float_data, str_data):
+    record._create_table(f, record.int_names, record.float_names, record.str_names, 100)
+    record._record(f, int_data=int_data, float_data=float_data, str_data=str_data)
+
+
+@pytest.fixture(name="reader", scope="module")
+def make_record(tmp_path_factory):
+    path = tmp_path_factory.mktemp("streaming")
+    filename = path / "june_record.h5"
+    infections = InfectionRecord(filename)
+    rng = np.random.RandomState(0)
+    with open_file(filename, mode="a") as f:
+        ids = np.arange(n_people)[::-1]
+        _write_static(
+            f,
+            PeopleRecord(),
+            int_data=[ids, ids % 90, ids, ids, ids % 4],
+            float_data=[],
+            str_data=[
+                ["m", "f"] * (n_people // 2),
+                ["A"] * n_people,
+                ["school"] * n_people,
+                ["household"] * n_people,
+            ],
+        )
+        _write_static(
+            f,
+            AreaRecord(),
+            int_data=[[0, 1, 2, 3], [0, 0, 1, 1]],
+            float_data=[[0.0] * 4, [0.0] * 4, [0.5] * 4],
+            str_data=[["a0", "a1", "a2", "a3"]],
+        )
+        _write_static(
+            f,
+            SuperAreaRecord(),
+            int_data=[[0, 1], [0, 1]],
+            float_data=[[0.0] * 2, [0.0] * 2],
+            str_data=[["s0", "s1"]],
+        )
+        _write_static(
+            f, RegionRecord(), int_data=[[0, 1]], float_data=[], str_data=[["r0", "r1"]]
+        )
+        for day in range(1, 6):
+            # id n_people is not in the population
+            infected = rng.choice(n_people + 1, 7, replace=False)
+            infections.accumulate(
+                location_spec="school" if day % 2 else "household",
+                location_id=day,
+                region_name="r0" if day < 3 else "r1",
+                infector_ids=[0] * len(infected),
+                infected_ids=infected,
+                infection_ids=[0] * len(infected),
+            )
+            infections.record(f, timestamp=datetime.datetime(2020, 3, day))
+    return RecordReader(results_path=path)
+
+
+def test__select_fields(reader):
+    df = reader.table_to_df("population", fields=["age", "sex"])
+    assert list(df.columns) == ["age", "sex"]
+    assert df.index.name == "id"
+    assert len(df) == n_people
+    # ids are written in reverse order
+    assert df.loc[3, "sex"] == "m"
+    assert df.loc[3, "age"] == 3
+
+
+def test__where_condition(reader):
+    full = reader.table_to_df("infections", index="infected_ids")
+    where, condvars = RecordReader.build_condition(
+        start_date="2020-03-02", end_date="2020-03-04", location_specs="school"
+    )
+    df = reader.table_to_df(
+        "infections", index="infected_ids", where=where, condvars=condvars
+    )
+    expected = full[
+        (full.timestamp >= "2020-03-02")
+        & (full.timestamp <= "2020-03-04")
+        & (full.location_specs == "school")
+    ]
+    assert len(df) == 7
+    pd.testing.assert_frame_equal(df, expected)
+    where, condvars = RecordReader.build_condition(location_ids=[1, 5])
+    df = reader.table_to_df(
+        "infections", index="infected_ids", where=where, condvars=condvars
+    )
+    assert set(df.location_ids) == {1, 5}
+    assert RecordReader.build_condition() == (None, {})
+
+
+def test__chunks_match_full_read(reader):
+    full = reader.table_to_df("infections", index="infected_ids")
+    chunks = list(
+        reader.iter_table_chunks("infections", index="infected_ids", chunk_size=4)
+    )
+    assert len(chunks) == 9
+    assert max(len(chunk) for chunk in chunks) == 4
+    pd.testing.assert_frame_equal(pd.concat(chunks), full)
+    chunked = reader.table_to_df("infections", index="infected_ids", chunk_size=4)
+    pd.testing.assert_frame_equal(chunked, full)
+
+
+def test__categorical_decoding(reader):
+    full = reader.table_to_df("infections", index="infected_ids")
+    df = reader.table_to_df(
+        "infections", index="infected_ids", chunk_size=6, categorical=True
+    )
+    for column in ["location_specs", "region_names", "timestamp"]:
+        assert df[column].dtype == "category"
+        assert list(df[column].astype(str)) == list(full[column])
+    df = reader.table_to_df(
+        "infections", index="infected_ids", categorical=["region_names"]
+    )
+    assert df["region_names"].dtype == "category"
+    assert df["location_specs"].dtype == object
+
+
+def _sort_by_person(df):
+    df = df.rename_axis("person_id").reset_index()
+    return df.sort_values(["timestamp", "person_id"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test__chunked_join_matches_full_merge(reader, categorical):
+    infections = reader.table_to_df("infections", index="infected_ids")
+    people = reader.table_to_df("population", index="id")
+    expected = infections.merge(people, left_index=True, right_index=True)
+    expected = expected.merge(
+        reader.get_geography_df(), left_on="area_id", right_index=True
+    )
+    expected["timestamp"] = pd.to_datetime(expected["timestamp"])
+    df = reader.get_table_with_extras(
+        "infections", "infected_ids", chunk_size=5, categorical=categorical
+    )
+    assert len(df) == len(expected)
+    assert n_people not in df.index
+    assert set(df.columns) == set(expected.columns)
+    df = df.astype({col: object for col in df.select_dtypes("category")})
+    pd.testing.assert_frame_equal(
+        _sort_by_person(df[expected.columns]), _sort_by_person(expected)
+    )
+
+
+def test__joined_chunks_are_yielded(reader):
+    chunks = list(
+        reader.iter_table_with_extras("infections", "infected_ids", chunk_size=4)
+    )
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4 for chunk in chunks)
+    df = reader.get_table_with_extras("infections", "infected_ids", chunk_size=4)
+    pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+
+def test__join_with_selected_people_fields(reader):
+    where, condvars = RecordReader.build_condition(region_names="r1")
+    df = reader.get_table_with_extras(
+        "infections",
+        "infected_ids",
+        people_fields=["age"],
+        where=where,
+        condvars=condvars,
+    )
+    assert "sex" not in df.columns
+    assert {"age", "area_id", "name_region"} <= set(df.columns)
+    assert (df.age == df.index % 90).all()
+    assert (df.area_id == df.index % 4).all()
+    assert (df.name_region == np.where(df.area_id < 2, "r0", "r1")).all()
+    assert set(df.region_names) == {"r1"}
+
+
+def test__indexed_queries(reader, tmp_path):
+    shutil.copy(reader.results_path / reader.record_name, tmp_path)
+    indexed = RecordReader(results_path=tmp_path)
+    index_record_tables(tmp_path / indexed.record_name, table_names=["infections"])
+    assert reader.get_indexed_columns("infections") == ()
+    assert set(indexed.get_indexed_columns("infections")) == {
+        "timestamp",
+        "location_specs",
+        "location_ids",
+        "region_names",
+        "infected_ids",
+        "infector_ids",
+    }
+    assert indexed.get_indexed_columns("population") == ()
+    where, condvars = RecordReader.build_condition(
+        start_date="2020-03-02", region_names="r1"
+    )
+    assert indexed.query_uses_indexes("infections", where, condvars)
+    assert not reader.query_uses_indexes("infections", where, condvars)
+    for kwargs in [
+        {"start_date": "2020-03-02", "end_date": "2020-03-03"},
+        {"region_names": "r1", "location_specs": ["school", "household"]},
+        {"end_date": "2020-03-04", "location_ids": 3},
+    ]:
+        expected = reader.query_infections(**kwargs)
+        assert len(expected) > 0
+        pd.testing.assert_frame_equal(indexed.query_infections(**kwargs), expected)
+    df = indexed.query_infections(start_date="2020-03-04", region_names="r0")
+    assert len(df) == 0
+    df = indexed.query_table("infections", index="infected_ids", location_ids=2)
+    assert set(df.timestamp) == {"2020-03-02"}
+
+
+def test__record_builds_indexes(tmp_path):
+    record = Record(record_path=tmp_path, index_tables=True)
+    with open_file(record.record_path / record.filename, mode="a") as f:
+        record.accumulate(
+            table_name="deaths",
+            location_spec="hospital",
+            location_id=3,
+            dead_person_id=7,
+        )
+        record.events["deaths"].record(f, timestamp=datetime.datetime(2020, 3, 1))
+    record.build_indexes()
+    reader = RecordReader(results_path=tmp_path)
+    assert "dead_person_ids" in reader.get_indexed_columns("deaths")
+    assert "timestamp" in reader.get_indexed_columns("symptoms")
+    df = reader.query_deaths(location_specs="hospital", location_ids=3)
+    assert list(df.index) == [7]
+    # appending after indexing keeps the indexes usable
+    with open_file(record.record_path / record.filename, mode="a") as f:
+        record.accumulate(
+            table_name="deaths",
+            location_spec="hospital",
+            location_id=3,
+            dead_person_id=8,
+        )
+        record.events["deaths"].record(f, timestamp=datetime.datetime(2020, 3, 2))
+    record.build_indexes()
+    df = reader.query_deaths(location_specs="hospital", location_ids=3)
+    assert list(df.index) == [7, 8]
@@ -0,0 +1,245 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from june import paths
+from june.demography import Person, Population
+from june.domains import DomainSplitter, SuperAreaCostProfile
+from june.domains.cost_profile import get_super_area_costs
+from june.epidemiology.epidemiology import Epidemiology
+from june.geography import Area, Areas, SuperArea, SuperAreas, Region, Regions
+from june.groups import Cemeteries, Household, Households
+from june.interaction import Interaction
+from june.mpi_setup import MovablePeople
+from june.policy import Policies
+from june.simulator import Simulator
+from june.world import World
+
+test_config = paths.configs_path / "tests/test_checkpoint_config.yaml"
+config_interaction = paths.configs_path / "tests/interaction.yaml"
+
+
+def create_world():
+    world = World()
+    areas, super_areas, people, households = [], [], Population(), []
+    for i in range(2):
+        area = Area(name=f"area_{i}")
+        super_area = SuperArea(areas=[area], name=f"super_area_{i}")
+        area.super_area = super_area
+        # the second super area has twice the people
+        for j in range(10 * (i + 1)):
+            person = Person.from_attributes(age=5 * j, sex="f")
+            person.area = area
+            area.people.append(person)
+            people.add(person)
+            household = Household(area=area)
+            household.add(person)
+            households.append(household)
+        areas.append(area)
+        super_areas.append(super_area)
+    region = Region(super_areas=super_areas)
+    for super_area in super_areas:
+        super_area.region = region
+    world.people = people
+    world.areas = Areas(areas, ball_tree=False)
+    world.super_areas = SuperAreas(super_areas, ball_tree=False)
+    world.regions = Regions([region])
+    world.households = Households(households)
+    world.cemeteries = Cemeteries()
+    return world
+
+
+def test__simulator_records_super_area_costs(selectors, tmp_path):
+    world = create_world()
+    cost_profile = SuperAreaCostProfile(save_path=tmp_path / "costs.csv")
+    sim = Simulator.from_file(
+        world=world,
+        interaction=Interaction.from_file(config_filename=config_interaction),
+        epidemiology=Epidemiology(infection_selectors=selectors),
+        config_filename=test_config,
+        leisure=None,
+        policies=Policies([]),
+        cost_profile=cost_profile,
+    )
+    sim.run()
+    costs = SuperAreaCostProfile.load(tmp_path / "costs.csv")
+    assert list(costs.index) == ["super_area_0", "super_area_1"]
+    assert (costs.interaction_time > 0).all()
+    # everyone stays at home, so people interact once per time step
+    n_time_steps = cost_profile.n_time_steps
+    assert n_time_steps > 0
+    assert costs.n_interactions.tolist() == [10 * n_time_steps, 20 * n_time_steps]
+    assert costs.n_people_moved.sum() == 0
+
+
+def test__people_going_abroad_are_counted_by_super_area():
+    world = create_world()
+    movable_people = MovablePeople()
+    external_subgroup = SimpleNamespace(
+        domain_id=1, spec="company", group_id=3, subgroup_type=0
+    )
+    for person in world.super_areas[1].areas[0].people[:4]:
+        movable_people.add_person(person, external_subgroup)
+    cost_profile = SuperAreaCostProfile()
+    cost_profile.add_people_going_abroad(movable_people, world.people)
+    df = cost_profile.to_df()
+    assert df.loc["super_area_1", "n_people_moved"] == 4
+    assert df.loc["super_area_1", "mpi_bytes"] >= 4 * 48
+    assert "super_area_0" not in df.index
+    with pytest.raises(ValueError):
+        cost_profile.save()
+
+
+@pytest.fixture(name="grid_paths")
+def make_grid(tmp_path):
+    """
+    6x4 grid of super areas, each adjacent to its 4 nearest neighbours.
+    """
+    names, xs, ys = [], [], []
+    for x in range(6):
+        for y in range(4):
+            names.append(f"sa_{x}_{y}")
+            xs.append(x)
+            ys.append(y)
+    adjacency = {
+        name: [
+            int(abs(xs[i] - xs[j]) + abs(ys[i] - ys[j]) == 1) for j in range(len(names))
+        ]
+        for i, name in enumerate(names)
+    }
+    centroids_path = tmp_path / "centroids.csv"
+    pd.DataFrame({"X": xs, "Y": ys}, index=names).to_csv(centroids_path)
+    adjacency_path = tmp_path / "adjacency.json"
+    with open(adjacency_path, "w") as f:
+        json.dump(adjacency, f)
+    super_area_data = {
+        name: {"n_people": 100, "n_workers": 0, "n_pupils": 0, "n_commuters": 10}
+        for name in names
+    }
+    return names, super_area_data, centroids_path, adjacency_path
+
+
+def test__cost_profile_changes_scores(grid_paths):
+    names, super_area_data, centroids_path, adjacency_path = grid_paths
+    cost_profile = pd.DataFrame(
+        {
+            "interaction_time": [1.0] * (len(names) - 1),
+            "n_interactions": 0,
+            "n_people_moved": 0,
+            "mpi_bytes": 0,
+        },
+        index=names[:-1],
+    )
+    # the first super area is measured to be five times slower
+    cost_profile.iloc[0, 0] = 5.0
+    splitter = DomainSplitter(
+        number_of_domains=2,
+        super_area_data=super_area_data,
+        super_area_centroids_path=centroids_path,
+        super_area_adjacency_graph_path=adjacency_path,
+        cost_profile=cost_profile,
+    )
+    scores = splitter.super_area_df["score"]
+    # profiled super areas keep the total of their static scores
+    assert scores.iloc[:-1].sum() == pytest.approx(510 * (len(names) - 1))
+    assert scores.iloc[0] == pytest.approx(5 * scores.iloc[1])
+    assert scores.iloc[-1] == 510
+    costs = get_super_area_costs(cost_profile)
+    assert costs.sum() == pytest.approx(1.0)
+
+
+def test__refined_split_balances_measured_costs(grid_paths):
+    names, super_area_data, centroids_path, adjacency_path = grid_paths
+    # columns x = 0 and 1 are measured to be four times slower than the rest
+    cost_profile = pd.DataFrame(
+        {
+            "interaction_time": [4.0 if name[3] in "01" else 1.0 for name in names],
+            "n_interactions": 0,
+            "n_people_moved": 0,
+            "mpi_bytes": 0,
+        },
+        index=names,
+    )
+    splitter = DomainSplitter(
+        number_of_domains=2,
+        super_area_data=super_area_data,
+        super_area_centroids_path=centroids_path,
+        super_area_adjacency_graph_path=adjacency_path,
+        cost_profile=cost_profile,
+    )
+    # the split a static score would give: three columns each
+    split = {
+        0: [name for name in names if name[3] in "012"],
+        1: [name for name in names if name[3] in "345"],
+    }
+    scores = splitter.super_area_df["score"]
+    loads = [scores.loc[super_areas].sum() for super_areas in split.values()]
+    refined_split = splitter.refine_domain_split(split)
+    refined_loads = [
+        scores.loc[super_areas].sum() for super_areas in refined_split.values()
+    ]
+    assert sorted(sum(refined_split.values(), [])) == sorted(names)
+    assert max(refined_loads) < max(loads)
+    assert max(refined_loads) / np.mean(refined_loads) < 1.1
+    # domains stay connected and the cut stays short
+    neighbours = splitter.get_neighbours()
+    for super_areas in refined_split.values():
+        to_visit, seen = [super_areas[0]], {super_areas[0]}
+        while to_visit:
+            for neighbour in neighbours[to_visit.pop()]:
+                if neighbour in super_areas and neighbour not in seen:
+                    seen.add(neighbour)
+                    to_visit.append(neighbour)
+        assert seen == set(super_areas)
+    assert splitter.get_cut_weight(refined_split) <= 2 * splitter.get_cut_weight(split)
+
+
+def test__generate_domain_split(grid_paths):
+    names, super_area_data, centroids_path, adjacency_path = grid_paths
+    splitter = DomainSplitter(
+        number_of_domains=3,
+        super_area_data=super_area_data,
+        super_area_centroids_path=centroids_path,
+        super_area_adjacency_graph_path=adjacency_path,
+    )
+    super_areas_per_domain, score_per_domain = splitter.generate_domain_split()
+    assert sorted(sum(super_areas_per_domain.values(), [])) == sorted(names)
+    assert sum(score_per_domain.values()) == pytest.approx(510 * len(names))
+
+
+def test__split_is_only_refined_for_cost_profiles(grid_paths, monkeypatch):
+    names, super_area_data, centroids_path, adjacency_path = grid_paths
+    refined = []
+    monkeypatch.setattr(
+        DomainSplitter,
+        "refine_domain_split",
+        lambda self, split: refined.append(split) or split,
+    )
+    cost_profile = pd.DataFrame(
+        {
+            "interaction_time": 1.0,
+            "n_interactions": 0,
+            "n_people_moved": 0,
+            "mpi_bytes": 0,
+        },
+        index=names,
+    )
+    for profile, refine, expected in (
+        (None, None, False),
+        (cost_profile, None, True),
+        (None, True, True),
+        (cost_profile, False, False),
+    ):
+        refined.clear()
+        splitter = DomainSplitter(
+            number_of_domains=2,
+            super_area_data=super_area_data,
+            super_area_centroids_path=centroids_path,
+            super_area_adjacency_graph_path=adjacency_path,
+            cost_profile=profile,
+        )
+        splitter.generate_domain_split(refine=refine)
+        assert bool(refined) is expected
@@ -0,0 +1,316 @@
+import time
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pytest
+
+import june.domains.domain_rebalancer as domain_rebalancer
+import june.epidemiology.epidemiology as epidemiology_module
+
+from june.demography import Person, Population
+from june.domains import DomainRebalancer, SuperAreaCostProfile
+from june.geography import Area, Areas, SuperArea, SuperAreas
+from june import paths
+from june.epidemiology.epidemiology import Epidemiology
+from june.groups import Cemeteries, Household, Households
+from june.interaction import Interaction
+from june.policy import Policies
+from june.simulator import Simulator
+from june.world import World
+
+
+def create_world(n_super_areas=2):
+    world = World()
+    areas, super_areas, people = [], [], Population()
+    for i in range(n_super_areas):
+        area = Area(name=f"area_{i}")
+        super_area = SuperArea(areas=[area], name=f"super_area_{i}")
+        super_area.id = i
+        area.super_area = super_area
+        for j in range(5 * (i + 1)):
+            person = Person.from_attributes(id=10 * i + j, age=10 * j)
+            person.area = area
+            area.people.append(person)
+            people.add(person)
+        areas.append(area)
+        super_areas.append(super_area)
+    world.people = people
+    world.areas = Areas(areas, ball_tree=False)
+    world.super_areas = SuperAreas(super_areas, ball_tree=False)
+    world.cemeteries = Cemeteries()
+    return world
+
+
+def make_rebalancer(world_path="world.hdf5"):
+    return DomainRebalancer(
+        world_path=world_path,
+        super_areas_to_domain_dict={0: 0, 1: 0},
+        simulator_factory=None,
+    )
+
+
+def test__people_states_are_restored(selector):
+    world = create_world()
+    infected = world.people.get_from_id(0)
+    selector.infect_person_at_time(infected, 0.0)
+    world.people.get_from_id(1).dead = True
+    world.people.get_from_id(2).vaccinated = 1
+    world.people.get_from_id(2).vaccine_type = "pfizer"
+    states = DomainRebalancer.get_people_states(world, {0: 0, 1: 0})
+    assert len(states[0]) == len(world.people)
+    people_states = DomainRebalancer.exchange_people_states(states)
+    new_world = create_world()
+    DomainRebalancer.restore_people_states(new_world, people_states)
+    person = new_world.people.get_from_id(0)
+    assert person.infected
+    assert person.infection is infected.infection
+    assert new_world.people.get_from_id(1).dead
+    assert new_world.people.get_from_id(1) in new_world.cemeteries[0].people
+    assert new_world.people.get_from_id(2).vaccine_type == "pfizer"
+    assert not new_world.people.get_from_id(3).infected
+
+
+def test__super_area_weights():
+    world = create_world()
+    weights = DomainRebalancer.get_super_area_weights(world)
+    assert weights == {0: 5.0, 1: 10.0}
+    cost_profile = SuperAreaCostProfile()
+    cost_profile.costs["super_area_0"][0] = 3.0
+    cost_profile.costs["super_area_1"][0] = 1.0
+    weights = DomainRebalancer.get_super_area_weights(world, cost_profile=cost_profile)
+    assert weights == {0: 3.0, 1: 1.0}
+
+
+def test__split_moves_super_areas_from_slow_ranks():
+    # 4x2 grid of super areas, columns 0-1 on rank 0 and 2-3 on rank 1
+    neighbours = {}
+    for x in range(4):
+        for y in range(2):
+            neighbours[2 * x + y] = {
+                2 * nx + ny
+                for nx, ny in [(x - 1, y), (x + 1, y), (x, 1 - y)]
+                if 0 <= nx < 4
+            }
+    super_areas_to_domain_dict = {
+        super_area: 0 if super_area < 4 else 1 for super_area in neighbours
+    }
+    weights = [
+        {super_area: 1.0 for super_area in range(4)},
+        {super_area: 1.0 for super_area in range(4, 8)},
+    ]
+    new_split = DomainRebalancer.compute_split(
+        super_areas_to_domain_dict,
+        rank_times=[3.0, 1.0],
+        super_area_weights_per_rank=weights,
+        neighbours=neighbours,
+    )
+    loads = [0.0, 0.0]
+    for super_area, domain_id in new_split.items():
+        loads[domain_id] += 0.75 if super_area < 4 else 0.25
+    assert max(loads) < 3.0
+    assert sorted(new_split) == sorted(super_areas_to_domain_dict)
+    # only super areas on the boundary between the ranks move
+    assert all(new_split[super_area] == 0 for super_area in (0, 1))
+    assert all(new_split[super_area] == 1 for super_area in range(4, 8))
+    # with the same times, the split stays the same
+    assert (
+        DomainRebalancer.compute_split(
+            super_areas_to_domain_dict,
+            rank_times=[1.0, 1.0],
+            super_area_weights_per_rank=weights,
+            neighbours=neighbours,
+        )
+        == super_areas_to_domain_dict
+    )
+
+
+def test__neighbours_from_world_file(tmp_path):
+    world_path = tmp_path / "world.hdf5"
+    with h5py.File(world_path, "w") as f:
+        geography = f.create_group("geography")
+        geography.create_dataset("super_area_id", data=np.arange(5))
+        geography.create_dataset(
+            "super_area_coordinates",
+            data=np.array([[51.0, x] for x in [0.0, 0.1, 0.3, 0.6, 1.0]]),
+        )
+    rebalancer = DomainRebalancer(
+        world_path=world_path,
+        super_areas_to_domain_dict={i: 0 for i in range(5)},
+        simulator_factory=None,
+        n_neighbours=1,
+    )
+    assert rebalancer.neighbours == {0: {1}, 1: {0, 2}, 2: {1, 3}, 3: {2, 4}, 4: {3}}
+
+
+def test__single_rank_is_not_rebalanced():
+    rebalancer = make_rebalancer()
+    rebalancer.add_timestep_time(1.0)
+    assert rebalancer.rebalance(simulator=None) is False
+    assert DomainRebalancer.get_imbalance([2.0, 1.0, 0.0]) == pytest.approx(2.0)
+    assert DomainRebalancer.get_imbalance([0.0, 0.0]) == 1.0
+
+
+def test__people_without_area_are_not_sent():
+    world = create_world()
+    person = Person.from_attributes(id=100)
+    world.people.add(person)
+    states = DomainRebalancer.get_people_states(world, {0: 0, 1: 0})
+    assert person.id not in states[0]
+    assert len(states[0]) == len(world.people) - 1
+
+
+class TwoRankComm:
+    """
+    Communicator of rank 0 of a run with two ranks, where rank 1 owns super
+    areas 1 and 2 and took three times longer.
+    """
+
+    def __init__(self):
+        self.sent = None
+
+    def allgather(self, obj):
+        return [obj, 3.0]
+
+    def gather(self, obj, root=0):
+        return [obj, {1: 1.0, 2: 1.0}]
+
+    def bcast(self, obj, root=0):
+        return obj
+
+    def alltoall(self, objs):
+        self.sent = list(objs)
+        return [None, {}]
+
+
+class RecordingPolicies:
+    def __init__(self):
+        self.n_resets = 0
+
+    def reset_population(self):
+        self.n_resets += 1
+
+
+def make_simulator(world, policies=None):
+    return SimpleNamespace(
+        world=world,
+        cost_profile=None,
+        timer="timer",
+        activity_manager=SimpleNamespace(
+            timer=None,
+            policies=SimpleNamespace(individual_policies=policies),
+        ),
+        interaction=object(),
+        epidemiology=object(),
+        events=object(),
+        tracker=object(),
+    )
+
+
+def test__rebalance_swaps_the_domain(tmp_path, monkeypatch, selector):
+    world_path = tmp_path / "world.hdf5"
+    with h5py.File(world_path, "w") as f:
+        geography = f.create_group("geography")
+        geography.create_dataset("super_area_id", data=np.arange(3))
+        geography.create_dataset(
+            "super_area_coordinates",
+            data=np.array([[51.0, x] for x in [0.0, 0.1, 0.2]]),
+        )
+    comm = TwoRankComm()
+    monkeypatch.setattr(domain_rebalancer, "mpi_size", 2)
+    monkeypatch.setattr(domain_rebalancer, "mpi_rank", 0)
+    monkeypatch.setattr(domain_rebalancer, "mpi_comm", comm)
+    loaded = []
+
+    def from_hdf5(**kwargs):
+        loaded.append(kwargs)
+        return create_world(n_super_areas=3)
+
+    monkeypatch.setattr(domain_rebalancer.Domain, "from_hdf5", from_hdf5)
+    built = []
+
+    def simulator_factory(domain):
+        built.append(make_simulator(domain, policies=RecordingPolicies()))
+        return built[-1]
+
+    rebalancer = DomainRebalancer(
+        world_path=world_path,
+        super_areas_to_domain_dict={0: 0, 1: 1, 2: 1},
+        simulator_factory=simulator_factory,
+        interaction_config="interaction.yaml",
+        n_neighbours=1,
+    )
+    world = create_world(n_super_areas=3)
+    selector.infect_person_at_time(world.people.get_from_id(0), 0.0)
+    simulator = make_simulator(world, policies=RecordingPolicies())
+    rebalancer.add_timestep_time(1.0)
+    assert rebalancer.rebalance(simulator) is True
+    new_split = {0: 0, 1: 0, 2: 1}
+    assert rebalancer.super_areas_to_domain_dict == new_split
+    assert rebalancer.n_rebalances == 1
+    assert loaded == [
+        {
+            "domain_id": 0,
+            "super_areas_to_domain_dict": new_split,
+            "hdf5_file_path": world_path,
+            "interaction_config": "interaction.yaml",
+        }
+    ]
+    # the people of super area 2 are sent to rank 1
+    assert set(comm.sent[1]) == {20 + j for j in range(15)}
+    # the simulator takes the parts of the one built for the new domain
+    (new_simulator,) = built
+    for attribute in domain_rebalancer.domain_dependent_attributes:
+        assert getattr(simulator, attribute) is getattr(new_simulator, attribute)
+    assert simulator.world is not world
+    assert simulator.world.people.get_from_id(0).infected
+    assert not simulator.world.people.get_from_id(1).infected
+    assert simulator.activity_manager.timer == "timer"
+    policies = simulator.activity_manager.policies.individual_policies
+    assert policies.n_resets == 1
+
+
+class SlowRankComm:
+    """
+    Communicator of a fast rank, which waits ``delay`` seconds in every
+    collective for a slower rank to catch up.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.waited = 0.0
+
+    def Allreduce(self, sendbuf, recvbuf, op=None):
+        time.sleep(self.delay)
+        self.waited += self.delay
+        recvbuf[:] = sendbuf
+
+
+def test__rank_time_excludes_waiting_for_other_ranks(selectors, monkeypatch):
+    world = create_world()
+    households = []
+    for person in world.people:
+        household = Household(area=person.area)
+        household.add(person)
+        households.append(household)
+    world.households = Households(households)
+    comm = SlowRankComm(delay=0.02)
+    monkeypatch.setattr(epidemiology_module, "mpi_size", 2)
+    monkeypatch.setattr(epidemiology_module, "mpi_comm", comm)
+    rebalancer = make_rebalancer()
+    sim = Simulator.from_file(
+        world=world,
+        interaction=Interaction.from_file(
+            config_filename=paths.configs_path / "tests/interaction.yaml"
+        ),
+        epidemiology=Epidemiology(infection_selectors=selectors),
+        config_filename=paths.configs_path / "tests/test_checkpoint_config.yaml",
+        leisure=None,
+        policies=Policies([]),
+        rebalancer=rebalancer,
+    )
+    sim.checkpoint_save_dates = ()
+    sim.run()
+    assert comm.waited > 0
+    # the local work of this small world takes much less than the waits
+    assert rebalancer.timestep_time < comm.waited / 2
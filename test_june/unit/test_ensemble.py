@@ -0,0 +1,161 @@
+import os
+
+import numpy as np
+import pytest
+
+from june import paths
+from june.demography import Person, Population
+from june.ensemble import EnsembleRunner, WorldSnapshot
+from june.epidemiology.epidemiology import Epidemiology
+from june.geography import Area, Areas, SuperArea, SuperAreas, Region, Regions
+from june.groups import Cemeteries, Household, Households
+from june.interaction import Interaction
+from june.policy import Policies
+from june.simulator import Simulator
+from june.utils.memory import get_unique_rss
+from june.world import World
+
+test_config = paths.configs_path / "tests/test_checkpoint_config.yaml"
+config_interaction = paths.configs_path / "tests/interaction.yaml"
+
+
+def create_world():
+    world = World()
+    area = Area(name="area_0")
+    super_area = SuperArea(areas=[area], name="super_area_0")
+    area.super_area = super_area
+    region = Region(super_areas=[super_area])
+    super_area.region = region
+    people, households = Population(), []
+    for i in range(10):
+        household = Household(area=area)
+        for j in range(5):
+            person = Person.from_attributes(age=10 * j, sex="f")
+            person.area = area
+            area.people.append(person)
+            people.add(person)
+            household.add(person)
+        households.append(household)
+    world.people = people
+    world.areas = Areas([area], ball_tree=False)
+    world.super_areas = SuperAreas([super_area], ball_tree=False)
+    world.regions = Regions([region])
+    world.households = Households(households)
+    world.cemeteries = Cemeteries()
+    return world
+
+
+def ever_infected(simulator):
+    return {
+        "n_ever_infected": sum(
+            bool(person.immunity.susceptibility_dict) or person.dead
+            for person in simulator.world.people
+        )
+    }
+
+
+@pytest.fixture(name="simulator_factory")
+def make_simulator_factory(selectors, tmp_path):
+    def simulator_factory(world, realisation):
+        simulator = Simulator.from_file(
+            world=world,
+            interaction=Interaction.from_file(config_filename=config_interaction),
+            epidemiology=Epidemiology(infection_selectors=selectors),
+            config_filename=test_config,
+            leisure=None,
+            policies=Policies([]),
+            checkpoint_save_path=tmp_path / f"checkpoints_{os.getpid()}",
+        )
+        people = list(world.people)
+        for index in np.random.choice(len(people), 3, replace=False):
+            selectors.infect_person_at_time(people[index], 0.0)
+        return simulator
+
+    return simulator_factory
+
+
+def swept_changed_people(snapshot):
+    """
+    Finds the people that changed by checking every person, to compare with
+    the people the snapshot kept track of.
+    """
+    return [
+        index
+        for index, person in enumerate(snapshot.people)
+        if index in snapshot.person_states
+        or person.infection is not None
+        or person.dead
+        or person.vaccine_trajectory is not None
+        or person.vaccinated is not None
+        or person.immunity.susceptibility_dict
+        or person.immunity.effective_multiplier_dict
+        or person.subgroups is not snapshot.subgroups[index]
+        or person.subgroups.medical_facility is not None
+    ]
+
+
+def test__snapshot_restores_people_and_groups(selector):
+    world = create_world()
+    snapshot = WorldSnapshot(world)
+    infected, dead = world.people[0], world.people[1]
+    household = dead.residence.group
+    selector.infect_person_at_time(infected, 0.0)
+    Epidemiology.bury_the_dead(world, dead)
+    world.regions[0].regional_compliance = 0.5
+    assert snapshot.changed_people() == [0, 1]
+    assert snapshot.restore() == 2
+    assert not infected.infected
+    assert not infected.immunity.susceptibility_dict
+    assert not dead.dead
+    assert dead.residence.group is household
+    assert dead in household.residents
+    assert len(world.cemeteries[0].people) == 0
+    assert world.regions[0].regional_compliance == 1
+    assert snapshot.changed_people() == []
+    assert swept_changed_people(snapshot) == []
+
+
+def test__snapshot_keeps_track_of_the_people_that_change(simulator_factory):
+    world = create_world()
+    snapshot = WorldSnapshot(world)
+    simulator = simulator_factory(world, {"seed": 1})
+    simulator.run()
+    changed = snapshot.changed_people()
+    assert len(changed) >= 3
+    assert changed == swept_changed_people(snapshot)
+    assert snapshot.restore() == len(changed)
+    assert swept_changed_people(snapshot) == []
+
+
+def test__realisations_are_reproducible(simulator_factory, tmp_path):
+    world = create_world()
+    runner = EnsembleRunner(
+        world=world,
+        simulator_factory=simulator_factory,
+        summary_function=ever_infected,
+        output_path=tmp_path / "ensemble.csv",
+    )
+    realisations = [{"seed": 1}, {"seed": 2}, {"seed": 1}]
+    summaries = runner.run(realisations)
+    assert summaries.seed.tolist() == [1, 2, 1]
+    assert summaries.n_ever_infected.min() >= 3
+    assert summaries.n_ever_infected[0] == summaries.n_ever_infected[2]
+    assert (tmp_path / "ensemble.csv").exists()
+    assert "unique_rss" in summaries
+    # the world is left as it was loaded
+    assert runner.snapshot.changed_people() == []
+    forked_runner = EnsembleRunner(
+        world=world,
+        simulator_factory=simulator_factory,
+        summary_function=ever_infected,
+        n_workers=2,
+    )
+    forked_summaries = forked_runner.run(realisations)
+    assert (
+        forked_summaries.n_ever_infected.tolist() == summaries.n_ever_infected.tolist()
+    )
+
+
+def test__unique_rss():
+    unique_rss = get_unique_rss()
+    assert unique_rss is None or unique_rss > 0
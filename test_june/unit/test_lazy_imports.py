@@ -0,0 +1,24 @@
+import subprocess
+import sys
+
+lazy_submodules = (
+    "june.distributors",
+    "june.hdf5_savers",
+    "june.simulator",
+    "june.tracker",
+)
+
+
+def test__heavy_subpackages_are_imported_when_used():
+    code = (
+        "import sys, june;"
+        f"print(*[name in sys.modules for name in {lazy_submodules}]);"
+        "print(june.distributors.SchoolDistributor.__name__,"
+        "june.distributors.HouseholdDistributor.__name__)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    imported, distributor_names = result.stdout.splitlines()[-2:]
+    assert imported.split() == ["False"] * len(lazy_submodules)
+    assert distributor_names.split() == ["SchoolDistributor", "HouseholdDistributor"]
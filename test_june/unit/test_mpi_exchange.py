@@ -0,0 +1,104 @@
+import logging
+
+import numpy as np
+
+from june.demography import Person, Population
+from june.epidemiology.infection import Covid19
+from june.mpi_setup import (
+    MovablePeople,
+    MovablePeopleExchange,
+    SerialComm,
+    launched_with_mpi,
+    mpi_comm,
+    mpi_launcher_variables,
+    mpi_size,
+    start_move_info,
+)
+from june.simulator import enable_mpi_debug, rank_logger
+from june.time import Timer
+from june.world import World
+
+
+def test__serial_runs_do_not_start_mpi(monkeypatch):
+    for variable in (*mpi_launcher_variables, "JUNE_USE_MPI"):
+        monkeypatch.delenv(variable, raising=False)
+    assert isinstance(mpi_comm, SerialComm)
+    assert mpi_size == 1
+    assert not launched_with_mpi()
+    monkeypatch.setenv("OMPI_COMM_WORLD_SIZE", "4")
+    assert launched_with_mpi()
+    monkeypatch.setenv("JUNE_USE_MPI", "0")
+    assert not launched_with_mpi()
+
+
+def test__serial_mpi_debug_log(tmp_path):
+    enable_mpi_debug(tmp_path)
+    (handler,) = rank_logger.handlers
+    try:
+        # logging is disabled in the tests, so the record is handled directly
+        handler.handle(logging.makeLogRecord({"msg": "rank message"}))
+    finally:
+        rank_logger.removeHandler(handler)
+        handler.close()
+    assert isinstance(handler, logging.FileHandler)
+    with open(tmp_path / "mpi.log") as f:
+        assert f.read() == "rank message\n"
+
+
+def test__serial_comm():
+    comm = SerialComm()
+    assert comm.bcast("a") == "a"
+    assert comm.gather("a") == comm.allgather("a") == ["a"]
+    total = np.empty(1, dtype=np.int64)
+    comm.Allreduce(np.array([3]), total)
+    assert total[0] == 3
+
+
+def test__move_info_to_own_rank():
+    request, received, n_sending, n_receiving = start_move_info(
+        [np.array([3, 4], dtype=np.uint32)]
+    )
+    request.Wait()
+    assert received.tolist() == [3, 4]
+    assert n_sending == n_receiving == 2
+
+
+def test__move_info_packs_fields_in_rows():
+    request, received, n_sending, n_receiving = start_move_info(
+        [np.array([[3, 30], [4, 40]], dtype=np.uint32)]
+    )
+    request.Wait()
+    assert received.tolist() == [[3, 30], [4, 40]]
+    assert n_sending == n_receiving == 2
+
+
+def test__people_exchange_without_people_abroad():
+    for movable_people in (MovablePeople(), None):
+        exchange = MovablePeopleExchange(movable_people)
+        assert exchange.groups_from_abroad == set()
+        assert exchange.progress()
+        assert exchange.finish() == ({}, 0, 0)
+
+
+def test__infections_from_other_domains(epidemiology):
+    world = World()
+    people = [Person.from_attributes(age=30) for _ in range(2)]
+    world.people = Population(people)
+    timer = Timer()
+    request, infections, _, _ = start_move_info(
+        [np.array([[people[1].id, Covid19.infection_id()]], dtype=np.uint32)]
+    )
+    infected_people = epidemiology.finish_telling_domains_to_infect(
+        world=world, timer=timer, infection_exchange=(request, infections, 2, 0.0)
+    )
+    assert infected_people == [people[1]]
+    assert people[1].infected
+    assert not people[0].infected
+    # nothing is exchanged in a single process
+    assert epidemiology.start_telling_domains_to_infect({}) is None
+    assert (
+        epidemiology.tell_domains_to_infect(
+            world=world, timer=timer, infect_in_domains={}
+        )
+        == []
+    )
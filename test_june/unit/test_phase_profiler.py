@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from june import paths
+from june.demography import Person, Population
+from june.epidemiology.epidemiology import Epidemiology
+from june.geography import Area, Areas, SuperArea, SuperAreas, Region, Regions
+from june.groups import Cemeteries, Household, Households
+from june.interaction import Interaction
+from june.policy import Policies
+from june.simulator import Simulator
+from june.utils.profiler import PhaseProfiler, get_phase_report, phase_columns
+from june.utils.rank_csv import gather_rank_dfs, save_gathered_csv
+from june.world import World
+
+test_config = paths.configs_path / "tests/test_checkpoint_config.yaml"
+config_interaction = paths.configs_path / "tests/interaction.yaml"
+
+
+def create_world():
+    world = World()
+    area = Area(name="area_0")
+    super_area = SuperArea(areas=[area], name="super_area_0")
+    area.super_area = super_area
+    region = Region(super_areas=[super_area])
+    super_area.region = region
+    people, households = Population(), []
+    for i in range(30):
+        person = Person.from_attributes(age=i, sex="f")
+        person.area = area
+        area.people.append(person)
+        people.add(person)
+        household = Household(area=area)
+        household.add(person)
+        households.append(household)
+    world.people = people
+    world.areas = Areas([area], ball_tree=False)
+    world.super_areas = SuperAreas([super_area], ball_tree=False)
+    world.regions = Regions([region])
+    world.households = Households(households)
+    world.cemeteries = Cemeteries()
+    return world
+
+
+def test__profiler_buffer_grows():
+    profiler = PhaseProfiler(initial_time_steps=2)
+    for time_step in range(5):
+        profiler.add_time("interaction", 0.5)
+        profiler.add_time("interaction", 0.25)
+        profiler.add_count("n_infections", time_step)
+        profiler.time_step(time_step / 2)
+    df = profiler.to_df()
+    assert len(df) == 5
+    assert df.time_step.tolist() == list(range(5))
+    assert df.time.tolist() == [0, 0.5, 1, 1.5, 2]
+    assert df.interaction.tolist() == [0.75] * 5
+    assert df.n_infections.tolist() == list(range(5))
+    assert (df.epidemiology == 0).all()
+
+
+def test__simulator_saves_phase_timeline(selectors, tmp_path):
+    phase_profiler = PhaseProfiler(save_path=tmp_path / "phases.csv")
+    sim = Simulator.from_file(
+        world=create_world(),
+        interaction=Interaction.from_file(config_filename=config_interaction),
+        epidemiology=Epidemiology(infection_selectors=selectors),
+        config_filename=test_config,
+        leisure=None,
+        policies=Policies([]),
+        phase_profiler=phase_profiler,
+    )
+    sim.run()
+    timeline = PhaseProfiler.load(tmp_path / "phases.csv")
+    assert len(timeline) == phase_profiler.n_time_steps > 0
+    assert (timeline["rank"] == 0).all()
+    assert (timeline.interaction > 0).all()
+    assert (timeline.timestep >= timeline.interaction).all()
+    # everyone stays at home, one household per person
+    assert (timeline.n_groups == 30).all()
+    assert (timeline.n_people == 30).all()
+    assert (timeline.n_people_moved == 0).all()
+    assert (timeline.mpi_bytes == 0).all()
+
+
+def test__gathered_csv(tmp_path):
+    df = pd.DataFrame({"a": [2, 1]}, index=["y", "x"])
+    gathered = []
+
+    def gather():
+        gathered.append(df)
+        return gather_rank_dfs(df, combine=lambda dfs: pd.concat(dfs).sort_index())
+
+    with pytest.raises(ValueError, match="phase timeline"):
+        save_gathered_csv(gather, None, name="phase timeline")
+    # ranks do not start gathering if they cannot save
+    assert not gathered
+    saved = save_gathered_csv(gather, tmp_path / "profiles/a.csv", name="a")
+    assert saved.a.tolist() == [1, 2]
+    loaded = pd.read_csv(tmp_path / "profiles/a.csv", index_col=0)
+    assert loaded.index.tolist() == ["x", "y"]
+
+
+def test__phase_report_flags_imbalance():
+    timeline = pd.DataFrame(
+        {
+            "rank": [0, 1, 0, 1],
+            "time_step": [0, 0, 1, 1],
+            "interaction": [1.0, 3.0, 1.0, 3.0],
+            "epidemiology": [1.0, 1.0, 2.0, 2.0],
+        }
+    )
+    report = get_phase_report(timeline, phases=["interaction", "epidemiology"])
+    assert report.critical_path.tolist() == [6.0, 3.0]
+    assert report.imbalance.tolist() == pytest.approx([0.5, 0.0])
+    assert report.slowest_rank.interaction == 1
+    assert report.imbalanced.tolist() == [True, False]
+    assert set(phase_columns) >= set(report.index)